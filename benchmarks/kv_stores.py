@@ -0,0 +1,125 @@
+"""Insert latency and concurrent readers: JSON vs SQLite KV stores
+
+Usage: python benchmarks/kv_stores.py [--records 5000] [--batch 50] [--readers 1 4 8]
+
+The writer upserts ``--records`` chunk-sized values in batches, committing
+each batch with ``index_done_callback`` (one batch ~ one indexed file).
+While it writes, reader processes look up random committed keys. A JSON
+reader has to re-read the whole file to see new data and can catch it
+half-written; an SQLite reader queries the last committed snapshot.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from lightrag.kg.json_kv_impl import JsonKVStorage
+from lightrag.kg.shared_storage import initialize_share_data
+
+from repowiki.storage.sqlite_kv import SQLiteKVStorage
+
+STORES = {"json": JsonKVStorage, "sqlite": SQLiteKVStorage}
+
+
+async def open_store(cls, working_dir: str):
+    storage = cls(
+        namespace="text_chunks",
+        workspace="bench",
+        global_config={"working_dir": working_dir},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return storage
+
+
+def reader(kind: str, working_dir: str, stop, counters):
+    """Look up random keys until ``stop`` is set; count reads and errors"""
+    reads = errors = 0
+    path = os.path.join(working_dir, "bench", "kv_store_text_chunks.json")
+
+    async def run():
+        nonlocal reads, errors
+        storage = await open_store(SQLiteKVStorage, working_dir) if kind == "sqlite" else None
+        while not stop.is_set():
+            key = f"chunk-{random.randrange(1000)}"
+            try:
+                if storage is not None:
+                    await storage.get_by_id(key)
+                else:
+                    with open(path, encoding="utf-8") as f:
+                        json.load(f).get(key)
+                reads += 1
+            except Exception:
+                errors += 1
+
+    asyncio.run(run())
+    counters.put((reads, errors))
+
+
+async def write(kind: str, working_dir: str, records: int, batch: int) -> list:
+    initialize_share_data()
+    storage = await open_store(STORES[kind], working_dir)
+    latencies = []
+    for start in range(0, records, batch):
+        data = {
+            f"chunk-{i}": {"content": "x" * 1000, "full_doc_id": f"doc-{i // batch}"}
+            for i in range(start, min(start + batch, records))
+        }
+        started = time.perf_counter()
+        await storage.upsert(data)
+        await storage.index_done_callback()
+        latencies.append((time.perf_counter() - started) * 1000)
+    await storage.finalize()
+    return latencies
+
+
+def run(kind: str, records: int, batch: int, readers: int):
+    working_dir = tempfile.mkdtemp(prefix=f"kv-{kind}-")
+    # Seed the keys readers look up
+    asyncio.run(write(kind, working_dir, 1000, batch))
+
+    stop, counters = mp.Event(), mp.Queue()
+    procs = [
+        mp.Process(target=reader, args=(kind, working_dir, stop, counters))
+        for _ in range(readers)
+    ]
+    for p in procs:
+        p.start()
+    started = time.perf_counter()
+    latencies = asyncio.run(write(kind, working_dir, records, batch))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    results = [counters.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    reads = sum(r for r, _ in results)
+    errors = sum(e for _, e in results)
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(
+        f"  {kind:<7} {readers:>7} {statistics.mean(latencies):>9.2f} {p95:>9.2f} "
+        f"{reads / elapsed:>10.0f} {errors:>7}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{args.records} records of 1 KB, {args.batch} per committed batch")
+    print(f"  {'store':<7} {'readers':>7} {'ms/batch':>9} {'p95 ms':>9} {'reads/s':>10} {'errors':>7}")
+    for readers in args.readers:
+        for kind in STORES:
+            run(kind, args.records, args.batch, readers)
+
+
+if __name__ == "__main__":
+    main()
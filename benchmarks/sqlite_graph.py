@@ -0,0 +1,94 @@
+"""Peak RSS of building and querying a graph: NetworkX vs SQLite graph storage
+
+Usage: python benchmarks/sqlite_graph.py [--nodes 5000 20000] [--stores networkx sqlite]
+
+Each run happens in a fresh process. It inserts ``--nodes`` entities with
+chunk-sized descriptions and ``--degree`` random edges per node, flushing
+every ``--batch`` nodes (one batch ~ one indexed file). Then it reads every
+node's neighbours once. It reports the peak RSS of that process,
+minus the RSS after imports, so interpreter and library overhead cancel out.
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import random
+import resource
+import sys
+import tempfile
+import time
+
+STORES = ("networkx", "sqlite")
+
+
+def rss_mb() -> float:
+    """Peak RSS of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def build(kind: str, nodes: int, degree: int, batch: int, results):
+    from lightrag.kg.networkx_impl import NetworkXStorage
+    from lightrag.kg.shared_storage import initialize_share_data
+
+    from repowiki.storage.sqlite_graph import SQLiteGraphStorage
+
+    baseline = rss_mb()
+    cls = SQLiteGraphStorage if kind == "sqlite" else NetworkXStorage
+    rng = random.Random(0)
+
+    async def run():
+        initialize_share_data()
+        storage = cls(
+            namespace="chunk_entity_relation",
+            workspace="bench",
+            global_config={"working_dir": tempfile.mkdtemp(prefix=f"graph-{kind}-")},
+            embedding_func=None,
+        )
+        await storage.initialize()
+        started = time.perf_counter()
+        for i in range(nodes):
+            await storage.upsert_node(f"entity-{i}", {
+                "entity_id": f"entity-{i}", "entity_type": "function",
+                "description": "x" * 500, "source_id": f"chunk-{i // 10}",
+            })
+            for _ in range(degree if i else 0):
+                target = f"entity-{rng.randrange(i)}"
+                await storage.upsert_edge(f"entity-{i}", target, {
+                    "weight": 1.0, "description": "y" * 200, "source_id": f"chunk-{i // 10}",
+                })
+            if (i + 1) % batch == 0:
+                await storage.index_done_callback()
+        await storage.index_done_callback()
+        written = time.perf_counter() - started
+        for i in range(nodes):
+            await storage.get_node_edges(f"entity-{i}")
+        await storage.finalize()
+        return written, time.perf_counter() - started - written
+
+    written, read = asyncio.run(run())
+    results.put((rss_mb() - baseline, written, read))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=200)
+    # NetworkX rewrites the GraphML file on every flush, so it is slow past ~20k nodes
+    parser.add_argument("--stores", nargs="+", choices=STORES, default=list(STORES))
+    args = parser.parse_args()
+
+    print(f"{args.degree} edges per node, flushed every {args.batch} nodes")
+    print(f"  {'store':<9} {'nodes':>8} {'peak MB':>9} {'write s':>9} {'read s':>8}")
+    for nodes in args.nodes:
+        for kind in args.stores:
+            results = mp.Queue()
+            proc = mp.Process(target=build, args=(kind, nodes, args.degree, args.batch, results))
+            proc.start()
+            peak, written, read = results.get()
+            proc.join()
+            print(f"  {kind:<9} {nodes:>8} {peak:>9.1f} {written:>9.1f} {read:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Recall vs latency of the IVF-flat index against an exact scan
+
+Usage: python benchmarks/vector_ann.py [--sizes 10000 50000] [--dim 1536]
+
+Generates clustered unit vectors (embeddings of a code base cluster by
+module and topic), queries with perturbed members and reports recall@k
+and per-query latency for the exact scan and several ``nprobe`` values.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from repowiki.storage.ann import IVFFlatIndex, exact_search, normalize
+
+
+def clustered_vectors(n: int, dim: int, rng) -> np.ndarray:
+    centers = normalize(rng.normal(size=(max(1, n // 200), dim)))
+    members = centers[rng.integers(0, len(centers), n)]
+    return normalize(members + 0.05 * rng.normal(size=(n, dim)).astype(np.float32))
+
+
+def timed(fn, queries):
+    started = time.perf_counter()
+    results = [fn(q)[0] for q in queries]
+    return results, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=40)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        matrix = clustered_vectors(n, args.dim, rng)
+        slots = np.arange(n)
+        queries = normalize(
+            matrix[rng.integers(0, n, args.queries)]
+            + 0.05 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+        )
+
+        started = time.perf_counter()
+        index = IVFFlatIndex()
+        index.train(matrix, slots)
+        train_s = time.perf_counter() - started
+
+        exact, exact_ms = timed(
+            lambda q: exact_search(matrix, slots, q, args.top_k), queries
+        )
+        print(f"\nn={n} dim={args.dim} nlist={index.nlist} (trained in {train_s:.1f}s)")
+        print(f"  {'method':<12} {'recall@' + str(args.top_k):>10} {'ms/query':>10}")
+        print(f"  {'exact':<12} {1.0:>10.3f} {exact_ms:>10.2f}")
+        for nprobe in args.nprobe:
+            approx, ms = timed(
+                lambda q: index.search(matrix, q, args.top_k, nprobe), queries
+            )
+            recall = np.mean([
+                len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact)
+            ])
+            print(f"  {'nprobe=' + str(nprobe):<12} {recall:>10.3f} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
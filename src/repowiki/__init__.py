@@ -12,8 +12,23 @@ __version__ = "0.1.0"
 __author__ = "LightRAG Contributors"
 
 from .config import Config
-from .indexer import RepositoryIndexer
-from .generator import WikiGenerator
+
+# The indexer and generator pull in LightRAG and numpy, so they are only
+# imported when first accessed (keeps ``repowiki --help`` fast)
+_LAZY = {
+    "RepositoryIndexer": ".indexer",
+    "WikiGenerator": ".generator",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     "Config",
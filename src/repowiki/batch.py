@@ -0,0 +1,186 @@
+"""Batch mode - index and generate wikis for many repositories in one process
+
+``repowiki batch repos.txt`` runs the equivalent of ``repowiki all`` for
+every repository in the list. Imports and model clients are set up once,
+and all repositories share one ``SharedClients``, so a single concurrency
+budget and rate limit cover the whole batch. Up to ``batch_parallel_repos``
+repositories are in flight at a time. Their model calls are served
+round-robin, so one large repository doesn't hold up the rest.
+
+LightRAG keeps storage data and its pipeline status in process-wide
+namespaces, keyed by workspace. Each repository therefore gets its own
+workspace (its name), and only one repository inserts documents at a
+time; generation runs concurrently.
+"""
+import asyncio
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .clients import RepoUsage, SharedClients
+from .config import Config
+from .scheduler import format_duration
+
+
+def read_repo_list(path: Path) -> List[Path]:
+    """Repository paths, one per line; blank lines and ``#`` comments are skipped
+
+    Relative paths are relative to the list file.
+    """
+    path = Path(path)
+    repos = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            repo = Path(line).expanduser()
+            repos.append(repo if repo.is_absolute() else path.parent / repo)
+    return repos
+
+
+def repo_configs(
+    repos: List[Path],
+    working_root: Optional[Path] = None,
+    output_root: Optional[Path] = None,
+    **overrides,
+) -> List[Config]:
+    """One config per repository
+
+    Storage and output go to ``<repo>/repowiki_storage`` and
+    ``<repo>/wiki_docs``, as if ``repowiki all`` ran in the repository,
+    or to ``<root>/<name>`` when roots are given. Names are made unique
+    and double as the LightRAG workspace, so no two repositories share
+    in-process storage data.
+    """
+    configs = []
+    seen: Dict[str, int] = {}
+    for repo in repos:
+        name = Path(repo).resolve().name
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}-{seen[name]}"
+        configs.append(Config.from_env(**{
+            **overrides,
+            "repo_path": Path(repo),
+            "repo_name": name,
+            "workspace": name,
+            "working_dir": working_root / name if working_root else Path(repo) / "repowiki_storage",
+            "output_dir": output_root / name if output_root else Path(repo) / "wiki_docs",
+        }))
+    return configs
+
+
+@dataclass
+class RepoResult:
+    """Outcome of one repository in a batch"""
+
+    name: str
+    status: str = "pending"  # "ok", "failed" or "pending"
+    seconds: float = 0.0
+    indexed: int = 0
+    pages: int = 0
+    reused: int = 0
+    error: str = ""
+    usage: RepoUsage = field(default_factory=RepoUsage)
+
+
+def print_batch_report(results: List[RepoResult], seconds: float):
+    """Per-repository time, files, pages, model usage and cache hits"""
+    headers = ["Repo", "Status", "Time", "Files", "Pages", "LLM calls", "~Tokens", "Cache hits"]
+    rows = [
+        [r.name, r.status, format_duration(r.seconds), str(r.indexed),
+         f"{r.pages} ({r.reused} kept)", str(r.usage.llm_calls), f"{r.usage.tokens:,}",
+         f"{r.usage.cache_hits} ({r.usage.llm_cache_hits} LLM)"]
+        for r in results
+    ]
+    rows.append([
+        "TOTAL", f"{sum(r.status == 'ok' for r in results)}/{len(results)} ok",
+        format_duration(seconds),
+        str(sum(r.indexed for r in results)), str(sum(r.pages for r in results)),
+        str(sum(r.usage.llm_calls for r in results)),
+        f"{sum(r.usage.tokens for r in results):,}",
+        str(sum(r.usage.cache_hits for r in results)),
+    ])
+    widths = [max(len(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+    print("\n📊 " + "  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("   " + "  ".join(cell.ljust(w) for cell, w in zip(row, widths)))
+    for r in results:
+        if r.error:
+            print(f"❌ {r.name}: {r.error}")
+
+
+class BatchRunner:
+    """Runs index and generate for many repositories with shared clients"""
+
+    def __init__(
+        self,
+        configs: List[Config],
+        clients: Optional[SharedClients] = None,
+        parallel_repos: int = 4,
+        extended: bool = False,
+        force: bool = False,
+    ):
+        self.configs = configs
+        self.clients = clients or SharedClients()
+        self.parallel_repos = max(1, parallel_repos)
+        self.extended = extended
+        self.force = force
+        self.results = [RepoResult(config.repo_name) for config in configs]
+        # LightRAG's pipeline status is global: a second concurrent insert
+        # returns at once, leaving its documents unprocessed
+        self.index_lock = asyncio.Lock()
+
+    async def run_repo(self, config: Config, result: RepoResult):
+        from .session import WikiSession
+
+        started = time.perf_counter()
+        print(f"\n📦 [{result.name}] starting ({config.repo_path})")
+        session = None
+        try:
+            # Indexing and generation share one LightRAG instance
+            session = WikiSession(config, extended=self.extended, force=self.force, clients=self.clients)
+            async with self.index_lock:
+                result.indexed, _, _ = await session.index()
+            if not result.indexed:
+                raise RuntimeError("no files indexed")
+            await session.generate()
+            result.pages = len(session.generator.generated_pages)
+            result.reused = session.generator.reused_pages
+            result.status = "ok"
+        except Exception as e:
+            result.status, result.error = "failed", f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            # Release each repository's storages so memory stays flat over the batch
+            if session is not None:
+                try:
+                    await session.close()
+                except Exception as e:
+                    print(f"⚠️  [{result.name}] error closing storages: {e}")
+            result.seconds = time.perf_counter() - started
+            result.usage = self.clients.usage_of(config.repo_name)
+            if session is not None:
+                # Calls answered by the caches shared across repositories
+                session.metrics.inc("cache_hits", result.usage.llm_cache_hits, cache="shared_llm")
+                session.metrics.inc(
+                    "cache_hits", result.usage.embedding_cache_hits, cache="shared_embedding"
+                )
+                session.metrics.write(Path(config.working_dir) / config.workspace)
+            print(f"📦 [{result.name}] {result.status} in {format_duration(result.seconds)}")
+
+    async def run(self) -> List[RepoResult]:
+        """Process every repository, ``parallel_repos`` at a time, in list order"""
+        started = time.perf_counter()
+        pending = list(zip(self.configs, self.results))
+        pending.reverse()
+
+        async def worker():
+            while pending:
+                config, result = pending.pop()
+                await self.run_repo(config, result)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.parallel_repos, len(pending)))))
+        print_batch_report(self.results, time.perf_counter() - started)
+        return self.results
@@ -0,0 +1,244 @@
+"""Entity canonicalization - merges name variants of the same symbol into one node"""
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .config import Config
+
+# Words the LLM tacks onto symbol names ("Config class", "the indexer module")
+GENERIC_WORDS = {
+    "the", "class", "function", "method", "module", "package", "object",
+    "instance", "dataclass", "file", "script", "library",
+}
+FILE_SUFFIX = re.compile(r"\.(py|md|txt|toml|json|ya?ml|cfg|ini|sh)$", re.IGNORECASE)
+QUALIFIED = re.compile(r"^[A-Za-z_]\w*((\.|::)[A-Za-z_]\w*)+$")
+
+# Same-block groups whose entity embeddings are at least this similar are merged
+SIMILARITY_THRESHOLD = float(os.getenv("CANONICALIZE_SIMILARITY", "0.85"))
+ALIAS_FILE = "entity_aliases.json"
+
+
+def exact_name(name: str) -> str:
+    """An entity name without quotes and call parentheses; case is kept"""
+    text = name.strip().strip("`'\"").strip()
+    return text[:-2] if text.endswith("()") else text
+
+
+def qualified_tail(name: str) -> Optional[str]:
+    """Last component of a qualified name (``config.Config`` -> ``Config``), else None"""
+    if QUALIFIED.match(name) and not FILE_SUFFIX.search(name):
+        return re.split(r"\.|::", name)[-1]
+    return None
+
+
+def normalize_name(name: str, repo_name: Optional[str] = None) -> str:
+    """Case-, quote- and filler-insensitive form of an entity name"""
+    text = exact_name(name)
+    if FILE_SUFFIX.search(text):
+        return text.lower().replace("\\", "/")
+    words = text.lower().split()
+    if repo_name and len(words) > 1 and words[0] == repo_name.lower():
+        words = words[1:]
+    kept = [w for w in words if w not in GENERIC_WORDS]
+    return " ".join(kept or words)
+
+
+def block_key(normalized: str) -> str:
+    """Last component of a qualified path (``config.Config`` -> ``config``)"""
+    if QUALIFIED.match(normalized) and not FILE_SUFFIX.search(normalized):
+        return re.split(r"\.|::", normalized)[-1]
+    return normalized
+
+
+class _UnionFind:
+    def __init__(self, items: Iterable[str]):
+        self.parent = {item: item for item in items}
+
+    def find(self, item: str) -> str:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: str, b: str):
+        self.parent[self.find(a)] = self.find(b)
+
+    def groups(self) -> List[List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return [g for g in groups.values() if len(g) > 1]
+
+
+@dataclass
+class CanonicalizationReport:
+    """Result of a canonicalization pass"""
+
+    groups: Dict[str, List[str]] = field(default_factory=dict)  # canonical -> aliases
+    nodes_before: int = 0
+    nodes_after: int = 0
+    edges_before: int = 0
+    edges_after: int = 0
+    vector_bytes_before: int = 0
+    vector_bytes_after: int = 0
+
+    @property
+    def aliases_merged(self) -> int:
+        return sum(len(aliases) for aliases in self.groups.values())
+
+    def print_summary(self, dry_run: bool = False):
+        verb = "Would merge" if dry_run else "Merged"
+        print(f"🧬 {verb} {self.aliases_merged} entity aliases into {len(self.groups)} canonical entities")
+        print(f"   Nodes: {self.nodes_before} → {self.nodes_after}, "
+              f"edges: {self.edges_before} → {self.edges_after}")
+        if not dry_run:
+            saved = self.vector_bytes_before - self.vector_bytes_after
+            print(f"   Entity/relation vectors: {self.vector_bytes_before / 1024:.1f} KiB → "
+                  f"{self.vector_bytes_after / 1024:.1f} KiB ({saved / 1024:.1f} KiB saved)")
+
+
+class EntityCanonicalizer:
+    """Groups entity name variants and merges each group into one node
+
+    Only names that differ by decoration (quotes, ``()``) or by
+    qualification are merged without a check, and only when unambiguous:
+    ``config.Config`` joins ``Config`` if no other qualified ``*.Config``
+    exists. Names that merely match after lowercasing and dropping filler
+    words (``Indexer`` vs ``indexer file``) or share the last component
+    of a qualified path form candidate blocks, and are merged only when
+    their entity embeddings agree (``SIMILARITY_THRESHOLD``). Each group collapses onto its best-connected member
+    via LightRAG's ``amerge_entities``, which rewires relations, merges
+    descriptions and source chunks and updates the vector stores. Merged
+    names are recorded in ``entity_aliases.json`` in the workspace.
+    """
+
+    def __init__(self, rag, config: Config):
+        self.rag = rag
+        self.config = config
+        self.workspace_dir = Path(config.working_dir) / config.workspace
+
+    @property
+    def alias_path(self) -> Path:
+        return self.workspace_dir / ALIAS_FILE
+
+    def load_aliases(self) -> Dict[str, str]:
+        if self.alias_path.exists():
+            return json.loads(self.alias_path.read_text(encoding="utf-8"))
+        return {}
+
+    def _save_aliases(self, aliases: Dict[str, str]):
+        tmp = self.alias_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(aliases, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.alias_path)
+
+    def _vector_bytes(self) -> int:
+        return sum(
+            f.stat().st_size for f in self.workspace_dir.glob("vdb_*")
+            if f.is_file() and ("entities" in f.name or "relationships" in f.name)
+        )
+
+    async def _vectors(self, names: List[str]) -> Dict[str, np.ndarray]:
+        from lightrag.utils import compute_mdhash_id
+
+        ids = {compute_mdhash_id(name, prefix="ent-"): name for name in names}
+        found = await self.rag.entities_vdb.get_vectors_by_ids(list(ids))
+        vectors = {}
+        for vid, vector in found.items():
+            vector = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vectors[ids[vid]] = vector / norm
+        return vectors
+
+    async def find_groups(self, names: List[str]) -> List[List[str]]:
+        """Groups (of two or more names) that denote the same entity"""
+        union = _UnionFind(names)
+        # Same name up to quotes and "()": always the same entity
+        by_exact: Dict[str, List[str]] = {}
+        for name in names:
+            by_exact.setdefault(exact_name(name), []).append(name)
+        for members in by_exact.values():
+            for other in members[1:]:
+                union.union(other, members[0])
+
+        # A bare name and its only qualified form
+        qualified: Dict[str, List[str]] = {}
+        for exact in by_exact:
+            tail = qualified_tail(exact)
+            if tail is not None:
+                qualified.setdefault(tail, []).append(exact)
+        for tail, forms in qualified.items():
+            if tail in by_exact and len(forms) == 1:
+                union.union(by_exact[forms[0]][0], by_exact[tail][0])
+
+        # Case, filler-word and shared-tail matches need their embeddings to agree
+        blocks: Dict[str, List[str]] = {}
+        for exact, members in by_exact.items():
+            key = block_key(normalize_name(exact, self.config.repo_name))
+            blocks.setdefault(key, []).append(members[0])
+        candidates = [reps for reps in blocks.values() if len(reps) > 1]
+        if candidates:
+            vectors = await self._vectors([n for reps in candidates for n in reps])
+            for reps in candidates:
+                reps = [r for r in reps if r in vectors]
+                for i, a in enumerate(reps):
+                    for b in reps[i + 1:]:
+                        if union.find(a) == union.find(b):
+                            continue
+                        if float(vectors[a] @ vectors[b]) >= SIMILARITY_THRESHOLD:
+                            union.union(b, a)
+        return union.groups()
+
+    async def run(self, dry_run: bool = False) -> CanonicalizationReport:
+        graph = self.rag.chunk_entity_relation_graph
+        names = await graph.get_all_labels()
+        report = CanonicalizationReport(
+            nodes_before=len(names),
+            edges_before=len(await graph.get_all_edges()),
+            vector_bytes_before=self._vector_bytes(),
+        )
+
+        groups = await self.find_groups(names)
+        degrees = await graph.node_degrees_batch([n for g in groups for n in g])
+        aliases = self.load_aliases()
+        for group in groups:
+            # Best-connected name wins; shorter names break ties
+            group.sort(key=lambda n: (-degrees.get(n, 0), len(n), n))
+            canonical, others = group[0], group[1:]
+            report.groups[canonical] = others
+            if dry_run:
+                continue
+            await self.rag.amerge_entities(
+                source_entities=group,
+                target_entity=canonical,
+                merge_strategy={
+                    "description": "join_unique",
+                    "file_path": "join_unique",
+                    "source_id": "join_unique",
+                    "entity_type": "keep_first",
+                },
+            )
+            for alias in others:
+                aliases[alias] = canonical
+            # Earlier aliases of a now-merged name follow it
+            for alias, target in aliases.items():
+                if target in others:
+                    aliases[alias] = canonical
+
+        if dry_run:
+            report.nodes_after = report.nodes_before - report.aliases_merged
+            report.edges_after = report.edges_before
+            report.vector_bytes_after = report.vector_bytes_before
+            return report
+
+        if groups:
+            self._save_aliases(aliases)
+        report.nodes_after = len(await graph.get_all_labels())
+        report.edges_after = len(await graph.get_all_edges())
+        report.vector_bytes_after = self._vector_bytes()
+        return report
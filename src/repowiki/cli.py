@@ -5,12 +5,12 @@ from pathlib import Path
 from typing import Optional
 
 from .config import Config
-from .indexer import RepositoryIndexer
-from .generator import WikiGenerator
 
 
 async def run_index(config: Config):
     """Run the indexing step"""
+    from .indexer import RepositoryIndexer
+    
     print("\n" + "=" * 80)
     print("STEP 1: INDEXING REPOSITORY")
     print("=" * 80)
@@ -21,20 +21,22 @@ async def run_index(config: Config):
     return indexed > 0
 
 
-async def run_generate(config: Config, extended: bool = False):
+async def run_generate(config: Config, extended: bool = False, force: bool = False):
     """Run the wiki generation step"""
+    from .generator import WikiGenerator
+    
     print("\n" + "=" * 80)
     mode_str = "EXTENDED " if extended else ""
     print(f"STEP 2: GENERATING {mode_str}WIKI")
     print("=" * 80)
     
-    generator = WikiGenerator(config, extended=extended)
+    generator = WikiGenerator(config, extended=extended, force=force)
     await generator.generate_all()
     
     return True
 
 
-async def run_all(config: Config, extended: bool = False):
+async def run_all(config: Config, extended: bool = False, force: bool = False):
     """Run both indexing and generation"""
     print("\n" + "=" * 80)
     print(f"🚀 {config.repo_name.upper()} REPOSITORY WIKI GENERATION")
@@ -54,20 +56,25 @@ Estimated cost: {'$20-40' if extended else '$10-20'} in LLM API calls
         print("❌ Cancelled")
         return False
     
-    # Step 1: Index
-    success = await run_index(config)
-    if not success:
-        print("❌ Indexing failed")
-        return False
-    
-    # Small delay
-    await asyncio.sleep(2)
-    
-    # Step 2: Generate
-    success = await run_generate(config, extended=extended)
-    if not success:
-        print("❌ Wiki generation failed")
-        return False
+    from .session import WikiSession
+    
+    # One LightRAG instance for both steps: generation reads the graph and
+    # vectors indexing left in memory instead of reloading them from disk
+    async with WikiSession(config, extended=extended, force=force) as session:
+        # Step 1: Index
+        print("\n" + "=" * 80)
+        print("STEP 1: INDEXING REPOSITORY")
+        print("=" * 80)
+        indexed, _, _ = await session.index()
+        if not indexed:
+            print("❌ Indexing failed")
+            return False
+        
+        # Step 2: Generate
+        print("\n" + "=" * 80)
+        print(f"STEP 2: GENERATING {mode_str.upper()}WIKI")
+        print("=" * 80)
+        await session.generate()
     
     # Done
     print("\n" + "=" * 80)
@@ -90,6 +97,165 @@ Next steps:
     return True
 
 
+async def run_batch(
+    config: Config,
+    repo_list: Path,
+    working_root: Optional[Path] = None,
+    output_root: Optional[Path] = None,
+    extended: bool = False,
+    force: bool = False,
+    max_concurrency: Optional[int] = None,
+):
+    """Index and generate every repository in a list, in one process"""
+    from dataclasses import asdict
+    
+    from .batch import BatchRunner, read_repo_list, repo_configs
+    from .clients import SharedClients
+    
+    repos = read_repo_list(repo_list)
+    print("=" * 80)
+    print(f"📦 BATCH: {len(repos)} REPOSITORIES")
+    print("=" * 80)
+    if not repos:
+        print("⚠️  No repositories in the list")
+        return False
+    
+    # Settings that aren't per repository come from the batch-level config
+    overrides = {
+        key: value for key, value in asdict(config).items()
+        if key not in ("repo_path", "repo_name", "workspace", "working_dir", "output_dir")
+    }
+    clients = SharedClients(
+        max_concurrency=max_concurrency or config.llm_model_max_async,
+        requests_per_minute=config.batch_requests_per_minute,
+    )
+    print(f"⚡ {config.batch_parallel_repos} repositories at a time, "
+          f"{clients.limiter.capacity} concurrent model calls shared"
+          + (f", {config.batch_requests_per_minute:g} requests/min" if clients.rate else ""))
+    runner = BatchRunner(
+        repo_configs(repos, working_root, output_root, **overrides),
+        clients=clients,
+        parallel_repos=config.batch_parallel_repos,
+        extended=extended,
+        force=force,
+    )
+    results = await runner.run()
+    return all(r.status == "ok" for r in results)
+
+
+async def run_serve(
+    config: Config,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    socket_path: Optional[Path] = None,
+    max_workspaces: Optional[int] = None,
+):
+    """Serve queries, page generation and reindexing from warm workspaces"""
+    from .serve import DEFAULT_HOST, DEFAULT_PORT, MAX_WORKSPACES, WikiServer
+    
+    server = WikiServer(config, max_workspaces=max_workspaces or MAX_WORKSPACES)
+    await server.serve(host or DEFAULT_HOST, port or DEFAULT_PORT, socket_path=socket_path)
+
+
+async def run_watch(
+    config: Config,
+    extended: bool = False,
+    poll: bool = False,
+    debounce: Optional[float] = None,
+):
+    """Re-index changed files and regenerate affected pages until interrupted"""
+    from .watch import DEBOUNCE, WikiWatcher
+    
+    print("=" * 80)
+    print(f"👀 WATCHING {config.repo_path}")
+    print("=" * 80)
+    watcher = WikiWatcher(config, extended=extended, poll=poll, debounce=debounce or DEBOUNCE)
+    await watcher.run()
+
+
+async def run_gc(config: Config, dry_run: bool = False):
+    """Remove knowledge left behind by deleted or rewritten files"""
+    from .gc import GarbageCollector
+    from .indexer import RepositoryIndexer
+    
+    print("\n" + "=" * 80)
+    print("GARBAGE COLLECTION" + (" (DRY RUN)" if dry_run else ""))
+    print("=" * 80)
+    
+    indexer = RepositoryIndexer(config)
+    rag = await indexer.initialize_rag()
+    try:
+        report = await GarbageCollector(rag, config).collect(dry_run=dry_run)
+    finally:
+        await rag.finalize_storages()
+    
+    verb = "Would remove" if dry_run else "Removed"
+    print(f"🗑️  {verb} {len(report.stale_docs)} stale documents, {report.chunks_removed} chunks")
+    print(f"🕸️  Nodes: {report.nodes_before} → {report.nodes_before - report.nodes_removed} "
+          f"(-{report.nodes_removed})")
+    print(f"🔗 Edges: {report.edges_before} → {report.edges_before - report.edges_removed} "
+          f"(-{report.edges_removed})")
+    print(f"🧮 Vectors: -{report.vectors_removed}")
+    if not dry_run:
+        if report.vector_slots_reclaimed:
+            print(f"🧹 Compacted {report.vector_slots_reclaimed} deleted vector slots")
+        print(f"💾 Workspace: {report.bytes_before / 1024:.1f} KiB → "
+              f"{report.bytes_after / 1024:.1f} KiB "
+              f"({report.bytes_reclaimed / 1024:.1f} KiB reclaimed)")
+    
+    return True
+
+
+async def run_canonicalize(config: Config, dry_run: bool = False):
+    """Merge entity name variants in an indexed workspace"""
+    from .canonicalize import EntityCanonicalizer
+    from .indexer import RepositoryIndexer
+    
+    indexer = RepositoryIndexer(config)
+    rag = await indexer.initialize_rag()
+    try:
+        report = await EntityCanonicalizer(rag, config).run(dry_run=dry_run)
+    finally:
+        await rag.finalize_storages()
+    
+    report.print_summary(dry_run=dry_run)
+    for canonical, aliases in sorted(report.groups.items()):
+        print(f"   {canonical} ← {', '.join(aliases)}")
+    return True
+
+
+def export_graphml(config: Config, output: Optional[Path] = None):
+    """Export the CSR graph snapshot of the workspace to GraphML"""
+    from .storage.csr_graph import export_graphml as write_graphml
+    
+    workspace_dir = config.working_dir / config.workspace
+    snapshot = workspace_dir / "graph_chunk_entity_relation.csr"
+    if not (snapshot / "CURRENT").exists():
+        print(f"❌ No CSR graph snapshot found at {snapshot}")
+        return False
+    
+    output = output or workspace_dir / "graph_chunk_entity_relation.graphml"
+    nodes, edges = write_graphml(snapshot, output)
+    print(f"✅ Exported {nodes} nodes, {edges} edges to {output}")
+    return True
+
+
+def export_site(config: Config, site_dir: Optional[Path] = None, force: bool = False):
+    """Render the generated wiki to a static HTML site with a search index"""
+    from .site_export import export_site as render_site
+    
+    if not config.output_dir.exists():
+        print(f"❌ No generated wiki found at {config.output_dir}")
+        return False
+    
+    site_dir = site_dir or config.output_dir.parent / f"{config.output_dir.name}_site"
+    site_name = config.repo_name or Path(config.repo_path).resolve().name
+    report = render_site(config.output_dir, site_dir, site_name=site_name, force=force)
+    report.print_summary()
+    print(f"✅ Site written to {site_dir} (open {site_dir / 'index.html'})")
+    return True
+
+
 def test_setup(config: Optional[Config] = None):
     """Test the setup"""
     if config is None:
@@ -221,6 +387,21 @@ def main():
         type=str,
         help="LLM model to use (e.g., gpt-4o, gpt-4o-mini)"
     )
+    gen_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Pages generated concurrently (default: 8)"
+    )
+    gen_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate every page, even if its retrieved context is unchanged"
+    )
+    gen_parser.add_argument(
+        "--api-fanout",
+        choices=["module", "package"],
+        help="Also generate one API reference page per module or package"
+    )
     
     # All command
     all_parser = subparsers.add_parser("all", help="Run index and generate")
@@ -239,6 +420,231 @@ def main():
         type=str,
         help="LLM model to use (e.g., gpt-4o, gpt-4o-mini)"
     )
+    all_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Pages generated concurrently (default: 8)"
+    )
+    all_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate every page, even if its retrieved context is unchanged"
+    )
+    all_parser.add_argument(
+        "--api-fanout",
+        choices=["module", "package"],
+        help="Also generate one API reference page per module or package"
+    )
+    
+    # Batch command
+    batch_parser = subparsers.add_parser(
+        "batch", help="Index and generate many repositories in one process"
+    )
+    batch_parser.add_argument(
+        "repos",
+        type=Path,
+        help="File listing repository paths, one per line"
+    )
+    batch_parser.add_argument(
+        "--working-dir",
+        type=Path,
+        help="Root for per-repository storage (default: <repo>/repowiki_storage)"
+    )
+    batch_parser.add_argument(
+        "--output",
+        type=Path,
+        help="Root for per-repository wikis (default: <repo>/wiki_docs)"
+    )
+    batch_parser.add_argument(
+        "--extended",
+        action="store_true",
+        help="Generate extended wikis with comprehensive documentation"
+    )
+    batch_parser.add_argument(
+        "--model",
+        type=str,
+        help="LLM model to use (e.g., gpt-4o, gpt-4o-mini)"
+    )
+    batch_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Pages generated concurrently per repository (default: 8)"
+    )
+    batch_parser.add_argument(
+        "--parallel-repos",
+        type=int,
+        help="Repositories processed at a time (default: 4)"
+    )
+    batch_parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="Model calls in flight across all repositories (default: LLM_MODEL_MAX_ASYNC)"
+    )
+    batch_parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Requests per minute across all repositories (default: unlimited)"
+    )
+    batch_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate every page, even if its retrieved context is unchanged"
+    )
+    batch_parser.add_argument(
+        "--api-fanout",
+        choices=["module", "package"],
+        help="Also generate one API reference page per module or package"
+    )
+    
+    # Watch command
+    watch_parser = subparsers.add_parser(
+        "watch", help="Re-index changed files and regenerate affected pages as you edit"
+    )
+    watch_parser.add_argument(
+        "--repo",
+        type=Path,
+        help="Path to repository (default: current directory)"
+    )
+    watch_parser.add_argument(
+        "--working-dir",
+        type=Path,
+        help="Working directory with indexed data"
+    )
+    watch_parser.add_argument(
+        "--output",
+        type=Path,
+        help="Output directory for wiki"
+    )
+    watch_parser.add_argument(
+        "--extended",
+        action="store_true",
+        help="Keep the extended wiki up to date"
+    )
+    watch_parser.add_argument(
+        "--api-fanout",
+        choices=["module", "package"],
+        help="Also keep one API reference page per module or package up to date"
+    )
+    watch_parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Poll for changes instead of using inotify"
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        help="Seconds without changes before an update runs (default: 1.0)"
+    )
+    
+    # Serve command
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep workspaces loaded and serve a local query/generate/reindex API"
+    )
+    serve_parser.add_argument(
+        "--repo",
+        type=Path,
+        help="Default repository for requests that don't name one (default: current directory)"
+    )
+    serve_parser.add_argument(
+        "--working-dir",
+        type=Path,
+        help="Working directory with indexed data (for the default repository)"
+    )
+    serve_parser.add_argument(
+        "--output",
+        type=Path,
+        help="Output directory for wiki (for the default repository)"
+    )
+    serve_parser.add_argument(
+        "--host",
+        type=str,
+        help="Interface to listen on (default: 127.0.0.1)"
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        help="TCP port (default: 8765)"
+    )
+    serve_parser.add_argument(
+        "--socket",
+        type=Path,
+        help="Listen on this Unix socket instead of a TCP port"
+    )
+    serve_parser.add_argument(
+        "--max-workspaces",
+        type=int,
+        help="Workspaces kept open, least recently used closed first (default: 4)"
+    )
+    
+    # Export GraphML command
+    export_parser = subparsers.add_parser(
+        "export-graphml", help="Export the CSR graph snapshot to GraphML"
+    )
+    export_parser.add_argument(
+        "--working-dir",
+        type=Path,
+        help="Working directory with indexed data"
+    )
+    export_parser.add_argument(
+        "--graphml",
+        type=Path,
+        help="Output GraphML file (default: <working-dir>/<workspace>/graph_chunk_entity_relation.graphml)"
+    )
+    
+    # Export site command
+    site_parser = subparsers.add_parser(
+        "export-site", help="Render the wiki to static HTML with a client-side search index"
+    )
+    site_parser.add_argument(
+        "--output",
+        type=Path,
+        help="Generated wiki directory (default: ./wiki_docs)"
+    )
+    site_parser.add_argument(
+        "--site",
+        type=Path,
+        help="Site output directory (default: <wiki directory>_site)"
+    )
+    site_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render every page, even if its markdown is unchanged"
+    )
+    
+    # GC command
+    gc_parser = subparsers.add_parser(
+        "gc", help="Remove entities, relations, chunks and vectors of deleted files"
+    )
+    gc_parser.add_argument(
+        "--repo",
+        type=Path,
+        help="Path to repository (default: current directory)"
+    )
+    gc_parser.add_argument(
+        "--working-dir",
+        type=Path,
+        help="Working directory with indexed data"
+    )
+    gc_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report what would be removed"
+    )
+    
+    # Canonicalize command
+    canon_parser = subparsers.add_parser(
+        "canonicalize", help="Merge entity name variants into canonical entities"
+    )
+    canon_parser.add_argument(
+        "--working-dir",
+        type=Path,
+        help="Working directory with indexed data"
+    )
+    canon_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report the groups that would be merged"
+    )
     
     # Test command
     test_parser = subparsers.add_parser("test", help="Test setup")
@@ -260,6 +666,18 @@ def main():
         config_kwargs['output_dir'] = args.output
     if hasattr(args, 'model') and args.model:
         config_kwargs['llm_model_name'] = args.model
+    if hasattr(args, 'workers') and args.workers:
+        config_kwargs['generation_workers'] = args.workers
+    if getattr(args, 'api_fanout', None):
+        config_kwargs['api_fanout'] = args.api_fanout
+    if getattr(args, 'parallel_repos', None):
+        config_kwargs['batch_parallel_repos'] = args.parallel_repos
+    if getattr(args, 'rpm', None):
+        config_kwargs['batch_requests_per_minute'] = args.rpm
+    if args.command == "batch":
+        # Roots for every repository's storage and output, not paths of this one
+        config_kwargs.pop('working_dir', None)
+        config_kwargs.pop('output_dir', None)
     
     config = Config.from_env(**config_kwargs)
     
@@ -270,9 +688,38 @@ def main():
     if args.command == "index":
         asyncio.run(run_index(config))
     elif args.command == "generate":
-        asyncio.run(run_generate(config, extended=extended))
+        asyncio.run(run_generate(config, extended=extended, force=args.force))
     elif args.command == "all":
-        asyncio.run(run_all(config, extended=extended))
+        asyncio.run(run_all(config, extended=extended, force=args.force))
+    elif args.command == "batch":
+        success = asyncio.run(run_batch(
+            config, args.repos, working_root=args.working_dir, output_root=args.output,
+            extended=extended, force=args.force, max_concurrency=args.max_concurrency,
+        ))
+        sys.exit(0 if success else 1)
+    elif args.command == "watch":
+        try:
+            asyncio.run(run_watch(config, extended=extended, poll=args.poll, debounce=args.debounce))
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+    elif args.command == "serve":
+        try:
+            asyncio.run(run_serve(
+                config, host=args.host, port=args.port, socket_path=args.socket,
+                max_workspaces=args.max_workspaces,
+            ))
+        except KeyboardInterrupt:
+            print("\n👋 Server stopped")
+    elif args.command == "gc":
+        asyncio.run(run_gc(config, dry_run=args.dry_run))
+    elif args.command == "canonicalize":
+        asyncio.run(run_canonicalize(config, dry_run=args.dry_run))
+    elif args.command == "export-graphml":
+        success = export_graphml(config, output=args.graphml)
+        sys.exit(0 if success else 1)
+    elif args.command == "export-site":
+        success = export_site(config, site_dir=args.site, force=args.force)
+        sys.exit(0 if success else 1)
     elif args.command == "test":
         success = test_setup(config)
         sys.exit(0 if success else 1)
@@ -0,0 +1,267 @@
+"""Shared model clients - one concurrency budget, client pool and cache for many repositories
+
+Normally each indexer or generator creates its own LiteLLM clients, and
+each LightRAG instance enforces its own ``llm_model_max_async``. When
+many repositories are processed in one process (``repowiki batch``),
+``SharedClients`` is passed to all of them instead:
+
+- one LLM client and one embedding client per model, reused by every repository
+- a global concurrency budget, handed out round-robin across repositories so
+  a large repository can't starve the others
+- an optional global requests-per-minute limit
+- in-memory LLM and embedding caches shared across repositories (vendored
+  files, licenses and boilerplate are common between repositories)
+- per-repository call, token and cache-hit counters for the batch report
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List
+
+import numpy as np
+
+LLM_CACHE_SIZE = 10_000        # completions
+EMBEDDING_CACHE_SIZE = 50_000  # vectors; 1536 float32 dims is 6 KiB each
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token), without a tokenizer"""
+    return (len(text) + 3) // 4
+
+
+class FairLimiter:
+    """Concurrency limit whose free slots go round-robin to the waiting keys
+
+    A plain semaphore serves waiters first come, first served, so a
+    repository that queues 10,000 calls at once delays every other
+    repository until they're done. Here each key waits in its own queue
+    and a freed slot goes to the next key in turn.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+        # key -> waiters; dict order is the round-robin order
+        self.waiting: Dict[str, Deque[asyncio.Future]] = {}
+
+    async def acquire(self, key: str):
+        if self.active < self.capacity and not self.waiting:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # granted just before the cancellation
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self.waiting and self.active < self.capacity:
+            key = next(iter(self.waiting))
+            queue = self.waiting.pop(key)
+            waiter = queue.popleft()
+            if queue:
+                self.waiting[key] = queue  # back of the line
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, key: str):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class RateLimiter:
+    """Spaces requests evenly to stay under a requests-per-minute limit"""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute
+        self.next_at = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        at = max(now, self.next_at)
+        self.next_at = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.items: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+
+@dataclass
+class RepoUsage:
+    """Model usage of one repository"""
+
+    llm_calls: int = 0
+    llm_cache_hits: int = 0
+    embedding_texts: int = 0
+    embedding_cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cache_hits(self) -> int:
+        return self.llm_cache_hits + self.embedding_cache_hits
+
+
+def _key(*parts) -> str:
+    return hashlib.md5(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SharedClients:
+    """Client pool, concurrency budget and caches shared by many repositories"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 96,
+        requests_per_minute: float = 0,
+        llm_cache_size: int = LLM_CACHE_SIZE,
+        embedding_cache_size: int = EMBEDDING_CACHE_SIZE,
+    ):
+        self.limiter = FairLimiter(max_concurrency)
+        self.rate = RateLimiter(requests_per_minute) if requests_per_minute else None
+        self.completions = LRUCache(llm_cache_size)
+        self.inflight: Dict[str, asyncio.Future] = {}  # completions being fetched, by key
+        self.embeddings = LRUCache(embedding_cache_size)
+        self.usage: Dict[str, RepoUsage] = {}
+        self._llms: Dict[tuple, object] = {}
+        self._embed_models: Dict[tuple, object] = {}
+
+    def llm(self, config):
+        """The shared LiteLLM client for ``config``'s model"""
+        key = (config.llm_model_name, config.api_key)
+        if key not in self._llms:
+            from llama_index.llms.litellm import LiteLLM
+
+            self._llms[key] = LiteLLM(
+                model=config.llm_model_name, api_key=config.api_key, temperature=0.7
+            )
+        return self._llms[key]
+
+    def embed_model(self, config):
+        """The shared LiteLLM embedding client for ``config``'s model"""
+        key = (config.embedding_model_name, config.api_key)
+        if key not in self._embed_models:
+            from llama_index.embeddings.litellm import LiteLLMEmbedding
+
+            self._embed_models[key] = LiteLLMEmbedding(
+                model_name=config.embedding_model_name, api_key=config.api_key
+            )
+        return self._embed_models[key]
+
+    @asynccontextmanager
+    async def _request(self, repo: str):
+        async with self.limiter.slot(repo):
+            if self.rate:
+                await self.rate.wait()
+            yield
+
+    def wrap_llm(self, repo: str, model: str, func: Callable) -> Callable:
+        """``func`` (a LightRAG ``llm_model_func``) under the shared budget and cache"""
+        usage = self.usage.setdefault(repo, RepoUsage())
+
+        async def llm_func(prompt, system_prompt=None, history_messages=[], **kwargs):
+            usage.llm_calls += 1
+            sent = estimate_tokens(
+                prompt + (system_prompt or "") + "".join(m["content"] for m in history_messages)
+            )
+            if kwargs.get("stream"):
+                usage.prompt_tokens += sent
+                return self._stream(repo, usage, func, prompt, system_prompt, history_messages, kwargs)
+            key = _key(model, prompt, system_prompt, history_messages)
+            cached = self.completions.get(key)
+            if cached is None and key in self.inflight:
+                cached = await asyncio.shield(self.inflight[key])  # same prompt already sent
+            if cached is not None:
+                usage.llm_cache_hits += 1
+                return cached
+            usage.prompt_tokens += sent
+            waiters = self.inflight[key] = asyncio.get_running_loop().create_future()
+            try:
+                async with self._request(repo):
+                    response = await func(prompt, system_prompt, history_messages, **kwargs)
+                waiters.set_result(response)
+            except asyncio.CancelledError:
+                waiters.cancel()
+                raise
+            except Exception as e:
+                waiters.set_exception(e)
+                waiters.exception()  # mark retrieved; waiters re-raise it themselves
+                raise
+            finally:
+                del self.inflight[key]
+            usage.completion_tokens += estimate_tokens(response)
+            self.completions.put(key, response)
+            return response
+
+        return llm_func
+
+    async def _stream(self, repo, usage, func, prompt, system_prompt, history_messages, kwargs):
+        # A streamed completion holds its slot until the last chunk
+        async with self._request(repo):
+            async for chunk in await func(prompt, system_prompt, history_messages, **kwargs):
+                usage.completion_tokens += estimate_tokens(chunk)
+                yield chunk
+
+    def wrap_embedding(self, repo: str, model: str, func: Callable) -> Callable:
+        """``func`` (texts -> vectors) under the shared budget, cached per text"""
+        usage = self.usage.setdefault(repo, RepoUsage())
+
+        async def embedding_func(texts: List[str]) -> np.ndarray:
+            usage.embedding_texts += len(texts)
+            keys = [_key(model, text) for text in texts]
+            vectors: Dict[str, np.ndarray] = {}
+            missing: Dict[str, str] = {}
+            for key, text in zip(keys, texts):
+                vector = self.embeddings.get(key)
+                if vector is not None:
+                    vectors[key] = vector
+                    usage.embedding_cache_hits += 1
+                else:
+                    missing.setdefault(key, text)
+            if missing:
+                async with self._request(repo):
+                    result = await func(list(missing.values()))
+                usage.prompt_tokens += sum(estimate_tokens(text) for text in missing.values())
+                for key, vector in zip(missing, np.asarray(result, dtype=np.float32)):
+                    vectors[key] = vector
+                    self.embeddings.put(key, vector)
+            return np.stack([vectors[key] for key in keys])
+
+        return embedding_func
+
+    def usage_of(self, repo: str) -> RepoUsage:
+        return self.usage.setdefault(repo, RepoUsage())
@@ -0,0 +1,280 @@
+"""Community summaries - hierarchical graph clusters summarized once at index time"""
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import networkx as nx
+from networkx.algorithms.community import louvain_partitions
+
+from .config import Config
+
+COMMUNITY_FILE = "community_summaries.json"
+MIN_COMMUNITY_SIZE = int(os.getenv("COMMUNITY_MIN_SIZE", "3"))
+MAX_LEVELS = int(os.getenv("COMMUNITY_MAX_LEVELS", "3"))
+# Entities/relations quoted per community in the summary prompt
+MAX_PROMPT_ITEMS = 40
+LOUVAIN_SEED = 42
+# A community whose members mostly match a cached one (Jaccard similarity of
+# the members the cached summary was written from) keeps that summary
+REUSE_SIMILARITY = float(os.getenv("COMMUNITY_REUSE_SIMILARITY", "0.9"))
+
+SUMMARY_PROMPT = """You are summarizing one cluster of a code repository's knowledge graph.
+
+{content}
+
+Write a report for this cluster:
+- First line: "TITLE: <short name for what this cluster of the codebase does>"
+- Then one paragraph (at most 150 words) on its purpose, its key components and how they interact.
+
+Only use the information above."""
+
+
+def membership_hash(members) -> str:
+    """Stable id of a community: changes exactly when its membership does"""
+    return hashlib.md5("\n".join(sorted(members)).encode("utf-8")).hexdigest()
+
+
+def jaccard(a, b) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _parse_summary(text: str):
+    lines = text.strip().splitlines()
+    if lines and lines[0].upper().startswith("TITLE:"):
+        return lines[0][6:].strip(), "\n".join(lines[1:]).strip()
+    return "", text.strip()
+
+
+@dataclass
+class Community:
+    """A cluster of entities at one level of the hierarchy (0 = coarsest)"""
+
+    id: str
+    level: int
+    members: List[str]
+    parent: Optional[str] = None
+    title: str = ""
+    summary: str = ""
+    # Members the summary was written from (differs from members on reuse)
+    basis: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CommunityReport:
+    """Result of a community build"""
+
+    communities: int = 0
+    levels: int = 0
+    summarized: int = 0
+    reused: int = 0
+    removed: int = 0
+    failed: int = 0  # left without a summary, retried by the next build
+
+    def print_summary(self):
+        print(f"🏘️  {self.communities} communities over {self.levels} levels: "
+              f"{self.summarized} summarized, {self.reused} unchanged, {self.removed} dropped"
+              + (f", {self.failed} failed" if self.failed else ""))
+
+
+def load_communities(workspace_dir: Path) -> Dict[str, Community]:
+    path = Path(workspace_dir) / COMMUNITY_FILE
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {cid: Community(**c) for cid, c in data.items()}
+
+
+def detect_communities(graph: nx.Graph, max_levels: int = MAX_LEVELS) -> List[Community]:
+    """Louvain hierarchy, coarsest level first, small and repeated clusters dropped"""
+    if graph.number_of_nodes() == 0:
+        return []
+    # louvain_partitions yields successively coarser partitions
+    partitions = list(louvain_partitions(graph, weight="weight", seed=LOUVAIN_SEED))
+    partitions = partitions[::-1][:max_levels]
+
+    communities: List[Community] = []
+    seen = set()
+    owner: List[Dict[str, str]] = []  # per level: member -> community id
+    for level, partition in enumerate(partitions):
+        owner.append({})
+        for members in partition:
+            if len(members) < MIN_COMMUNITY_SIZE:
+                continue
+            cid = membership_hash(members)
+            for member in members:
+                owner[level][member] = cid
+            if cid in seen:  # unchanged from the coarser level
+                continue
+            seen.add(cid)
+            first = min(members)
+            parent = next(
+                (owner[up][first] for up in range(level - 1, -1, -1) if first in owner[up]), None
+            )
+            communities.append(Community(cid, level, sorted(members), parent=parent))
+    return communities
+
+
+class CommunityBuilder:
+    """Clusters the knowledge graph into hierarchical communities and summarizes them
+
+    Communities are found with Louvain over the entity graph (edge weights
+    from LightRAG). The finest level is summarized from entity and relation
+    descriptions, coarser levels from their children's summaries. Results
+    are cached in ``community_summaries.json`` keyed by membership hash, so
+    a rebuild only asks the LLM about communities whose members changed.
+    """
+
+    def __init__(self, rag, config: Config, llm_func: Optional[Callable] = None):
+        self.rag = rag
+        self.config = config
+        self.llm_func = llm_func or rag.llm_model_func
+        self.workspace_dir = Path(config.working_dir) / config.workspace
+
+    @property
+    def path(self) -> Path:
+        return self.workspace_dir / COMMUNITY_FILE
+
+    async def load_graph(self):
+        storage = self.rag.chunk_entity_relation_graph
+        nodes = {n["id"]: n for n in await storage.get_all_nodes()}
+        edges = await storage.get_all_edges()
+        graph = nx.Graph()
+        # Sorted insertion keeps Louvain (and so membership hashes) deterministic
+        graph.add_nodes_from(sorted(nodes))
+        for edge in sorted(edges, key=lambda e: (e["source"], e["target"])):
+            try:
+                weight = float(edge.get("weight") or 1.0)
+            except (TypeError, ValueError):
+                weight = 1.0
+            graph.add_edge(edge["source"], edge["target"], weight=weight)
+        edge_data = {(e["source"], e["target"]): e for e in edges}
+        return graph, nodes, edge_data
+
+    def _entity_content(self, community: Community, graph, nodes, edge_data) -> str:
+        members = sorted(community.members, key=lambda n: (-graph.degree(n), n))
+        lines = ["Entities:"]
+        for name in members[:MAX_PROMPT_ITEMS]:
+            node = nodes.get(name, {})
+            description = (node.get("description") or "").split("<SEP>")[0][:300]
+            lines.append(f"- {name} ({node.get('entity_type', 'unknown')}): {description}")
+        member_set = set(community.members)
+        relations = [
+            (s, t, d) for (s, t), d in edge_data.items() if s in member_set and t in member_set
+        ]
+        relations.sort(key=lambda r: -float(r[2].get("weight") or 1.0))
+        if relations:
+            lines.append("\nRelations:")
+        for s, t, data in relations[:MAX_PROMPT_ITEMS]:
+            description = (data.get("description") or "").split("<SEP>")[0][:200]
+            lines.append(f"- {s} -> {t}: {description}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _children_content(children: List[Community]) -> str:
+        lines = ["Sub-clusters:"]
+        for child in sorted(children, key=lambda c: -len(c.members))[:MAX_PROMPT_ITEMS]:
+            lines.append(f"- {child.title or 'Untitled'} ({len(child.members)} entities): {child.summary}")
+        return "\n".join(lines)
+
+    async def _summarize(self, community: Community, content: str) -> bool:
+        """Summarize ``community``; on failure it keeps an empty summary"""
+        try:
+            response = await self.llm_func(SUMMARY_PROMPT.format(content=content))
+        except Exception as e:
+            print(f"⚠️  No summary for community {community.id[:8]}: {type(e).__name__}: {e}")
+            return False
+        community.title, community.summary = _parse_summary(response)
+        return True
+
+    @staticmethod
+    def _previous(community: Community, cached: Dict[str, Community]) -> Optional[Community]:
+        """The cached community whose summary still describes ``community``"""
+        exact = cached.get(community.id)
+        if exact and exact.summary:
+            return exact
+        best, best_score = None, REUSE_SIMILARITY
+        for previous in cached.values():
+            if previous.level != community.level or not previous.summary:
+                continue
+            # Compare with the summarized members so drift can't accumulate
+            score = jaccard(community.members, previous.basis or previous.members)
+            if score >= best_score:
+                best, best_score = previous, score
+        return best
+
+    async def build(self) -> CommunityReport:
+        graph, nodes, edge_data = await self.load_graph()
+        communities = detect_communities(graph)
+        cached = load_communities(self.workspace_dir)
+        report = CommunityReport(
+            communities=len(communities),
+            levels=len({c.level for c in communities}),
+            removed=len(set(cached) - {c.id for c in communities}),
+        )
+
+        children: Dict[str, List[Community]] = {}
+        for community in communities:
+            if community.parent:
+                children.setdefault(community.parent, []).append(community)
+
+        # Finest level first so parents can summarize their children
+        for level in sorted({c.level for c in communities}, reverse=True):
+            pending = []
+            for community in (c for c in communities if c.level == level):
+                previous = self._previous(community, cached)
+                # Same or nearly the same members: keep the summary we already paid for
+                if previous:
+                    community.title, community.summary = previous.title, previous.summary
+                    community.basis = previous.basis or previous.members
+                    report.reused += 1
+                    continue
+                kids = [k for k in children.get(community.id, []) if k.summary]
+                content = (
+                    self._children_content(kids) if kids
+                    else self._entity_content(community, graph, nodes, edge_data)
+                )
+                pending.append(self._summarize(community, content))
+            done = sum(await asyncio.gather(*pending))
+            report.summarized += done
+            report.failed += len(pending) - done
+
+        self.workspace_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({c.id: asdict(c) for c in communities}, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+        return report
+
+
+def community_context(communities: Dict[str, Community], limit: int = 12) -> str:
+    """Compact context for global pages: the largest top-level communities first"""
+    return "\n\n".join(_context_sections(communities, limit))
+
+
+def community_items(communities: Dict[str, Community], limit: int = 12) -> List[str]:
+    """Fingerprint items of the sections ``community_context`` uses, one per community"""
+    return [
+        "community:" + hashlib.md5(section.encode("utf-8")).hexdigest()
+        for section in _context_sections(communities, limit)
+    ]
+
+
+def _context_sections(communities: Dict[str, Community], limit: int) -> List[str]:
+    ranked = sorted(
+        (c for c in communities.values() if c.summary),
+        key=lambda c: (c.level, -len(c.members), c.id),
+    )
+    sections = []
+    for community in ranked[:limit]:
+        title = community.title or f"Cluster of {len(community.members)} entities"
+        # The entities the summary was written from
+        key = ", ".join((community.basis or community.members)[:8])
+        sections.append(f"## {title}\nKey entities: {key}\n\n{community.summary}")
+    return sections
@@ -3,6 +3,7 @@ import os
 from pathlib import Path
 from typing import Set, Optional
 from dataclasses import dataclass, field
+from functools import lru_cache
 
 
 @dataclass
@@ -35,6 +36,37 @@ class Config:
     max_parallel_insert: int = 48      # Documents processed concurrently
     llm_model_max_async: int = 96      # Concurrent LLM calls
     embedding_func_max_async: int = 48  # Concurrent embedding calls
+    generation_workers: int = 8        # Wiki pages generated concurrently
+    stream_pages: bool = True          # Write pages to disk as tokens arrive
+    page_narrative: bool = False       # Short LLM intro on statically rendered pages
+    api_fanout: Optional[str] = None   # "module" or "package": one API reference page each
+    cross_links: bool = True           # Link the first mention of each entity in every page
+    
+    # Batch mode (repowiki batch): repositories in flight, and a global
+    # requests-per-minute limit shared by all of them (0 = unlimited)
+    batch_parallel_repos: int = 4
+    batch_requests_per_minute: float = 0
+    
+    # Merge entity name variants ("Config", "config.Config") after indexing.
+    # Off by default: merges are irreversible
+    canonicalize_entities: bool = False
+    
+    # PageRank node importance for retrieval ranking; optionally drop the
+    # entity vectors of the least important fraction of nodes
+    node_importance: bool = True
+    importance_prune_fraction: float = 0.0
+    
+    # Cluster the graph and summarize communities for global-mode pages
+    community_summaries: bool = True
+    
+    # Summarize files, then directories, for map-reduce overview/structure pages
+    summary_tree: bool = True
+    
+    # Storage backends (LightRAG storage names, see repowiki.storage)
+    graph_storage: str = "NetworkXStorage"  # or "CSRGraphStorage", "WALGraphStorage", "SQLiteGraphStorage"
+    kv_storage: str = "JsonKVStorage"  # or "WALKVStorage" (append-only log), "SQLiteKVStorage"
+    doc_status_storage: str = "JsonDocStatusStorage"  # or "SQLiteDocStatusStorage"
+    vector_storage: str = "NanoVectorDBStorage"  # or "MmapVectorDBStorage" (ANN)
     
     @classmethod
     def from_env(cls, **overrides) -> "Config":
@@ -81,6 +113,55 @@ class Config:
         if embed_async := os.getenv("EMBEDDING_FUNC_MAX_ASYNC"):
             config_dict["embedding_func_max_async"] = int(embed_async)
         
+        if workers := os.getenv("GENERATION_WORKERS"):
+            config_dict["generation_workers"] = int(workers)
+        
+        if stream := os.getenv("STREAM_PAGES"):
+            config_dict["stream_pages"] = stream.lower() in ("1", "true", "yes")
+        
+        if narrative := os.getenv("PAGE_NARRATIVE"):
+            config_dict["page_narrative"] = narrative.lower() in ("1", "true", "yes")
+        
+        if fanout := os.getenv("API_FANOUT"):
+            config_dict["api_fanout"] = fanout
+        
+        if cross_links := os.getenv("CROSS_LINKS"):
+            config_dict["cross_links"] = cross_links.lower() in ("1", "true", "yes")
+        
+        if parallel_repos := os.getenv("BATCH_PARALLEL_REPOS"):
+            config_dict["batch_parallel_repos"] = int(parallel_repos)
+        
+        if rpm := os.getenv("BATCH_REQUESTS_PER_MINUTE"):
+            config_dict["batch_requests_per_minute"] = float(rpm)
+        
+        if canonicalize := os.getenv("CANONICALIZE_ENTITIES"):
+            config_dict["canonicalize_entities"] = canonicalize.lower() in ("1", "true", "yes")
+        
+        if importance := os.getenv("NODE_IMPORTANCE"):
+            config_dict["node_importance"] = importance.lower() in ("1", "true", "yes")
+        
+        if prune := os.getenv("IMPORTANCE_PRUNE_FRACTION"):
+            config_dict["importance_prune_fraction"] = float(prune)
+        
+        if communities := os.getenv("COMMUNITY_SUMMARIES"):
+            config_dict["community_summaries"] = communities.lower() in ("1", "true", "yes")
+        
+        if summary_tree := os.getenv("SUMMARY_TREE"):
+            config_dict["summary_tree"] = summary_tree.lower() in ("1", "true", "yes")
+        
+        # Storage backends
+        if graph_storage := os.getenv("GRAPH_STORAGE"):
+            config_dict["graph_storage"] = graph_storage
+        
+        if kv_storage := os.getenv("KV_STORAGE"):
+            config_dict["kv_storage"] = kv_storage
+        
+        if doc_status_storage := os.getenv("DOC_STATUS_STORAGE"):
+            config_dict["doc_status_storage"] = doc_status_storage
+        
+        if vector_storage := os.getenv("VECTOR_STORAGE"):
+            config_dict["vector_storage"] = vector_storage
+        
         # Apply overrides
         config_dict.update(overrides)
         
@@ -101,26 +182,36 @@ class Config:
     
     def _detect_repo_name(self) -> str:
         """Auto-detect repository name from git or directory name"""
-        import subprocess
-        
-        # Try to get from git remote
-        try:
-            result = subprocess.run(
-                ["git", "remote", "get-url", "origin"],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                url = result.stdout.strip()
-                # Extract repo name from URL (e.g., https://github.com/user/repo.git -> repo)
-                name = url.rstrip('/').split('/')[-1]
-                if name.endswith('.git'):
-                    name = name[:-4]
-                return name
-        except Exception:
-            pass
-        
-        # Fallback to directory name
-        return self.repo_path.resolve().name
+        return detect_repo_name(str(self.repo_path.resolve()))
+
+
+@lru_cache(maxsize=None)
+def detect_repo_name(repo_path: str) -> str:
+    """Repository name from its git remote, or its directory name
+    
+    Cached: every command validates its config, some more than once, and
+    running ``git`` costs tens of milliseconds each time.
+    """
+    import subprocess
+    
+    # Try to get from git remote
+    try:
+        result = subprocess.run(
+            ["git", "remote", "get-url", "origin"],
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        if result.returncode == 0:
+            url = result.stdout.strip()
+            # Extract repo name from URL (e.g., https://github.com/user/repo.git -> repo)
+            name = url.rstrip('/').split('/')[-1]
+            if name.endswith('.git'):
+                name = name[:-4]
+            return name
+    except Exception:
+        pass
+    
+    # Fallback to directory name
+    return Path(repo_path).name
@@ -0,0 +1,295 @@
+"""Entity cross-linking - links the first mention of each entity in every page
+
+After generation, every identifier-like entity name that has a page
+(a definition heading such as ``### `class Config` ``, or the fan-out page
+of the module it was extracted from) becomes a link target. An
+Aho-Corasick automaton over all names and their aliases finds every
+mention in a page in one linear pass, however many names there are, and
+the first mention of each entity is turned into a relative link. Code
+blocks, headings and existing links are left alone, and an inline code
+span is linked only when it is exactly an entity name.
+"""
+import json
+import os
+import re
+from array import array
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .site_export import slugify
+
+# Only names that look like code are linked; prose entities ("Knowledge Graph") aren't
+IDENTIFIER = re.compile(r"^[A-Za-z_][\w.]*[\w]$")
+MIN_NAME_LENGTH = 3
+_WORD = re.compile(r"\w")
+# Regions that are never rewritten; inline code spans are handled separately
+_PROTECTED = re.compile(
+    r"```.*?```|~~~.*?~~~"            # fenced code
+    r"|`[^`\n]+`"                       # inline code
+    r"|!?\[[^\]\n]*\]\([^)\n]*\)"       # links and images
+    r"|^#{1,6} [^\n]*$"                  # headings
+    r"|<[^>\n]+>|https?://\S+",         # HTML tags, bare URLs
+    re.S | re.M,
+)
+_DEFINITION = re.compile(r"^`(?:@\w+ )?(?:async def|def|class)\s+(\w+)")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*$", re.M)
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher; matching is linear in the text length
+
+    Transitions live in one dict keyed by ``(state << 21) | ord(char)``
+    instead of a dict per state, which keeps 100k+ patterns compact.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self.goto: Dict[int, int] = {}
+        self.output = array("l", [-1])  # state -> longest pattern ending here
+        self.fail = array("l", [0])
+        self.suffix = array("l", [0])  # state -> nearest fail state with an output
+        levels: List[List[int]] = []  # goto keys by depth, for the breadth-first linking
+        for pattern in patterns:
+            self._add(pattern, levels)
+        self._link(levels)
+
+    def _add(self, pattern: str, levels: List[List[int]]):
+        state = 0
+        for depth, char in enumerate(pattern):
+            key = (state << 21) | ord(char)
+            next_state = self.goto.get(key)
+            if next_state is None:
+                next_state = len(self.output)
+                self.goto[key] = next_state
+                self.output.append(-1)
+                if depth == len(levels):
+                    levels.append([])
+                levels[depth].append(key)
+            state = next_state
+        if self.output[state] == -1:
+            self.output[state] = len(self.patterns)
+            self.patterns.append(pattern)
+
+    def _link(self, levels: List[List[int]]):
+        goto, fail, output = self.goto, self.fail, self.output
+        fail.extend([0] * (len(output) - 1))
+        self.suffix = suffix = array("l", bytes(fail.itemsize * len(output)))
+        for keys in levels[1:]:  # depth-one states fail to the root
+            for key in keys:
+                child, code = goto[key], key & 0x1FFFFF
+                fallback = fail[key >> 21]
+                while fallback and (fallback << 21) | code not in goto:
+                    fallback = fail[fallback]
+                target = goto.get((fallback << 21) | code, 0)
+                fail[child] = target
+                suffix[child] = target if output[target] != -1 else suffix[target]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Every (start, end, pattern) occurrence, in order of end position"""
+        state = 0
+        goto, fail, output, suffix = self.goto, self.fail, self.output, self.suffix
+        for index, code in enumerate(map(ord, text)):
+            next_state = goto.get((state << 21) | code)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto.get((state << 21) | code)
+            state = next_state or 0
+            if not state:
+                continue
+            match = state if output[state] != -1 else suffix[state]
+            while match:
+                pattern = self.patterns[output[match]]
+                yield index + 1 - len(pattern), index + 1, pattern
+                match = suffix[match]
+
+
+def _bounded(text: str, start: int, end: int) -> bool:
+    """The match isn't part of a longer word or dotted name"""
+    before = text[start - 1] if start else " "
+    after = text[end] if end < len(text) else " "
+    return not (_WORD.match(before) or before == "." or _WORD.match(after)
+                or (after == "." and end + 1 < len(text) and _WORD.match(text[end + 1])))
+
+
+def select_mentions(text: str, matches: Iterable[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    """Leftmost-longest, non-overlapping, word-bounded matches"""
+    best: Dict[int, Tuple[int, str]] = {}
+    for start, end, pattern in matches:
+        if _bounded(text, start, end) and end > best.get(start, (0, ""))[0]:
+            best[start] = (end, pattern)
+    chosen, reach = [], 0
+    for start in sorted(best):
+        end, pattern = best[start]
+        if start >= reach:
+            chosen.append((start, end, pattern))
+            reach = end
+    return chosen
+
+
+def heading_targets(wiki_dir: Path) -> Dict[str, str]:
+    """Entity name -> ``page.md#anchor`` from definition headings in the wiki
+
+    ``class``/``def`` headings win over headings that are just a
+    backticked name; among equals, the first page in path order wins.
+    """
+    targets: Dict[str, Tuple[int, str]] = {}
+    for path in sorted(Path(wiki_dir).rglob("*.md")):
+        page = path.relative_to(wiki_dir).as_posix()
+        for match in _HEADING.finditer(path.read_text(encoding="utf-8")):
+            level, heading = len(match.group(1)), match.group(2)
+            definition = _DEFINITION.match(heading)
+            if definition:
+                name, rank = definition.group(1), 0
+            elif re.fullmatch(r"`[A-Za-z_][\w.]*`", heading):
+                name, rank = heading.strip("`"), 1
+            else:
+                continue
+            target = page if level == 1 else f"{page}#{slugify(heading)}"
+            if name not in targets or rank < targets[name][0]:
+                targets[name] = (rank, target)
+    return {name: target for name, (_, target) in targets.items()}
+
+
+def linkable(name: str) -> bool:
+    return len(name) >= MIN_NAME_LENGTH and bool(IDENTIFIER.match(name))
+
+
+@dataclass
+class CrossLinkReport:
+    """Result of a cross-linking pass"""
+
+    names: int = 0
+    pages: int = 0
+    pages_changed: int = 0
+    links_added: int = 0
+
+    def print_summary(self):
+        print(f"🔗 Cross-links: {self.links_added} added in {self.pages_changed}/{self.pages} "
+              f"pages ({self.names} linkable names)")
+
+
+class CrossLinker:
+    """Links entity mentions in wiki pages to the pages that document them"""
+
+    def __init__(self, targets: Dict[str, str], aliases: Optional[Dict[str, str]] = None):
+        # name (or alias) -> (entity, target); mentions of any alias count for the entity
+        self.names: Dict[str, Tuple[str, str]] = {
+            name: (name, target) for name, target in targets.items() if linkable(name)
+        }
+        for alias, canonical in (aliases or {}).items():
+            if canonical in targets and linkable(alias) and alias not in self.names:
+                self.names[alias] = (canonical, targets[canonical])
+        self.matcher = AhoCorasick(self.names)
+
+    def link_page(self, text: str, page: str) -> Tuple[str, int]:
+        """Link first mentions in one page (``page`` is its wiki-relative path)"""
+        directory = PurePosixPath(page).parent
+        linked = set()
+        out: List[str] = []
+        added = 0
+
+        def href(target: str) -> Optional[str]:
+            path, _, anchor = target.partition("#")
+            if path == page:
+                return None  # documented on this page
+            relative = os.path.relpath(path, directory).replace(os.sep, "/")
+            return relative + (f"#{anchor}" if anchor else "")
+
+        def link_text(segment: str):
+            nonlocal added
+            last = 0
+            for start, end, name in select_mentions(segment, self.matcher.iter_matches(segment)):
+                entity, target = self.names[name]
+                link = href(target) if entity not in linked else None
+                if link is None:
+                    continue
+                linked.add(entity)
+                out.append(segment[last:start])
+                out.append(f"[{segment[start:end]}]({link})")
+                last = end
+                added += 1
+            out.append(segment[last:])
+
+        last = 0
+        for match in _PROTECTED.finditer(text):
+            link_text(text[last:match.start()])
+            region = match.group(0)
+            code = region[1:-1] if region.startswith("`") and not region.startswith("```") else None
+            if region.startswith("["):
+                # An existing link to an entity (e.g. from an earlier pass) is its first mention
+                label = region[1:region.index("]")].strip("`")
+                if label in self.names:
+                    linked.add(self.names[label][0])
+            elif code in self.names and self.names[code][0] not in linked:
+                entity, target = self.names[code]
+                link = href(target)
+                if link is not None:
+                    linked.add(entity)
+                    region = f"[{region}]({link})"
+                    added += 1
+            out.append(region)
+            last = match.end()
+        link_text(text[last:])
+        return "".join(out), added
+
+    def link_wiki(self, wiki_dir: Path) -> CrossLinkReport:
+        """Rewrite every page in place (atomically, and only if links were added)"""
+        wiki_dir = Path(wiki_dir)
+        report = CrossLinkReport(names=len(self.names))
+        for path in sorted(wiki_dir.rglob("*.md")):
+            text = path.read_text(encoding="utf-8")
+            page = path.relative_to(wiki_dir).as_posix()
+            linked, added = self.link_page(text, page)
+            report.pages += 1
+            if added:
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_text(linked, encoding="utf-8")
+                os.replace(tmp, path)
+                report.pages_changed += 1
+                report.links_added += added
+        return report
+
+
+def module_page_targets(nodes: Iterable[Dict], module_pages: Dict[str, str]) -> Dict[str, str]:
+    """Entity name -> page of the module it was extracted from (first source file)"""
+    from lightrag.constants import GRAPH_FIELD_SEP
+
+    targets = {}
+    for node in nodes:
+        name = node.get("id") or node.get("entity_name")
+        source = (node.get("file_path") or "").split(GRAPH_FIELD_SEP)[0]
+        if name and source in module_pages and linkable(name):
+            targets[name] = module_pages[source]
+    return targets
+
+
+def load_aliases(workspace_dir: Path) -> Dict[str, str]:
+    from .canonicalize import ALIAS_FILE
+
+    path = Path(workspace_dir) / ALIAS_FILE
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+async def cross_link(rag, config) -> CrossLinkReport:
+    """Link entity mentions across the generated wiki
+
+    Definition headings are the preferred targets. With ``API_FANOUT`` on,
+    graph entities without one link to the page of the module they were
+    extracted from.
+    """
+    wiki_dir = Path(config.output_dir)
+    targets = {}
+    if config.api_fanout:
+        from .fanout import FANOUT_CATEGORY, FANOUT_DIR, api_units
+
+        repo_path = Path(config.repo_path)
+        module_pages = {
+            path.relative_to(repo_path).as_posix(): f"{FANOUT_CATEGORY}/{FANOUT_DIR}/{unit.page}"
+            for unit in api_units(config, config.api_fanout) for path in unit.files
+        }
+        nodes = await rag.chunk_entity_relation_graph.get_all_nodes()
+        targets.update(module_page_targets(nodes, module_pages))
+    targets.update(heading_targets(wiki_dir))
+    aliases = load_aliases(Path(config.working_dir) / config.workspace)
+    return CrossLinker(targets, aliases).link_wiki(wiki_dir)
@@ -0,0 +1,250 @@
+"""API reference fan-out - one wiki page per module or package, with generated indexes
+
+The base wiki has a single ``public-api`` page, which doesn't scale past a
+few dozen modules. With ``API_FANOUT=module`` (or ``package``) every
+module (or package) gets its own page under ``04-api-reference/modules/``:
+a short LLM overview written from the module's file summary, its
+signatures and a small local retrieval, followed by the signatures
+rendered from ``ast``. Each directory gets a deterministic README index.
+
+Pages are scheduled on the generator's worker pool after the base pages.
+Nothing is kept per page except a one-line summary for the indexes, so
+memory stays flat with thousands of pages. A page is skipped when its
+fingerprint (prompt and module source hash) is unchanged, and the
+fingerprints are saved as pages finish, so an interrupted run resumes
+where it stopped.
+"""
+import hashlib
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Set
+
+from .generator import page_summary
+from .renderers import api_modules, module_api, module_name
+from .retrieval import Retrieval, context_fingerprint
+from .scheduler import DAGScheduler, Progress
+from .streaming import write_page
+
+FANOUT_CATEGORY = "04-api-reference"
+FANOUT_DIR = "modules"
+FANOUT_LEVELS = ("module", "package")
+FANOUT_TOP_K = 20
+FANOUT_PRIORITY = 2  # after the base wiki's pages
+# Package-level page of the modules outside any package (not a valid package path)
+ROOT_UNIT_PAGE = "__root__.md"
+# Persist fingerprints every N finished pages so interrupted runs resume
+FINGERPRINT_SAVE_EVERY = 25
+
+FANOUT_PROMPT = """Write the overview for the API reference page of the {level} `{name}`.
+
+Explain what it is for, how its main classes and functions fit together, and
+show one short usage example. Don't list every signature; the full list of
+public classes and functions follows your text on the page.
+
+Summary: {summary}
+
+Public API:
+{entries}
+"""
+
+
+@dataclass
+class ApiUnit:
+    """One fan-out page: a module, or a package and its modules"""
+
+    name: str                      # dotted name
+    page: str                      # page path under modules/, e.g. "repowiki/storage/wal.md"
+    files: List[Path] = field(default_factory=list)
+
+
+def api_units(config, level: str = "module") -> List[ApiUnit]:
+    """Pages to generate, in a stable order"""
+    if level not in FANOUT_LEVELS:
+        raise ValueError(f"Unknown API fan-out level: {level} (choose from {FANOUT_LEVELS})")
+    repo_path = Path(config.repo_path)
+    units: Dict[str, ApiUnit] = {}
+    for path in api_modules(config):
+        if level == "package":
+            name = module_name(path.parent / "__init__.py", repo_path)
+        else:
+            name = module_name(path, repo_path)
+        if name:
+            page = "/".join(name.split(".")) + ".md"
+        elif level == "package":
+            # Top-level modules share one page named after the repository
+            name, page = config.repo_name or repo_path.name, ROOT_UNIT_PAGE
+        else:
+            continue
+        unit = units.setdefault(page, ApiUnit(name, page))
+        unit.files.append(path)
+    return sorted(units.values(), key=lambda unit: unit.page)
+
+
+def _directories(page: str) -> List[str]:
+    """"a/b/c.md" -> ["a/b", "a", ""]"""
+    parents = [str(p) for p in PurePosixPath(page).parents]
+    return ["" if p == "." else p for p in parents]
+
+
+class ApiFanout:
+    """Adds per-module API pages and their indexes to a generator's scheduler"""
+
+    def __init__(self, generator, level: str = "module"):
+        self.generator = generator
+        self.config = generator.config
+        self.level = level
+        self.units = api_units(self.config, level)
+        self.root = Path(self.config.output_dir) / FANOUT_CATEGORY / FANOUT_DIR
+        self.category_title = "API Reference"
+        self.summaries: Dict[str, str] = {}  # page -> one-line summary for the indexes
+        self.progress = Progress(len(self.units), "API pages")
+        self.file_summaries: Dict[str, str] = {}
+        if self.config.summary_tree:
+            from .summary_tree import load_tree
+
+            # The indexer's per-file summaries, shared by every page
+            tree = load_tree(Path(self.config.working_dir) / self.config.workspace)
+            self.file_summaries = {p: n.summary for p, n in tree.items() if n.kind == "file"}
+
+    def _job(self, page: str) -> str:
+        return f"{FANOUT_CATEGORY}/{FANOUT_DIR}/{page}"
+
+    def add_jobs(self, scheduler: DAGScheduler, category_title: str) -> Optional[str]:
+        """Schedule every page and index; returns the root index job"""
+        if not self.units:
+            return None
+        self.category_title = category_title
+        children: Dict[str, Set[str]] = {}
+        for unit in self.units:
+            job = self._job(unit.page[:-3])
+            scheduler.add(job, partial(self.generate_unit, unit), priority=FANOUT_PRIORITY)
+            directories = _directories(unit.page)
+            children.setdefault(directories[0], set()).add(job)
+            for child, parent in zip(directories, directories[1:]):
+                children.setdefault(parent, set()).add(self._job(f"{child}/README"))
+        for directory in sorted(children, key=lambda d: -d.count("/") - bool(d)):
+            job = self._job(f"{directory}/README" if directory else "README")
+            scheduler.add(
+                job, partial(self.generate_index, directory), deps=sorted(children[directory]),
+                priority=FANOUT_PRIORITY,
+            )
+        return self._job("README")
+
+    def _crumbs(self, parts: List[str]) -> str:
+        return " > ".join(["Home", self.category_title, "Module Reference", *parts])
+
+    async def generate_unit(self, unit: ApiUnit) -> Optional[str]:
+        """Write one module's page, or keep it if its inputs are unchanged"""
+        generator = self.generator
+        key = f"{FANOUT_CATEGORY}/{FANOUT_DIR}/{unit.page}"
+        path = Path(self.config.output_dir) / key
+        entry = (FANOUT_CATEGORY, f"{FANOUT_DIR}/{unit.page[:-3]}", unit.name)
+        try:
+            repo_path = Path(self.config.repo_path)
+            apis = [api for api in (module_api(p, repo_path) for p in unit.files) if api]
+            if self.level == "package":
+                entries = "\n\n".join(
+                    f"## `{api.name}`\n\n{api.entries}" for api in apis if api.entries
+                )
+            else:
+                entries = "\n\n".join(api.entries for api in apis)
+            relative = [p.relative_to(repo_path).as_posix() for p in unit.files]
+            summary = " ".join(
+                self.file_summaries.get(p) or next((a.summary for a in apis if a.summary), "")
+                for p in relative[:5]
+            ).strip()
+            prompt = FANOUT_PROMPT.format(
+                level=self.level, name=unit.name, summary=summary or "n/a",
+                entries=entries or "(no public classes or functions)",
+            )
+            source = hashlib.md5()
+            for file in unit.files:
+                source.update(file.read_bytes())
+            fingerprint = context_fingerprint(
+                prompt, "fanout", FANOUT_TOP_K, self.config.llm_model_name, [source.hexdigest()]
+            )
+
+            if (not generator.force and path.exists()
+                    and generator.fingerprints.unchanged(key, fingerprint)):
+                generator.reused_pages += 1
+                generator.generated_pages.append(entry)
+                text = path.read_text(encoding="utf-8")
+                self.summaries[unit.page] = page_summary(text.split("\n\n", 1)[-1])
+                return unit.page
+
+            started = time.perf_counter()
+            retrieval = await generator.retrieve(
+                f"{unit.name}: {summary}", "local", FANOUT_TOP_K, memo=False
+            )
+            if retrieval.system_prompt is None:  # nothing retrieved; write from the prompt alone
+                retrieval = Retrieval("", "")
+            response = await generator.complete(prompt, retrieval, stream=self.config.stream_pages)
+
+            async def body():
+                yield f"{self._crumbs(unit.name.split('.'))}\n\n"
+                if isinstance(response, str):
+                    yield response
+                else:
+                    async for chunk in response:
+                        yield chunk
+                if entries:
+                    yield f"\n\n## Public API\n\n{entries}\n"
+
+            content, _ = await write_page(path, f"`{unit.name}`", body(), started)
+            if not content:
+                return None
+            generator.fingerprints.record(key, fingerprint)
+            generator.generated_pages.append(entry)
+            self.summaries[unit.page] = page_summary(content)
+            return unit.page
+        except Exception as e:
+            print(f"❌ Error generating API page {unit.name}: {e}")
+            return None
+        finally:
+            self.progress.tick()
+            if self.progress.done % FINGERPRINT_SAVE_EVERY == 0:
+                generator.fingerprints.save()
+
+    async def generate_index(self, directory: str):
+        """Deterministic README listing a directory's pages and subdirectories"""
+        prefix = f"{directory}/" if directory else ""
+        pages, subdirectories = [], {}
+        for unit in self.units:
+            if not unit.page.startswith(prefix):
+                continue
+            rest = unit.page[len(prefix):]
+            if "/" in rest:
+                child = rest.split("/", 1)[0]
+                subdirectories[child] = subdirectories.get(child, 0) + 1
+            else:
+                pages.append(unit)
+        parts = directory.split("/") if directory else []
+        title = ".".join(parts) if parts else "Module Reference"
+        lines = [self._crumbs(parts)]
+        total = len(pages) + sum(subdirectories.values())
+        lines.append(f"{total} {self.level} pages{f' in `{title}`' if parts else ''}.")
+        if subdirectories:
+            lines.append("## Packages\n\n" + "\n".join(
+                f"- [`{'.'.join(parts + [child])}`]({child}/README.md): {count} pages"
+                for child, count in sorted(subdirectories.items())
+            ))
+        if pages:
+            lines.append("## Modules\n\n" + "\n".join(
+                f"- [`{unit.name}`]({PurePosixPath(unit.page).name})"
+                + (f": {self.summaries[unit.page]}" if self.summaries.get(unit.page) else "")
+                for unit in pages
+            ))
+        await write_page(
+            self.root / prefix / "README.md", f"`{title}`" if parts else title,
+            "\n\n".join(lines) + "\n", time.perf_counter(),
+        )
+        if not parts:
+            self.generator.extra_pages.setdefault(FANOUT_CATEGORY, []).append(
+                (f"{FANOUT_DIR}/README", "Module Reference")
+            )
+            self.generator.page_summaries[(FANOUT_CATEGORY, f"{FANOUT_DIR}/README")] = (
+                f"One page per {self.level}: {len(self.units)} pages."
+            )
+            print(f"📚 API reference: {len(self.units)} {self.level} pages")
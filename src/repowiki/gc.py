@@ -0,0 +1,225 @@
+"""Workspace garbage collection - drops knowledge left behind by deleted or rewritten files"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from lightrag.base import DocStatus
+from lightrag.constants import GRAPH_FIELD_SEP
+from lightrag.utils import compute_mdhash_id, sanitize_text_for_encoding
+
+from .config import Config
+
+
+@dataclass
+class GCReport:
+    """What a garbage collection run removed"""
+
+    stale_docs: List[str] = field(default_factory=list)
+    chunks_removed: int = 0
+    nodes_before: int = 0
+    nodes_removed: int = 0
+    edges_before: int = 0
+    edges_removed: int = 0
+    vectors_removed: int = 0
+    vector_slots_reclaimed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _sources(data: dict) -> Set[str]:
+    return {s for s in data.get("source_id", "").split(GRAPH_FIELD_SEP) if s}
+
+
+def _relation_ids(source: str, target: str) -> List[str]:
+    # LightRAG keys relation vectors by either endpoint order
+    return [
+        compute_mdhash_id(source + target, prefix="rel-"),
+        compute_mdhash_id(target + source, prefix="rel-"),
+    ]
+
+
+async def _vector_ids(vdb) -> Optional[Set[str]]:
+    """All ids in a vector store, if the backend can enumerate them"""
+    if hasattr(vdb, "get_all_ids"):
+        return set(await vdb.get_all_ids())
+    if hasattr(type(vdb), "client_storage"):  # NanoVectorDBStorage
+        storage = await vdb.client_storage
+        return {dp["__id__"] for dp in storage["data"]}
+    return None
+
+
+class GarbageCollector:
+    """Removes documents whose files are gone and everything only they referenced
+
+    A document is stale when its file no longer exists, or when the file
+    was re-indexed under new content (another document with the same path
+    matches the current file). Chunks of stale documents are deleted, then
+    every entity and relation is checked against the remaining chunks:
+    those with no live source chunk are dropped, the others lose the dead
+    chunk ids. Vector entries are removed alongside and vector stores that
+    support it are compacted.
+    """
+
+    def __init__(self, rag, config: Config):
+        self.rag = rag
+        self.config = config
+
+    def _current_doc_id(self, file_path: str) -> Optional[str]:
+        """Id LightRAG would give the file's current content (see RepositoryIndexer)"""
+        path = Path(self.config.repo_path) / file_path
+        try:
+            content = path.read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            return None
+        full_content = f"# File: {file_path}\n\n{content}"
+        return compute_mdhash_id(sanitize_text_for_encoding(full_content), prefix="doc-")
+
+    async def find_stale_docs(self) -> Dict[str, List[str]]:
+        """Map of stale doc id -> its chunk ids"""
+        docs = {}
+        for status in DocStatus:
+            docs.update(await self.rag.doc_status.get_docs_by_status(status))
+
+        by_path: Dict[str, List[str]] = {}
+        for doc_id, doc in docs.items():
+            by_path.setdefault(doc.file_path, []).append(doc_id)
+
+        stale = {}
+        for file_path, doc_ids in by_path.items():
+            if not (Path(self.config.repo_path) / file_path).is_file():
+                keep = None
+            else:
+                current = self._current_doc_id(file_path)
+                # Not re-indexed yet: keep the newest version
+                keep = current if current in doc_ids else max(
+                    doc_ids, key=lambda d: docs[d].updated_at or ""
+                )
+            for doc_id in doc_ids:
+                if doc_id != keep:
+                    stale[doc_id] = list(docs[doc_id].chunks_list or [])
+        return stale
+
+    async def collect(self, dry_run: bool = False) -> GCReport:
+        rag = self.rag
+        graph = rag.chunk_entity_relation_graph
+        workspace_dir = Path(self.config.working_dir) / self.config.workspace
+        report = GCReport(bytes_before=directory_size(workspace_dir))
+
+        stale = await self.find_stale_docs()
+        report.stale_docs = sorted(stale)
+        dead_chunks = {c for chunks in stale.values() for c in chunks}
+
+        if hasattr(rag.text_chunks, "get_all"):
+            all_chunks = await rag.text_chunks.get_all()
+            # Chunks of stale documents or of documents no longer tracked at all
+            dead_docs = set(stale) | await rag.doc_status.filter_keys(
+                {c["full_doc_id"] for c in all_chunks.values() if c and c.get("full_doc_id")}
+            )
+            dead_chunks |= {
+                chunk_id for chunk_id, chunk in all_chunks.items()
+                if chunk and chunk.get("full_doc_id") in dead_docs
+            }
+            live_chunks = set(all_chunks) - dead_chunks
+        else:
+            live_chunks = None
+        report.chunks_removed = len(dead_chunks)
+
+        def is_dead(data: dict) -> bool:
+            sources = _sources(data)
+            if live_chunks is not None:
+                sources_alive = sources & live_chunks
+            else:
+                sources_alive = sources - dead_chunks
+            # Only collect knowledge that came from chunks in the first place
+            return bool(sources) and not sources_alive and all(
+                s.startswith("chunk-") for s in sources
+            )
+
+        nodes = await graph.get_all_nodes()
+        edges = await graph.get_all_edges()
+        report.nodes_before, report.edges_before = len(nodes), len(edges)
+
+        dead_nodes = {n["id"] for n in nodes if is_dead(n)}
+        dead_edges = [
+            (e["source"], e["target"]) for e in edges
+            if is_dead(e) or e["source"] in dead_nodes or e["target"] in dead_nodes
+        ]
+        report.nodes_removed, report.edges_removed = len(dead_nodes), len(dead_edges)
+
+        dead_vectors = {
+            "entities_vdb": {compute_mdhash_id(n, prefix="ent-") for n in dead_nodes},
+            "relationships_vdb": {i for s, t in dead_edges for i in _relation_ids(s, t)},
+            "chunks_vdb": set(dead_chunks),
+        }
+        # Vectors whose graph node, edge or chunk no longer exists at all
+        live_nodes = {n["id"] for n in nodes} - dead_nodes
+        dead_edge_set = set(dead_edges)
+        expected = {
+            "entities_vdb": {compute_mdhash_id(n, prefix="ent-") for n in live_nodes},
+            "relationships_vdb": {
+                i for e in edges if (e["source"], e["target"]) not in dead_edge_set
+                for i in _relation_ids(e["source"], e["target"])
+            },
+            "chunks_vdb": live_chunks,
+        }
+        for name, vdb_ids in dead_vectors.items():
+            existing = await _vector_ids(getattr(rag, name))
+            if existing is not None and expected[name] is not None:
+                vdb_ids |= existing - expected[name]
+            if existing is not None:
+                vdb_ids &= existing
+            report.vectors_removed += len(vdb_ids)
+
+        if dry_run:
+            report.bytes_after = report.bytes_before
+            return report
+
+        # Trim dead chunk ids from surviving nodes and edges
+        for node in nodes:
+            if node["id"] in dead_nodes:
+                continue
+            sources = _sources(node)
+            if sources & dead_chunks:
+                kept = [s for s in node["source_id"].split(GRAPH_FIELD_SEP) if s not in dead_chunks]
+                await graph.upsert_node(node["id"], {"source_id": GRAPH_FIELD_SEP.join(kept)})
+        for edge in edges:
+            if (edge["source"], edge["target"]) in dead_edge_set:
+                continue
+            if _sources(edge) & dead_chunks:
+                kept = [s for s in edge["source_id"].split(GRAPH_FIELD_SEP) if s not in dead_chunks]
+                await graph.upsert_edge(
+                    edge["source"], edge["target"], {"source_id": GRAPH_FIELD_SEP.join(kept)}
+                )
+
+        await graph.remove_edges(dead_edges)
+        await graph.remove_nodes(list(dead_nodes))
+        for name, vdb_ids in dead_vectors.items():
+            if vdb_ids:
+                await getattr(rag, name).delete(list(vdb_ids))
+        if dead_chunks:
+            await rag.text_chunks.delete(list(dead_chunks))
+        doc_storages = (rag.full_docs, rag.full_entities, rag.full_relations, rag.doc_status)
+        if stale:
+            for storage in doc_storages:
+                await storage.delete(list(stale))
+
+        for storage in (*doc_storages, rag.text_chunks, graph,
+                        *(getattr(rag, name) for name in dead_vectors)):
+            await storage.index_done_callback()
+
+        # Rewrite vector stores without the deleted (tombstoned) slots
+        for name in dead_vectors:
+            vdb = getattr(rag, name)
+            if hasattr(vdb, "compact"):
+                report.vector_slots_reclaimed += await vdb.compact()
+
+        report.bytes_after = directory_size(workspace_dir)
+        return report
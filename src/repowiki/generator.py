@@ -4,114 +4,326 @@ import os
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import asyncio
+import time
+from functools import partial
 
 from .config import Config
-from .prompts import get_wiki_structure, get_category_index_prompt
+from .metrics import Metrics
+from .prompts import (
+    get_wiki_structure,
+    get_category_index_prompt,
+    get_community_system_prompt,
+    get_summary_tree_system_prompt,
+)
+from .retrieval import (
+    FINGERPRINT_FILE,
+    EmbeddingBatcher,
+    FingerprintStore,
+    Retrieval,
+    context_fingerprint,
+    retrieve_context,
+)
+from .renderers import render_page
+from .scheduler import LATENCY_FILE, DAGScheduler, LatencyHistory
+from .streaming import StreamStats, print_stream_report, write_page
 
 
 class WikiGenerator:
     """Generates hierarchical wiki documentation from knowledge graph"""
     
-    def __init__(self, config: Optional[Config] = None, extended: bool = False):
+    def __init__(
+        self, config: Optional[Config] = None, extended: bool = False, force: bool = False,
+        clients=None, metrics: Optional[Metrics] = None,
+    ):
         self.config = config or Config()
+        # SharedClients when many repositories run in one process (repowiki batch)
+        self.clients = clients
         self.config.validate()
+        self.metrics = metrics or Metrics(self.config.repo_name)
         self.extended = extended
+        self.force = force  # regenerate pages even when their inputs are unchanged
         
         # Set API key in environment
         os.environ["OPENAI_API_KEY"] = self.config.api_key
         
-        # Import LightRAG (assumes it's installed via pip)
-        from lightrag import LightRAG, QueryParam
-        from lightrag.llm.llama_index_impl import (
-            llama_index_complete_if_cache,
-            llama_index_embed,
-        )
-        from lightrag.utils import EmbeddingFunc
-        from llama_index.llms.litellm import LiteLLM
-        from llama_index.embeddings.litellm import LiteLLMEmbedding
-        
-        self.EmbeddingFunc = EmbeddingFunc
-        self.LightRAG = LightRAG
-        self.QueryParam = QueryParam
-        self.llama_index_complete_if_cache = llama_index_complete_if_cache
-        self.llama_index_embed = llama_index_embed
-        self.LiteLLM = LiteLLM
-        self.LiteLLMEmbedding = LiteLLMEmbedding
-        
         print(f"🤖 Using GitHub Copilot models")
         print(f"   LLM: {self.config.llm_model_name}")
         
         self.rag = None
         self.generated_pages = []
+        self.page_summaries = {}
+        # category -> (name, title) of pages added outside the wiki structure
+        self.extra_pages: Dict[str, List[Tuple[str, str]]] = {}
+        self.fingerprints = FingerprintStore(
+            Path(self.config.working_dir) / self.config.workspace / FINGERPRINT_FILE
+        )
+        self.reused_pages = 0
+        self.stream_stats: Dict[str, StreamStats] = {}
+        # (query, mode, top_k) -> retrieval task, shared by pages asking the same thing
+        self.retrievals: Dict[Tuple[str, str, int], asyncio.Task] = {}
+        embedding_func = self.metrics.instrument_embedding(self._create_embedding_func)
+        if self.clients:
+            embedding_func = self.clients.wrap_embedding(
+                self.config.repo_name, self.config.embedding_model_name, embedding_func
+            )
+        self.embedding_batcher = EmbeddingBatcher(embedding_func)
+        self.community_context = ""
+        self.tree_context = ""
+        # Fingerprint items: one per community / tree node in the contexts above
+        self.community_items: List[str] = []
+        self.tree_items: List[str] = []
+        self.ranker = None  # ImportanceRanker, once node importance is loaded
     
     async def _create_llm_func(self, prompt, system_prompt=None, history_messages=[], **kwargs):
         """Create LLM function using LiteLLM."""
         if "llm_instance" not in kwargs:
-            kwargs["llm_instance"] = self.LiteLLM(
+            from llama_index.llms.litellm import LiteLLM
+            
+            kwargs["llm_instance"] = self.clients.llm(self.config) if self.clients else LiteLLM(
                 model=self.config.llm_model_name,
                 api_key=self.config.api_key,
                 temperature=0.7,
             )
-        return await self.llama_index_complete_if_cache(
+        if kwargs.get("stream"):
+            return self._stream_llm(kwargs["llm_instance"], prompt, system_prompt, history_messages)
+        from lightrag.llm.llama_index_impl import llama_index_complete_if_cache
+        
+        complete = self.metrics.retrying(llama_index_complete_if_cache, "llm")
+        return await complete(
             kwargs["llm_instance"], prompt, system_prompt, history_messages
         )
     
+    async def _stream_llm(self, llm, prompt, system_prompt=None, history_messages=[]):
+        """Yield completion text as the model produces it"""
+        from llama_index.core.llms import ChatMessage, MessageRole
+        
+        messages = []
+        if system_prompt:
+            messages.append(ChatMessage(role=MessageRole.SYSTEM, content=system_prompt))
+        for msg in history_messages:
+            role = MessageRole.USER if msg["role"] == "user" else MessageRole.ASSISTANT
+            messages.append(ChatMessage(role=role, content=msg["content"]))
+        messages.append(ChatMessage(role=MessageRole.USER, content=prompt))
+        async for response in await llm.astream_chat(messages):
+            if response.delta:
+                yield response.delta
+    
     async def _create_embedding_func(self, texts):
         """Create embedding function using LiteLLM."""
-        embed_model = self.LiteLLMEmbedding(
+        from lightrag.llm.llama_index_impl import llama_index_embed
+        from llama_index.embeddings.litellm import LiteLLMEmbedding
+        
+        embed_model = self.clients.embed_model(self.config) if self.clients else LiteLLMEmbedding(
             model_name=self.config.embedding_model_name,
             api_key=self.config.api_key,
         )
-        return await self.llama_index_embed(texts, embed_model=embed_model)
+        embed = self.metrics.retrying(llama_index_embed, "embedding")
+        return await embed(texts, embed_model=embed_model)
     
     async def initialize_rag(self):
         """Initialize LightRAG instance"""
+        # Heavy dependencies are imported on first use, not when the CLI starts
+        from lightrag import LightRAG
+        from lightrag.kg.shared_storage import initialize_pipeline_status
+        from lightrag.utils import EmbeddingFunc
+        from .storage import register_storages
+        
+        # Make repowiki storage backends selectable by name
+        register_storages()
+        
+        # Counted around the provider requests, inside the shared caches
+        llm_func = self.metrics.instrument_llm(self._create_llm_func)
+        if self.clients:
+            # Global concurrency budget and cache shared with the other repositories
+            llm_func = self.clients.wrap_llm(self.config.repo_name, self.config.llm_model_name, llm_func)
+        
         # Wrap embedding function with EmbeddingFunc
-        embedding_func_wrapped = self.EmbeddingFunc(
+        embedding_func_wrapped = EmbeddingFunc(
             embedding_dim=1536,  # text-embedding-3-small dimension
             max_token_size=8192,
-            func=self._create_embedding_func,
+            # Concurrent query embeddings are sent to the provider in batches
+            func=self.embedding_batcher,
         )
         
-        self.rag = self.LightRAG(
+        self.rag = LightRAG(
             working_dir=str(self.config.working_dir),
             workspace=self.config.workspace,
-            llm_model_func=self._create_llm_func,
+            llm_model_func=llm_func,
             embedding_func=embedding_func_wrapped,
             llm_model_name=self.config.llm_model_name,
-            # Parallel processing configuration (same as indexer for consistency)
+            # Parallel processing configuration (same as indexer for consistency;
+            # the instance also indexes when shared through repowiki.session)
+            max_parallel_insert=self.config.max_parallel_insert,
             llm_model_max_async=self.config.llm_model_max_async,
             embedding_func_max_async=self.config.embedding_func_max_async,
+            graph_storage=self.config.graph_storage,
+            kv_storage=self.config.kv_storage,
+            vector_storage=self.config.vector_storage,
+            doc_status_storage=self.config.doc_status_storage,
         )
-        # Initialize storages
+        # Initialize storages, and the process-wide pipeline status inserts check (idempotent)
         await self.rag.initialize_storages()
+        await initialize_pipeline_status()
+        self.load_contexts()
         return self.rag
     
+    def load_contexts(self):
+        """Load what the indexer precomputed: community summaries, importance, summary tree"""
+        if self.config.community_summaries:
+            from .communities import community_context, community_items, load_communities
+            
+            communities = load_communities(Path(self.config.working_dir) / self.config.workspace)
+            self.community_context = community_context(communities)
+            self.community_items = community_items(communities)
+            if communities:
+                print(f"🏘️  Using {len(communities)} community summaries for global pages")
+        
+        if self.config.node_importance:
+            from .importance import ImportanceRanker, load_importance
+            
+            scores = load_importance(Path(self.config.working_dir) / self.config.workspace)
+            self.ranker = ImportanceRanker(scores) if scores else None
+        
+        if self.config.summary_tree:
+            from .summary_tree import load_tree, tree_context, tree_items
+            
+            tree = load_tree(Path(self.config.working_dir) / self.config.workspace)
+            self.tree_context = tree_context(tree)
+            self.tree_items = tree_items(tree)
+    
+    async def retrieve(
+        self,
+        prompt: str,
+        mode: str,
+        top_k: int,
+        context: Optional[str] = None,
+        memo: bool = True
+    ) -> Retrieval:
+        """Gather a page's context without running its completion
+        
+        With ``memo``, the result is kept so later pages asking the same
+        (query, mode, top_k) share it.
+        """
+        if mode == "bypass":
+            # Everything the completion needs is already in the prompt
+            return Retrieval("", "")
+        if context == "summary_tree" and self.tree_context:
+            # Reduce step over the precomputed file/directory summaries
+            return Retrieval(
+                self.tree_context,
+                get_summary_tree_system_prompt(self.tree_context),
+                self.tree_items,
+            )
+        if mode == "global" and self.community_context:
+            # Precomputed community summaries replace raw relation retrieval
+            return Retrieval(
+                self.community_context,
+                get_community_system_prompt(self.community_context),
+                self.community_items,
+            )
+        from lightrag import QueryParam
+        
+        if not memo:
+            return await retrieve_context(self.rag, QueryParam, prompt, mode, top_k, self.ranker)
+        key = (prompt, mode, top_k)
+        if key not in self.retrievals:
+            self.retrievals[key] = asyncio.ensure_future(
+                retrieve_context(self.rag, QueryParam, prompt, mode, top_k, self.ranker)
+            )
+        return await self.retrievals[key]
+    
+    async def retrieve_all(self, structure: Dict):
+        """Phase one: run every page's retrieval before any completion starts
+        
+        Retrievals run concurrently, so their query embeddings are batched
+        and pages with the same query share one retrieval. The completions
+        that follow only wait for LLM slots, never for retrieval.
+        """
+        pages = [
+            page for info in structure.values() for page in info.get("pages", [])
+            if not page.renderer
+        ]
+        started = time.perf_counter()
+        # The batcher also served indexing when the instance is shared
+        calls, requests = self.embedding_batcher.calls, self.embedding_batcher.requests
+        results = await asyncio.gather(
+            *(self.retrieve(page.prompt, page.mode, page.top_k, page.context) for page in pages),
+            return_exceptions=True,
+        )
+        failed = sum(isinstance(r, Exception) for r in results)
+        print(f"🔎 Retrieved context for {len(pages)} pages ({len(self.retrievals)} unique queries, "
+              f"{self.embedding_batcher.calls - calls} embeddings in "
+              f"{self.embedding_batcher.requests - requests} requests"
+              f"{f', {failed} failed' if failed else ''}) in {time.perf_counter() - started:.1f}s")
+    
+    async def complete(self, prompt: str, retrieval: Retrieval, stream: bool = False):
+        """Write a page from an already retrieved context
+        
+        With ``stream``, returns an async iterator of text chunks.
+        """
+        if retrieval.system_prompt is None:
+            return retrieval.context
+        return await self.rag.llm_model_func(
+            prompt, system_prompt=retrieval.system_prompt or None, stream=stream
+        )
+    
+    def _count_tokens(self, text: str) -> int:
+        return len(self.rag.tokenizer.encode(text))
+    
     async def generate_page(
         self,
         title: str,
         prompt: str,
         mode: str = "global",
         top_k: int = 60,
-        breadcrumb: str = ""
+        breadcrumb: str = "",
+        context: Optional[str] = None,
+        key: Optional[str] = None,
+        heading: Optional[str] = None
     ) -> Tuple[str, Optional[str]]:
-        """Generate a single wiki page"""
-        print(f"📝 Generating: {title}...")
+        """Generate a single wiki page
         
+        With ``key`` (the page's path in the wiki), the page is written there
+        under ``heading`` as it streams in, and the existing page is kept
+        when the fingerprint of its prompt, settings and retrieved context
+        matches the one recorded when it was last written.
+        """
         try:
             # Add breadcrumb to prompt
             enhanced_prompt = f"BREADCRUMB: {breadcrumb}\n\n{prompt}\n\nInclude breadcrumb at the top."
             
-            result = await self.rag.aquery(
-                enhanced_prompt,
-                param=self.QueryParam(
-                    mode=mode,
-                    top_k=top_k,
-                    only_need_context=False
-                )
+            # Retrieve on the page prompt alone so the breadcrumb doesn't skew it
+            retrieval = await self.retrieve(prompt, mode, top_k, context)
+            fingerprint = context_fingerprint(
+                enhanced_prompt, mode, top_k, self.config.llm_model_name, retrieval.items
+            )
+            existing = self.config.output_dir / key if key else None
+            if (existing is not None and not self.force and existing.exists()
+                    and self.fingerprints.unchanged(key, fingerprint)):
+                print(f"♻️  Unchanged: {title}")
+                self.reused_pages += 1
+                text = existing.read_text(encoding="utf-8")
+                return (title, text.split("\n\n", 1)[-1] if text.startswith("# ") else text)
+            
+            print(f"📝 Generating: {title}...")
+            started = time.perf_counter()
+            response = await self.complete(
+                enhanced_prompt, retrieval, stream=self.config.stream_pages and key is not None
+            )
+            if key is None:
+                print(f"✅ Generated: {title}")
+                return (title, response)
+            
+            count_tokens = self._count_tokens if getattr(self.rag, "tokenizer", None) else None
+            result, stats = await write_page(
+                existing, heading or title, response, started, count_tokens
             )
+            if result:
+                self.fingerprints.record(key, fingerprint)
+                self.stream_stats[key] = stats
             
-            print(f"✅ Generated: {title}")
+            print(f"✅ Generated: {title} (first token {stats.ttft:.1f}s, "
+                  f"{stats.tokens_per_second:.0f} tok/s)")
             return (title, result)
             
         except Exception as e:
@@ -124,67 +336,88 @@ class WikiGenerator:
         with open(path, 'w', encoding='utf-8') as f:
             f.write(content)
     
-    async def generate_category(
-        self,
-        category_id: str,
-        category_info: Dict
-    ):
-        """Generate all pages in a category"""
-        category_path = self.config.output_dir / category_id
-        category_path.mkdir(exist_ok=True)
-        
-        print(f"\n📁 Category: {category_info['title']}")
-        print("-" * 80)
-        
-        # Generate category index if needed
-        if "index_prompt" in category_info or "pages" in category_info:
-            index_prompt = category_info.get(
-                "index_prompt",
-                get_category_index_prompt(category_info["title"])
-            )
-            title, content = await self.generate_page(
+    async def render_leaf_page(self, key: str, breadcrumb: str, page) -> Optional[str]:
+        """Render a page from static analysis, with an optional LLM narrative"""
+        started = time.perf_counter()
+        try:
+            facts = render_page(page.renderer, self.config)
+        except Exception as e:
+            print(f"❌ Error rendering {page.title}: {e}")
+            return None
+        content = f"{breadcrumb}\n\n{facts}\n"
+        if self.config.page_narrative:
+            try:
+                narrative = await self.complete(f"{page.prompt}\n\n{facts}", Retrieval("", ""))
+                if narrative and narrative.strip():
+                    content = f"{breadcrumb}\n\n{narrative.strip()}\n\n{facts}\n"
+            except Exception as e:
+                print(f"⚠️  No narrative for {page.title}: {e}")
+        content, _ = await write_page(self.config.output_dir / key, page.title, content, started)
+        print(f"📐 Rendered: {page.title} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return content
+    
+    async def generate_leaf_page(self, category_id: str, category_info: Dict, page) -> Optional[str]:
+        """Generate one content page and remember its summary for the indexes"""
+        breadcrumb = f"Home > {category_info['title']} > {page.title}"
+        key = f"{category_id}/{page.name}.md"
+        if page.renderer:
+            content = await self.render_leaf_page(key, breadcrumb, page)
+            if content:
+                self.generated_pages.append((category_id, page.name, page.title))
+                self.page_summaries[(category_id, page.name)] = page_summary(content)
+            return content
+        title, content = await self.generate_page(
+            page.title,
+            page.prompt,
+            mode=page.mode,
+            top_k=page.top_k,
+            breadcrumb=breadcrumb,
+            context=page.context,
+            key=key,
+            heading=page.title
+        )
+        if content:
+            self.generated_pages.append((category_id, page.name, page.title))
+            self.page_summaries[(category_id, page.name)] = page_summary(content)
+        return content
+    
+    def _finished_pages(self, category_id: str, category_info: Dict) -> List[Tuple[str, str, str]]:
+        """(name, title, summary) of the category's pages that were generated"""
+        pages = [(page.name, page.title) for page in category_info.get("pages", [])]
+        return [
+            (name, title, self.page_summaries[(category_id, name)])
+            for name, title in pages + self.extra_pages.get(category_id, [])
+            if (category_id, name) in self.page_summaries
+        ]
+    
+    async def generate_category_index(self, category_id: str, category_info: Dict):
+        """Generate a category README from its finished pages (no retrieval)"""
+        pages = self._finished_pages(category_id, category_info)
+        toc = "\n".join(f"- [{title}]({name}.md): {summary}" for name, title, summary in pages)
+        index_prompt = category_info.get(
+            "index_prompt",
+            get_category_index_prompt(category_info["title"])
+        )
+        content = None
+        if pages:
+            _, content = await self.generate_page(
                 f"{category_info['title']} - Index",
-                index_prompt,
-                mode="mix",
-                top_k=100,
-                breadcrumb=f"Home > {category_info['title']}"
+                f"{index_prompt}\n\nPages in this section (link them exactly as given):\n{toc}",
+                mode="bypass",
+                top_k=0,
+                breadcrumb=f"Home > {category_info['title']}",
+                key=f"{category_id}/README.md",
+                heading=category_info["title"]
+            )
+        if not content:
+            content = f"Home > {category_info['title']}\n\n## Pages\n\n{toc}\n"
+            self.write_file(
+                self.config.output_dir / category_id / "README.md",
+                f"# {category_info['title']}\n\n{content}"
             )
-            if content:
-                self.write_file(
-                    category_path / "README.md",
-                    f"# {category_info['title']}\n\n{content}"
-                )
-        
-        # Generate pages in parallel
-        if "pages" in category_info:
-            # Create all page generation tasks
-            page_tasks = []
-            for page in category_info["pages"]:
-                breadcrumb = f"Home > {category_info['title']} > {page.title}"
-                task = self.generate_page(
-                    page.title,
-                    page.prompt,
-                    mode=page.mode,
-                    top_k=page.top_k,
-                    breadcrumb=breadcrumb
-                )
-                page_tasks.append((page, task))
-            
-            # Execute all pages in parallel
-            results = await asyncio.gather(*[task for _, task in page_tasks])
-            
-            # Write results
-            for (page, _), (title, content) in zip(page_tasks, results):
-                if content:
-                    filepath = category_path / f"{page.name}.md"
-                    self.write_file(
-                        filepath,
-                        f"# {page.title}\n\n{content}"
-                    )
-                    self.generated_pages.append((category_id, page.name, page.title))
     
     async def generate_root_index(self, structure: Dict):
-        """Generate root README with full hierarchy"""
+        """Generate root README from the finished pages' titles and summaries"""
         content = f"""# {self.config.repo_name} Repository Wiki
 
 Welcome to the comprehensive {self.config.repo_name} documentation!
@@ -194,23 +427,18 @@ This wiki was automatically generated from the codebase using LightRAG's knowled
 ## 📚 Table of Contents
 
 """
+        quick_links = []
         for category_id, category_info in structure.items():
             content += f"### [{category_info['title']}]({category_id}/README.md)\n\n"
-            
-            if "pages" in category_info:
-                for page in category_info["pages"][:5]:
-                    content += f"- [{page.title}]({category_id}/{page.name}.md)\n"
-            
+            pages = self._finished_pages(category_id, category_info)
+            for name, title, summary in pages:
+                content += f"- [{title}]({category_id}/{name}.md): {summary}\n"
+            if pages:
+                quick_links.append(f"- [{pages[0][1]}]({category_id}/{pages[0][0]}.md)")
             content += "\n"
         
+        content += "\n---\n\n## 🚀 Quick Links\n\n" + "\n".join(quick_links)
         content += """
----
-
-## 🚀 Quick Links
-
-- [Getting Started](03-guides/getting-started.md)
-- [API Reference](04-api-reference/quick-start.md)
-- [FAQ](06-troubleshooting/faq.md)
 
 ---
 
@@ -226,29 +454,103 @@ This wiki was automatically generated from the codebase using LightRAG's knowled
         print("🏗️  GENERATING HIERARCHICAL WIKI (PARALLEL MODE)")
         print("="*80 + "\n")
         
-        # Initialize RAG
-        await self.initialize_rag()
+        # Initialize RAG, unless it is already open (watch mode, daemon)
+        if self.rag is None:
+            await self.initialize_rag()
+        self.metrics.stage = "generate"
+        
+        # Per-run state; pages whose inputs are unchanged are kept via the fingerprints
+        self.generated_pages = []
+        self.page_summaries = {}
+        self.extra_pages = {}
+        self.reused_pages = 0
+        self.stream_stats = {}
+        self.retrievals = {}
         
         # Get wiki structure
         structure = get_wiki_structure(extended=self.extended)
         
-        # Generate all categories in parallel
-        category_tasks = [
-            self.generate_category(category_id, category_info)
-            for category_id, category_info in structure.items()
-        ]
-        await asyncio.gather(*category_tasks)
+        # Phase one: all retrievals, with batched embeddings
+        await self.retrieve_all(structure)
         
-        # Generate root index
-        await self.generate_root_index(structure)
+        # Phase two: completions. Pages first, then each category index, then the root README
+        history = LatencyHistory(Path(self.config.working_dir) / self.config.workspace / LATENCY_FILE)
+        scheduler = DAGScheduler(self.config.generation_workers, history=history)
+        extra_jobs: Dict[str, List[str]] = {}
+        if self.config.api_fanout:
+            from .fanout import FANOUT_CATEGORY, ApiFanout
+            
+            category = structure.setdefault(FANOUT_CATEGORY, {"title": "API Reference", "pages": []})
+            fanout = ApiFanout(self, self.config.api_fanout)
+            root_job = fanout.add_jobs(scheduler, category["title"])
+            if root_job:
+                extra_jobs[FANOUT_CATEGORY] = [root_job]
+            print(f"📚 API fan-out: {len(fanout.units)} {self.config.api_fanout} pages")
+        index_jobs = []
+        for category_id, category_info in structure.items():
+            (self.config.output_dir / category_id).mkdir(parents=True, exist_ok=True)
+            page_jobs = []
+            for page in category_info.get("pages", []):
+                job = f"{category_id}/{page.name}"
+                scheduler.add(
+                    job,
+                    partial(self.generate_leaf_page, category_id, category_info, page),
+                    priority=page.priority,
+                )
+                page_jobs.append(job)
+            index_job = f"{category_id}/README"
+            scheduler.add(
+                index_job,
+                partial(self.generate_category_index, category_id, category_info),
+                deps=page_jobs + extra_jobs.get(category_id, []),
+            )
+            index_jobs.append(index_job)
+        scheduler.add("README", partial(self.generate_root_index, structure), deps=index_jobs)
+        
+        print(f"⚙️  {len(scheduler.jobs)} jobs on {self.config.generation_workers} workers")
+        results = await scheduler.run()
+        for timing in scheduler.timings:
+            self.metrics.record_page(timing.name, timing.wait, timing.run)
+        history.save()
+        self.fingerprints.save()
+        scheduler.print_report()
+        print_stream_report(self.stream_stats)
+        
+        if self.config.cross_links:
+            from .crosslink import cross_link
+            
+            report = await cross_link(self.rag, self.config)
+            report.print_summary()
+        
+        # Content page jobs return their text, or None when they failed; index jobs return nothing
+        failed = sum(result is None for name, result in results.items() if not name.endswith("README"))
+        generated = len(self.generated_pages) - self.reused_pages
+        self.metrics.inc("pages", generated, status="generated")
+        self.metrics.inc("pages", self.reused_pages, status="unchanged")
+        self.metrics.inc("pages", failed, status="failed")
+        # Unchanged pages are the page-level cache: their completions were skipped
+        self.metrics.inc("cache_hits", self.reused_pages, cache="page")
+        self.metrics.write_report(self.config.working_dir, self.config.workspace)
         
         print("\n" + "="*80)
         print("✅ WIKI GENERATION COMPLETE!")
         print(f"📂 Output: {self.config.output_dir}")
-        print(f"📄 Generated {len(self.generated_pages)} pages")
+        print(f"📄 Generated {len(self.generated_pages)} pages "
+              f"({self.reused_pages} unchanged and kept)")
         print("="*80 + "\n")
 
 
+def page_summary(content: str, limit: int = 200) -> str:
+    """First prose paragraph of a generated page, for index entries"""
+    for block in content.split("\n\n"):
+        text = " ".join(block.split())
+        if not text or text.startswith(("#", "---", "BREADCRUMB")) or "Home >" in text:
+            continue
+        text = text.lstrip("*_> ").strip()
+        return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + "…"
+    return ""
+
+
 async def main():
     """CLI entry point for generator"""
     config = Config.from_env()
@@ -2,111 +2,150 @@
 import sys
 import os
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple, Optional
 import asyncio
 
 from .config import Config
+from .metrics import SIZE_BUCKETS, Metrics
+from .storage import bytes_written
+
+
+# File patterns to include (code and docs only)
+INCLUDE_PATTERNS = ['*.py', '*.md', '*.txt']
+
+# Directories to exclude
+EXCLUDE_DIRS = {
+    '__pycache__', '.pytest_cache', 'node_modules',
+    'venv', 'build', 'dist',
+}
 
 
 class RepositoryIndexer:
     """Indexes a code repository into a LightRAG knowledge graph"""
     
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, clients=None,
+                 metrics: Optional[Metrics] = None):
         self.config = config or Config()
+        # SharedClients when many repositories run in one process (repowiki batch)
+        self.clients = clients
         self.config.validate()
+        self.metrics = metrics or Metrics(self.config.repo_name)
         
         # Set API key in environment
         os.environ["OPENAI_API_KEY"] = self.config.api_key
         
-        # Import LightRAG (assumes it's installed via pip)
-        from lightrag import LightRAG
-        from lightrag.llm.llama_index_impl import (
-            llama_index_complete_if_cache,
-            llama_index_embed,
-        )
-        from lightrag.utils import EmbeddingFunc
-        from llama_index.llms.litellm import LiteLLM
-        from llama_index.embeddings.litellm import LiteLLMEmbedding
-        
-        self.EmbeddingFunc = EmbeddingFunc
-        self.LightRAG = LightRAG
-        self.llama_index_complete_if_cache = llama_index_complete_if_cache
-        self.llama_index_embed = llama_index_embed
-        self.LiteLLM = LiteLLM
-        self.LiteLLMEmbedding = LiteLLMEmbedding
-        
         print(f"🤖 Using GitHub Copilot models")
         print(f"   LLM: {self.config.llm_model_name}")
         print(f"   Embedding: {self.config.embedding_model_name}")
         
         self.rag = None
+        self.repo_root = Path(self.config.repo_path).resolve()
+        self.generated_roots = {
+            Path(self.config.working_dir).resolve(), Path(self.config.output_dir).resolve()
+        }
     
     async def _create_llm_func(self, prompt, system_prompt=None, history_messages=[], **kwargs):
         """Create LLM function using LiteLLM."""
         if "llm_instance" not in kwargs:
-            kwargs["llm_instance"] = self.LiteLLM(
+            from llama_index.llms.litellm import LiteLLM
+            
+            kwargs["llm_instance"] = self.clients.llm(self.config) if self.clients else LiteLLM(
                 model=self.config.llm_model_name,
                 api_key=self.config.api_key,
                 temperature=0.7,
             )
-        return await self.llama_index_complete_if_cache(
+        from lightrag.llm.llama_index_impl import llama_index_complete_if_cache
+        
+        complete = self.metrics.retrying(llama_index_complete_if_cache, "llm")
+        return await complete(
             kwargs["llm_instance"], prompt, system_prompt, history_messages
         )
     
     async def _create_embedding_func(self, texts):
         """Create embedding function using LiteLLM."""
-        embed_model = self.LiteLLMEmbedding(
+        from lightrag.llm.llama_index_impl import llama_index_embed
+        from llama_index.embeddings.litellm import LiteLLMEmbedding
+        
+        embed_model = self.clients.embed_model(self.config) if self.clients else LiteLLMEmbedding(
             model_name=self.config.embedding_model_name,
             api_key=self.config.api_key,
         )
-        return await self.llama_index_embed(texts, embed_model=embed_model)
+        embed = self.metrics.retrying(llama_index_embed, "embedding")
+        return await embed(texts, embed_model=embed_model)
     
     async def initialize_rag(self):
         """Initialize LightRAG instance"""
+        # Heavy dependencies are imported on first use, not when the CLI starts
+        from lightrag import LightRAG
+        from lightrag.utils import EmbeddingFunc
+        from .storage import register_storages
+        
+        # Make repowiki storage backends selectable by name
+        register_storages()
+        
+        # Counted around the provider requests, inside the shared caches
+        llm_func = self.metrics.instrument_llm(self._create_llm_func)
+        embedding_func = self.metrics.instrument_embedding(self._create_embedding_func)
+        if self.clients:
+            # Global concurrency budget and caches shared with the other repositories
+            llm_func = self.clients.wrap_llm(self.config.repo_name, self.config.llm_model_name, llm_func)
+            embedding_func = self.clients.wrap_embedding(
+                self.config.repo_name, self.config.embedding_model_name, embedding_func
+            )
+        
         # Wrap embedding function with EmbeddingFunc
-        embedding_func_wrapped = self.EmbeddingFunc(
+        embedding_func_wrapped = EmbeddingFunc(
             embedding_dim=1536,  # text-embedding-3-small dimension
             max_token_size=8192,
-            func=self._create_embedding_func,
+            func=embedding_func,
         )
         
-        self.rag = self.LightRAG(
+        self.rag = LightRAG(
             working_dir=str(self.config.working_dir),
             workspace=self.config.workspace,
-            llm_model_func=self._create_llm_func,
+            llm_model_func=llm_func,
             embedding_func=embedding_func_wrapped,
             llm_model_name=self.config.llm_model_name,
             # Parallel processing configuration (configurable)
             max_parallel_insert=self.config.max_parallel_insert,
             llm_model_max_async=self.config.llm_model_max_async,
             embedding_func_max_async=self.config.embedding_func_max_async,
+            graph_storage=self.config.graph_storage,
+            kv_storage=self.config.kv_storage,
+            vector_storage=self.config.vector_storage,
+            doc_status_storage=self.config.doc_status_storage,
         )
         # Initialize storages (required for JsonDocStatusStorage)
         await self.rag.initialize_storages()
         return self.rag
     
+    def is_indexable(self, file_path: Path) -> bool:
+        """Whether a file is code or docs to index (size aside)"""
+        # File patterns to include (code and docs only)
+        if not any(file_path.match(pattern) for pattern in INCLUDE_PATTERNS):
+            return False
+        resolved = file_path.resolve()
+        try:
+            parts = resolved.relative_to(self.repo_root).parts
+        except ValueError:
+            return False  # outside the repository
+        
+        # Skip excluded directories and any directory starting with "." (hidden directories)
+        if any(part in EXCLUDE_DIRS or part.startswith('.') or part.endswith('.egg-info')
+               for part in parts[:-1]):
+            return False
+        
+        # Skip repowiki's own storage and generated wiki
+        return not self.generated_roots.intersection(resolved.parents)
+    
     def collect_files(self) -> List[Path]:
         """Collect files to index from repository"""
         repo_path = Path(self.config.repo_path)
         
-        # File patterns to include (code and docs only)
-        include_patterns = ['*.py', '*.md', '*.txt']
-        
-        # Directories to exclude
-        exclude_dirs = {
-            '__pycache__', '.pytest_cache', 'node_modules',
-            'venv', 'build', 'dist', '*.egg-info'
-        }
-        
         files = []
-        for pattern in include_patterns:
+        for pattern in INCLUDE_PATTERNS:
             for file_path in repo_path.rglob(pattern):
-                # Skip if in excluded directory
-                if any(excluded in file_path.parts for excluded in exclude_dirs):
-                    continue
-                
-                # Skip any directory starting with "." (hidden directories)
-                if any(part.startswith('.') for part in file_path.parts):
+                if not self.is_indexable(file_path):
                     continue
                     
                 # Skip if too small
@@ -153,8 +192,10 @@ class RepositoryIndexer:
         print("INDEXING REPOSITORY (PARALLEL MODE)")
         print("=" * 80)
         
-        # Initialize RAG
-        await self.initialize_rag()
+        # Initialize RAG, unless an open instance was handed over
+        if self.rag is None:
+            await self.initialize_rag()
+        self.metrics.stage = "index"
         
         print(f"⚡ Parallel processing enabled:")
         print(f"   - max_parallel_insert: {self.rag.max_parallel_insert}")
@@ -164,34 +205,64 @@ class RepositoryIndexer:
         
         # Collect files
         files_to_index = self.collect_files()
+        self.metrics.inc("files_discovered", len(files_to_index))
         print(f"📁 Found {len(files_to_index)} files to index")
         print()
         
         # Read all file contents
         print("📖 Reading files...")
-        read_tasks = [self.read_file_content(f) for f in files_to_index]
-        read_results = await asyncio.gather(*read_tasks)
-        
-        # Separate successful reads from failures
-        contents = []
-        file_paths = []
-        skipped_count = 0
-        
-        for (success, content, rel_path) in read_results:
-            if success:
-                contents.append(content)
-                file_paths.append(rel_path)
-            else:
-                skipped_count += 1
-        
-        print(f"✅ Successfully read {len(contents)} files")
+        files, skipped_count = await self.read_files(files_to_index)
+        
+        print(f"✅ Successfully read {len(files)} files")
         print(f"⏭️  Skipped {skipped_count} files (too small or errors)")
         print()
         
-        if not contents:
+        if not files:
             print("⚠️  No files to index!")
+            self.metrics.write_report(self.config.working_dir, self.config.workspace)
             return 0, skipped_count, 0
         
+        written_before = bytes_written()
+        
+        indexed_count, error_count = await self.insert_files(files)
+        if indexed_count:
+            await self.post_index(files)
+        
+        print("\n" + "=" * 80)
+        print("INDEXING COMPLETE")
+        print("=" * 80)
+        print(f"✅ Successfully indexed: {indexed_count} files")
+        print(f"⏭️  Skipped: {skipped_count} files (too small)")
+        print(f"❌ Errors: {error_count} files")
+        print(f"📁 Storage: {self.config.working_dir}")
+        written = bytes_written() - written_before
+        if written and indexed_count:
+            print(f"💾 Storage writes: {written / 1024:.1f} KiB "
+                  f"({written / indexed_count / 1024:.1f} KiB per document)")
+        self.metrics.inc("storage_bytes_written", written)
+        self.metrics.write_report(self.config.working_dir, self.config.workspace)
+        print("=" * 80)
+        
+        return indexed_count, skipped_count, error_count
+    
+    async def read_files(self, paths: List[Path]) -> Tuple[Dict[str, str], int]:
+        """Read files for indexing; returns (relative path -> content, skipped count)"""
+        read_results = await asyncio.gather(*(self.read_file_content(f) for f in paths))
+        files = {rel_path: content for success, content, rel_path in read_results if success}
+        self.metrics.inc("files_read", len(files))
+        self.metrics.inc("files_skipped", len(read_results) - len(files))
+        for content in files.values():
+            self.metrics.observe("file_size_bytes", len(content.encode("utf-8")), SIZE_BUCKETS)
+        return files, len(read_results) - len(files)
+    
+    async def insert_files(self, files: Dict[str, str]) -> Tuple[int, int]:
+        """Insert documents (relative path -> content); returns (indexed, errors)"""
+        from lightrag.utils import statistic_data
+        
+        contents, file_paths = list(files.values()), list(files)
+        # LightRAG counts extraction calls answered from its LLM response cache
+        cached_before = statistic_data["llm_cache"]
+        
         # Use LightRAG's batch insert with automatic parallelization
         print(f"🚀 Starting parallel batch indexing of {len(contents)} files...")
         print(f"   This will process up to {self.rag.max_parallel_insert} documents concurrently")
@@ -224,16 +295,73 @@ class RepositoryIndexer:
                     print(f"   ✗ Error indexing {file_path}: {e}")
                     error_count += 1
         
-        print("\n" + "=" * 80)
-        print("INDEXING COMPLETE")
-        print("=" * 80)
-        print(f"✅ Successfully indexed: {indexed_count} files")
-        print(f"⏭️  Skipped: {skipped_count} files (too small)")
-        print(f"❌ Errors: {error_count} files")
-        print(f"📁 Storage: {self.config.working_dir}")
-        print("=" * 80)
+        self.metrics.inc("documents_inserted", indexed_count)
+        self.metrics.inc("documents_failed", error_count)
+        self.metrics.inc("cache_hits", statistic_data["llm_cache"] - cached_before, cache="llm_response")
+        return indexed_count, error_count
+    
+    async def post_index(self, files: Dict[str, str], removed: Iterable[str] = (),
+                         changed_only: bool = False):
+        """Whole-graph steps after inserting: canonicalize, importance, communities, summary tree
         
-        return indexed_count, skipped_count, error_count
+        ``files`` covers the whole repository (relative path -> content), or
+        with ``changed_only`` just the changed files: the summary tree then
+        keeps every other cached file except the ``removed`` paths.
+        """
+        if self.config.canonicalize_entities:
+            from .canonicalize import EntityCanonicalizer
+            
+            await self._post_step(
+                "canonicalize", "🧬 Canonicalizing entity names",
+                lambda: EntityCanonicalizer(self.rag, self.config).run(),
+            )
+        
+        if self.config.node_importance:
+            from .importance import NodeImportance
+            
+            await self._post_step(
+                "importance", "⭐ Scoring node importance",
+                lambda: NodeImportance(self.rag, self.config).refresh(
+                    prune_fraction=self.config.importance_prune_fraction
+                ),
+            )
+        
+        if self.config.community_summaries:
+            from .communities import CommunityBuilder
+            
+            await self._post_step(
+                "communities", "🏘️  Summarizing graph communities",
+                lambda: CommunityBuilder(self.rag, self.config).build(),
+            )
+        
+        if self.config.summary_tree:
+            from .summary_tree import SummaryTreeBuilder
+            
+            contents = {
+                path: content.split("\n\n", 1)[-1]  # drop the "# File:" header
+                for path, content in files.items()
+            }
+            await self._post_step(
+                "summary_tree", "🌳 Summarizing files and directories",
+                lambda: SummaryTreeBuilder(self.rag, self.config).build(
+                    contents, removed=removed, incremental=changed_only
+                ),
+            )
+    
+    async def _post_step(self, step: str, title: str, run: Callable[[], Awaitable]):
+        """Run one post-index step; a failure is reported but doesn't fail indexing
+        
+        The documents are already in the graph, and the step runs again
+        after the next index.
+        """
+        print(f"\n{title}...")
+        try:
+            report = await run()
+        except Exception as e:
+            print(f"⚠️  Step {step} failed: {type(e).__name__}: {e}")
+            self.metrics.inc("post_index_failures", step=step)
+            return
+        report.print_summary()
 
 
 async def main():
@@ -0,0 +1,309 @@
+"""Run metrics - counters and histograms, exported as JSON and Prometheus text
+
+Indexing and generation record what they did into a ``Metrics`` object
+(shared by both when they run in one ``WikiSession``). At the end of each
+index and generate step it is written to the workspace:
+
+- ``<working_dir>/<workspace>/metrics.json``: every series, plus per-page timings
+- ``<working_dir>/<workspace>/metrics.prom``: Prometheus text format, for the
+  node_exporter textfile collector (``--collector.textfile.directory``)
+
+Counters are cumulative over the process, so in watch mode and the daemon
+each report covers every update so far. Token counts are estimates (about
+four characters per token); calls and latencies are measured around the
+provider request, so they exclude LightRAG's and the shared clients' cache hits,
+which are counted separately.
+"""
+import json
+import os
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .clients import estimate_tokens
+
+METRICS_JSON = "metrics.json"
+METRICS_PROM = "metrics.prom"
+PREFIX = "repowiki_"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKEN_BUCKETS = (64, 256, 1024, 4096, 16384, 65536)
+
+# name -> (type, help); names get PREFIX, counters also a "_total" suffix
+METRICS = {
+    "files_discovered": ("counter", "Files matching the include patterns"),
+    "files_read": ("counter", "Files read for indexing"),
+    "files_skipped": ("counter", "Files skipped as too small or unreadable"),
+    "file_size_bytes": ("histogram", "Size of the files read for indexing"),
+    "documents_inserted": ("counter", "Documents inserted into LightRAG"),
+    "documents_failed": ("counter", "Documents that failed to insert"),
+    "post_index_failures": ("counter", "Post-index steps (communities, summary tree, ...) that failed"),
+    "storage_bytes_written": ("counter", "Bytes written by repowiki storage backends"),
+    "llm_calls": ("counter", "LLM requests sent to the provider"),
+    "llm_errors": ("counter", "LLM requests that failed after retries"),
+    "llm_latency_seconds": ("histogram", "LLM request latency, to the last token when streamed"),
+    "llm_prompt_tokens": ("histogram", "Estimated prompt tokens per LLM request"),
+    "llm_tokens": ("counter", "Estimated LLM tokens sent (in) and received (out)"),
+    "embedding_calls": ("counter", "Embedding requests sent to the provider"),
+    "embedding_texts": ("counter", "Texts embedded"),
+    "embedding_errors": ("counter", "Embedding requests that failed after retries"),
+    "embedding_latency_seconds": ("histogram", "Embedding request latency"),
+    "embedding_tokens": ("counter", "Estimated tokens embedded"),
+    "cache_hits": ("counter", "Work served from a cache instead of a model call"),
+    "retries": ("counter", "Model requests retried after an error"),
+    "rate_limited": ("counter", "Model requests rejected with HTTP 429"),
+    "pages": ("counter", "Wiki pages by outcome"),
+    "page_seconds": ("histogram", "Time a wiki generation job ran"),
+    "page_wait_seconds": ("histogram", "Time a wiki generation job waited for a worker"),
+    "run_seconds": ("gauge", "Seconds since the run started"),
+    "last_report_timestamp_seconds": ("gauge", "Unix time the report was written"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class Histogram:
+    """Observations counted into fixed buckets (upper bounds, +Inf implied)"""
+
+    buckets: Tuple[float, ...]
+    counts: List[int] = field(default_factory=list)
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs as Prometheus expects them"""
+        pairs, total = [], 0
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            pairs.append((format_value(bound), total))
+        return pairs
+
+
+def format_value(value: float) -> str:
+    """A sample value or bucket bound at full precision (integers without exponent)"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    """Whether a provider error is an HTTP 429"""
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return status == 429 or "RateLimit" in type(error).__name__
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    """Counters and histograms of one repository's runs"""
+
+    def __init__(self, repo: Optional[str] = None):
+        self.repo = repo
+        self.stage = "index"  # label of model calls: "index" or "generate"
+        self.started = time.time()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.page_timings: Dict[str, Dict[str, float]] = {}
+        self._retrying: Dict[Tuple[int, str], Callable] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                **labels):
+        key = (name, _labels(labels))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(buckets)
+        self.histograms[key].observe(value)
+
+    def value(self, name: str, **labels) -> float:
+        """A counter's value (0 if never incremented)"""
+        return self.counters.get((name, _labels(labels)), 0)
+
+    def record_page(self, name: str, wait: float, run: float):
+        self.observe("page_seconds", run)
+        self.observe("page_wait_seconds", wait)
+        self.page_timings[name] = {"wait": round(wait, 3), "run": round(run, 3)}
+
+    # Model calls
+
+    def retrying(self, func: Callable, kind: str) -> Callable:
+        """``func`` with its tenacity retries counted (LightRAG's model helpers retry)
+
+        Functions without ``retry_with`` are returned unchanged.
+        """
+        if not hasattr(func, "retry_with"):
+            return func
+        key = (id(func), kind)
+        if key not in self._retrying:
+            def before_sleep(state):
+                self.inc("retries", kind=kind)
+                error = state.outcome.exception() if state.outcome else None
+                if error is not None and is_rate_limit(error):
+                    self.inc("rate_limited", kind=kind)
+
+            self._retrying[key] = func.retry_with(before_sleep=before_sleep)
+        return self._retrying[key]
+
+    def instrument_llm(self, func: Callable) -> Callable:
+        """Count and time a LightRAG ``llm_model_func``"""
+
+        async def llm_func(prompt, system_prompt=None, history_messages=[], **kwargs):
+            stage = self.stage
+            sent = estimate_tokens(
+                prompt + (system_prompt or "") + "".join(m["content"] for m in history_messages)
+            )
+            self.inc("llm_calls", stage=stage)
+            self.inc("llm_tokens", sent, direction="in", stage=stage)
+            self.observe("llm_prompt_tokens", sent, TOKEN_BUCKETS, stage=stage)
+            started = time.perf_counter()
+            try:
+                response = await func(prompt, system_prompt, history_messages, **kwargs)
+            except Exception as e:
+                self._failed("llm", e, stage)
+                raise
+            if kwargs.get("stream") and not isinstance(response, str):
+                return self._stream(response, started, stage)
+            self.observe("llm_latency_seconds", time.perf_counter() - started, stage=stage)
+            self.inc("llm_tokens", estimate_tokens(response or ""), direction="out", stage=stage)
+            return response
+
+        return llm_func
+
+    async def _stream(self, chunks, started: float, stage: str):
+        received = 0
+        try:
+            async for chunk in chunks:
+                received += estimate_tokens(chunk)
+                yield chunk
+        except Exception as e:
+            self._failed("llm", e, stage)
+            raise
+        finally:
+            self.observe("llm_latency_seconds", time.perf_counter() - started, stage=stage)
+            self.inc("llm_tokens", received, direction="out", stage=stage)
+
+    def instrument_embedding(self, func: Callable) -> Callable:
+        """Count and time an embedding function (texts -> vectors)"""
+
+        async def embedding_func(texts, **kwargs):
+            stage = self.stage
+            self.inc("embedding_calls", stage=stage)
+            self.inc("embedding_texts", len(texts), stage=stage)
+            self.inc("embedding_tokens", sum(estimate_tokens(t) for t in texts), stage=stage)
+            started = time.perf_counter()
+            try:
+                return await func(texts, **kwargs)
+            except Exception as e:
+                self._failed("embedding", e, stage)
+                raise
+            finally:
+                self.observe("embedding_latency_seconds", time.perf_counter() - started, stage=stage)
+
+        return embedding_func
+
+    def _failed(self, kind: str, error: BaseException, stage: str):
+        self.inc(f"{kind}_errors", stage=stage)
+        if is_rate_limit(error):
+            self.inc("rate_limited", kind=kind)
+
+    # Reports
+
+    def _common(self) -> Dict[str, str]:
+        return {"repo": self.repo} if self.repo else {}
+
+    def to_dict(self) -> Dict:
+        """Every series as JSON-friendly data"""
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(self.counters.items())
+        ]
+        histograms = [
+            {
+                "name": name, "labels": dict(labels), "count": h.count, "sum": round(h.sum, 6),
+                "mean": round(h.sum / h.count, 6) if h.count else 0.0,
+                "buckets": dict(h.cumulative()),
+            }
+            for (name, labels), h in sorted(self.histograms.items())
+        ]
+        return {
+            "repo": self.repo,
+            "started": self.started,
+            "run_seconds": round(time.time() - self.started, 3),
+            "counters": counters,
+            "histograms": histograms,
+            "pages": self.page_timings,
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        common = self._common()
+        series: Dict[str, List[str]] = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            full = _labels({**common, **dict(labels)})
+            series.setdefault(name, []).append(
+                f"{PREFIX}{name}_total{_format_labels(full)} {format_value(value)}"
+            )
+        for (name, labels), h in sorted(self.histograms.items()):
+            full = {**common, **dict(labels)}
+            lines = series.setdefault(name, [])
+            for le, count in h.cumulative():
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(_labels({**full, 'le': le}))} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(_labels(full))} {format_value(h.sum)}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(_labels(full))} {h.count}")
+        gauge_labels = _format_labels(_labels(common))
+        series["run_seconds"] = [f"{PREFIX}run_seconds{gauge_labels} {time.time() - self.started:.3f}"]
+        series["last_report_timestamp_seconds"] = [
+            f"{PREFIX}last_report_timestamp_seconds{gauge_labels} {time.time():.0f}"
+        ]
+
+        out = []
+        for name, lines in series.items():
+            kind, help_text = METRICS.get(name, ("untyped", name))
+            metric = f"{PREFIX}{name}_total" if kind == "counter" else f"{PREFIX}{name}"
+            out.append(f"# HELP {metric} {help_text}")
+            out.append(f"# TYPE {metric} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+    def write(self, directory: Path) -> Tuple[Path, Path]:
+        """Write the JSON report and the Prometheus textfile (atomically)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = (directory / METRICS_JSON, directory / METRICS_PROM)
+        for path, text in zip(paths, (json.dumps(self.to_dict(), indent=2), self.to_prometheus())):
+            # The textfile collector may read at any time: never expose a partial file
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+        return paths
+
+    def write_report(self, working_dir: Path, workspace: str):
+        """Write both files into the workspace and say where"""
+        json_path, prom_path = self.write(Path(working_dir) / workspace)
+        print(f"📊 Metrics: {json_path} ({prom_path.name} for Prometheus)")
@@ -6,7 +6,7 @@ Refined prompts based on reference implementation with:
 - Better top_k values (30-40 range)
 - Practical sections (dependencies, testing, extension_points)
 """
-from typing import Dict
+from typing import Dict, Optional
 from dataclasses import dataclass
 
 
@@ -18,6 +18,11 @@ class PageDefinition:
     mode: str  # global, local, mix, hybrid, naive
     top_k: int
     prompt: str
+    context: Optional[str] = None  # "summary_tree": answer from the directory summary tree
+    priority: int = 1  # scheduling order, lower first (overview pages are 0)
+    # Render the page from static analysis (see repowiki.renderers); the
+    # prompt then only asks for a short narrative over the rendered facts
+    renderer: Optional[str] = None
 
 
 def get_wiki_structure(extended: bool = False) -> Dict:
@@ -36,6 +41,8 @@ def get_wiki_structure(extended: bool = False) -> Dict:
                     title="Project Overview",
                     mode="global",
                     top_k=30,
+                    context="summary_tree",
+                    priority=0,
                     prompt="""
 Based on the codebase knowledge graph, provide a comprehensive overview of this project.
 
@@ -54,6 +61,7 @@ Be concise but comprehensive (2-3 paragraphs). Focus on what makes this project
                     title="Architecture",
                     mode="global",
                     top_k=30,
+                    priority=0,
                     prompt="""
 Analyze the codebase architecture and describe:
 
@@ -77,6 +85,7 @@ Provide a clear, structured explanation suitable for developers.
                     title="Design Decisions",
                     mode="global",
                     top_k=30,
+                    priority=0,
                     prompt="""
 Explain the core concepts and design principles of this codebase.
 
@@ -177,17 +186,12 @@ Organize by importance and functionality.
                 PageDefinition(
                     name="project-structure",
                     title="Project Structure",
-                    mode="hybrid",
-                    top_k=35,
+                    mode="bypass",
+                    top_k=0,
+                    renderer="project_structure",
                     prompt="""
-Explain the directory/package structure of this codebase.
-
-For the main directories:
-- Directory name
-- Purpose
-- What types of files belong there
-
-This helps developers navigate the codebase.
+In 2-3 sentences, explain how this codebase is organized and where a new
+developer should start reading, based only on the directory tree below.
 """
                 ),
                 PageDefinition(
@@ -215,19 +219,12 @@ Focus on workflows that represent core functionality.
                 PageDefinition(
                     name="public-api",
                     title="Public API",
-                    mode="local",
-                    top_k=40,
+                    mode="bypass",
+                    top_k=0,
+                    renderer="public_api",
                     prompt="""
-Extract and document the main public APIs of this codebase.
-
-For each major API/interface:
-- API name and purpose
-- Main methods/functions
-- Parameters and return types
-- Brief usage example
-
-Focus on APIs that external users would interact with.
-Organize by functionality (e.g., Authentication API, Data API, etc.)
+In 2-3 sentences, summarize which modules and classes form the main entry
+points of this API, based only on the signatures below.
 """
                 ),
                 PageDefinition(
@@ -255,21 +252,12 @@ Focus on common, real-world scenarios.
                 PageDefinition(
                     name="dependencies",
                     title="Dependencies",
-                    mode="hybrid",
-                    top_k=35,
+                    mode="bypass",
+                    top_k=0,
+                    renderer="dependencies",
                     prompt="""
-Analyze the dependencies of this codebase.
-
-List:
-1. External Dependencies
-   - Major libraries/packages used
-   - Purpose of each major dependency
-
-2. System Requirements
-   - Platform requirements (OS, runtime)
-   - Minimum versions if critical
-
-Be concise but cover the most important dependencies.
+In 2-3 sentences, describe what the main dependencies below are used for,
+based only on the declared packages.
 """
                 ),
                 PageDefinition(
@@ -325,3 +313,23 @@ Create an index page for the "{category_title}" section:
 
 Format as markdown.
 """
+
+
+def get_community_system_prompt(community_context: str) -> str:
+    """System prompt for global pages answered from precomputed community summaries"""
+    return f"""You are documenting a code repository. Its knowledge graph has been clustered
+into communities, each summarized below (largest, highest-level clusters first).
+
+{community_context}
+
+Answer using these summaries. Format as markdown."""
+
+
+def get_summary_tree_system_prompt(tree_context: str) -> str:
+    """System prompt for pages reduced from the per-directory summary tree"""
+    return f"""You are documenting a code repository. Every file and directory has been
+summarized bottom-up; the repository, package and directory summaries are below.
+
+{tree_context}
+
+Answer using these summaries. Format as markdown."""
@@ -0,0 +1,292 @@
+"""Deterministic page renderers - wiki pages computed from the repository, no LLM
+
+Some pages document facts that are exact and cheap to compute: declared
+dependencies, the directory tree, the public classes and functions. A
+``PageDefinition`` with ``renderer`` set is rendered here from static
+analysis, so the page is reproducible byte for byte and cannot contain
+anything the repository doesn't. The page's ``prompt`` is then only used
+for an optional short narrative (``PAGE_NARRATIVE``).
+"""
+import ast
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .config import Config
+
+# Same exclusions as the indexer
+EXCLUDE_DIRS = {
+    "__pycache__", ".pytest_cache", "node_modules", "venv", "build", "dist",
+}
+TREE_MAX_DEPTH = 3
+TREE_MAX_ENTRIES = 25  # per directory, the rest are counted
+# Code outside the API surface
+NON_API_DIRS = {"tests", "test", "testing", "benchmarks", "examples", "scripts", "docs"}
+
+
+def _skipped(path: Path, root: Path, exclude: frozenset = frozenset()) -> bool:
+    parts = path.relative_to(root).parts
+    return parts[:1] in exclude or any(
+        part in EXCLUDE_DIRS or part.startswith(".") or part.endswith(".egg-info")
+        for part in parts
+    )
+
+
+def _generated_dirs(config: Config) -> frozenset:
+    """Top-level repository entries holding repowiki's own storage and output"""
+    root = Path(config.repo_path).resolve()
+    entries = set()
+    for path in (config.working_dir, config.output_dir):
+        try:
+            entries.add(Path(path).resolve().relative_to(root).parts[:1])
+        except ValueError:
+            pass  # outside the repository
+    return frozenset(entries)
+
+
+def _table(headers: List[str], rows: List[List[str]]) -> str:
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines += ["| " + " | ".join(cell.replace("|", "\\|") for cell in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def _split_requirement(requirement: str) -> List[str]:
+    """"numpy>=1.24.0; python_version<'3.13'" -> ["numpy", ">=1.24.0; python_version<'3.13'"]"""
+    requirement = requirement.strip()
+    for i, char in enumerate(requirement):
+        if char in "<>=!~;[ @":
+            return [requirement[:i], requirement[i:].strip() or "any"]
+    return [requirement, "any"]
+
+
+def render_dependencies(config: Config) -> str:
+    """Declared dependencies from pyproject.toml, else requirements*.txt"""
+    repo_path = Path(config.repo_path)
+    sections = []
+    declared = 0
+    pyproject = repo_path / "pyproject.toml"
+    if pyproject.exists():
+        data = tomllib.loads(pyproject.read_text(encoding="utf-8"))
+        project = data.get("project", {})
+        runtime = [f"- **Python**: `{project['requires-python']}`"] if "requires-python" in project else []
+        build = data.get("build-system", {})
+        if build.get("build-backend"):
+            runtime.append(f"- **Build backend**: `{build['build-backend']}` "
+                           f"(requires {', '.join(f'`{r}`' for r in build.get('requires', []))})")
+        if runtime:
+            sections.append("## Runtime\n\n" + "\n".join(runtime))
+        declared = len(project.get("dependencies", []))
+        sections.insert(0, f"{declared} runtime dependencies and "
+                           f"{len(project.get('optional-dependencies', {}))} optional groups "
+                           f"declared in `pyproject.toml`.")
+        if project.get("dependencies"):
+            sections.append("## Dependencies\n\n" + _table(
+                ["Package", "Constraint"], [_split_requirement(r) for r in project["dependencies"]]
+            ))
+        for group, requirements in sorted(project.get("optional-dependencies", {}).items()):
+            sections.append(f"## Optional: `{group}`\n\n" + _table(
+                ["Package", "Constraint"], [_split_requirement(r) for r in requirements]
+            ))
+        if project.get("scripts"):
+            sections.append("## Entry Points\n\n" + _table(
+                ["Command", "Target"],
+                [[f"`{name}`", f"`{target}`"] for name, target in sorted(project["scripts"].items())],
+            ))
+    else:
+        for requirements in sorted(repo_path.glob("requirements*.txt")):
+            lines = [
+                line.split("#", 1)[0].strip()
+                for line in requirements.read_text(encoding="utf-8").splitlines()
+            ]
+            rows = [_split_requirement(line) for line in lines if line and not line.startswith("-")]
+            if rows:
+                declared += len(rows)
+                sections.append(f"## {requirements.name}\n\n" + _table(["Package", "Constraint"], rows))
+        if sections:
+            sections.insert(0, f"{declared} dependencies declared in requirements files.")
+    if not sections:
+        return "No pyproject.toml or requirements file declares dependencies."
+    return "\n\n".join(sections)
+
+
+def render_project_structure(config: Config, max_depth: int = TREE_MAX_DEPTH) -> str:
+    """Directory tree with per-directory file counts"""
+    repo_path = Path(config.repo_path)
+    exclude = _generated_dirs(config)
+    lines = [f"{repo_path.resolve().name}/"]
+    counts = {"dirs": 0, "files": 0}
+
+    def walk(directory: Path, prefix: str, depth: int):
+        entries = sorted(
+            (p for p in directory.iterdir() if not _skipped(p, repo_path, exclude)),
+            key=lambda p: (not p.is_dir(), p.name),
+        )
+        shown = entries[:TREE_MAX_ENTRIES]
+        for i, entry in enumerate(shown):
+            last = i == len(shown) - 1 and len(entries) == len(shown)
+            branch, extension = ("└── ", "    ") if last else ("├── ", "│   ")
+            if entry.is_dir():
+                files = sum(
+                    1 for p in entry.rglob("*") if p.is_file() and not _skipped(p, repo_path, exclude)
+                )
+                lines.append(f"{prefix}{branch}{entry.name}/ ({files} files)")
+                if depth < max_depth:
+                    walk(entry, prefix + extension, depth + 1)
+            else:
+                lines.append(f"{prefix}{branch}{entry.name}")
+        if len(entries) > len(shown):
+            lines.append(f"{prefix}└── … {len(entries) - len(shown)} more")
+
+    walk(repo_path, "", 1)
+    for path in repo_path.rglob("*"):
+        if not _skipped(path, repo_path, exclude):
+            counts["dirs" if path.is_dir() else "files"] += 1
+    return (f"{counts['dirs']} directories and {counts['files']} files, "
+            f"shown {max_depth} levels deep.\n\n"
+            "## Directory Tree\n\n```\n" + "\n".join(lines) + "\n```")
+
+
+def module_name(path: Path, repo_path: Path) -> str:
+    """Dotted module name of a file (``src/`` and ``__init__`` dropped)"""
+    parts = list(path.relative_to(repo_path).with_suffix("").parts)
+    if parts[0] == "src" and len(parts) > 1:
+        parts = parts[1:]
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _signature(node) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    for decorator in node.decorator_list:
+        if isinstance(decorator, ast.Name) and decorator.id in ("classmethod", "staticmethod", "property"):
+            prefix = f"@{decorator.id} {prefix}"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def _summary(node) -> str:
+    docstring = ast.get_docstring(node)
+    return docstring.strip().splitlines()[0] if docstring else ""
+
+
+def _exported(tree: ast.Module) -> Optional[List[str]]:
+    """Names listed in a literal ``__all__``, if the module defines one"""
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets
+        ):
+            try:
+                return list(ast.literal_eval(node.value))
+            except ValueError:
+                return None
+    return None
+
+
+def api_modules(config: Config) -> List[Path]:
+    """Python files that make up the public API, sorted
+
+    Only ``src/`` is scanned when the repository has one; tests, scripts,
+    underscore modules and other non-package code are skipped either way.
+    """
+    repo_path = Path(config.repo_path)
+    exclude = _generated_dirs(config)
+    source = repo_path / "src" if (repo_path / "src").is_dir() else repo_path
+    modules = []
+    for path in sorted(source.rglob("*.py")):
+        relative = path.relative_to(repo_path)
+        if _skipped(path, repo_path, exclude) or NON_API_DIRS & set(relative.parts[:-1]):
+            continue
+        if relative.name.startswith("test_") or any(
+            part.startswith("_") and part != "__init__.py" for part in relative.parts
+        ):
+            continue
+        modules.append(path)
+    return modules
+
+
+@dataclass
+class ModuleApi:
+    """Public API of one module"""
+
+    name: str       # dotted module name
+    summary: str    # first line of the module docstring
+    entries: str    # markdown: one ### section per public class or function
+    classes: int
+    functions: int
+
+
+def module_api(path: Path, repo_path: Path) -> Optional[ModuleApi]:
+    """Public classes and functions of a module; None if it can't be parsed"""
+    try:
+        tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    except (SyntaxError, UnicodeDecodeError):
+        return None
+    exported = _exported(tree)
+
+    def public(name: str) -> bool:
+        return name in exported if exported is not None else not name.startswith("_")
+
+    entries = []
+    classes = functions = 0
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and public(node.name):
+            classes += 1
+            bases = f"({', '.join(ast.unparse(b) for b in node.bases)})" if node.bases else ""
+            entries.append(f"### `class {node.name}{bases}`")
+            if _summary(node):
+                entries.append(_summary(node))
+            methods = [
+                item for item in node.body
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+                and (not item.name.startswith("_") or item.name == "__init__")
+            ]
+            if methods:
+                entries.append("\n".join(
+                    f"- `{_signature(m)}`" + (f": {_summary(m)}" if _summary(m) else "")
+                    for m in methods
+                ))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and public(node.name):
+            functions += 1
+            entries.append(f"### `{_signature(node)}`")
+            if _summary(node):
+                entries.append(_summary(node))
+    return ModuleApi(
+        module_name(Path(path), Path(repo_path)), _summary(tree), "\n\n".join(entries),
+        classes, functions,
+    )
+
+
+def render_public_api(config: Config) -> str:
+    """Public classes, functions and method signatures found by ``ast``"""
+    sections = []
+    classes = functions = 0
+    for path in api_modules(config):
+        api = module_api(path, config.repo_path)
+        if api is None or not api.entries:
+            continue
+        classes += api.classes
+        functions += api.functions
+        header = f"## `{api.name}`"
+        if api.summary:
+            header += f"\n\n{api.summary}"
+        sections.append(header + "\n\n" + api.entries)
+    if not sections:
+        return "No public Python classes or functions were found."
+    return (f"{classes} public classes and {functions} public functions "
+            f"in {len(sections)} modules.\n\n" + "\n\n".join(sections))
+
+
+RENDERERS: Dict[str, Callable[[Config], str]] = {
+    "dependencies": render_dependencies,
+    "project_structure": render_project_structure,
+    "public_api": render_public_api,
+}
+
+
+def render_page(renderer: str, config: Config) -> str:
+    """Render a page body with the named renderer"""
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown page renderer: {renderer} (choose from {sorted(RENDERERS)})")
+    return RENDERERS[renderer](config)
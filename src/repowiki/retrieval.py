@@ -0,0 +1,177 @@
+"""Page retrieval - context-only LightRAG retrieval and page input fingerprints"""
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+FINGERPRINT_FILE = "page_fingerprints.json"
+# How long the first embedding call of a batch waits for others to join it
+EMBEDDING_BATCH_WINDOW = 0.01
+EMBEDDING_BATCH_SIZE = 64
+
+
+@dataclass
+class Retrieval:
+    """Context for one page, ready to be completed"""
+
+    context: str
+    # None when retrieval found nothing; context then holds LightRAG's fail response
+    system_prompt: Optional[str]
+    # "<kind>:<id>:<content hash>" for everything the context was built from
+    items: List[str] = field(default_factory=list)
+
+
+def _digest(*parts) -> str:
+    return hashlib.md5("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def retrieval_items(data: Dict) -> List[str]:
+    """Ids and content hashes of the entities, relations and chunks in a retrieval"""
+    items = []
+    for entity in data.get("entities") or []:
+        items.append(f"ent:{entity.get('entity_name')}:"
+                     f"{_digest(entity.get('entity_type'), entity.get('description'))}")
+    for relation in data.get("relationships") or []:
+        items.append(f"rel:{relation.get('src_id')}|{relation.get('tgt_id')}:"
+                     f"{_digest(relation.get('description'), relation.get('keywords'), relation.get('weight'))}")
+    for chunk in data.get("chunks") or []:
+        items.append(f"chunk:{chunk.get('chunk_id')}:{_digest(chunk.get('content'))}")
+    return items
+
+
+def context_fingerprint(prompt: str, mode: str, top_k: int, model: str, items: List[str]) -> str:
+    """Hash of everything that determines a page's completion"""
+    payload = json.dumps([prompt, mode, top_k, model, items], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """Input fingerprint of each generated page, keyed by its path in the wiki"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.fingerprints: Dict[str, str] = {}
+        if self.path.exists():
+            self.fingerprints = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def unchanged(self, key: str, fingerprint: str) -> bool:
+        return self.fingerprints.get(key) == fingerprint
+
+    def record(self, key: str, fingerprint: str):
+        self.fingerprints[key] = fingerprint
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.fingerprints, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+async def retrieve_context(rag, query_param_cls, prompt: str, mode: str, top_k: int,
+                           ranker=None) -> Retrieval:
+    """Run LightRAG retrieval only (``only_need_context=True``), no completion
+    
+    With an ``ImportanceRanker``, entities and relations that tie on
+    relevance are ordered by node importance before the context is cut.
+    """
+    from lightrag.operate import kg_query, naive_query
+    from lightrag.prompt import PROMPTS
+
+    param = query_param_cls(mode=mode, top_k=top_k, only_need_context=True)
+    global_config = asdict(rag)
+    if mode == "naive":
+        result = await naive_query(
+            prompt, rag.chunks_vdb, param, global_config, hashing_kv=rag.llm_response_cache,
+        )
+    else:
+        graph, entities_vdb = rag.chunk_entity_relation_graph, rag.entities_vdb
+        if ranker is not None:
+            graph, entities_vdb = ranker.graph(graph), ranker.entities(entities_vdb)
+        result = await kg_query(
+            prompt,
+            graph,
+            entities_vdb,
+            rag.relationships_vdb,
+            rag.text_chunks,
+            param,
+            global_config,
+            hashing_kv=rag.llm_response_cache,
+            chunks_vdb=rag.chunks_vdb,
+        )
+    # Persist cached keyword extractions, as LightRAG does after each query
+    await rag.llm_response_cache.index_done_callback()
+
+    data = (result.raw_data or {}).get("data") or {}
+    items = retrieval_items(data)
+    if not items:
+        return Retrieval(result.content, None)
+    if mode == "naive":
+        system_prompt = PROMPTS["naive_rag_response"].format(
+            response_type=param.response_type, user_prompt="n/a", content_data=result.content,
+        )
+    else:
+        system_prompt = PROMPTS["rag_response"].format(
+            response_type=param.response_type, user_prompt="n/a", context_data=result.content,
+        )
+    return Retrieval(result.content, system_prompt, items)
+
+
+class EmbeddingBatcher:
+    """Merges concurrent embedding calls into one provider request
+
+    Retrieval embeds every query on its own (``embedding_func([query])``).
+    When many pages retrieve at once, the calls arriving within
+    ``window`` seconds are sent as a single batch of unique texts and
+    each caller gets its own rows back.
+    """
+
+    def __init__(self, func: Callable[[List[str]], Awaitable[np.ndarray]],
+                 window: float = EMBEDDING_BATCH_WINDOW, max_batch: int = EMBEDDING_BATCH_SIZE):
+        self.func = func
+        self.window = window
+        self.max_batch = max_batch
+        self.pending: List[Tuple[List[str], asyncio.Future]] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.calls = 0      # embedding calls received
+        self.requests = 0   # provider requests made
+
+    async def __call__(self, texts: List[str], **kwargs) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((list(texts), future))
+        self.calls += 1
+        if sum(len(t) for t, _ in self.pending) >= self.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self._embed(batch))
+
+    async def _embed(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        unique: Dict[str, int] = {}
+        for texts, _ in batch:
+            for text in texts:
+                unique.setdefault(text, len(unique))
+        self.requests += 1
+        try:
+            embeddings = np.asarray(await self.func(list(unique)))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for texts, future in batch:
+            if not future.done():
+                future.set_result(embeddings[[unique[t] for t in texts]])
@@ -0,0 +1,219 @@
+"""Page scheduler - runs generation jobs as a dependency DAG on a bounded worker pool"""
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+LATENCY_FILE = "page_latency.json"
+# Weight of the newest run in the per-job latency average
+LATENCY_SMOOTHING = 0.5
+
+
+@dataclass
+class Job:
+    """A unit of generation work and the jobs it must wait for"""
+
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    deps: List[str] = field(default_factory=list)
+    priority: int = 1  # lower runs first
+
+
+@dataclass
+class JobTiming:
+    """How long a job waited for a worker and how long it ran"""
+
+    name: str
+    wait: float
+    run: float
+
+
+class LatencyHistory:
+    """Per-job execution time from earlier runs, as a moving average"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.seconds: Dict[str, float] = {}
+        if self.path.exists():
+            self.seconds = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def expected(self, name: str) -> float:
+        """Previous latency, or the average of all jobs for unseen ones"""
+        if name in self.seconds:
+            return self.seconds[name]
+        return sum(self.seconds.values()) / len(self.seconds) if self.seconds else 0.0
+
+    def record(self, name: str, seconds: float):
+        previous = self.seconds.get(name)
+        self.seconds[name] = seconds if previous is None else (
+            LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * previous
+        )
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.seconds, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Progress:
+    """Completed/total with throughput and ETA, printed at most every ``interval`` seconds"""
+
+    def __init__(self, total: int, label: str, interval: float = 5.0):
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.done = 0
+        self.started = time.perf_counter()
+        self.last_print = 0.0
+
+    def eta(self) -> float:
+        """Seconds left at the average rate so far"""
+        if not self.done:
+            return 0.0
+        elapsed = time.perf_counter() - self.started
+        return elapsed / self.done * (self.total - self.done)
+
+    def tick(self, count: int = 1):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.last_print < self.interval and self.done < self.total:
+            return
+        self.last_print = now
+        rate = self.done / max(now - self.started, 1e-9)
+        percent = 100 * self.done / self.total if self.total else 100.0
+        print(f"⏳ {self.label}: {self.done}/{self.total} ({percent:.0f}%) · "
+              f"{rate:.1f}/s · ETA {format_duration(self.eta())}")
+
+
+class DAGScheduler:
+    """Runs jobs once their dependencies finish, at most ``max_workers`` at a time
+
+    Jobs become ready when every dependency has finished (successfully or
+    not - a failed job's result is ``None`` and its dependents still run
+    with whatever else finished). Ready jobs are picked up by a fixed set
+    of workers, so the provider sees a steady, bounded number of requests
+    instead of one burst per category. Among ready jobs, lower priority
+    values go first, then the longest expected runtime (from ``history``)
+    so the slowest pages don't start last and stretch the run.
+    """
+
+    def __init__(self, max_workers: int = 8, history: Optional[LatencyHistory] = None):
+        self.max_workers = max(1, max_workers)
+        self.history = history
+        self.jobs: Dict[str, Job] = {}
+        self.timings: List[JobTiming] = []
+
+    def add(self, name: str, run: Callable[[], Awaitable[Any]], deps: Iterable[str] = (),
+            priority: int = 1):
+        if name in self.jobs:
+            raise ValueError(f"Duplicate job: {name}")
+        self.jobs[name] = Job(name, run, list(deps), priority)
+
+    def _check(self):
+        for job in self.jobs.values():
+            missing = [d for d in job.deps if d not in self.jobs]
+            if missing:
+                raise ValueError(f"Job {job.name} depends on unknown jobs: {missing}")
+        # Kahn's algorithm: every job must be reachable from a job without deps
+        remaining = {name: len(job.deps) for name, job in self.jobs.items()}
+        dependents: Dict[str, List[str]] = {}
+        for job in self.jobs.values():
+            for dep in job.deps:
+                dependents.setdefault(dep, []).append(job.name)
+        ready = [name for name, count in remaining.items() if count == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for child in dependents.get(name, []):
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if seen != len(self.jobs):
+            raise ValueError("Job dependencies contain a cycle")
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every job; returns job name -> result"""
+        self._check()
+        results: Dict[str, Any] = {}
+        if not self.jobs:
+            return results
+
+        waiting = {name: set(job.deps) for name, job in self.jobs.items()}
+        dependents: Dict[str, List[str]] = {}
+        for job in self.jobs.values():
+            for dep in job.deps:
+                dependents.setdefault(dep, []).append(job.name)
+
+        ready: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        ready_at: Dict[str, float] = {}
+        sequence = 0
+
+        def enqueue(name: Optional[str]):
+            nonlocal sequence
+            sequence += 1
+            if name is None:  # shutdown marker, sorts after every job
+                ready.put_nowait((float("inf"), 0.0, sequence, None))
+                return
+            expected = self.history.expected(name) if self.history else 0.0
+            ready_at[name] = time.perf_counter()
+            ready.put_nowait((self.jobs[name].priority, -expected, sequence, name))
+
+        for name, deps in waiting.items():
+            if not deps:
+                enqueue(name)
+        workers = min(self.max_workers, len(self.jobs))
+        remaining = len(self.jobs)
+
+        async def worker():
+            nonlocal remaining
+            while True:
+                *_, name = await ready.get()
+                if name is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    results[name] = await self.jobs[name].run()
+                except Exception as e:
+                    print(f"❌ Job {name} failed: {e}")
+                    results[name] = None
+                elapsed = time.perf_counter() - started
+                self.timings.append(JobTiming(name, started - ready_at[name], elapsed))
+                if self.history is not None:
+                    self.history.record(name, elapsed)
+                for child in dependents.get(name, []):
+                    waiting[child].discard(name)
+                    if not waiting[child]:
+                        enqueue(child)
+                remaining -= 1
+                if remaining == 0:
+                    for _ in range(workers):
+                        enqueue(None)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return results
+
+    def print_report(self):
+        """Per-job queue wait vs execution time, slowest first"""
+        if not self.timings:
+            return
+        width = max(len(t.name) for t in self.timings)
+        print(f"\n⏱️  {'Job'.ljust(width)}  {'Wait':>8}  {'Run':>8}")
+        for timing in sorted(self.timings, key=lambda t: -t.run):
+            print(f"   {timing.name.ljust(width)}  {timing.wait:7.1f}s  {timing.run:7.1f}s")
+        total_wait = sum(t.wait for t in self.timings)
+        total_run = sum(t.run for t in self.timings)
+        print(f"   {'Total'.ljust(width)}  {total_wait:7.1f}s  {total_run:7.1f}s")
@@ -0,0 +1,468 @@
+"""Wiki daemon - keeps workspaces loaded and answers queries over a local HTTP API
+
+``repowiki serve`` pays the import, storage-loading and client setup cost
+once. Opened workspaces (a LightRAG instance with its graph, KV and vector
+stores, plus the page generator around it) stay warm in an LRU of
+``max_workspaces``, so a query only costs its retrieval and completion.
+
+The API speaks JSON over HTTP/1.1, on a TCP port or a Unix socket:
+
+- ``GET /health``: open workspaces and request counts
+- ``POST /query`` ``{"question", "mode"?, "top_k"?}``: answer from the graph
+- ``POST /generate`` ``{"page"}``: (re)generate one page, e.g. ``01-overview/architecture``
+- ``POST /reindex``: index new and changed files into the warm workspace
+
+Every POST also takes ``repo`` (default: the server's repository) and
+optionally ``working_dir``, ``output_dir`` and ``workspace``. Identical
+requests that arrive while one is running share its result; a reindex
+arriving mid-run queues one follow-up run instead.
+
+Trust model: the server binds to localhost (or a Unix socket) and trusts
+its clients to read any repository the server's user can read. It only
+writes inside the server's storage and wiki directories or inside the
+requested repository: ``working_dir``/``output_dir`` outside those, and
+workspace names that aren't plain names, are rejected.
+
+LightRAG keeps each workspace's storage data in process-wide namespaces
+named after the workspace, and doesn't release them on close. Every open
+therefore gets a LightRAG workspace name of its own, linked to the real
+storage directory, and closing releases its data. Document inserts share
+a process-wide pipeline status, so reindexes run one at a time.
+"""
+import asyncio
+import json
+import tempfile
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import Config
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_WORKSPACES = 4
+QUERY_MODE = "mix"
+QUERY_TOP_K = 40
+MAX_BODY = 1 << 20  # bytes
+
+REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """A client error, returned with its HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Coalescer:
+    """Runs one task per key; identical calls made while it runs await the same result"""
+
+    def __init__(self):
+        self.running: Dict[tuple, asyncio.Future] = {}
+        self.queued: Dict[tuple, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def run(self, key: tuple, factory: Callable[[], Awaitable]):
+        task = self.running.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(factory())
+            self.running[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        # One caller disconnecting doesn't cancel the work for the others
+        return await asyncio.shield(task)
+
+    async def run_after(self, key: tuple, factory: Callable[[], Awaitable]):
+        """Like ``run``, but never returns a result whose work started before the call
+
+        A call made while the task runs queues one follow-up run; calls made
+        before the follow-up starts share it.
+        """
+        task = self.queued.get(key)
+        if task is None:
+            running = self.running.get(key)
+            if running is None or running.done():
+                return await self.run(key, factory)
+
+            async def follow_up():
+                await asyncio.wait([running])
+                del self.queued[key]
+                return await self.run(key, factory)
+
+            task = self.queued[key] = asyncio.ensure_future(follow_up())
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: tuple, task: asyncio.Future):
+        if self.running.get(key) is task:
+            del self.running[key]
+
+
+@dataclass
+class Workspace:
+    """An open workspace: its config and a generator with a warm LightRAG"""
+
+    config: Config
+    generator: object
+    active: int = 0  # requests in progress; a busy workspace isn't evicted
+    requests: int = 0
+    opened: float = field(default_factory=time.time)
+    link: Optional[Path] = None  # LightRAG's name for the storage directory
+
+
+class WorkspacePool:
+    """LRU of open workspaces, keyed by (repo, working dir, output dir, workspace)"""
+
+    def __init__(self, base: Config, capacity: int = MAX_WORKSPACES):
+        self.base = base
+        self.capacity = max(1, capacity)
+        self.open: "OrderedDict[tuple, Workspace]" = OrderedDict()
+        self.opening = Coalescer()
+        self.links: Optional[Path] = None  # directory of per-open storage links
+        self.opens = 0
+
+    def config_for(self, request: Dict) -> Config:
+        """Workspace config from a request; unset fields follow the server's config
+
+        ``working_dir`` and ``output_dir`` must be the server's own or lie
+        inside the repository; ``workspace`` must be a plain name.
+        """
+        if "repo" not in request:
+            overrides = {}
+        else:
+            repo = Path(request["repo"])
+            overrides = {
+                "repo_path": repo,
+                "repo_name": None,
+                "working_dir": repo / "repowiki_storage",
+                "output_dir": repo / "wiki_docs",
+            }
+        repo = Path(overrides.get("repo_path", self.base.repo_path)).resolve()
+        for name in ("working_dir", "output_dir"):
+            if request.get(name):
+                path = Path(request[name]).resolve()
+                if path != Path(getattr(self.base, name)).resolve() and not path.is_relative_to(repo):
+                    raise RequestError(403, f"'{name}' must be inside the repository: {path}")
+                overrides[name] = path
+        if request.get("workspace"):
+            workspace = str(request["workspace"])
+            if Path(workspace).name != workspace or workspace in (".", ".."):
+                raise RequestError(400, f"Invalid workspace name: {workspace!r}")
+            overrides["workspace"] = workspace
+        config = replace(self.base, **overrides)
+        if not Path(config.repo_path).exists():
+            raise RequestError(404, f"Repository path does not exist: {config.repo_path}")
+        config.validate()
+        return config
+
+    @staticmethod
+    def key(config: Config) -> tuple:
+        return (
+            str(Path(config.repo_path).resolve()), str(Path(config.working_dir).resolve()),
+            str(Path(config.output_dir).resolve()), config.workspace,
+        )
+
+    async def acquire(self, config: Config) -> Workspace:
+        """The open workspace for ``config``, opening (and evicting) as needed
+
+        The workspace counts as active, and can't be evicted, until ``release``.
+        """
+        key = self.key(config)
+        if key not in self.open:
+            workspace = await self.opening.run(key, lambda: self._open(config))
+            self.open.setdefault(key, workspace)
+        self.open.move_to_end(key)
+        workspace = self.open[key]
+        workspace.active += 1
+        workspace.requests += 1
+        await self._evict()
+        return workspace
+
+    def release(self, workspace: Workspace):
+        workspace.active -= 1
+
+    async def _open(self, config: Config) -> Workspace:
+        from .generator import WikiGenerator
+
+        started = time.perf_counter()
+        link = self._link(config)
+        # The generator reaches the storage directory through the link
+        generator = WikiGenerator(replace(config, working_dir=link.parent, workspace=link.name))
+        try:
+            await generator.initialize_rag()
+        except BaseException:
+            link.unlink()
+            raise
+        print(f"📂 Opened {config.repo_name} ({config.workspace}) "
+              f"in {time.perf_counter() - started:.1f}s")
+        return Workspace(config, generator, link=link)
+
+    def _link(self, config: Config) -> Path:
+        """A new name for the workspace's storage directory: a symlink to it
+
+        LightRAG names the directory and its in-process data after the
+        workspace, so the same name in another storage directory, or an
+        earlier open of this one, would share data with this open.
+        """
+        if self.links is None:
+            self.links = Path(tempfile.mkdtemp(prefix="repowiki-serve-"))
+        self.opens += 1
+        storage = Path(config.working_dir).resolve() / config.workspace
+        storage.mkdir(parents=True, exist_ok=True)
+        link = self.links / f"{config.workspace}-{self.opens}"
+        link.symlink_to(storage, target_is_directory=True)
+        return link
+
+    async def _evict(self):
+        for key in list(self.open):
+            if len(self.open) <= self.capacity:
+                return
+            workspace = self.open[key]
+            if workspace.active:
+                continue  # in use; the next least recently used goes instead
+            del self.open[key]
+            await close_workspace(workspace)
+
+    async def close(self):
+        while self.open:
+            _, workspace = self.open.popitem()
+            await close_workspace(workspace)
+        if self.links is not None:
+            self.links.rmdir()
+            self.links = None
+
+
+async def close_workspace(workspace: Workspace):
+    generator = workspace.generator
+    generator.fingerprints.save()
+    try:
+        await generator.rag.finalize_storages()
+    except Exception as e:
+        print(f"⚠️  Error closing {workspace.config.repo_name}: {e}")
+    release_shared_data(generator.rag)
+    if workspace.link is not None:
+        workspace.link.unlink(missing_ok=True)
+    print(f"📁 Closed {workspace.config.repo_name} ({workspace.config.workspace})")
+
+
+def release_shared_data(rag):
+    """Drop LightRAG's in-process copy of a closed instance's storage data
+
+    finalize_storages() flushes the data but keeps it for the life of the
+    process, and LightRAG has no call to release one namespace.
+    """
+    from lightrag.kg import shared_storage
+
+    registries = (shared_storage._shared_dicts, shared_storage._init_flags,
+                  shared_storage._update_flags)
+    for storage in vars(rag).values():
+        namespace = getattr(storage, "final_namespace", None)
+        if isinstance(namespace, str):
+            for registry in registries:
+                if registry is not None:
+                    registry.pop(namespace, None)
+
+
+class WikiServer:
+    """Routes API requests to warm workspaces"""
+
+    def __init__(self, base: Config, max_workspaces: int = MAX_WORKSPACES):
+        self.pool = WorkspacePool(base, max_workspaces)
+        self.coalescer = Coalescer()
+        # LightRAG's pipeline status is global: a concurrent insert into
+        # another workspace would return without processing its documents
+        self.index_lock = asyncio.Lock()
+        self.started = time.time()
+        self.served = 0
+        self.routes: Dict[Tuple[str, str], Callable] = {
+            ("GET", "/health"): self.health,
+            ("POST", "/query"): self.query,
+            ("POST", "/generate"): self.generate,
+            ("POST", "/reindex"): self.reindex,
+        }
+
+    async def health(self, request: Dict) -> Dict:
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started, 1),
+            "served": self.served,
+            "coalesced": self.coalescer.coalesced,
+            "workspaces": [
+                {"repo": key[0], "workspace": key[3], "requests": ws.requests, "active": ws.active}
+                for key, ws in self.pool.open.items()
+            ],
+        }
+
+    async def _in(self, request: Dict, operation: str, key: tuple, work: Callable,
+                  fresh: bool = False) -> Dict:
+        """Run ``work(workspace)`` on the request's workspace, coalescing identical requests
+
+        With ``fresh``, a request arriving mid-run waits for a follow-up run
+        (shared with the other late requests) instead of the running one.
+        """
+        config = self.pool.config_for(request)
+        workspace_key = WorkspacePool.key(config)
+
+        async def run():
+            workspace = await self.pool.acquire(config)
+            started = time.perf_counter()
+            try:
+                result = await work(workspace)
+            finally:
+                self.pool.release(workspace)
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result
+
+        coalesce = self.coalescer.run_after if fresh else self.coalescer.run
+        return await coalesce((workspace_key, operation, *key), run)
+
+    async def query(self, request: Dict) -> Dict:
+        question = request.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise RequestError(400, "'question' is required")
+        mode = request.get("mode", QUERY_MODE)
+        if mode not in ("local", "global", "hybrid", "naive", "mix"):
+            raise RequestError(400, f"Unknown mode: {mode}")
+        top_k = request.get("top_k", QUERY_TOP_K)
+        if not isinstance(top_k, int) or top_k < 1:
+            raise RequestError(400, "'top_k' must be a positive integer")
+
+        async def work(workspace: Workspace) -> Dict:
+            generator = workspace.generator
+            started = time.perf_counter()
+            retrieval = await generator.retrieve(question, mode, top_k, memo=False)
+            retrieved = time.perf_counter()
+            answer = await generator.complete(question, retrieval)
+            return {
+                "answer": answer,
+                "retrieval_seconds": round(retrieved - started, 3),
+                "completion_seconds": round(time.perf_counter() - retrieved, 3),
+            }
+
+        return await self._in(request, "query", (question, mode, top_k), work)
+
+    async def generate(self, request: Dict) -> Dict:
+        from .prompts import get_wiki_structure
+
+        name = str(request.get("page", "")).removesuffix(".md")
+        category_id, _, page_name = name.partition("/")
+        structure = get_wiki_structure(extended=True)
+        category = structure.get(category_id)
+        page = next((p for p in (category or {}).get("pages", []) if p.name == page_name), None)
+        if page is None:
+            pages = [f"{c}/{p.name}" for c, info in structure.items() for p in info["pages"]]
+            raise RequestError(404, f"Unknown page {name!r}; pages: {', '.join(pages)}")
+
+        async def work(workspace: Workspace) -> Dict:
+            generator = workspace.generator
+            reused = generator.reused_pages
+            content = await generator.generate_leaf_page(category_id, category, page)
+            generator.fingerprints.save()
+            return {
+                "page": f"{name}.md",
+                "path": str(Path(workspace.config.output_dir) / f"{name}.md"),
+                "status": "unchanged" if generator.reused_pages > reused
+                          else "generated" if content else "failed",
+            }
+
+        return await self._in(request, "generate", (name,), work)
+
+    async def reindex(self, request: Dict) -> Dict:
+        async def work(workspace: Workspace) -> Dict:
+            from .indexer import RepositoryIndexer
+
+            indexer = RepositoryIndexer(workspace.generator.config)
+            indexer.rag = workspace.generator.rag  # insert into the warm instance
+            async with self.index_lock:
+                indexed, skipped, errors = await indexer.index_repository()
+            # Retrievals and precomputed contexts were made from the old graph
+            workspace.generator.retrievals.clear()
+            workspace.generator.load_contexts()
+            return {"indexed": indexed, "skipped": skipped, "errors": errors}
+
+        # A reindex that started before this request may have missed its changes
+        return await self._in(request, "reindex", (), work, fresh=True)
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        handler = self.routes.get((method, path.split("?", 1)[0]))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                return 405, {"error": f"{method} not allowed on {path}"}
+            return 404, {"error": f"No such endpoint: {path}"}
+        try:
+            request = json.loads(body) if body.strip() else {}
+            if not isinstance(request, dict):
+                raise RequestError(400, "Request body must be a JSON object")
+            return 200, await handler(request)
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One HTTP request per connection"""
+        try:
+            status, response = await self._read_and_dispatch(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        self.served += 1
+        payload = json.dumps(response, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + payload
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_and_dispatch(self, reader: asyncio.StreamReader) -> Tuple[int, Dict]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            return 400, {"error": "Malformed request line"}
+        method, path, _ = request_line
+        length = 0
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                if not value.strip().isdigit():
+                    return 400, {"error": "Invalid Content-Length"}
+                length = int(value)
+        if length > MAX_BODY:
+            return 413, {"error": f"Body over {MAX_BODY} bytes"}
+        body = await reader.readexactly(length) if length else b""
+        return await self.dispatch(method, path, body)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    socket_path: Optional[Path] = None):
+        """Serve until cancelled (Ctrl+C); open workspaces are closed on the way out"""
+        if socket_path:
+            Path(socket_path).unlink(missing_ok=True)
+            server = await asyncio.start_unix_server(self.handle, path=str(socket_path))
+            where = f"unix:{socket_path}"
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            where = f"http://{host}:{port}"
+        print(f"🛰️  repowiki serving on {where} (up to {self.pool.capacity} open workspaces)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.pool.close()
+            if socket_path:
+                Path(socket_path).unlink(missing_ok=True)
@@ -0,0 +1,68 @@
+"""One LightRAG session shared by indexing and generation
+
+Indexing and generation used to build their own LightRAG instance each, so
+``repowiki all`` wrote the graph and vector stores, then loaded them back
+from disk for the generator. ``WikiSession`` opens the storages once and
+hands the same in-memory instance to both stages.
+
+The generator builds the instance: its model functions are a superset of
+the indexer's (streaming completions, batched query embeddings), and the
+indexer only needs ``ainsert`` and the storages.
+"""
+from typing import Tuple
+
+from .config import Config
+
+
+class WikiSession:
+    """An indexer and a generator on one LightRAG instance"""
+
+    def __init__(self, config: Config, extended: bool = False, force: bool = False, clients=None):
+        from .generator import WikiGenerator
+        from .indexer import RepositoryIndexer
+
+        self.config = config
+        self.indexer = RepositoryIndexer(config, clients=clients)
+        # One report covers both stages
+        self.metrics = self.indexer.metrics
+        self.generator = WikiGenerator(
+            config, extended=extended, force=force, clients=clients, metrics=self.metrics
+        )
+
+    @property
+    def rag(self):
+        return self.generator.rag
+
+    async def open(self):
+        """Initialize the storages once (idempotent)"""
+        if self.generator.rag is None:
+            await self.generator.initialize_rag()
+        self.indexer.rag = self.generator.rag
+        return self.generator.rag
+
+    async def index(self) -> Tuple[int, int, int]:
+        """Index the repository; returns (indexed, skipped, errors)"""
+        await self.open()
+        result = await self.indexer.index_repository()
+        # Communities, importance and the summary tree were just rebuilt
+        self.generator.load_contexts()
+        return result
+
+    async def generate(self):
+        """Generate the wiki from what is in memory"""
+        await self.open()
+        await self.generator.generate_all()
+
+    async def close(self):
+        """Flush and release the storages"""
+        rag = self.generator.rag
+        if rag is not None:
+            self.generator.rag = self.indexer.rag = None
+            await rag.finalize_storages()
+
+    async def __aenter__(self) -> "WikiSession":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,502 @@
+"""Static site export - renders the markdown wiki to HTML with a prebuilt search index
+
+``repowiki export-site`` turns ``wiki_docs/`` into a self-contained static
+site. Pages are re-rendered only when their markdown (or the page
+template) changed, tracked by content hash in ``<site>/.manifest.json``.
+
+Search needs no server: the exporter builds an inverted index (term ->
+flat ``[page id gap, weight, ...]`` postings, delta-encoded by page id) and
+shards it by the first two characters of each term, so the browser
+fetches one small JSON file per query word.
+Per-page term counts are cached alongside the manifest, so only changed
+pages are re-tokenized, and shards are rewritten only when they change.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Tuple
+
+MANIFEST_FILE = ".manifest.json"
+SEARCH_DIR = "search"
+# Bump when the page template or renderer changes to re-render every page
+TEMPLATE_VERSION = "2"
+SHARD_PREFIX = 2
+# Absolute links with any other scheme (javascript:, data:, ...) are dropped
+LINK_SCHEMES = frozenset({"http", "https", "mailto"})
+TITLE_WEIGHT = 5  # a term in the title counts as this many occurrences
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were
+will with you your can not but if into than then there these they which while
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens, without stopwords and single characters"""
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def shard_of(term: str) -> str:
+    return term[:SHARD_PREFIX]
+
+
+# --- Markdown -------------------------------------------------------------
+
+_INLINE = re.compile(
+    r"!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)\)"
+    r"|\[(?P<text>[^\]]+)\]\((?P<href>[^)\s]+)\)"
+    r"|\*\*(?P<strong>.+?)\*\*"
+    r"|__(?P<strong2>.+?)__"
+    r"|(?<![\w*])\*(?P<em>[^*\s][^*]*?)\*(?![\w*])"
+    r"|(?<![\w_])_(?P<em2>[^_\s][^_]*?)_(?![\w_])"
+)
+
+
+_SCHEME = re.compile(r"^[\x00-\x20]*([a-zA-Z][a-zA-Z0-9+.\-]*):")
+
+
+def page_href(target: str) -> str:
+    """Rewrite a link to a wiki page (``x.md``, ``README.md``) to its HTML page
+    
+    Only relative links and http(s)/mailto URLs are kept; others become ``#``.
+    """
+    scheme = _SCHEME.match(target)
+    if scheme:
+        return target if scheme.group(1).lower() in LINK_SCHEMES else "#"
+    if target.startswith("#"):
+        return target
+    path, _, anchor = target.partition("#")
+    if path.endswith(".md"):
+        path = path[:-len("README.md")] + "index.html" if path.endswith("README.md") else path[:-3] + ".html"
+    return path + (f"#{anchor}" if anchor else "")
+
+
+def _inline_text(text: str) -> str:
+    def replace(match: re.Match) -> str:
+        if match.group("src") is not None:
+            return f'<img src="{html.escape(page_href(match.group("src")))}" alt="{html.escape(match.group("alt"))}">'
+        if match.group("href") is not None:
+            href = html.escape(page_href(match.group("href")))
+            return f'<a href="{href}">{_inline(match.group("text"))}</a>'
+        if match.group("strong") or match.group("strong2"):
+            return f"<strong>{_inline(match.group('strong') or match.group('strong2'))}</strong>"
+        return f"<em>{_inline(match.group('em') or match.group('em2'))}</em>"
+
+    out, last = [], 0
+    for match in _INLINE.finditer(text):
+        out.append(html.escape(text[last:match.start()], quote=False))
+        out.append(replace(match))
+        last = match.end()
+    out.append(html.escape(text[last:], quote=False))
+    return "".join(out)
+
+
+def _inline(text: str) -> str:
+    """Inline markdown: code spans first, so nothing inside them is formatted"""
+    parts = re.split(r"(`+)(.+?)\1", text)
+    out = []
+    for i in range(0, len(parts), 3):
+        out.append(_inline_text(parts[i]))
+        if i + 2 < len(parts):
+            out.append(f"<code>{html.escape(parts[i + 2].strip(), quote=False)}</code>")
+    return "".join(out)
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^\w\- ]", "", text.lower()).strip().replace(" ", "-")
+
+
+def _unique_id(slug: str, used: set) -> str:
+    """``slug``, or ``slug-1``, ``slug-2``... when a heading above already has it"""
+    candidate, n = slug, 0
+    while candidate in used:
+        n += 1
+        candidate = f"{slug}-{n}"
+    used.add(candidate)
+    return candidate
+
+
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_TABLE_RULE = re.compile(r"^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$")
+
+
+def _cells(row: str) -> List[str]:
+    row = row.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in re.split(r"(?<!\\)\|", row)]
+
+
+def _render_list(items: List[Tuple[int, str, str]], pos: int) -> Tuple[str, int]:
+    """Render items from ``pos`` at its indent; deeper items nest in the previous item"""
+    indent, tag, _ = items[pos]
+    parts = [f"<{tag}>"]
+    while pos < len(items) and items[pos][0] >= indent:
+        if items[pos][0] == indent and items[pos][1] != tag:
+            break  # "-" items followed by "1." items: a new list
+        if items[pos][0] > indent:
+            nested, pos = _render_list(items, pos)
+            if parts[-1].endswith("</li>"):
+                parts[-1] = parts[-1][:-len("</li>")] + nested + "</li>"
+            else:
+                parts.append(f"<li>{nested}</li>")
+            continue
+        parts.append(f"<li>{_inline(items[pos][2])}</li>")
+        pos += 1
+    parts.append(f"</{tag}>")
+    return "".join(parts), pos
+
+
+def _list(lines: List[str]) -> str:
+    """Nested lists; continuation lines join the item above"""
+    items: List[Tuple[int, str, str]] = []
+    for line in lines:
+        match = _LIST_ITEM.match(line)
+        if match:
+            tag = "ul" if match.group(2) in "-*+" else "ol"
+            items.append((len(match.group(1).expandtabs(4)), tag, match.group(3)))
+        elif items:
+            indent, tag, text = items[-1]
+            items[-1] = (indent, tag, f"{text} {line.strip()}")
+    out, pos = [], 0
+    while pos < len(items):
+        fragment, pos = _render_list(items, pos)
+        out.append(fragment)
+    return "".join(out)
+
+
+def markdown_to_html(text: str) -> Tuple[str, str]:
+    """Render the markdown subset generated pages use; returns (html, title)"""
+    lines = text.replace("\r\n", "\n").split("\n")
+    out: List[str] = []
+    title = ""
+    paragraph: List[str] = []
+    heading_ids: set = set()
+    i = 0
+
+    def flush():
+        if paragraph:
+            out.append(f"<p>{_inline(' '.join(s.strip() for s in paragraph))}</p>")
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        fence = re.match(r"^\s*(```+|~~~+)\s*([\w+-]*)", line)
+        if fence:
+            flush()
+            marker, language = fence.group(1), fence.group(2)
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(marker):
+                code.append(lines[i])
+                i += 1
+            css = f' class="language-{language}"' if language else ""
+            out.append(f"<pre><code{css}>{html.escape(chr(10).join(code), quote=False)}</code></pre>")
+            i += 1
+            continue
+        heading = re.match(r"^(#{1,6})\s+(.*?)\s*#*\s*$", line)
+        if heading:
+            flush()
+            level, content = len(heading.group(1)), heading.group(2)
+            if level == 1 and not title:
+                title = re.sub(r"[`*_]", "", content)
+            heading_id = _unique_id(slugify(content), heading_ids)
+            out.append(f'<h{level} id="{heading_id}">{_inline(content)}</h{level}>')
+            i += 1
+            continue
+        if re.match(r"^\s*([-*_])(\s*\1){2,}\s*$", line):
+            flush()
+            out.append("<hr>")
+            i += 1
+            continue
+        if "|" in line and i + 1 < len(lines) and _TABLE_RULE.match(lines[i + 1]):
+            flush()
+            header = _cells(line)
+            rows = []
+            i += 2
+            while i < len(lines) and "|" in lines[i] and lines[i].strip():
+                rows.append(_cells(lines[i]))
+                i += 1
+            out.append(
+                "<table><thead><tr>" + "".join(f"<th>{_inline(c)}</th>" for c in header)
+                + "</tr></thead><tbody>"
+                + "".join("<tr>" + "".join(f"<td>{_inline(c)}</td>" for c in row) + "</tr>" for row in rows)
+                + "</tbody></table>"
+            )
+            continue
+        if stripped.startswith(">"):
+            flush()
+            quoted = []
+            while i < len(lines) and lines[i].strip().startswith(">"):
+                quoted.append(re.sub(r"^\s*>\s?", "", lines[i]))
+                i += 1
+            out.append(f"<blockquote>{markdown_to_html(chr(10).join(quoted))[0]}</blockquote>")
+            continue
+        if _LIST_ITEM.match(line):
+            flush()
+            items = []
+            while i < len(lines) and (
+                _LIST_ITEM.match(lines[i])
+                or (lines[i].startswith((" ", "\t")) and lines[i].strip() and items)
+            ):
+                items.append(lines[i])
+                i += 1
+            out.append(_list(items))
+            continue
+        if not stripped:
+            flush()
+        else:
+            paragraph.append(line)
+        i += 1
+    flush()
+    return "\n".join(out), title
+
+
+# --- Site -----------------------------------------------------------------
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} · {site}</title>
+<link rel="stylesheet" href="{root}style.css">
+</head>
+<body data-root="{root}">
+<header><a href="{root}index.html">{site}</a>
+<input id="search" type="search" placeholder="Search the wiki…" autocomplete="off">
+<ol id="results"></ol></header>
+<main>
+{body}
+</main>
+<script src="{root}search.js"></script>
+</body>
+</html>
+"""
+
+STYLE = """body{font:16px/1.6 system-ui,sans-serif;margin:0;color:#1f2328}
+header{position:sticky;top:0;background:#f6f8fa;border-bottom:1px solid #d0d7de;padding:.6em 1.5em}
+header>a{font-weight:600;margin-right:1em;color:inherit;text-decoration:none}
+#search{width:22em;max-width:60%;padding:.3em .6em}
+#results{position:absolute;background:#fff;border:1px solid #d0d7de;margin:.3em 0 0;padding:.5em 1.8em;
+max-width:40em;list-style:decimal}#results:empty{display:none}#results small{display:block;color:#656d76}
+main{max-width:60em;margin:0 auto;padding:1em 1.5em}
+pre{background:#f6f8fa;padding:1em;overflow:auto}code{font-size:90%}
+table{border-collapse:collapse}td,th{border:1px solid #d0d7de;padding:.3em .7em}
+blockquote{border-left:4px solid #d0d7de;margin-left:0;padding-left:1em;color:#656d76}
+"""
+
+SEARCH_JS = """(function () {
+  var root = document.body.dataset.root, input = document.getElementById("search"),
+      list = document.getElementById("results"), shards = {}, docs = null;
+  var stop = new Set(%(stopwords)s);
+  function tokens(text) {
+    return (text.toLowerCase().match(/[a-z0-9_]+/g) || []).filter(function (t) {
+      return t.length > 1 && !stop.has(t);
+    });
+  }
+  function load(url) { return fetch(root + url).then(function (r) { return r.ok ? r.json() : {}; }); }
+  function shard(key) {
+    if (!(key in shards)) shards[key] = load("%(dir)s/" + encodeURIComponent(key) + ".json");
+    return shards[key];
+  }
+  function search(query) {
+    var words = tokens(query);
+    if (!words.length) { list.innerHTML = ""; return; }
+    docs = docs || load("%(dir)s/docs.json");
+    Promise.all([docs].concat(words.map(function (w) { return shard(w.slice(0, %(prefix)d)); })))
+      .then(function (loaded) {
+        var pages = loaded[0].docs, scores = null;
+        words.forEach(function (word, i) {
+          var index = loaded[i + 1], found = {}, last = i === words.length - 1;
+          Object.keys(index).forEach(function (term) {
+            if (term === word || (last && term.indexOf(word) === 0)) {
+              var postings = index[term];
+              for (var k = 0, id = 0; k < postings.length; k += 2) {
+                id += postings[k];
+                found[id] = (found[id] || 0) + postings[k + 1];
+              }
+            }
+          });
+          if (scores === null) { scores = found; return; }
+          Object.keys(scores).forEach(function (id) {
+            if (id in found) scores[id] += found[id]; else delete scores[id];
+          });
+        });
+        var ids = Object.keys(scores || {}).sort(function (a, b) { return scores[b] - scores[a]; });
+        list.innerHTML = "";
+        ids.slice(0, 20).forEach(function (id) {
+          var doc = pages[id], li = document.createElement("li"), a = document.createElement("a"),
+              small = document.createElement("small");
+          a.href = root + doc[0]; a.textContent = doc[1]; small.textContent = doc[2];
+          li.appendChild(a); li.appendChild(small); list.appendChild(li);
+        });
+      });
+  }
+  var timer;
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () { search(input.value); }, 80);
+  });
+})();
+"""
+
+
+def content_hash(data: str) -> str:
+    return hashlib.sha256(f"{TEMPLATE_VERSION}\x00{data}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SiteReport:
+    """Result of a site export"""
+
+    pages: int = 0
+    rendered: int = 0
+    removed: int = 0
+    terms: int = 0
+    shards_written: int = 0
+    shards: int = 0
+
+    def print_summary(self):
+        print(f"🌐 Pages: {self.pages} ({self.rendered} rendered, "
+              f"{self.pages - self.rendered} unchanged, {self.removed} removed)")
+        print(f"🔍 Search index: {self.terms} terms in {self.shards} shards "
+              f"({self.shards_written} rewritten)")
+
+
+def _write_if_changed(path: Path, data: str) -> bool:
+    """Atomically write ``data`` unless the file already holds it"""
+    if path.exists() and path.read_text(encoding="utf-8") == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+    return True
+
+
+def html_path(markdown_path: str) -> str:
+    """``a/README.md`` -> ``a/index.html``, ``a/b.md`` -> ``a/b.html``"""
+    return page_href(markdown_path)
+
+
+class SiteExporter:
+    """Renders a markdown wiki directory to a static HTML site"""
+
+    def __init__(self, wiki_dir: Path, site_dir: Path, site_name: str = "Wiki"):
+        self.wiki_dir = Path(wiki_dir)
+        self.site_dir = Path(site_dir)
+        self.site_name = site_name
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.site_dir / MANIFEST_FILE
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        return {}
+
+    def export(self, force: bool = False) -> SiteReport:
+        report = SiteReport()
+        previous = self._load_manifest()
+        manifest: Dict[str, Dict] = {}
+        # Pages still streaming are named ``<page>.md.partial`` and don't match
+        sources = sorted(
+            p.relative_to(self.wiki_dir).as_posix() for p in self.wiki_dir.rglob("*.md")
+        )
+        for source in sources:
+            text = (self.wiki_dir / source).read_text(encoding="utf-8")
+            digest = content_hash(text)
+            entry = previous.get(source)
+            target = self.site_dir / html_path(source)
+            if not force and entry and entry["hash"] == digest and target.exists():
+                manifest[source] = entry
+                continue
+            body, title = markdown_to_html(text)
+            title = title or PurePosixPath(source).stem
+            depth = source.count("/")
+            page = PAGE_TEMPLATE.format(
+                title=html.escape(title), site=html.escape(self.site_name),
+                root="../" * depth, body=body,
+            )
+            _write_if_changed(target, page)
+            report.rendered += 1
+            plain = re.sub(r"<[^>]+>", " ", body)
+            counts = Counter(tokenize(plain))
+            for term in tokenize(title):
+                counts[term] += TITLE_WEIGHT
+            manifest[source] = {
+                "hash": digest,
+                "title": title,
+                "summary": _summary(text),
+                "terms": dict(counts),
+            }
+        for source in set(previous) - set(manifest):
+            target = self.site_dir / html_path(source)
+            if target.exists():
+                target.unlink()
+            report.removed += 1
+        report.pages = len(manifest)
+
+        self._write_assets()
+        self._write_index(manifest, report)
+        _write_if_changed(self.manifest_path, json.dumps(manifest, sort_keys=True))
+        return report
+
+    def _write_assets(self):
+        _write_if_changed(self.site_dir / "style.css", STYLE)
+        _write_if_changed(self.site_dir / "search.js", SEARCH_JS % {
+            "stopwords": json.dumps(sorted(STOPWORDS)), "dir": SEARCH_DIR, "prefix": SHARD_PREFIX,
+        })
+
+    def _write_index(self, manifest: Dict[str, Dict], report: SiteReport):
+        sources = sorted(manifest)
+        docs = [
+            [html_path(s), manifest[s]["title"], manifest[s]["summary"]] for s in sources
+        ]
+        postings: Dict[str, List[int]] = {}
+        previous: Dict[str, int] = {}
+        for doc_id, source in enumerate(sources):
+            for term, weight in manifest[source]["terms"].items():
+                # Page ids only grow, so store the gap from the previous one
+                postings.setdefault(term, []).extend([doc_id - previous.get(term, 0), weight])
+                previous[term] = doc_id
+        shards: Dict[str, Dict[str, List[int]]] = {}
+        for term, entries in postings.items():
+            shards.setdefault(shard_of(term), {})[term] = entries
+        search_dir = self.site_dir / SEARCH_DIR
+        _write_if_changed(search_dir / "docs.json", json.dumps({"docs": docs}, separators=(",", ":")))
+        for key, terms in shards.items():
+            data = json.dumps(terms, sort_keys=True, separators=(",", ":"))
+            report.shards_written += _write_if_changed(search_dir / f"{key}.json", data)
+        if search_dir.exists():
+            for stale in search_dir.glob("*.json"):
+                if stale.stem != "docs" and stale.stem not in shards:
+                    stale.unlink()
+        report.terms = len(postings)
+        report.shards = len(shards)
+
+
+def _summary(text: str, limit: int = 160) -> str:
+    for block in text.split("\n\n"):
+        block = " ".join(block.split())
+        if block and not block.startswith(("#", "|", "```", "Home >", "---")):
+            plain = re.sub(r"[`*_\[\]]|\([^)]*\.md\)", "", block)
+            return plain if len(plain) <= limit else plain[:limit].rsplit(" ", 1)[0] + "…"
+    return ""
+
+
+def export_site(wiki_dir: Path, site_dir: Path, site_name: str = "Wiki",
+                force: bool = False) -> SiteReport:
+    """Render ``wiki_dir`` to ``site_dir``; only changed pages are re-rendered"""
+    return SiteExporter(wiki_dir, site_dir, site_name).export(force=force)
@@ -0,0 +1,56 @@
+"""Custom LightRAG storage backends shipped with repowiki
+
+LightRAG resolves storages by name through its own registry
+(``lightrag.kg.STORAGES``). ``register_storages()`` adds the repowiki
+backends to that registry so they can be selected through ``Config``
+exactly like the built-in ones.
+"""
+
+# name -> (LightRAG storage type, module path)
+REPOWIKI_STORAGES = {
+    "CSRGraphStorage": ("GRAPH_STORAGE", "repowiki.storage.csr_graph"),
+    "WALGraphStorage": ("GRAPH_STORAGE", "repowiki.storage.wal"),
+    "SQLiteGraphStorage": ("GRAPH_STORAGE", "repowiki.storage.sqlite_graph"),
+    "WALKVStorage": ("KV_STORAGE", "repowiki.storage.wal"),
+    "SQLiteKVStorage": ("KV_STORAGE", "repowiki.storage.sqlite_kv"),
+    "SQLiteDocStatusStorage": ("DOC_STATUS_STORAGE", "repowiki.storage.sqlite_kv"),
+    "MmapVectorDBStorage": ("VECTOR_STORAGE", "repowiki.storage.mmap_vector"),
+}
+
+
+# Bytes written to disk by repowiki storage backends in this process
+_io_stats = {"bytes_written": 0}
+
+
+def record_bytes_written(nbytes: int):
+    """Account bytes written by a storage backend"""
+    _io_stats["bytes_written"] += nbytes
+
+
+def bytes_written() -> int:
+    """Total bytes written by repowiki storage backends so far"""
+    return _io_stats["bytes_written"]
+
+
+def register_storages():
+    """Register repowiki storage backends with LightRAG (idempotent)"""
+    from lightrag.kg import (
+        STORAGES,
+        STORAGE_IMPLEMENTATIONS,
+        STORAGE_ENV_REQUIREMENTS,
+    )
+
+    for name, (storage_type, module_path) in REPOWIKI_STORAGES.items():
+        STORAGES[name] = module_path
+        STORAGE_ENV_REQUIREMENTS.setdefault(name, [])
+        implementations = STORAGE_IMPLEMENTATIONS[storage_type]["implementations"]
+        if name not in implementations:
+            implementations.append(name)
+
+
+__all__ = [
+    "REPOWIKI_STORAGES",
+    "bytes_written",
+    "record_bytes_written",
+    "register_storages",
+]
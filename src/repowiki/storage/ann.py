@@ -0,0 +1,178 @@
+"""IVF-flat approximate nearest-neighbour index over NumPy
+
+Vectors live outside the index (in the storage's memory-mapped matrix);
+the index only keeps ``nlist`` k-means centroids and the inverted list
+assignment of every slot. A query scores the centroids, probes the
+``nprobe`` closest lists and ranks their members exactly, so it touches
+roughly ``nprobe / nlist`` of the matrix. With ``nlist ~ 4 * sqrt(n)``
+that is O(sqrt(n)) work per query instead of a full scan.
+
+All vectors are expected to be L2-normalized; scores are cosine
+similarities.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Below this many vectors an exact scan is cheaper than probing lists
+MIN_TRAIN_SIZE = 2048
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 32
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+def kmeans(sample: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means; returns normalized centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        # Re-seed empty lists with random points to keep lists balanced
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFFlatIndex:
+    """Inverted-file index whose lists hold slot numbers of a vector matrix"""
+
+    def __init__(
+        self,
+        centroids: Optional[np.ndarray] = None,
+        assignments: Optional[np.ndarray] = None,
+    ):
+        self.centroids = centroids
+        self.assignments = (
+            np.asarray(assignments, dtype=np.int32).copy()
+            if assignments is not None
+            else np.zeros(0, dtype=np.int32)
+        )
+        self.trained_size = 0
+        self._rebuild_lists()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None and len(self.centroids) > 0
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids) if self.is_trained else 0
+
+    def _rebuild_lists(self):
+        self._lists: List[List[int]] = [[] for _ in range(self.nlist)]
+        for slot in np.flatnonzero(self.assignments >= 0):
+            self._lists[self.assignments[slot]].append(int(slot))
+        self._list_arrays: List[Optional[np.ndarray]] = [None] * self.nlist
+        self._stale = [False] * self.nlist
+        self.trained_size = int((self.assignments >= 0).sum())
+
+    def _ensure_capacity(self, slot: int):
+        if slot >= len(self.assignments):
+            grown = np.full(max(slot + 1, 2 * len(self.assignments)), -1, dtype=np.int32)
+            grown[: len(self.assignments)] = self.assignments
+            self.assignments = grown
+
+    # -- building ------------------------------------------------------
+
+    @staticmethod
+    def suggested_nlist(n: int) -> int:
+        return max(1, int(4 * math.sqrt(n)))
+
+    def train(self, matrix: np.ndarray, slots: np.ndarray, seed: int = 0):
+        """(Re)build centroids from live ``slots`` of ``matrix`` and reassign them"""
+        nlist = self.suggested_nlist(len(slots))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(slots), nlist * KMEANS_SAMPLE_PER_LIST)
+        sample_slots = np.sort(rng.choice(slots, size=sample_size, replace=False))
+        self.centroids = kmeans(np.asarray(matrix[sample_slots]), nlist, seed)
+
+        self.assignments = np.full(len(matrix), -1, dtype=np.int32)
+        batch = 65536
+        for start in range(0, len(slots), batch):
+            chunk = slots[start:start + batch]
+            self.assignments[chunk] = np.argmax(
+                np.asarray(matrix[chunk]) @ self.centroids.T, axis=1
+            )
+        self._rebuild_lists()
+
+    def add(self, slot: int, vector: np.ndarray):
+        if not self.is_trained:
+            return
+        self._ensure_capacity(slot)
+        if self.assignments[slot] >= 0:
+            self.remove(slot)
+        list_id = int(np.argmax(self.centroids @ vector))
+        # A removed copy of this slot may still be listed; drop it first
+        self._compact(list_id)
+        self.assignments[slot] = list_id
+        self._lists[list_id].append(slot)
+        self._list_arrays[list_id] = None
+
+    def remove(self, slot: int):
+        if not self.is_trained or slot >= len(self.assignments):
+            return
+        list_id = self.assignments[slot]
+        if list_id >= 0:
+            self.assignments[slot] = -1
+            # Filtered lazily on the next probe of this list
+            self._stale[list_id] = True
+
+    def _compact(self, list_id: int):
+        if self._stale[list_id]:
+            self._lists[list_id] = [
+                s for s in self._lists[list_id] if self.assignments[s] == list_id
+            ]
+            self._stale[list_id] = False
+            self._list_arrays[list_id] = None
+
+    def _list(self, list_id: int) -> np.ndarray:
+        self._compact(list_id)
+        if self._list_arrays[list_id] is None:
+            self._list_arrays[list_id] = np.array(self._lists[list_id], dtype=np.int64)
+        return self._list_arrays[list_id]
+
+    # -- querying ------------------------------------------------------
+
+    def search(
+        self, matrix: np.ndarray, query: np.ndarray, k: int, nprobe: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(slots, scores) of the approximate top ``k``"""
+        probe = top_k(self.centroids @ query, min(nprobe, self.nlist))
+        candidates = np.concatenate([self._list(int(l)) for l in probe])
+        if len(candidates) == 0:
+            return candidates, np.zeros(0, dtype=np.float32)
+        candidates.sort()  # sequential access into the memory map
+        scores = np.asarray(matrix[candidates]) @ query
+        best = top_k(scores, k)
+        return candidates[best], scores[best]
+
+
+def exact_search(
+    matrix: np.ndarray, live_slots: np.ndarray, query: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(slots, scores) of the exact top ``k`` by brute-force scan"""
+    if len(live_slots) == 0:
+        return live_slots, np.zeros(0, dtype=np.float32)
+    scores = np.asarray(matrix[live_slots]) @ query
+    best = top_k(scores, k)
+    return live_slots[best], scores[best]
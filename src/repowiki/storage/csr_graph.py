@@ -0,0 +1,516 @@
+"""Memory-mapped CSR knowledge-graph storage
+
+The graph is persisted as a compact binary snapshot instead of GraphML:
+
+    graph_<namespace>.csr/
+        CURRENT                 name of the live generation (atomic pointer)
+        <generation>/
+            meta.json           format version and counts
+            strings.npy         uint8, UTF-8 bytes of the interned string table
+            string_offsets.npy  int64, offsets into strings.npy (n_strings + 1)
+            node_ids.npy        int32, string index of each node id (sorted)
+            node_attr_ptr.npy   int64, per-node slice into node_attrs
+            node_attrs.npy      int32 (m, 2), (key string, JSON value string)
+            indptr.npy          int64, CSR row pointers (n_nodes + 1)
+            indices.npy         int32, neighbour node index per adjacency slot
+            adj_edges.npy       int32, edge index per adjacency slot
+            edge_nodes.npy      int32 (n_edges, 2), endpoint node indices
+            edge_attr_ptr.npy   int64, per-edge slice into edge_attrs
+            edge_attrs.npy      int32 (k, 2), (key string, JSON value string)
+
+Every array is opened with ``numpy.load(mmap_mode="r")``, so loading is
+O(1) and a lookup only touches the pages it needs: node ids are found by
+binary search over the sorted id table and neighbours are a CSR row
+slice. Attribute keys and values share one interned string table, so
+repeated values (entity types, file paths, keys) are stored once.
+
+Mutations are kept in an in-memory overlay and folded into a new
+generation on ``index_done_callback``. Old generations are unlinked after
+the pointer swap; processes still mapping them keep a valid view until
+they reload.
+"""
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from lightrag.utils import logger
+
+from . import record_bytes_written
+from .graph_base import GraphStorageBase, edge_key
+
+FORMAT_VERSION = 1
+_DELETED = None
+
+
+def _load_array(path: Path) -> np.ndarray:
+    return np.load(path, mmap_mode="r")
+
+
+class CSRSnapshot:
+    """Read-only view of one CSR snapshot generation"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        if path is None:
+            self._init_empty()
+            return
+
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported CSR snapshot version in {path}: {meta.get('version')}")
+
+        self.strings = _load_array(path / "strings.npy")
+        self.string_offsets = _load_array(path / "string_offsets.npy")
+        self.node_ids = _load_array(path / "node_ids.npy")
+        self.node_attr_ptr = _load_array(path / "node_attr_ptr.npy")
+        self.node_attrs = _load_array(path / "node_attrs.npy")
+        self.indptr = _load_array(path / "indptr.npy")
+        self.indices = _load_array(path / "indices.npy")
+        self.adj_edges = _load_array(path / "adj_edges.npy")
+        self.edge_nodes = _load_array(path / "edge_nodes.npy")
+        self.edge_attr_ptr = _load_array(path / "edge_attr_ptr.npy")
+        self.edge_attrs = _load_array(path / "edge_attrs.npy")
+        self.num_nodes = int(meta["num_nodes"])
+        self.num_edges = int(meta["num_edges"])
+        self.meta = meta
+
+    def _init_empty(self):
+        self.strings = np.zeros(0, dtype=np.uint8)
+        self.string_offsets = np.zeros(1, dtype=np.int64)
+        self.node_ids = np.zeros(0, dtype=np.int32)
+        self.node_attr_ptr = np.zeros(1, dtype=np.int64)
+        self.node_attrs = np.zeros((0, 2), dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.adj_edges = np.zeros(0, dtype=np.int32)
+        self.edge_nodes = np.zeros((0, 2), dtype=np.int32)
+        self.edge_attr_ptr = np.zeros(1, dtype=np.int64)
+        self.edge_attrs = np.zeros((0, 2), dtype=np.int32)
+        self.num_nodes = 0
+        self.num_edges = 0
+        self.meta = {}
+
+    @property
+    def nbytes(self) -> int:
+        """On-disk size of this generation"""
+        if self.path is None:
+            return 0
+        return sum(f.stat().st_size for f in self.path.iterdir())
+
+    # -- strings -------------------------------------------------------
+
+    def _string_bytes(self, sid: int) -> bytes:
+        start = self.string_offsets[sid]
+        end = self.string_offsets[sid + 1]
+        return self.strings[start:end].tobytes()
+
+    def string(self, sid: int) -> str:
+        return self._string_bytes(sid).decode("utf-8")
+
+    def _attrs(self, ptr: np.ndarray, attrs: np.ndarray, idx: int) -> dict:
+        data = {}
+        for key_sid, value_sid in attrs[ptr[idx]:ptr[idx + 1]]:
+            data[self.string(int(key_sid))] = json.loads(self.string(int(value_sid)))
+        return data
+
+    # -- nodes ---------------------------------------------------------
+
+    def node_id(self, idx: int) -> str:
+        return self.string(int(self.node_ids[idx]))
+
+    def find(self, node_id: str) -> int:
+        """Index of ``node_id`` or -1 (binary search over sorted ids)"""
+        target = node_id.encode("utf-8")
+        lo, hi = 0, self.num_nodes
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._string_bytes(int(self.node_ids[mid]))
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def node_data(self, idx: int) -> dict:
+        return self._attrs(self.node_attr_ptr, self.node_attrs, idx)
+
+    def neighbors(self, idx: int) -> Iterator[Tuple[int, int]]:
+        """(neighbour index, edge index) pairs of node ``idx``"""
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        return zip(self.indices[start:end].tolist(), self.adj_edges[start:end].tolist())
+
+    def degree(self, idx: int) -> int:
+        return int(self.indptr[idx + 1] - self.indptr[idx])
+
+    # -- edges ---------------------------------------------------------
+
+    def edge_data(self, eidx: int) -> dict:
+        return self._attrs(self.edge_attr_ptr, self.edge_attrs, eidx)
+
+    def edge_endpoints(self, eidx: int) -> Tuple[int, int]:
+        source, target = self.edge_nodes[eidx]
+        return int(source), int(target)
+
+    def find_edge(self, source_idx: int, target_idx: int) -> int:
+        """Edge index between two node indices or -1"""
+        # Scan the shorter adjacency row
+        if self.degree(source_idx) > self.degree(target_idx):
+            source_idx, target_idx = target_idx, source_idx
+        for neighbor, eidx in self.neighbors(source_idx):
+            if neighbor == target_idx:
+                return eidx
+        return -1
+
+    # -- writing -------------------------------------------------------
+
+    @staticmethod
+    def write(
+        path: Path,
+        nodes: Iterable[Tuple[str, dict]],
+        edges: Iterable[Tuple[str, str, dict]],
+        extra_meta: Optional[dict] = None,
+    ) -> int:
+        """Write a snapshot generation to ``path``; returns bytes written"""
+        strings: Dict[str, int] = {}
+        string_list: List[bytes] = []
+
+        def intern(value: str) -> int:
+            sid = strings.get(value)
+            if sid is None:
+                sid = len(string_list)
+                strings[value] = sid
+                string_list.append(value.encode("utf-8"))
+            return sid
+
+        def encode_attrs(data: dict) -> List[Tuple[int, int]]:
+            return [(intern(str(k)), intern(json.dumps(v, ensure_ascii=False))) for k, v in data.items()]
+
+        node_items = sorted(nodes, key=lambda item: item[0].encode("utf-8"))
+        node_index = {node_id: i for i, (node_id, _) in enumerate(node_items)}
+        node_ids = np.array([intern(node_id) for node_id, _ in node_items], dtype=np.int32)
+        node_attr_ptr, node_attrs = _pack_attrs(encode_attrs(data) for _, data in node_items)
+
+        edge_pairs = []
+        edge_attr_rows = []
+        for source, target, data in edges:
+            edge_pairs.append((node_index[source], node_index[target]))
+            edge_attr_rows.append(encode_attrs(data))
+        edge_nodes = np.array(edge_pairs, dtype=np.int32).reshape(-1, 2)
+        edge_attr_ptr, edge_attrs = _pack_attrs(edge_attr_rows)
+
+        num_nodes = len(node_items)
+        num_edges = len(edge_pairs)
+
+        # CSR adjacency: each undirected edge appears in both endpoint rows
+        rows = np.concatenate([edge_nodes[:, 0], edge_nodes[:, 1]])
+        cols = np.concatenate([edge_nodes[:, 1], edge_nodes[:, 0]])
+        eids = np.concatenate([np.arange(num_edges, dtype=np.int32)] * 2)
+        order = np.argsort(rows, kind="stable")
+        indices = cols[order].astype(np.int32)
+        adj_edges = eids[order].astype(np.int32)
+        counts = np.bincount(rows, minlength=num_nodes) if num_nodes else np.zeros(0, dtype=np.int64)
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        lengths = np.array([len(s) for s in string_list], dtype=np.int64)
+        string_offsets = np.zeros(len(string_list) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=string_offsets[1:])
+        string_bytes = np.frombuffer(b"".join(string_list), dtype=np.uint8)
+
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "strings": string_bytes,
+            "string_offsets": string_offsets,
+            "node_ids": node_ids,
+            "node_attr_ptr": node_attr_ptr,
+            "node_attrs": node_attrs,
+            "indptr": indptr,
+            "indices": indices,
+            "adj_edges": adj_edges,
+            "edge_nodes": edge_nodes,
+            "edge_attr_ptr": edge_attr_ptr,
+            "edge_attrs": edge_attrs,
+        }
+        for name, array in arrays.items():
+            np.save(path / f"{name}.npy", array)
+        meta = {
+            "version": FORMAT_VERSION,
+            "num_nodes": num_nodes,
+            "num_edges": num_edges,
+            "num_strings": len(string_list),
+            "created_at": int(time.time()),
+            **(extra_meta or {}),
+        }
+        (path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+        return sum(f.stat().st_size for f in path.iterdir())
+
+
+def _pack_attrs(rows: Iterable[List[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray]:
+    ptr = [0]
+    flat: List[Tuple[int, int]] = []
+    for row in rows:
+        flat.extend(row)
+        ptr.append(len(flat))
+    return np.array(ptr, dtype=np.int64), np.array(flat, dtype=np.int32).reshape(-1, 2)
+
+
+class CSRSnapshotDir:
+    """Generation directory with an atomically swapped ``CURRENT`` pointer"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def exists(self) -> bool:
+        return (self.path / "CURRENT").exists()
+
+    def open(self) -> CSRSnapshot:
+        if not self.exists():
+            return CSRSnapshot()
+        return CSRSnapshot(self.path / self.current())
+
+    def current(self) -> Optional[str]:
+        """Name of the live generation (None when no snapshot exists)"""
+        try:
+            return (self.path / "CURRENT").read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+
+    def commit(
+        self,
+        nodes: Iterable[Tuple[str, dict]],
+        edges: Iterable[Tuple[str, str, dict]],
+        extra_meta: Optional[dict] = None,
+    ) -> int:
+        """Write a new generation, swap ``CURRENT`` and drop old generations"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        generation = f"gen-{time.time_ns()}"
+        written = CSRSnapshot.write(self.path / generation, nodes, edges, extra_meta)
+
+        pointer_tmp = self.path / f"CURRENT.{os.getpid()}.tmp"
+        pointer_tmp.write_text(generation, encoding="utf-8")
+        os.replace(pointer_tmp, self.path / "CURRENT")
+
+        for child in self.path.iterdir():
+            if child.is_dir() and child.name != generation:
+                shutil.rmtree(child, ignore_errors=True)
+        return written
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def iter_snapshot_nodes(snapshot: CSRSnapshot) -> Iterator[Tuple[str, dict]]:
+    for idx in range(snapshot.num_nodes):
+        yield snapshot.node_id(idx), snapshot.node_data(idx)
+
+
+def iter_snapshot_edges(snapshot: CSRSnapshot) -> Iterator[Tuple[str, str, dict]]:
+    for eidx in range(snapshot.num_edges):
+        source, target = snapshot.edge_endpoints(eidx)
+        yield snapshot.node_id(source), snapshot.node_id(target), snapshot.edge_data(eidx)
+
+
+def merged_nodes(
+    snapshot: CSRSnapshot, node_overlay: Dict[str, Optional[dict]]
+) -> Iterator[Tuple[str, dict]]:
+    """Live nodes of ``snapshot`` with ``node_overlay`` applied"""
+    for node_id, data in iter_snapshot_nodes(snapshot):
+        if node_id not in node_overlay:
+            yield node_id, data
+    for node_id, data in node_overlay.items():
+        if data is not _DELETED:
+            yield node_id, dict(data)
+
+
+def merged_edges(
+    snapshot: CSRSnapshot,
+    node_overlay: Dict[str, Optional[dict]],
+    edge_overlay: Dict[Tuple[str, str], Optional[dict]],
+) -> Iterator[Tuple[str, str, dict]]:
+    """Live edges of ``snapshot`` with both overlays applied"""
+    for source, target, data in iter_snapshot_edges(snapshot):
+        if edge_key(source, target) in edge_overlay:
+            continue
+        if node_overlay.get(source, True) is _DELETED or node_overlay.get(target, True) is _DELETED:
+            continue
+        yield source, target, data
+    for (source, target), data in edge_overlay.items():
+        if data is not _DELETED:
+            yield source, target, dict(data)
+
+
+def export_graphml(snapshot_path: Path, output_path: Path) -> Tuple[int, int]:
+    """Export a CSR snapshot to GraphML; returns (nodes, edges)"""
+    import networkx as nx
+
+    snapshot = CSRSnapshotDir(snapshot_path).open()
+    graph = nx.Graph()
+    for node_id, data in iter_snapshot_nodes(snapshot):
+        graph.add_node(node_id, **data)
+    for source, target, data in iter_snapshot_edges(snapshot):
+        graph.add_edge(source, target, **data)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    nx.write_graphml(graph, output_path)
+    return graph.number_of_nodes(), graph.number_of_edges()
+
+
+@dataclass
+class CSRGraphStorage(GraphStorageBase):
+    """Graph storage backed by a memory-mapped CSR snapshot plus overlay"""
+
+    def _load(self) -> None:
+        self._snapshot_dir = CSRSnapshotDir(
+            Path(self.workspace_dir) / f"graph_{self.namespace}.csr"
+        )
+        self._snapshot = self._snapshot_dir.open()
+        self._reset_overlay()
+
+        if self._snapshot_dir.exists():
+            logger.info(
+                f"[{self.workspace}] Mapped CSR graph {self._snapshot_dir.path} with {self._snapshot.num_nodes} nodes, {self._snapshot.num_edges} edges"
+            )
+        else:
+            self._import_graphml()
+
+    def _import_graphml(self) -> None:
+        """Seed the overlay from an existing GraphML file (one-time migration)"""
+        graphml = Path(self.workspace_dir) / f"graph_{self.namespace}.graphml"
+        if not graphml.exists():
+            return
+        import networkx as nx
+
+        graph = nx.read_graphml(graphml)
+        for node_id, data in graph.nodes(data=True):
+            self._put_node(str(node_id), dict(data))
+        for source, target, data in graph.edges(data=True):
+            self._put_edge(str(source), str(target), dict(data))
+        logger.info(
+            f"[{self.workspace}] Imported {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges from {graphml}"
+        )
+
+    def _reset_overlay(self) -> None:
+        self._node_overlay: Dict[str, Optional[dict]] = {}
+        self._edge_overlay: Dict[Tuple[str, str], Optional[dict]] = {}
+        self._adj_overlay: Dict[str, Set[str]] = {}
+
+    def _has_pending_changes(self) -> bool:
+        return bool(self._node_overlay or self._edge_overlay)
+
+    def _persist(self) -> None:
+        if not self._has_pending_changes():
+            return
+        written = self._snapshot_dir.commit(self._iter_nodes(), self._iter_edges())
+        record_bytes_written(written)
+        self._snapshot = self._snapshot_dir.open()
+        self._reset_overlay()
+        logger.info(
+            f"[{self.workspace}] Wrote CSR graph with {self._snapshot.num_nodes} nodes, {self._snapshot.num_edges} edges ({written} bytes)"
+        )
+
+    def _clear(self) -> None:
+        self._snapshot_dir.remove()
+        self._snapshot = CSRSnapshot()
+        self._reset_overlay()
+
+    # -- reads ---------------------------------------------------------
+
+    def _node(self, node_id: str) -> Optional[dict]:
+        if node_id in self._node_overlay:
+            data = self._node_overlay[node_id]
+            return dict(data) if data is not None else None
+        idx = self._snapshot.find(node_id)
+        return self._snapshot.node_data(idx) if idx >= 0 else None
+
+    def _node_deleted(self, node_id: str) -> bool:
+        return node_id in self._node_overlay and self._node_overlay[node_id] is _DELETED
+
+    def _neighbors(self, node_id: str) -> List[str]:
+        if self._node_deleted(node_id):
+            return []
+        result = []
+        seen = set()
+        idx = self._snapshot.find(node_id)
+        if idx >= 0:
+            for neighbor_idx, _ in self._snapshot.neighbors(idx):
+                neighbor = self._snapshot.node_id(neighbor_idx)
+                key = edge_key(node_id, neighbor)
+                if key in self._edge_overlay and self._edge_overlay[key] is _DELETED:
+                    continue
+                if self._node_deleted(neighbor):
+                    continue
+                seen.add(neighbor)
+                result.append(neighbor)
+        for neighbor in self._adj_overlay.get(node_id, ()):
+            if neighbor in seen:
+                continue
+            if self._edge_overlay.get(edge_key(node_id, neighbor)) is _DELETED:
+                continue
+            result.append(neighbor)
+        return result
+
+    def _edge(self, source: str, target: str) -> Optional[dict]:
+        key = edge_key(source, target)
+        if key in self._edge_overlay:
+            data = self._edge_overlay[key]
+            return dict(data) if data is not None else None
+        if self._node_deleted(source) or self._node_deleted(target):
+            return None
+        source_idx = self._snapshot.find(source)
+        target_idx = self._snapshot.find(target)
+        if source_idx < 0 or target_idx < 0:
+            return None
+        eidx = self._snapshot.find_edge(source_idx, target_idx)
+        return self._snapshot.edge_data(eidx) if eidx >= 0 else None
+
+    def _iter_nodes(self) -> Iterator[Tuple[str, dict]]:
+        return merged_nodes(self._snapshot, self._node_overlay)
+
+    def _iter_node_ids(self) -> Iterator[str]:
+        for idx in range(self._snapshot.num_nodes):
+            node_id = self._snapshot.node_id(idx)
+            if node_id not in self._node_overlay:
+                yield node_id
+        for node_id, data in self._node_overlay.items():
+            if data is not _DELETED:
+                yield node_id
+
+    def _iter_edges(self) -> Iterator[Tuple[str, str, dict]]:
+        return merged_edges(self._snapshot, self._node_overlay, self._edge_overlay)
+
+    # -- writes --------------------------------------------------------
+
+    def _put_node(self, node_id: str, node_data: dict) -> None:
+        current = self._node(node_id) or {}
+        current.update(node_data)
+        self._node_overlay[node_id] = current
+
+    def _put_edge(self, source: str, target: str, edge_data: dict) -> None:
+        current = self._edge(source, target) or {}
+        current.update(edge_data)
+        self._edge_overlay[edge_key(source, target)] = current
+        self._adj_overlay.setdefault(source, set()).add(target)
+        self._adj_overlay.setdefault(target, set()).add(source)
+
+    def _drop_node(self, node_id: str) -> bool:
+        if not self._has_node(node_id):
+            return False
+        for neighbor in self._neighbors(node_id):
+            self._edge_overlay[edge_key(node_id, neighbor)] = _DELETED
+        self._node_overlay[node_id] = _DELETED
+        self._adj_overlay.pop(node_id, None)
+        return True
+
+    def _drop_edge(self, source: str, target: str) -> bool:
+        if self._edge(source, target) is None:
+            return False
+        self._edge_overlay[edge_key(source, target)] = _DELETED
+        return True
@@ -0,0 +1,441 @@
+"""Shared LightRAG graph-storage logic for repowiki graph backends
+
+``GraphStorageBase`` implements the full ``BaseGraphStorage`` API
+(batch lookups, label search, BFS subgraph extraction, chunk filters,
+cross-process reload) on top of a handful of synchronous primitives.
+Backends only decide how nodes and edges are stored.
+
+All edges are undirected, matching ``NetworkXStorage``.
+"""
+import os
+from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lightrag.base import BaseGraphStorage
+from lightrag.constants import GRAPH_FIELD_SEP
+from lightrag.types import KnowledgeGraph, KnowledgeGraphEdge, KnowledgeGraphNode
+from lightrag.utils import logger
+from lightrag.kg.shared_storage import (
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+
+
+def edge_key(source: str, target: str) -> Tuple[str, str]:
+    """Canonical key for an undirected edge"""
+    return (source, target) if source <= target else (target, source)
+
+
+@dataclass
+class GraphStorageBase(BaseGraphStorage):
+    """Base class for repowiki graph storages
+
+    Subclasses implement the abstract ``_`` primitives below, including
+    ``_load`` / ``_persist`` / ``_clear``. Primitives are synchronous; like
+    ``NetworkXStorage`` we rely on the asyncio event loop for mutual
+    exclusion between coroutines and only take the storage lock around
+    reload and persistence.
+    """
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            self.workspace_dir = os.path.join(working_dir, self.workspace)
+            self.final_namespace = f"{self.workspace}_{self.namespace}"
+        else:
+            self.workspace_dir = working_dir
+            self.final_namespace = self.namespace
+            self.workspace = "_"
+        os.makedirs(self.workspace_dir, exist_ok=True)
+
+        self._storage_lock = None
+        self.storage_updated = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Backend primitives
+    # ------------------------------------------------------------------
+
+    @abstractmethod
+    def _load(self) -> None:
+        ...
+
+    @abstractmethod
+    def _persist(self) -> None:
+        ...
+
+    @abstractmethod
+    def _clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def _node(self, node_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def _neighbors(self, node_id: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def _edge(self, source: str, target: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def _iter_nodes(self) -> Iterator[Tuple[str, dict]]:
+        ...
+
+    @abstractmethod
+    def _iter_edges(self) -> Iterator[Tuple[str, str, dict]]:
+        ...
+
+    @abstractmethod
+    def _put_node(self, node_id: str, node_data: dict) -> None:
+        ...
+
+    @abstractmethod
+    def _put_edge(self, source: str, target: str, edge_data: dict) -> None:
+        ...
+
+    @abstractmethod
+    def _drop_node(self, node_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def _drop_edge(self, source: str, target: str) -> bool:
+        ...
+
+    def _iter_node_ids(self) -> Iterator[str]:
+        for node_id, _ in self._iter_nodes():
+            yield node_id
+
+    def _degree(self, node_id: str) -> int:
+        return len(self._neighbors(node_id))
+
+    def _has_node(self, node_id: str) -> bool:
+        return self._node(node_id) is not None
+
+    # ------------------------------------------------------------------
+    # Lifecycle and cross-process sync
+    # ------------------------------------------------------------------
+
+    async def initialize(self):
+        """Initialize storage data"""
+        self.storage_updated = await get_update_flag(self.final_namespace)
+        self._storage_lock = get_storage_lock()
+
+    async def _sync(self):
+        """Reload from disk if another process committed since our last read"""
+        async with self._storage_lock:
+            if self.storage_updated.value:
+                logger.info(
+                    f"[{self.workspace}] Process {os.getpid()} reloading {self.namespace} due to modifications by another process"
+                )
+                self._load()
+                self.storage_updated.value = False
+
+    async def index_done_callback(self) -> bool:
+        """Persist pending changes"""
+        async with self._storage_lock:
+            if self.storage_updated.value:
+                logger.info(
+                    f"[{self.workspace}] Graph was updated by another process, reloading..."
+                )
+                self._load()
+                self.storage_updated.value = False
+                return False
+
+        async with self._storage_lock:
+            try:
+                self._persist()
+                await set_all_update_flags(self.final_namespace)
+                self.storage_updated.value = False
+                return True
+            except Exception as e:
+                logger.error(f"[{self.workspace}] Error saving graph: {e}")
+                return False
+
+    async def drop(self) -> dict[str, str]:
+        """Drop all graph data and persist the empty state immediately"""
+        try:
+            async with self._storage_lock:
+                self._clear()
+                await set_all_update_flags(self.final_namespace)
+                self.storage_updated.value = False
+            logger.info(f"[{self.workspace}] Process {os.getpid()} drop {self.namespace}")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+    # ------------------------------------------------------------------
+    # Point lookups
+    # ------------------------------------------------------------------
+
+    async def has_node(self, node_id: str) -> bool:
+        await self._sync()
+        return self._has_node(node_id)
+
+    async def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        await self._sync()
+        return self._edge(source_node_id, target_node_id) is not None
+
+    async def get_node(self, node_id: str) -> dict[str, str] | None:
+        await self._sync()
+        return self._node(node_id)
+
+    async def node_degree(self, node_id: str) -> int:
+        await self._sync()
+        return self._degree(node_id)
+
+    async def edge_degree(self, src_id: str, tgt_id: str) -> int:
+        await self._sync()
+        return self._degree(src_id) + self._degree(tgt_id)
+
+    async def get_edge(
+        self, source_node_id: str, target_node_id: str
+    ) -> dict[str, str] | None:
+        await self._sync()
+        return self._edge(source_node_id, target_node_id)
+
+    async def get_node_edges(self, source_node_id: str) -> list[tuple[str, str]] | None:
+        await self._sync()
+        if not self._has_node(source_node_id):
+            return None
+        return [(source_node_id, n) for n in self._neighbors(source_node_id)]
+
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        await self._sync()
+        result = {}
+        for node_id in node_ids:
+            node = self._node(node_id)
+            if node is not None:
+                result[node_id] = node
+        return result
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        await self._sync()
+        return {node_id: self._degree(node_id) for node_id in node_ids}
+
+    async def edge_degrees_batch(
+        self, edge_pairs: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        await self._sync()
+        degrees: Dict[str, int] = {}
+        result = {}
+        for src_id, tgt_id in edge_pairs:
+            for node_id in (src_id, tgt_id):
+                if node_id not in degrees:
+                    degrees[node_id] = self._degree(node_id)
+            result[(src_id, tgt_id)] = degrees[src_id] + degrees[tgt_id]
+        return result
+
+    async def get_edges_batch(
+        self, pairs: list[dict[str, str]]
+    ) -> dict[tuple[str, str], dict]:
+        await self._sync()
+        result = {}
+        for pair in pairs:
+            edge = self._edge(pair["src"], pair["tgt"])
+            if edge is not None:
+                result[(pair["src"], pair["tgt"])] = edge
+        return result
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        await self._sync()
+        return {
+            node_id: [(node_id, n) for n in self._neighbors(node_id)]
+            for node_id in node_ids
+        }
+
+    # ------------------------------------------------------------------
+    # Mutations (persisted on the next index_done_callback)
+    # ------------------------------------------------------------------
+
+    async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
+        await self._sync()
+        self._put_node(node_id, dict(node_data))
+
+    async def upsert_edge(
+        self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
+    ) -> None:
+        await self._sync()
+        # networkx creates missing endpoints implicitly; keep that behaviour
+        for node_id in (source_node_id, target_node_id):
+            if not self._has_node(node_id):
+                self._put_node(node_id, {})
+        self._put_edge(source_node_id, target_node_id, dict(edge_data))
+
+    async def delete_node(self, node_id: str) -> None:
+        await self._sync()
+        if self._drop_node(node_id):
+            logger.debug(f"[{self.workspace}] Node {node_id} deleted from the graph")
+        else:
+            logger.warning(
+                f"[{self.workspace}] Node {node_id} not found in the graph for deletion"
+            )
+
+    async def remove_nodes(self, nodes: list[str]):
+        await self._sync()
+        for node_id in nodes:
+            self._drop_node(node_id)
+
+    async def remove_edges(self, edges: list[tuple[str, str]]):
+        await self._sync()
+        for source, target in edges:
+            self._drop_edge(source, target)
+
+    # ------------------------------------------------------------------
+    # Scans
+    # ------------------------------------------------------------------
+
+    async def get_all_labels(self) -> list[str]:
+        await self._sync()
+        return sorted(self._iter_node_ids())
+
+    async def get_popular_labels(self, limit: int = 300) -> list[str]:
+        await self._sync()
+        degrees = [(node_id, self._degree(node_id)) for node_id in self._iter_node_ids()]
+        degrees.sort(key=lambda x: x[1], reverse=True)
+        return [node_id for node_id, _ in degrees[:limit]]
+
+    async def search_labels(self, query: str, limit: int = 50) -> list[str]:
+        await self._sync()
+        query_lower = query.lower().strip()
+        if not query_lower:
+            return []
+
+        matches = []
+        for node_id in self._iter_node_ids():
+            node_lower = node_id.lower()
+            if query_lower not in node_lower:
+                continue
+            if node_lower == query_lower:
+                score = 1000
+            elif node_lower.startswith(query_lower):
+                score = 500
+            else:
+                score = 100 - len(node_id)
+                if f" {query_lower}" in node_lower or f"_{query_lower}" in node_lower:
+                    score += 50
+            matches.append((node_id, score))
+
+        matches.sort(key=lambda x: (-x[1], x[0]))
+        return [node_id for node_id, _ in matches[:limit]]
+
+    async def get_all_nodes(self) -> list[dict]:
+        await self._sync()
+        return [{**data, "id": node_id} for node_id, data in self._iter_nodes()]
+
+    async def get_all_edges(self) -> list[dict]:
+        await self._sync()
+        return [
+            {**data, "source": source, "target": target}
+            for source, target, data in self._iter_edges()
+        ]
+
+    async def get_nodes_by_chunk_ids(self, chunk_ids: list[str]) -> list[dict]:
+        await self._sync()
+        chunk_ids_set = set(chunk_ids)
+        matching_nodes = []
+        for node_id, data in self._iter_nodes():
+            if "source_id" in data:
+                if not chunk_ids_set.isdisjoint(data["source_id"].split(GRAPH_FIELD_SEP)):
+                    matching_nodes.append({**data, "id": node_id})
+        return matching_nodes
+
+    async def get_edges_by_chunk_ids(self, chunk_ids: list[str]) -> list[dict]:
+        await self._sync()
+        chunk_ids_set = set(chunk_ids)
+        matching_edges = []
+        for source, target, data in self._iter_edges():
+            if "source_id" in data:
+                if not chunk_ids_set.isdisjoint(data["source_id"].split(GRAPH_FIELD_SEP)):
+                    matching_edges.append({**data, "source": source, "target": target})
+        return matching_edges
+
+    async def get_knowledge_graph(
+        self,
+        node_label: str,
+        max_depth: int = 3,
+        max_nodes: int = None,
+    ) -> KnowledgeGraph:
+        """Connected subgraph around ``node_label`` (``*`` = highest-degree nodes)
+
+        Same traversal as ``NetworkXStorage``: BFS that visits high-degree
+        nodes first within each depth, truncated at ``max_nodes``.
+        """
+        if max_nodes is None:
+            max_nodes = self.global_config.get("max_graph_nodes", 1000)
+        else:
+            max_nodes = min(max_nodes, self.global_config.get("max_graph_nodes", 1000))
+
+        await self._sync()
+        result = KnowledgeGraph()
+
+        if node_label == "*":
+            degrees = [(n, self._degree(n)) for n in self._iter_node_ids()]
+            degrees.sort(key=lambda x: x[1], reverse=True)
+            if len(degrees) > max_nodes:
+                result.is_truncated = True
+            selected = [n for n, _ in degrees[:max_nodes]]
+        else:
+            if not self._has_node(node_label):
+                logger.warning(f"[{self.workspace}] Node {node_label} not found in the graph")
+                return result
+
+            selected = []
+            visited = set()
+            level = [(node_label, self._degree(node_label))]
+            depth = 0
+            while level and len(selected) < max_nodes:
+                level.sort(key=lambda x: x[1], reverse=True)
+                next_level = []
+                for node_id, _ in level:
+                    if node_id in visited:
+                        continue
+                    visited.add(node_id)
+                    selected.append(node_id)
+                    if len(selected) >= max_nodes:
+                        result.is_truncated = True
+                        break
+                    unvisited = [n for n in self._neighbors(node_id) if n not in visited]
+                    if depth < max_depth:
+                        next_level.extend((n, self._degree(n)) for n in unvisited)
+                level = next_level
+                depth += 1
+
+        selected_set = set(selected)
+        for node_id in selected:
+            node_data = self._node(node_id) or {}
+            result.nodes.append(
+                KnowledgeGraphNode(id=node_id, labels=[node_id], properties=dict(node_data))
+            )
+
+        seen_edges = set()
+        for node_id in selected:
+            for neighbor in self._neighbors(node_id):
+                if neighbor not in selected_set:
+                    continue
+                source, target = edge_key(node_id, neighbor)
+                edge_id = f"{source}-{target}"
+                if edge_id in seen_edges:
+                    continue
+                seen_edges.add(edge_id)
+                result.edges.append(
+                    KnowledgeGraphEdge(
+                        id=edge_id,
+                        type="DIRECTED",
+                        source=source,
+                        target=target,
+                        properties=dict(self._edge(source, target) or {}),
+                    )
+                )
+
+        logger.info(
+            f"[{self.workspace}] Subgraph query successful | Node count: {len(result.nodes)} | Edge count: {len(result.edges)}"
+        )
+        return result
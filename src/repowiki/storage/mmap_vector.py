@@ -0,0 +1,435 @@
+"""Memory-mapped vector storage with an IVF-flat ANN index
+
+``NanoVectorDBStorage`` keeps every vector in one base64 JSON document
+that is parsed into RAM on load, rewritten in full on every save and
+scanned exhaustively on every query. This backend instead keeps:
+
+- ``vdb_<ns>.f32``: a float32 ``(capacity, dim)`` matrix, memory-mapped
+  and written in place; deleted slots are recycled once the metadata
+  that frees them is saved
+- ``vdb_<ns>.meta.json``: per-slot ids and metadata fields
+- ``vdb_<ns>.ivf.npz``: IVF centroids and list assignments
+
+Queries probe the nearest inverted lists (see ``repowiki.storage.ann``)
+once the collection is large enough, otherwise they scan exactly.
+An existing ``vdb_<ns>.json`` from NanoVectorDB is imported on first use.
+"""
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, final
+
+import numpy as np
+
+from lightrag.base import BaseVectorStorage
+from lightrag.kg.shared_storage import (
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+from lightrag.utils import compute_mdhash_id, logger
+
+from . import record_bytes_written
+from .ann import MIN_TRAIN_SIZE, IVFFlatIndex, exact_search, normalize
+
+# Inverted lists probed per query; higher is slower but more accurate
+MMAP_VDB_NPROBE = int(os.getenv("MMAP_VDB_NPROBE", "16"))
+# Retrain the IVF index once the collection grew by this factor
+RETRAIN_GROWTH = 2.0
+INITIAL_CAPACITY = 1024
+
+
+class VectorFile:
+    """Slot-addressed vector matrix plus metadata, backed by a memory map"""
+
+    def __init__(self, base_path: str, dim: int):
+        self.dim = dim
+        self.matrix_path = base_path + ".f32"
+        self.meta_path = base_path + ".meta.json"
+        self.index_path = base_path + ".ivf.npz"
+        self.ids: List[Optional[str]] = []
+        self.meta: List[Optional[Dict[str, Any]]] = []
+        self.slot_of: Dict[str, int] = {}
+        self.free: List[int] = []
+        # Slots deleted since the last save: the metadata on disk still maps
+        # them to their old ids, so they must not be overwritten yet
+        self.released: List[int] = []
+        self.index = IVFFlatIndex()
+        self.dirty_vectors = 0
+        self._live_slots: Optional[np.ndarray] = None
+
+        capacity = INITIAL_CAPACITY
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state["dim"] != dim:
+                raise ValueError(
+                    f"Embedding dim mismatch, expected: {dim}, but loaded: {state['dim']}"
+                )
+            capacity = state["capacity"]
+            self.ids = state["ids"]
+            self.meta = state["meta"]
+        self.matrix = self._open_matrix(capacity)
+        for slot, vid in enumerate(self.ids):
+            if vid is None:
+                self.free.append(slot)
+            else:
+                self.slot_of[vid] = slot
+        self.free.reverse()  # pop() hands out the lowest free slot first
+
+        if os.path.exists(self.index_path) and self.ids:
+            with np.load(self.index_path) as saved:
+                self.index = IVFFlatIndex(saved["centroids"], saved["assignments"])
+
+    def _open_matrix(self, capacity: int, shrink: bool = False) -> np.memmap:
+        size = capacity * self.dim * 4
+        mode = "r+" if os.path.exists(self.matrix_path) else "w+"
+        current = os.path.getsize(self.matrix_path) if mode == "r+" else 0
+        if mode == "r+" and (current < size or (shrink and current > size)):
+            # Resizing is a truncate; existing rows stay in place
+            with open(self.matrix_path, "r+b") as f:
+                f.truncate(size)
+        return np.memmap(self.matrix_path, dtype=np.float32, mode=mode,
+                         shape=(capacity, self.dim))
+
+    @property
+    def capacity(self) -> int:
+        return self.matrix.shape[0]
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    def live_slots(self) -> np.ndarray:
+        if self._live_slots is None:
+            self._live_slots = np.array(sorted(self.slot_of.values()), dtype=np.int64)
+        return self._live_slots
+
+    # -- mutation ------------------------------------------------------
+
+    def upsert(self, vid: str, vector: np.ndarray, meta: Dict[str, Any]):
+        slot = self.slot_of.get(vid)
+        if slot is None:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                slot = len(self.ids)
+                if slot >= self.capacity:
+                    self.matrix.flush()
+                    self.matrix = self._open_matrix(self.capacity * 2)
+                self.ids.append(None)
+                self.meta.append(None)
+            self.ids[slot] = vid
+            self.slot_of[vid] = slot
+            self._live_slots = None
+        self.matrix[slot] = vector
+        self.meta[slot] = meta
+        self.index.add(slot, vector)
+        self.dirty_vectors += 1
+
+    def delete(self, vid: str) -> bool:
+        slot = self.slot_of.pop(vid, None)
+        if slot is None:
+            return False
+        self.ids[slot] = None
+        self.meta[slot] = None
+        self.released.append(slot)
+        self.index.remove(slot)
+        self._live_slots = None
+        return True
+
+    def compact(self) -> int:
+        """Move live vectors into a dense prefix and shrink the file
+
+        Returns the number of free (tombstoned) slots reclaimed.
+        """
+        live = self.live_slots()
+        reclaimed = len(self.ids) - len(live)
+        capacity = max(INITIAL_CAPACITY, 1 << max(len(live) - 1, 0).bit_length())
+        if reclaimed == 0 and capacity >= self.capacity:
+            return 0
+        # Targets never overtake sources, so an in-order copy is safe
+        for new_slot, old_slot in enumerate(live):
+            if new_slot != old_slot:
+                self.matrix[new_slot] = self.matrix[old_slot]
+        self.ids = [self.ids[slot] for slot in live]
+        self.meta = [self.meta[slot] for slot in live]
+        self.slot_of = {vid: slot for slot, vid in enumerate(self.ids)}
+        self.free = []
+        self.released = []
+        if self.index.is_trained:
+            assignments = np.full(len(live), -1, dtype=np.int32)
+            known = live[live < len(self.index.assignments)]
+            assignments[: len(known)] = self.index.assignments[known]
+            self.index = IVFFlatIndex(self.index.centroids, assignments)
+        self._live_slots = None
+        self.matrix.flush()
+        del self.matrix
+        self.matrix = self._open_matrix(capacity, shrink=True)
+        self.dirty_vectors += len(live)
+        return reclaimed
+
+    def maybe_train(self):
+        """Build or rebuild the IVF index when the collection outgrew it"""
+        n = len(self)
+        if n < MIN_TRAIN_SIZE:
+            return
+        if self.index.is_trained and n <= self.index.trained_size * RETRAIN_GROWTH:
+            return
+        started = time.perf_counter()
+        self.index.train(self.matrix, self.live_slots())
+        logger.info(
+            f"Trained IVF index over {n} vectors ({self.index.nlist} lists) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    # -- lookup --------------------------------------------------------
+
+    def search(self, query: np.ndarray, k: int, nprobe: int):
+        if self.index.is_trained and len(self) >= MIN_TRAIN_SIZE:
+            return self.index.search(self.matrix, query, k, nprobe)
+        return exact_search(self.matrix, self.live_slots(), query, k)
+
+    def record(self, slot: int) -> Dict[str, Any]:
+        return {**self.meta[slot], "__id__": self.ids[slot]}
+
+    # -- persistence ---------------------------------------------------
+
+    def save(self) -> int:
+        """Flush the matrix and atomically rewrite metadata; returns bytes written"""
+        self.matrix.flush()
+        written = self.dirty_vectors * self.dim * 4
+        self.dirty_vectors = 0
+
+        state = {"dim": self.dim, "capacity": self.capacity,
+                 "ids": self.ids, "meta": self.meta}
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        written += os.path.getsize(tmp)
+        os.replace(tmp, self.meta_path)
+        if self.released:
+            # The saved metadata no longer refers to them: safe to reuse
+            self.free = sorted(self.free + self.released, reverse=True)
+            self.released = []
+
+        if self.index.is_trained:
+            tmp = self.index_path + ".tmp.npz"
+            np.savez(tmp, centroids=self.index.centroids,
+                     assignments=self.index.assignments)
+            written += os.path.getsize(tmp)
+            os.replace(tmp, self.index_path)
+        elif os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        return written
+
+    def import_nano(self, path: str) -> int:
+        """Load a NanoVectorDB JSON file into this (empty) store"""
+        from nano_vectordb.dbs import load_storage
+
+        storage = load_storage(path)
+        if not storage or storage["embedding_dim"] != self.dim:
+            return 0
+        vectors = normalize(storage["matrix"])
+        for data, vector in zip(storage["data"], vectors):
+            meta = {k: v for k, v in data.items() if k not in ("__id__", "vector")}
+            self.upsert(data["__id__"], vector, meta)
+        return len(storage["data"])
+
+    def remove_files(self):
+        del self.matrix
+        for path in (self.matrix_path, self.meta_path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+@final
+@dataclass
+class MmapVectorDBStorage(BaseVectorStorage):
+    def __post_init__(self):
+        self._storage_lock = None
+        self.storage_updated = None
+
+        kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
+        cosine_threshold = kwargs.get("cosine_better_than_threshold")
+        if cosine_threshold is None:
+            raise ValueError(
+                "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
+            )
+        self.cosine_better_than_threshold = cosine_threshold
+
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            workspace_dir = os.path.join(working_dir, self.workspace)
+            self.final_namespace = f"{self.workspace}_{self.namespace}"
+        else:
+            self.final_namespace = self.namespace
+            self.workspace = "_"
+            workspace_dir = working_dir
+        os.makedirs(workspace_dir, exist_ok=True)
+
+        self._base_path = os.path.join(workspace_dir, f"vdb_{self.namespace}")
+        self._max_batch_size = self.global_config.get("embedding_batch_num", 32)
+        self._data = self._load()
+
+    def _load(self) -> VectorFile:
+        data = VectorFile(self._base_path, self.embedding_func.embedding_dim)
+        nano_path = self._base_path + ".json"
+        if len(data) == 0 and not os.path.exists(data.meta_path) and os.path.exists(nano_path):
+            imported = data.import_nano(nano_path)
+            if imported:
+                data.maybe_train()
+                record_bytes_written(data.save())
+                logger.info(f"Imported {imported} vectors from {nano_path}")
+        return data
+
+    async def initialize(self):
+        self.storage_updated = await get_update_flag(self.final_namespace)
+        self._storage_lock = get_storage_lock(enable_logging=False)
+
+    async def _get_data(self) -> VectorFile:
+        async with self._storage_lock:
+            if self.storage_updated.value:
+                logger.info(
+                    f"[{self.workspace}] Process {os.getpid()} reloading {self.namespace} due to update by another process"
+                )
+                self._data = self._load()
+                self.storage_updated.value = False
+            return self._data
+
+    def _result(self, data: VectorFile, slot: int) -> Dict[str, Any]:
+        record = data.record(slot)
+        return {**record, "id": record["__id__"],
+                "created_at": record.get("__created_at__")}
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        if not data:
+            return
+
+        current_time = int(time.time())
+        contents = [v["content"] for v in data.values()]
+        batches = [
+            contents[i : i + self._max_batch_size]
+            for i in range(0, len(contents), self._max_batch_size)
+        ]
+        embeddings_list = await asyncio.gather(
+            *[self.embedding_func(batch) for batch in batches]
+        )
+        embeddings = np.concatenate(embeddings_list)
+        if len(embeddings) != len(data):
+            logger.error(
+                f"[{self.workspace}] embedding is not 1-1 with data, {len(embeddings)} != {len(data)}"
+            )
+            return
+
+        store = await self._get_data()
+        for (vid, values), vector in zip(data.items(), normalize(embeddings)):
+            meta = {k: v for k, v in values.items() if k in self.meta_fields}
+            meta["__created_at__"] = current_time
+            store.upsert(vid, vector, meta)
+
+    async def query(
+        self, query: str, top_k: int, query_embedding: list[float] = None
+    ) -> list[dict[str, Any]]:
+        if query_embedding is None:
+            query_embedding = (await self.embedding_func([query], _priority=5))[0]
+        vector = normalize(np.asarray(query_embedding, dtype=np.float32))
+
+        store = await self._get_data()
+        slots, scores = store.search(vector, top_k, MMAP_VDB_NPROBE)
+        results = []
+        for slot, score in zip(slots, scores):
+            if score < self.cosine_better_than_threshold:
+                break
+            result = self._result(store, int(slot))
+            result["distance"] = float(score)
+            results.append(result)
+        return results
+
+    async def delete(self, ids: list[str]):
+        store = await self._get_data()
+        deleted = sum(store.delete(vid) for vid in ids)
+        logger.debug(
+            f"[{self.workspace}] Successfully deleted {deleted} vectors from {self.namespace}"
+        )
+
+    async def delete_entity(self, entity_name: str) -> None:
+        entity_id = compute_mdhash_id(entity_name, prefix="ent-")
+        store = await self._get_data()
+        if not store.delete(entity_id):
+            logger.debug(f"[{self.workspace}] Entity {entity_name} not found in storage")
+
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        store = await self._get_data()
+        ids_to_delete = [
+            vid for vid, slot in store.slot_of.items()
+            if store.meta[slot].get("src_id") == entity_name
+            or store.meta[slot].get("tgt_id") == entity_name
+        ]
+        for vid in ids_to_delete:
+            store.delete(vid)
+        logger.debug(
+            f"[{self.workspace}] Deleted {len(ids_to_delete)} relations for {entity_name}"
+        )
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        store = await self._get_data()
+        slot = store.slot_of.get(id)
+        return self._result(store, slot) if slot is not None else None
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        store = await self._get_data()
+        return [
+            self._result(store, store.slot_of[vid]) for vid in ids if vid in store.slot_of
+        ]
+
+    async def get_vectors_by_ids(self, ids: list[str]) -> dict[str, list[float]]:
+        store = await self._get_data()
+        return {
+            vid: store.matrix[store.slot_of[vid]].tolist()
+            for vid in ids if vid in store.slot_of
+        }
+
+    async def get_all_ids(self) -> list[str]:
+        store = await self._get_data()
+        return list(store.slot_of)
+
+    async def compact(self) -> int:
+        """Drop tombstoned slots and persist; returns the slots reclaimed"""
+        store = await self._get_data()
+        async with self._storage_lock:
+            reclaimed = store.compact()
+        await self.index_done_callback()
+        return reclaimed
+
+    async def index_done_callback(self) -> bool:
+        async with self._storage_lock:
+            if self.storage_updated.value:
+                logger.warning(
+                    f"[{self.workspace}] Storage for {self.namespace} was updated by another process, reloading..."
+                )
+                self._data = self._load()
+                self.storage_updated.value = False
+                return False
+            try:
+                self._data.maybe_train()
+                record_bytes_written(self._data.save())
+                await set_all_update_flags(self.final_namespace)
+                self.storage_updated.value = False
+                return True
+            except Exception as e:
+                logger.error(f"[{self.workspace}] Error saving data for {self.namespace}: {e}")
+                return False
+
+    async def drop(self) -> dict[str, str]:
+        try:
+            async with self._storage_lock:
+                self._data.remove_files()
+                self._data = VectorFile(self._base_path, self.embedding_func.embedding_dim)
+                await set_all_update_flags(self.final_namespace)
+                self.storage_updated.value = False
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
@@ -0,0 +1,111 @@
+"""SQLite connection helpers shared by the SQLite storage backends
+
+Databases are opened in WAL mode: one writer appends to the ``-wal``
+file while any number of readers (in this or other processes) keep
+reading the last committed snapshot without blocking.
+
+A write transaction (``BEGIN IMMEDIATE``) holds the database's write
+lock, and indexing spends most of its time waiting for the LLM between
+writes. So instead of staying open until ``index_done_callback``, a
+transaction is committed once it holds ``SQLITE_BATCH_ROWS`` rows or has
+been open for ``SQLITE_BATCH_SECONDS``, whichever comes first; other
+writers wait at most that long.
+"""
+import asyncio
+import os
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from lightrag.utils import logger
+
+from . import record_bytes_written
+
+# Page cache per connection; bounds the memory SQLite uses for hot pages
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+SQLITE_BUSY_TIMEOUT_MS = 30000
+# Bounds on one write transaction
+SQLITE_BATCH_ROWS = int(os.getenv("SQLITE_BATCH_ROWS", "1000"))
+SQLITE_BATCH_SECONDS = float(os.getenv("SQLITE_BATCH_SECONDS", "1.0"))
+
+
+class Connection(sqlite3.Connection):
+    """Connection that tracks the size and age of its write transaction"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_rows = 0
+        self.batch_bytes = 0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def flush(self):
+        """Commit from the event loop once the transaction is old enough"""
+        self.flush_handle = None
+        try:
+            commit(self)
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite batch commit failed: {e}")
+
+    def close(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        super().close()
+
+
+def connect(path: Path, readonly: bool = False) -> sqlite3.Connection:
+    """Open ``path`` in WAL mode with explicit transaction control"""
+    if readonly:
+        conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, isolation_level=None,
+            check_same_thread=False, factory=Connection,
+        )
+    else:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(path), isolation_level=None, check_same_thread=False, factory=Connection,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints; a crash can only lose the last commits
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+    return conn
+
+
+def begin(conn: Connection):
+    """Open a write transaction unless one is already running"""
+    if conn.in_transaction:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # no event loop: only the row bound and explicit commits apply
+    conn.flush_handle = loop.call_later(SQLITE_BATCH_SECONDS, conn.flush)
+
+
+def wrote(conn: Connection, rows: int = 1, nbytes: int = 0):
+    """Account rows written in the open transaction; commits a full batch"""
+    conn.batch_rows += rows
+    conn.batch_bytes += nbytes
+    if conn.batch_rows >= SQLITE_BATCH_ROWS:
+        commit(conn)
+
+
+def commit(conn: Connection):
+    if conn.flush_handle is not None:
+        conn.flush_handle.cancel()
+        conn.flush_handle = None
+    if conn.in_transaction:
+        conn.execute("COMMIT")
+        record_bytes_written(conn.batch_bytes)
+    conn.batch_rows = conn.batch_bytes = 0
+
+
+def remove_database(path: Path):
+    """Delete a database together with its WAL and shared-memory files"""
+    for suffix in ("", "-wal", "-shm"):
+        candidate = Path(f"{path}{suffix}")
+        if candidate.exists():
+            candidate.unlink()
@@ -0,0 +1,255 @@
+"""Disk-backed knowledge-graph storage on SQLite
+
+``graph_<namespace>.sqlite`` holds two tables::
+
+    nodes(id TEXT PRIMARY KEY, data TEXT)
+    edges(src TEXT, tgt TEXT, data TEXT, PRIMARY KEY (src, tgt))  + index on tgt
+
+Edges are undirected and stored once under their canonical
+``(min, max)`` key, so the neighbours of a node are one primary-key range
+scan plus one index range scan. Attributes are JSON.
+
+Nothing but a bounded LRU of hot nodes (data and neighbour lists) and
+SQLite's own page cache (``SQLITE_CACHE_MB``) is held in memory, so peak
+RSS does not grow with the graph (``benchmarks/sqlite_graph.py``).
+Mutations go into a write transaction that is committed in bounded
+batches (see ``sqlite_base``) and by ``index_done_callback``; uncommitted
+pages spill to the WAL file rather than to RAM.
+"""
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, final
+
+from lightrag.utils import logger
+
+from .graph_base import GraphStorageBase, edge_key
+from .sqlite_base import begin, commit, connect, remove_database, wrote
+
+# Nodes whose data and neighbour lists are kept in memory
+SQLITE_GRAPH_CACHE_NODES = int(os.getenv("SQLITE_GRAPH_CACHE_NODES", "10000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edges (
+    src TEXT NOT NULL,
+    tgt TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (src, tgt)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_tgt ON edges (tgt, src);
+"""
+
+
+class NodeCache:
+    """LRU of node data and neighbour lists"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def get(self, node_id: str, field: str):
+        entry = self._entries.get(node_id)
+        if entry is None or field not in entry:
+            return None
+        self._entries.move_to_end(node_id)
+        return entry[field]
+
+    def put(self, node_id: str, field: str, value):
+        entry = self._entries.get(node_id)
+        if entry is None:
+            entry = self._entries[node_id] = {}
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(node_id)
+        entry[field] = value
+
+    def invalidate(self, node_id: str, field: Optional[str] = None):
+        if field is None:
+            self._entries.pop(node_id, None)
+        elif node_id in self._entries:
+            self._entries[node_id].pop(field, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@final
+@dataclass
+class SQLiteGraphStorage(GraphStorageBase):
+    """Graph storage backed by an SQLite database"""
+
+    def _load(self) -> None:
+        if getattr(self, "_conn", None) is None:
+            self._db_path = Path(self.workspace_dir) / f"graph_{self.namespace}.sqlite"
+            is_new = not self._db_path.exists()
+            self._conn = connect(self._db_path)
+            self._conn.executescript(SCHEMA)
+            self._cache = NodeCache(SQLITE_GRAPH_CACHE_NODES)
+            if is_new:
+                self._import_graphml()
+        else:
+            # The connection already sees other processes' commits
+            self._cache.clear()
+        num_nodes = self._conn.execute("SELECT count(*) FROM nodes").fetchone()[0]
+        logger.info(f"[{self.workspace}] Opened SQLite graph {self._db_path} with {num_nodes} nodes")
+
+    def _import_graphml(self) -> None:
+        """Copy an existing GraphML graph into the database (one-time migration)"""
+        graphml = Path(self.workspace_dir) / f"graph_{self.namespace}.graphml"
+        if not graphml.exists():
+            return
+        import networkx as nx
+
+        graph = nx.read_graphml(graphml)
+        begin(self._conn)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO nodes (id, data) VALUES (?, ?)",
+            ((str(n), json.dumps(d)) for n, d in graph.nodes(data=True)),
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO edges (src, tgt, data) VALUES (?, ?, ?)",
+            ((*edge_key(str(s), str(t)), json.dumps(d)) for s, t, d in graph.edges(data=True)),
+        )
+        commit(self._conn)
+        logger.info(
+            f"[{self.workspace}] Imported {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges from {graphml}"
+        )
+
+    def _persist(self) -> None:
+        commit(self._conn)
+
+    def _clear(self) -> None:
+        self._conn.close()
+        remove_database(self._db_path)
+        self._conn = connect(self._db_path)
+        self._conn.executescript(SCHEMA)
+        self._cache.clear()
+
+    async def finalize(self):
+        """Commit outstanding writes and close the database"""
+        if getattr(self, "_conn", None) is not None:
+            self._persist()
+            self._conn.close()
+            self._conn = None
+
+    # -- reads ---------------------------------------------------------
+
+    def _node(self, node_id: str) -> Optional[dict]:
+        data = self._cache.get(node_id, "data")
+        if data is None:
+            row = self._conn.execute(
+                "SELECT data FROM nodes WHERE id = ?", (node_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            self._cache.put(node_id, "data", data)
+        return dict(data)
+
+    def _has_node(self, node_id: str) -> bool:
+        if self._cache.get(node_id, "data") is not None:
+            return True
+        return self._conn.execute(
+            "SELECT 1 FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone() is not None
+
+    def _neighbors(self, node_id: str) -> List[str]:
+        neighbors = self._cache.get(node_id, "neighbors")
+        if neighbors is None:
+            neighbors = [
+                row[0] for row in self._conn.execute(
+                    "SELECT tgt FROM edges WHERE src = ? "
+                    "UNION ALL SELECT src FROM edges WHERE tgt = ? AND src != tgt",
+                    (node_id, node_id),
+                )
+            ]
+            self._cache.put(node_id, "neighbors", neighbors)
+        return list(neighbors)
+
+    def _edge(self, source: str, target: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT data FROM edges WHERE src = ? AND tgt = ?", edge_key(source, target)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _iter_nodes(self) -> Iterator[Tuple[str, dict]]:
+        # A dedicated cursor streams rows instead of materializing the table
+        for node_id, data in self._conn.cursor().execute("SELECT id, data FROM nodes"):
+            yield node_id, json.loads(data)
+
+    def _iter_node_ids(self) -> Iterator[str]:
+        for (node_id,) in self._conn.cursor().execute("SELECT id FROM nodes"):
+            yield node_id
+
+    def _iter_edges(self) -> Iterator[Tuple[str, str, dict]]:
+        for source, target, data in self._conn.cursor().execute(
+            "SELECT src, tgt, data FROM edges"
+        ):
+            yield source, target, json.loads(data)
+
+    async def get_popular_labels(self, limit: int = 300) -> list[str]:
+        await self._sync()
+        rows = self._conn.execute(
+            "SELECT id FROM (SELECT src AS id FROM edges UNION ALL "
+            "SELECT tgt FROM edges) GROUP BY id ORDER BY count(*) DESC LIMIT ?",
+            (limit,),
+        )
+        return [row[0] for row in rows]
+
+    # -- writes --------------------------------------------------------
+
+    def _put_node(self, node_id: str, node_data: dict) -> None:
+        current = self._node(node_id) or {}
+        current.update(node_data)
+        payload = json.dumps(current)
+        begin(self._conn)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO nodes (id, data) VALUES (?, ?)", (node_id, payload)
+        )
+        self._cache.put(node_id, "data", current)
+        wrote(self._conn, 1, len(payload))
+
+    def _put_edge(self, source: str, target: str, edge_data: dict) -> None:
+        current = self._edge(source, target) or {}
+        current.update(edge_data)
+        payload = json.dumps(current)
+        begin(self._conn)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO edges (src, tgt, data) VALUES (?, ?, ?)",
+            (*edge_key(source, target), payload),
+        )
+        self._cache.invalidate(source, "neighbors")
+        self._cache.invalidate(target, "neighbors")
+        wrote(self._conn, 1, len(payload))
+
+    def _drop_node(self, node_id: str) -> bool:
+        if not self._has_node(node_id):
+            return False
+        for neighbor in self._neighbors(node_id):
+            self._cache.invalidate(neighbor, "neighbors")
+        begin(self._conn)
+        self._conn.execute("DELETE FROM edges WHERE src = ? OR tgt = ?", (node_id, node_id))
+        self._conn.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
+        self._cache.invalidate(node_id)
+        wrote(self._conn)
+        return True
+
+    def _drop_edge(self, source: str, target: str) -> bool:
+        begin(self._conn)
+        deleted = self._conn.execute(
+            "DELETE FROM edges WHERE src = ? AND tgt = ?", edge_key(source, target)
+        ).rowcount
+        self._cache.invalidate(source, "neighbors")
+        self._cache.invalidate(target, "neighbors")
+        wrote(self._conn)
+        return deleted > 0
@@ -0,0 +1,300 @@
+"""SQLite KV and doc-status storages (WAL mode)
+
+Each namespace lives in ``kv_store_<namespace>.sqlite``. Unlike the JSON
+stores nothing is loaded into memory and nothing is rewritten on save:
+upserts are batched into write transactions that ``index_done_callback``
+commits, or sooner once they reach the bounds in ``sqlite_base`` so other
+writers aren't locked out. Because the database runs in WAL mode, any
+number of reader processes (``repowiki generate``, queries) can read the
+last committed state while one indexer writes, and they never see a
+half-written upsert.
+
+An existing ``kv_store_<namespace>.json`` is imported on first use.
+"""
+import json
+import os
+import time
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, final
+
+from lightrag.base import BaseKVStorage, DocProcessingStatus, DocStatus, DocStatusStorage
+from lightrag.utils import get_pinyin_sort_key, load_json, logger
+
+from .sqlite_base import begin, commit, connect, remove_database, wrote
+
+# SQLite limits the number of bound parameters per statement
+_MAX_PARAMS = 500
+
+
+def _chunks(ids: List[str]) -> Iterator[List[str]]:
+    for start in range(0, len(ids), _MAX_PARAMS):
+        yield ids[start:start + _MAX_PARAMS]
+
+
+def _column(value: Any) -> Any:
+    # DocStatus is a str enum; store its plain value
+    return value.value if isinstance(value, Enum) else value
+
+
+@dataclass
+class SQLiteKVBase(BaseKVStorage):
+    """Connection handling and id-keyed access shared by the SQLite stores"""
+
+    # Extra indexed columns copied out of each value (doc status only)
+    _columns = ()
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            workspace_dir = os.path.join(working_dir, self.workspace)
+            self.final_namespace = f"{self.workspace}_{self.namespace}"
+        else:
+            workspace_dir = working_dir
+            self.final_namespace = self.namespace
+            self.workspace = "_"
+        os.makedirs(workspace_dir, exist_ok=True)
+
+        self._json_file = os.path.join(workspace_dir, f"kv_store_{self.namespace}.json")
+        self._db_path = Path(workspace_dir) / f"kv_store_{self.namespace}.sqlite"
+        self._conn = None
+
+    async def initialize(self):
+        """Open the database, importing the JSON store on first use"""
+        if self._conn is not None:
+            return
+        is_new = not self._db_path.exists()
+        self._conn = connect(self._db_path)
+        self._create_schema()
+        if is_new and os.path.exists(self._json_file):
+            data = load_json(self._json_file) or {}
+            begin(self._conn)
+            self._write(data)
+            commit(self._conn)
+            logger.info(
+                f"[{self.workspace}] Imported {len(data)} records into {self._db_path}"
+            )
+
+    def _create_schema(self):
+        extra = "".join(f", {column} TEXT" for column in self._columns)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS kv (id TEXT PRIMARY KEY, data TEXT NOT NULL{extra}) WITHOUT ROWID"
+        )
+        for column in self._columns:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS kv_{column} ON kv ({column})")
+
+    def _write(self, data: dict[str, dict[str, Any]]):
+        columns = ("id", "data", *self._columns)
+        rows, nbytes = [], 0
+        for key, value in data.items():
+            payload = json.dumps(value, ensure_ascii=False)
+            nbytes += len(payload)
+            rows.append((key, payload, *(_column(value.get(c)) for c in self._columns)))
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO kv ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            rows,
+        )
+        wrote(self._conn, len(rows), nbytes)
+
+    def _rows(self, ids: Iterable[str]) -> dict[str, dict]:
+        found = {}
+        for chunk in _chunks(list(ids)):
+            query = f"SELECT id, data FROM kv WHERE id IN ({', '.join('?' * len(chunk))})"
+            for key, data in self._conn.execute(query, chunk):
+                found[key] = json.loads(data)
+        return found
+
+    def _existing(self, ids: Iterable[str]) -> set[str]:
+        existing = set()
+        for chunk in _chunks(list(ids)):
+            query = f"SELECT id FROM kv WHERE id IN ({', '.join('?' * len(chunk))})"
+            existing.update(row[0] for row in self._conn.execute(query, chunk))
+        return existing
+
+    def _iter_values(self, where: str = "", params: tuple = ()) -> Iterator[tuple[str, dict]]:
+        for key, data in self._conn.cursor().execute(f"SELECT id, data FROM kv {where}", params):
+            yield key, json.loads(data)
+
+    async def filter_keys(self, keys: set[str]) -> set[str]:
+        return set(keys) - self._existing(keys)
+
+    async def delete(self, ids: list[str]) -> None:
+        begin(self._conn)
+        for chunk in _chunks(list(ids)):
+            self._conn.execute(
+                f"DELETE FROM kv WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+        wrote(self._conn, len(ids))
+
+    async def index_done_callback(self) -> None:
+        """Commit the pending batch"""
+        if self._conn is not None:
+            commit(self._conn)
+
+    async def finalize(self):
+        if self._conn is not None:
+            await self.index_done_callback()
+            self._conn.close()
+            self._conn = None
+
+    async def drop(self) -> dict[str, str]:
+        try:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            remove_database(self._db_path)
+            self._conn = connect(self._db_path)
+            self._create_schema()
+            logger.info(f"[{self.workspace}] Process {os.getpid()} drop {self.namespace}")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+
+@final
+@dataclass
+class SQLiteKVStorage(SQLiteKVBase):
+    """Drop-in replacement for ``JsonKVStorage``"""
+
+    @staticmethod
+    def _with_defaults(key: str, value: dict) -> dict:
+        value.setdefault("create_time", 0)
+        value.setdefault("update_time", 0)
+        value["_id"] = key
+        return value
+
+    async def get_all(self) -> dict[str, Any]:
+        return {k: self._with_defaults(k, v) for k, v in self._iter_values()}
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        value = self._rows([id]).get(id)
+        return self._with_defaults(id, value) if value else value
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        found = self._rows(ids)
+        return [self._with_defaults(id, found[id]) if found.get(id) else None for id in ids]
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        if not data:
+            return
+        current_time = int(time.time())
+        existing = self._existing(data.keys())
+        for k, v in data.items():
+            if self.namespace.endswith("text_chunks") and "llm_cache_list" not in v:
+                v["llm_cache_list"] = []
+            if k in existing:
+                v["update_time"] = current_time
+            else:
+                v["create_time"] = current_time
+                v["update_time"] = current_time
+            v["_id"] = k
+        begin(self._conn)
+        self._write(data)
+
+
+def _doc_status(data: dict) -> DocProcessingStatus:
+    data = dict(data)
+    data.pop("content", None)
+    data.setdefault("file_path", "no-file-path")
+    data.setdefault("metadata", {})
+    data.setdefault("error_msg", None)
+    return DocProcessingStatus(**data)
+
+
+@final
+@dataclass
+class SQLiteDocStatusStorage(SQLiteKVBase, DocStatusStorage):
+    """Drop-in replacement for ``JsonDocStatusStorage``
+
+    Status, file path and track id are indexed columns, so status counts
+    and lookups do not scan the documents.
+    """
+
+    _columns = ("status", "file_path", "track_id")
+
+    async def get_by_id(self, id: str) -> Optional[dict[str, Any]]:
+        return self._rows([id]).get(id)
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        found = self._rows(ids)
+        return [found[id] for id in ids if found.get(id)]
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        if not data:
+            return
+        for doc_data in data.values():
+            doc_data.setdefault("chunks_list", [])
+        begin(self._conn)
+        self._write(data)
+        # Status changes are committed at once so readers can follow progress
+        await self.index_done_callback()
+
+    async def get_status_counts(self) -> dict[str, int]:
+        counts = {status.value: 0 for status in DocStatus}
+        for status, count in self._conn.execute(
+            "SELECT status, count(*) FROM kv GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+    async def get_all_status_counts(self) -> dict[str, int]:
+        counts = await self.get_status_counts()
+        counts["all"] = sum(counts.values())
+        return counts
+
+    def _docs_where(self, where: str, params: tuple) -> dict[str, DocProcessingStatus]:
+        result = {}
+        for key, data in self._iter_values(where, params):
+            try:
+                result[key] = _doc_status(data)
+            except KeyError as e:
+                logger.error(f"[{self.workspace}] Missing required field for document {key}: {e}")
+        return result
+
+    async def get_docs_by_status(self, status: DocStatus) -> dict[str, DocProcessingStatus]:
+        return self._docs_where("WHERE status = ?", (status.value,))
+
+    async def get_docs_by_track_id(self, track_id: str) -> dict[str, DocProcessingStatus]:
+        return self._docs_where("WHERE track_id = ?", (track_id,))
+
+    async def get_doc_by_file_path(self, file_path: str) -> Optional[dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT data FROM kv WHERE file_path = ? LIMIT 1", (file_path,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort_field: str = "updated_at",
+        sort_direction: str = "desc",
+    ) -> tuple[list[tuple[str, DocProcessingStatus]], int]:
+        """Same filtering, sorting and clamping as ``JsonDocStatusStorage``"""
+        page = max(page, 1)
+        page_size = min(max(page_size, 10), 200)
+        if sort_field not in ["created_at", "updated_at", "id", "file_path"]:
+            sort_field = "updated_at"
+        if sort_direction.lower() not in ["asc", "desc"]:
+            sort_direction = "desc"
+
+        if status_filter is None:
+            docs = self._docs_where("", ())
+        else:
+            docs = self._docs_where("WHERE status = ?", (status_filter.value,))
+
+        def sort_key(item):
+            doc_id, doc = item
+            if sort_field == "id":
+                return doc_id
+            if sort_field == "file_path":
+                return get_pinyin_sort_key(doc.file_path or "")
+            return getattr(doc, sort_field, "")
+
+        ordered = sorted(docs.items(), key=sort_key, reverse=sort_direction.lower() == "desc")
+        start = (page - 1) * page_size
+        return ordered[start:start + page_size], len(ordered)
@@ -0,0 +1,511 @@
+"""Write-ahead-log storages for graph and KV data
+
+Flushing ``NetworkXStorage`` or ``JsonKVStorage`` rewrites the whole file
+after every document, so write volume grows with the square of the graph
+and a crash mid-write can truncate it. The storages here append each
+flush's mutations to a log instead and fold the log into a snapshot in a
+background thread once it grows past the snapshot size:
+
+    <name>.wal/
+        00000001.log    checksummed JSON records, one per line
+        00000002.log    active segment (appended on index_done_callback)
+
+Every snapshot records the last segment it contains (``wal_seq``);
+readers open the snapshot and replay the newer segments. A torn final
+record (crash during append) fails its checksum and is dropped.
+
+Compaction is amortized: a snapshot of S bytes is only rewritten after at
+least ``WAL_COMPACT_RATIO * S`` bytes of log, so total bytes written stay
+linear in the number of mutations.
+"""
+import json
+import os
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, final
+
+from lightrag.base import BaseKVStorage
+from lightrag.exceptions import StorageNotInitializedError
+from lightrag.utils import load_json, logger
+from lightrag.kg.shared_storage import (
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+
+from . import record_bytes_written
+from .csr_graph import CSRGraphStorage, merged_edges, merged_nodes
+
+# Compact once the log exceeds max(MIN_BYTES, RATIO * snapshot size)
+WAL_COMPACT_MIN_BYTES = int(os.getenv("WAL_COMPACT_MIN_BYTES", 4 * 1024 * 1024))
+WAL_COMPACT_RATIO = float(os.getenv("WAL_COMPACT_RATIO", 1.0))
+WAL_FSYNC = os.getenv("WAL_FSYNC", "true").lower() == "true"
+
+_compaction_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="repowiki-wal")
+
+
+class WriteAheadLog:
+    """Segmented append-only log of JSON records"""
+
+    def __init__(self, path: Path, fsync: bool = WAL_FSYNC):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._repaired = False
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        if not self.path.exists():
+            return []
+        result = []
+        for segment in self.path.glob("*.log"):
+            try:
+                result.append((int(segment.stem), segment))
+            except ValueError:
+                continue
+        return sorted(result)
+
+    def active_seq(self) -> int:
+        segments = self.segments()
+        return segments[-1][0] if segments else 1
+
+    def size(self, after_seq: int = 0) -> int:
+        """Bytes in segments newer than ``after_seq``"""
+        return sum(p.stat().st_size for seq, p in self.segments() if seq > after_seq)
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[dict]:
+        if not line.endswith(b"\n") or len(line) < 10:
+            return None
+        checksum, payload = line[:8], line[9:-1]
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload)
+        except ValueError:
+            return None
+
+    def _repair_tail(self, segment: Path):
+        """Truncate a torn record left behind by a crash"""
+        valid = 0
+        with open(segment, "rb") as f:
+            for line in f:
+                if self._decode(line) is None:
+                    break
+                valid += len(line)
+        if valid != segment.stat().st_size:
+            logger.warning(f"Truncating torn WAL tail of {segment} at byte {valid}")
+            with open(segment, "r+b") as f:
+                f.truncate(valid)
+
+    def append(self, records: List[dict]) -> int:
+        """Append records to the active segment; returns bytes written"""
+        if not records:
+            return 0
+        self.path.mkdir(parents=True, exist_ok=True)
+        segment = self.path / f"{self.active_seq():08d}.log"
+        if not self._repaired and segment.exists():
+            self._repair_tail(segment)
+            self._repaired = True
+        data = b"".join(self._encode(r) for r in records)
+        with open(segment, "ab") as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        record_bytes_written(len(data))
+        return len(data)
+
+    def roll(self) -> int:
+        """Start a new active segment; returns the sequence number of the sealed one"""
+        sealed = self.active_seq()
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / f"{sealed + 1:08d}.log").touch()
+        return sealed
+
+    def replay(self, after_seq: int = 0) -> Iterator[dict]:
+        for seq, segment in self.segments():
+            if seq <= after_seq:
+                continue
+            with open(segment, "rb") as f:
+                for line in f:
+                    record = self._decode(line)
+                    if record is None:
+                        break
+                    yield record
+
+    def truncate_through(self, seq: int):
+        """Delete segments already folded into a snapshot"""
+        for segment_seq, segment in self.segments():
+            if segment_seq <= seq:
+                segment.unlink(missing_ok=True)
+
+    def remove(self):
+        for _, segment in self.segments():
+            segment.unlink(missing_ok=True)
+
+
+def compaction_due(log_bytes: int, snapshot_bytes: int) -> bool:
+    return log_bytes >= max(WAL_COMPACT_MIN_BYTES, WAL_COMPACT_RATIO * snapshot_bytes)
+
+
+@final
+@dataclass
+class WALGraphStorage(CSRGraphStorage):
+    """CSR graph snapshot plus an append-only mutation log"""
+
+    def _load(self) -> None:
+        self._wal = WriteAheadLog(Path(self.workspace_dir) / f"graph_{self.namespace}.wal")
+        self._compaction: Optional[Future] = None
+        # The snapshot can be swapped by the writer while we replay; retry then
+        while True:
+            self._pending_ops: List[dict] = []
+            super()._load()
+            generation = self._snapshot_dir.current()
+            replayed = self._replay(self._snapshot.meta.get("wal_seq", 0))
+            if self._snapshot_dir.current() == generation:
+                break
+        if replayed:
+            logger.info(f"[{self.workspace}] Replayed {replayed} graph WAL records")
+
+    def _import_graphml(self) -> None:
+        # Only seed from GraphML when the log is empty too, otherwise the
+        # import has already been logged
+        if not self._wal.segments():
+            super()._import_graphml()
+
+    def _replay(self, after_seq: int) -> int:
+        count = 0
+        for record in self._wal.replay(after_seq):
+            op = record["op"]
+            if op == "node":
+                self._node_overlay[record["id"]] = record["data"]
+            elif op == "edge":
+                CSRGraphStorage._put_edge(self, record["s"], record["t"], record["data"])
+            elif op == "del_node":
+                CSRGraphStorage._drop_node(self, record["id"])
+            elif op == "del_edge":
+                CSRGraphStorage._drop_edge(self, record["s"], record["t"])
+            count += 1
+        return count
+
+    # -- mutations are recorded for the next append ----------------------
+
+    def _put_node(self, node_id: str, node_data: dict) -> None:
+        super()._put_node(node_id, node_data)
+        self._pending_ops.append({"op": "node", "id": node_id, "data": self._node_overlay[node_id]})
+
+    def _put_edge(self, source: str, target: str, edge_data: dict) -> None:
+        super()._put_edge(source, target, edge_data)
+        self._pending_ops.append(
+            {"op": "edge", "s": source, "t": target, "data": self._edge(source, target)}
+        )
+
+    def _drop_node(self, node_id: str) -> bool:
+        dropped = super()._drop_node(node_id)
+        if dropped:
+            self._pending_ops.append({"op": "del_node", "id": node_id})
+        return dropped
+
+    def _drop_edge(self, source: str, target: str) -> bool:
+        dropped = super()._drop_edge(source, target)
+        if dropped:
+            self._pending_ops.append({"op": "del_edge", "s": source, "t": target})
+        return dropped
+
+    # -- persistence ---------------------------------------------------
+
+    def _persist(self) -> None:
+        # Only the process that wrote records may compact; readers just reload
+        wrote = self._wal.append(self._pending_ops) > 0
+        self._pending_ops = []
+
+        if self._compaction is not None:
+            if not self._compaction.done():
+                return
+            self._install_compaction()
+
+        log_bytes = self._wal.size(self._snapshot.meta.get("wal_seq", 0))
+        if wrote and compaction_due(log_bytes, self._snapshot.nbytes):
+            self._start_compaction()
+
+    def _start_compaction(self):
+        sealed = self._wal.roll()
+        # The snapshot is immutable and _put_* never mutates overlay values
+        # in place, so shallow copies give the worker a consistent view.
+        snapshot = self._snapshot
+        node_overlay = dict(self._node_overlay)
+        edge_overlay = dict(self._edge_overlay)
+
+        def compact() -> int:
+            return self._snapshot_dir.commit(
+                merged_nodes(snapshot, node_overlay),
+                merged_edges(snapshot, node_overlay, edge_overlay),
+                {"wal_seq": sealed},
+            )
+
+        logger.info(f"[{self.workspace}] Compacting graph WAL through segment {sealed}")
+        self._compaction = _compaction_pool.submit(compact)
+
+    def _install_compaction(self):
+        future, self._compaction = self._compaction, None
+        try:
+            written = future.result()
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Graph WAL compaction failed: {e}")
+            return
+        record_bytes_written(written)
+        self._snapshot = self._snapshot_dir.open()
+        self._wal.truncate_through(self._snapshot.meta["wal_seq"])
+        # Pending ops were flushed above, so snapshot + newer segments is
+        # exactly the in-memory state
+        self._reset_overlay()
+        self._replay(self._snapshot.meta["wal_seq"])
+        logger.info(
+            f"[{self.workspace}] Installed compacted graph with {self._snapshot.num_nodes} nodes, {self._snapshot.num_edges} edges ({written} bytes)"
+        )
+
+    async def finalize(self):
+        """Flush the log and wait for a running compaction"""
+        if self._storage_lock is None:
+            return
+        async with self._storage_lock:
+            self._wal.append(self._pending_ops)
+            self._pending_ops = []
+            if self._compaction is not None:
+                self._compaction.result()
+                self._install_compaction()
+
+    def _clear(self) -> None:
+        if self._compaction is not None:
+            self._compaction.result()
+            self._compaction = None
+        self._wal.remove()
+        self._pending_ops = []
+        super()._clear()
+
+
+@final
+@dataclass
+class WALKVStorage(BaseKVStorage):
+    """KV storage: ``kv_store_<namespace>.json`` snapshot plus mutation log
+
+    The snapshot is a ``JsonKVStorage`` file, so a workspace can switch to
+    this storage in place. Not back, though: the snapshot carries an extra
+    ``__wal_seq__`` key, which ``JsonKVStorage`` would read as a record,
+    and recent writes are only in the log. Re-index to switch back.
+    """
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            workspace_dir = os.path.join(working_dir, self.workspace)
+            self.final_namespace = f"{self.workspace}_{self.namespace}"
+        else:
+            workspace_dir = working_dir
+            self.final_namespace = self.namespace
+            self.workspace = "_"
+
+        os.makedirs(workspace_dir, exist_ok=True)
+        self._file_name = os.path.join(workspace_dir, f"kv_store_{self.namespace}.json")
+        self._wal = WriteAheadLog(Path(workspace_dir) / f"kv_store_{self.namespace}.wal")
+
+        self._data: Dict[str, Any] = {}
+        self._pending_ops: List[dict] = []
+        self._compaction: Optional[Future] = None
+        self._snapshot_seq = 0
+        self._snapshot_bytes = 0
+        self._storage_lock = None
+        self.storage_updated = None
+
+    async def initialize(self):
+        """Initialize storage data"""
+        self._storage_lock = get_storage_lock()
+        self.storage_updated = await get_update_flag(self.final_namespace)
+        async with self._storage_lock:
+            self._load()
+
+    def _snapshot_generation(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self._file_name)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        # A writer's compaction can replace the snapshot and truncate the
+        # segments we are about to replay; retry then
+        while True:
+            generation = self._snapshot_generation()
+            try:
+                replayed = self._load_snapshot_and_log()
+            except FileNotFoundError:
+                continue  # a segment was truncated under us
+            if self._snapshot_generation() == generation:
+                break
+        logger.info(
+            f"[{self.workspace}] Process {os.getpid()} KV load {self.namespace} with {len(self._data)} records ({replayed} WAL records replayed)"
+        )
+
+    def _load_snapshot_and_log(self) -> int:
+        snapshot = load_json(self._file_name) or {}
+        self._snapshot_seq = snapshot.pop("__wal_seq__", 0)
+        self._snapshot_bytes = (
+            os.path.getsize(self._file_name) if os.path.exists(self._file_name) else 0
+        )
+        self._data = snapshot
+        replayed = 0
+        for record in self._wal.replay(self._snapshot_seq):
+            if record["op"] == "put":
+                self._data.update(record["data"])
+            elif record["op"] == "del":
+                for key in record["ids"]:
+                    self._data.pop(key, None)
+            replayed += 1
+        return replayed
+
+    async def _sync(self):
+        if self._storage_lock is None:
+            raise StorageNotInitializedError("WALKVStorage")
+        if self.storage_updated.value:
+            self._load()
+            self.storage_updated.value = False
+
+    @staticmethod
+    def _with_defaults(key: str, value: dict) -> dict:
+        result = dict(value)
+        result.setdefault("create_time", 0)
+        result.setdefault("update_time", 0)
+        result["_id"] = key
+        return result
+
+    async def get_all(self) -> dict[str, Any]:
+        async with self._storage_lock:
+            await self._sync()
+            return {k: self._with_defaults(k, v) if v else v for k, v in self._data.items()}
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        async with self._storage_lock:
+            await self._sync()
+            value = self._data.get(id)
+            return self._with_defaults(id, value) if value else value
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        async with self._storage_lock:
+            await self._sync()
+            return [
+                self._with_defaults(id, self._data[id]) if self._data.get(id) else None
+                for id in ids
+            ]
+
+    async def filter_keys(self, keys: set[str]) -> set[str]:
+        async with self._storage_lock:
+            await self._sync()
+            return set(keys) - set(self._data.keys())
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        if not data:
+            return
+        current_time = int(time.time())
+        async with self._storage_lock:
+            await self._sync()
+            for k, v in data.items():
+                if self.namespace.endswith("text_chunks") and "llm_cache_list" not in v:
+                    v["llm_cache_list"] = []
+                if k in self._data:
+                    v["update_time"] = current_time
+                else:
+                    v["create_time"] = current_time
+                    v["update_time"] = current_time
+                v["_id"] = k
+            self._data.update(data)
+            self._pending_ops.append({"op": "put", "data": data})
+
+    async def delete(self, ids: list[str]) -> None:
+        async with self._storage_lock:
+            await self._sync()
+            deleted = [doc_id for doc_id in ids if self._data.pop(doc_id, None) is not None]
+            if deleted:
+                self._pending_ops.append({"op": "del", "ids": deleted})
+
+    async def index_done_callback(self) -> None:
+        async with self._storage_lock:
+            if not self._pending_ops and self._compaction is None:
+                return
+            wrote = self._wal.append(self._pending_ops) > 0
+            self._pending_ops = []
+
+            if self._compaction is not None and self._compaction.done():
+                self._install_compaction()
+            if wrote and self._compaction is None and compaction_due(
+                self._wal.size(self._snapshot_seq), self._snapshot_bytes
+            ):
+                self._start_compaction()
+            await set_all_update_flags(self.final_namespace)
+            self.storage_updated.value = False
+
+    def _start_compaction(self):
+        sealed = self._wal.roll()
+        data = dict(self._data)
+        file_name = self._file_name
+
+        def compact() -> Tuple[int, int]:
+            tmp = f"{file_name}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({**data, "__wal_seq__": sealed}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, file_name)
+            return sealed, os.path.getsize(file_name)
+
+        self._compaction = _compaction_pool.submit(compact)
+
+    def _install_compaction(self):
+        future, self._compaction = self._compaction, None
+        try:
+            sealed, written = future.result()
+        except Exception as e:
+            logger.error(f"[{self.workspace}] KV WAL compaction of {self.namespace} failed: {e}")
+            return
+        record_bytes_written(written)
+        self._snapshot_seq = sealed
+        self._snapshot_bytes = written
+        self._wal.truncate_through(sealed)
+
+    async def finalize(self):
+        """Flush the log and wait for a running compaction"""
+        if self._storage_lock is None:
+            return
+        async with self._storage_lock:
+            self._wal.append(self._pending_ops)
+            self._pending_ops = []
+            if self._compaction is not None:
+                self._compaction.result()
+                self._install_compaction()
+
+    async def drop(self) -> dict[str, str]:
+        try:
+            async with self._storage_lock:
+                if self._compaction is not None:
+                    self._compaction.result()
+                    self._compaction = None
+                self._data.clear()
+                self._pending_ops = []
+                self._wal.remove()
+                if os.path.exists(self._file_name):
+                    os.remove(self._file_name)
+                self._snapshot_seq = 0
+                self._snapshot_bytes = 0
+                await set_all_update_flags(self.final_namespace)
+                self.storage_updated.value = False
+            logger.info(f"[{self.workspace}] Process {os.getpid()} drop {self.namespace}")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
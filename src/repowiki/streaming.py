@@ -0,0 +1,80 @@
+"""Page streaming - writes completions to disk as they arrive"""
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple, Union
+
+# In-progress pages are written next to their final path with this suffix
+PARTIAL_SUFFIX = ".partial"
+
+
+@dataclass
+class StreamStats:
+    """Latency and throughput of one page's completion"""
+
+    ttft: float     # seconds from the request to the first token
+    seconds: float  # seconds from the request to the last token
+    tokens: int
+
+    @property
+    def tokens_per_second(self) -> float:
+        generating = self.seconds - self.ttft
+        return self.tokens / generating if generating > 0 else 0.0
+
+
+async def write_page(
+    path: Path,
+    heading: str,
+    response: Union[str, AsyncIterator[str]],
+    started: float,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> Tuple[str, StreamStats]:
+    """Write a completion to ``path`` as it streams in; returns the page body
+
+    Chunks are appended to ``<path>.partial`` and flushed as they arrive,
+    so progress is visible on disk and a crash leaves the partial page
+    behind. The temp file replaces ``path`` only once the stream ends, so
+    readers never see a half-written page at its final path. A plain
+    string response (non-streaming LLM) is written the same way.
+    ``started`` is the ``time.perf_counter()`` taken before the request.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + PARTIAL_SUFFIX)
+    parts = []
+    first = None
+    with open(partial, "w", encoding="utf-8") as f:
+        f.write(f"# {heading}\n\n")
+        if isinstance(response, str):
+            first = time.perf_counter()
+            parts.append(response)
+            f.write(response)
+        else:
+            async for chunk in response:
+                if not chunk:
+                    continue
+                if first is None:
+                    first = time.perf_counter()
+                parts.append(chunk)
+                f.write(chunk)
+                f.flush()
+    finished = time.perf_counter()
+    content = "".join(parts)
+    if not content.strip():
+        partial.unlink()
+        return "", StreamStats(finished - started, finished - started, 0)
+    os.replace(partial, path)
+    tokens = count_tokens(content) if count_tokens else len(parts)
+    return content, StreamStats(first - started, finished - started, tokens)
+
+
+def print_stream_report(stats: Dict[str, StreamStats]):
+    """Per-page time to first token and generation speed, slowest first"""
+    if not stats:
+        return
+    width = max(len(name) for name in stats)
+    print(f"\n🚰 {'Page'.ljust(width)}  {'TTFT':>7}  {'Tokens':>6}  {'Tok/s':>7}")
+    for name, stat in sorted(stats.items(), key=lambda item: -item[1].ttft):
+        print(f"   {name.ljust(width)}  {stat.ttft:6.1f}s  {stat.tokens:6d}  "
+              f"{stat.tokens_per_second:7.1f}")
@@ -0,0 +1,274 @@
+"""Summary tree - bottom-up file, directory and package summaries for map-reduce pages"""
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import Config
+
+SUMMARY_TREE_FILE = "summary_tree.json"
+ROOT = "."
+# File text sent to the LLM per file summary
+FILE_SUMMARY_CHARS = int(os.getenv("SUMMARY_TREE_FILE_CHARS", "6000"))
+# Children per reduce prompt; larger directories are reduced in rounds
+MAX_CHILDREN_PER_PROMPT = 40
+# A directory keeps its summary until more than this fraction of its
+# children's summaries changed since it was written (or its children did)
+DIR_REFRESH_FRACTION = float(os.getenv("SUMMARY_TREE_REFRESH_FRACTION", "0.25"))
+
+FILE_PROMPT = """Summarize this file from the {repo} repository in 2-4 sentences:
+its purpose, the main classes/functions it defines and what it depends on.
+
+File: {path}
+```
+{content}
+```"""
+
+REDUCE_PROMPT = """Summarize the directory `{path}` of the {repo} repository in one short paragraph
+(at most 120 words): what it is responsible for and how its parts fit together.
+
+Contents:
+{children}"""
+
+
+def content_hash(text: str) -> str:
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class TreeNode:
+    """A file or directory in the summary tree"""
+
+    path: str
+    kind: str  # "file" or "dir"
+    hash: str  # files: content hash; directories: hash of the child paths
+    summary: str = ""
+    children: List[str] = field(default_factory=list)
+    # Directories: child -> hash of the child summary the summary was written from
+    basis: Dict[str, str] = field(default_factory=dict)
+
+
+def summary_hash(node: TreeNode) -> str:
+    return content_hash(node.summary)
+
+
+@dataclass
+class SummaryTreeReport:
+    """Result of a summary tree build"""
+
+    files: int = 0
+    directories: int = 0
+    summarized: int = 0
+    reused: int = 0
+    failed: int = 0  # left without a summary, retried by the next build
+
+    def print_summary(self):
+        print(f"🌳 Summary tree: {self.files} files, {self.directories} directories "
+              f"({self.summarized} summarized, {self.reused} unchanged"
+              + (f", {self.failed} failed)" if self.failed else ")"))
+
+
+def load_tree(workspace_dir: Path) -> Dict[str, TreeNode]:
+    path = Path(workspace_dir) / SUMMARY_TREE_FILE
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {p: TreeNode(**node) for p, node in data.items()}
+
+
+def _parent(path: str) -> str:
+    parent = str(PurePosixPath(path).parent)
+    return ROOT if parent in ("", ".") else parent
+
+
+class SummaryTreeBuilder:
+    """Builds the file → directory → package summary tree
+
+    Files are summarized from their content, directories from their
+    children's summaries (in rounds when a directory has many children).
+    Every node is cached in ``summary_tree.json``. A file is re-summarized
+    when its content hash changes; a directory when its set of children
+    changes or more than ``DIR_REFRESH_FRACTION`` of its children's
+    summaries changed since it was written. Editing one file in a wide
+    directory therefore doesn't ripple up to the root summary (which every
+    summary-tree page is built from), while small directories follow
+    their files closely. A node whose summary call fails is saved without
+    a summary and retried by the next build.
+    """
+
+    def __init__(self, rag, config: Config, llm_func: Optional[Callable] = None):
+        self.rag = rag
+        self.config = config
+        self.llm_func = llm_func or rag.llm_model_func
+        self.workspace_dir = Path(config.working_dir) / config.workspace
+
+    @property
+    def path(self) -> Path:
+        return self.workspace_dir / SUMMARY_TREE_FILE
+
+    def _layout(self, hashes: Dict[str, str]) -> Dict[str, TreeNode]:
+        """Nodes for every file (posix path -> content hash) and its directories"""
+        nodes: Dict[str, TreeNode] = {ROOT: TreeNode(ROOT, "dir", "")}
+        for posix in sorted(hashes):
+            nodes[posix] = TreeNode(posix, "file", hashes[posix])
+            child, parent = posix, _parent(posix)
+            while True:
+                if parent not in nodes:
+                    nodes[parent] = TreeNode(parent, "dir", "")
+                if child not in nodes[parent].children:
+                    nodes[parent].children.append(child)
+                if parent == ROOT:
+                    break
+                child, parent = parent, _parent(parent)
+        return nodes
+
+    async def _summarize_file(self, node: TreeNode, content: str) -> bool:
+        """Summarize a file node; on failure it keeps an empty summary"""
+        try:
+            node.summary = (await self.llm_func(FILE_PROMPT.format(
+                repo=self.config.repo_name, path=node.path, content=content[:FILE_SUMMARY_CHARS],
+            ))).strip()
+        except Exception as e:
+            print(f"⚠️  No summary for {node.path}: {type(e).__name__}: {e}")
+            return False
+        return True
+
+    async def _reduce(self, path: str, items: List[str]) -> str:
+        """Summarize ``items`` (child lines), batching when there are too many"""
+        while len(items) > MAX_CHILDREN_PER_PROMPT:
+            batches = [
+                items[i:i + MAX_CHILDREN_PER_PROMPT]
+                for i in range(0, len(items), MAX_CHILDREN_PER_PROMPT)
+            ]
+            partials = await asyncio.gather(*(self._reduce(path, batch) for batch in batches))
+            items = [f"- (part {i + 1}) {p}" for i, p in enumerate(partials)]
+        response = await self.llm_func(REDUCE_PROMPT.format(
+            repo=self.config.repo_name, path=path, children="\n".join(items),
+        ))
+        return response.strip()
+
+    async def build(self, files: Dict[str, str], removed: Iterable[str] = (),
+                    incremental: bool = False) -> SummaryTreeReport:
+        """Build the tree for ``files`` (repository-relative path -> content)
+        
+        With ``incremental``, ``files`` are only the changed files: every
+        other file of the cached tree is kept, except the ``removed`` paths.
+        """
+        posix = lambda p: PurePosixPath(p.replace("\\", "/")).as_posix()
+        cached = load_tree(self.workspace_dir)
+        contents = {posix(p): c for p, c in files.items()}
+        hashes = {p: content_hash(c) for p, c in contents.items()}
+        if incremental:
+            gone = [posix(p) for p in removed]
+            for path, node in cached.items():
+                # A removed path may be a deleted directory
+                deleted = any(path == g or path.startswith(g + "/") for g in gone)
+                if node.kind == "file" and path not in hashes and not deleted:
+                    hashes[path] = node.hash
+        nodes = self._layout(hashes)
+        report = SummaryTreeReport(
+            files=sum(1 for n in nodes.values() if n.kind == "file"),
+            directories=sum(1 for n in nodes.values() if n.kind == "dir"),
+        )
+
+        def reuse(node: TreeNode) -> bool:
+            previous = cached.get(node.path)
+            if not previous or previous.hash != node.hash or not previous.summary:
+                return False
+            if node.kind == "dir":
+                changed = sum(
+                    previous.basis.get(c) != summary_hash(nodes[c]) for c in node.children
+                )
+                if changed > DIR_REFRESH_FRACTION * len(node.children):
+                    return False
+                node.basis = previous.basis
+            node.summary = previous.summary
+            report.reused += 1
+            return True
+
+        pending = [
+            self._summarize_file(node, contents[node.path])
+            for node in nodes.values()
+            if node.kind == "file" and not reuse(node) and node.path in contents
+        ]
+        done = sum(await asyncio.gather(*pending))
+        report.summarized += done
+        report.failed += len(pending) - done
+
+        # Deepest directories first; each level waits for the one below it
+        directories = [n for n in nodes.values() if n.kind == "dir"]
+        depth = lambda n: 0 if n.path == ROOT else len(PurePosixPath(n.path).parts)
+        for level in sorted({depth(n) for n in directories}, reverse=True):
+            batch = [n for n in directories if depth(n) == level]
+            for node in batch:
+                node.children.sort()
+                node.hash = content_hash("\n".join(node.children))
+            todo = [n for n in batch if not reuse(n)]
+
+            async def summarize_dir(node: TreeNode) -> bool:
+                # Children whose summary failed are left out, and count as
+                # changed once they have one
+                items = [
+                    f"- {nodes[c].path}{'/' if nodes[c].kind == 'dir' else ''}: {nodes[c].summary}"
+                    for c in node.children if nodes[c].summary
+                ]
+                if not items:
+                    return False
+                try:
+                    node.summary = await self._reduce(node.path, items)
+                except Exception as e:
+                    print(f"⚠️  No summary for {node.path}/: {type(e).__name__}: {e}")
+                    return False
+                node.basis = {c: summary_hash(nodes[c]) for c in node.children}
+                return True
+
+            done = sum(await asyncio.gather(*(summarize_dir(n) for n in todo)))
+            report.summarized += done
+            report.failed += len(todo) - done
+
+        self.workspace_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({p: asdict(n) for p, n in nodes.items()}, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+        return report
+
+
+def tree_context(tree: Dict[str, TreeNode], max_depth: int = 2, max_chars: int = 24000) -> str:
+    """Repository, package and directory summaries, breadth-first, within a size budget"""
+    return "\n".join(entry for _, entry in _context_entries(tree, max_depth, max_chars))
+
+
+def tree_items(tree: Dict[str, TreeNode], max_depth: int = 2, max_chars: int = 24000) -> List[str]:
+    """Fingerprint items of the nodes ``tree_context`` uses (path and summary hash)"""
+    return [
+        f"tree:{path}:{summary_hash(tree[path])}"
+        for path, _ in _context_entries(tree, max_depth, max_chars)
+    ]
+
+
+def _context_entries(tree: Dict[str, TreeNode], max_depth: int, max_chars: int):
+    if ROOT not in tree:
+        return []
+    lines: List[Tuple[str, str]] = []
+    used = 0
+    queue = [(ROOT, 0)]
+    while queue:
+        path, depth = queue.pop(0)
+        node = tree[path]
+        label = "Repository root" if path == ROOT else f"{path}/"
+        entry = f"{'#' * min(depth + 2, 6)} {label}\n{node.summary}\n"
+        if used + len(entry) > max_chars:
+            break
+        lines.append((path, entry))
+        used += len(entry)
+        if depth < max_depth:
+            queue.extend(
+                (c, depth + 1) for c in node.children if tree[c].kind == "dir"
+            )
+    return lines
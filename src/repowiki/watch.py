@@ -0,0 +1,320 @@
+"""Watch mode - keeps the wiki in step with the working tree
+
+``repowiki watch`` opens the workspace once and then, for every batch of
+file changes:
+
+1. inserts the changed files into the warm LightRAG instance (unchanged
+   content is skipped by LightRAG's document ids)
+2. collects the knowledge of their previous versions and of deleted files
+   (see ``repowiki.gc``)
+3. refreshes the whole-graph steps (canonicalization, importance,
+   communities, summary tree), which reuse everything that didn't change
+4. re-runs the page retrievals and regenerates only the pages whose
+   retrieved context changed, i.e. the pages that touch an affected
+   entity, relation or chunk (see ``repowiki.retrieval.FingerprintStore``)
+
+Changes come from inotify on Linux (through libc, no extra dependency) or
+from polling file modification times everywhere else. Events are debounced:
+a batch is processed once the tree has been quiet for ``DEBOUNCE`` seconds,
+or at most ``MAX_DELAY`` seconds after its first change.
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .config import Config
+
+DEBOUNCE = 1.0       # seconds without changes before a batch is processed
+MAX_DELAY = 10.0     # seconds a batch may wait under continuous changes
+POLL_INTERVAL = 2.0  # seconds between scans when polling
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; then the name
+
+
+class Debouncer:
+    """Collects changed paths and hands them out in batches"""
+
+    def __init__(self, quiet: float = DEBOUNCE, max_delay: float = MAX_DELAY):
+        self.quiet = quiet
+        self.max_delay = max_delay
+        self.pending: Set[Path] = set()
+        self.changed = asyncio.Event()
+
+    def add(self, path: Path):
+        self.pending.add(path)
+        self.changed.set()
+
+    async def next_batch(self) -> Set[Path]:
+        """Wait for changes, then for the tree to go quiet (or ``max_delay``)"""
+        while not self.pending:
+            self.changed.clear()
+            await self.changed.wait()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_delay
+        while True:
+            self.changed.clear()
+            timeout = min(self.quiet, deadline - loop.time())
+            if timeout <= 0:
+                break
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+        batch, self.pending = self.pending, set()
+        return batch
+
+
+class InotifyWatcher:
+    """Recursive inotify watch on a directory tree (Linux)"""
+
+    def __init__(self, root: Path, on_change: Callable[[Path], None],
+                 skip_dir: Callable[[Path], bool] = lambda path: False):
+        self.root = Path(root)
+        self.on_change = on_change
+        self.skip_dir = skip_dir
+        self.paths: Dict[int, Path] = {}  # watch descriptor -> directory
+        self.fd = -1
+        self.libc = None
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith("linux") and bool(ctypes.util.find_library("c"))
+
+    def start(self):
+        """Watch every directory; raises OSError if inotify can't be used"""
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+        asyncio.get_running_loop().add_reader(self.fd, self._read)
+
+    def _watch_tree(self, top: Path, report: bool = False):
+        for directory, dirs, files in os.walk(top):
+            directory = Path(directory)
+            dirs[:] = [d for d in dirs if not self.skip_dir(directory / d)]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOENT:
+                    continue  # removed while walking
+                raise OSError(code, f"inotify_add_watch failed for {directory}: {os.strerror(code)}")
+            self.paths[wd] = directory
+            if report:  # a directory moved or copied in: its files are new too
+                for name in files:
+                    self.on_change(directory / name)
+
+    def _read(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b"\0")
+            offset += EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                self.on_change(self.root)  # events were lost: rescan everything
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.skip_dir(path):
+                    try:
+                        self._watch_tree(path, report=True)
+                    except OSError as e:
+                        print(f"⚠️  Not watching {path}: {e}")
+                elif mask & IN_MOVED_FROM:
+                    self.on_change(self.root)  # everything under it is gone
+            else:
+                self.on_change(path)
+
+    def close(self):
+        if self.fd >= 0:
+            try:
+                asyncio.get_running_loop().remove_reader(self.fd)
+            except RuntimeError:
+                pass
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Detects changes by comparing file modification times and sizes"""
+
+    def __init__(self, root: Path, on_change: Callable[[Path], None],
+                 skip_dir: Callable[[Path], bool] = lambda path: False,
+                 interval: float = POLL_INTERVAL):
+        self.root = Path(root)
+        self.on_change = on_change
+        self.skip_dir = skip_dir
+        self.interval = interval
+        self.snapshot: Dict[Path, Tuple[int, int]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def scan(self) -> Dict[Path, Tuple[int, int]]:
+        files = {}
+        for directory, dirs, names in os.walk(self.root):
+            directory = Path(directory)
+            dirs[:] = [d for d in dirs if not self.skip_dir(directory / d)]
+            for name in names:
+                try:
+                    stat = (directory / name).stat()
+                except OSError:
+                    continue
+                files[directory / name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def start(self):
+        self.snapshot = self.scan()
+        self.task = asyncio.ensure_future(self._poll())
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(self.scan)
+            for path in current.keys() | self.snapshot.keys():
+                if current.get(path) != self.snapshot.get(path):
+                    self.on_change(path)
+            self.snapshot = current
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+
+
+class WikiWatcher:
+    """Re-indexes changed files and regenerates affected pages on one warm LightRAG"""
+
+    def __init__(self, config: Config, extended: bool = False, poll: bool = False,
+                 debounce: float = DEBOUNCE):
+        self.config = config
+        self.extended = extended
+        self.poll = poll
+        self.debouncer = Debouncer(debounce)
+        self.session = None
+        self.indexer = None
+        self.generator = None
+        self.updates = 0
+
+    def skip_dir(self, path: Path) -> bool:
+        """Directories that are never indexed: hidden, excluded, or repowiki's own output"""
+        from .indexer import EXCLUDE_DIRS
+
+        name = path.name
+        return (name.startswith(".") or name in EXCLUDE_DIRS or name.endswith(".egg-info")
+                or path.resolve() in self.indexer.generated_roots)
+
+    def start_watcher(self):
+        """inotify when possible, polling otherwise"""
+        root = Path(self.config.repo_path)
+        if not self.poll and InotifyWatcher.available():
+            watcher = InotifyWatcher(root, self.debouncer.add, self.skip_dir)
+            try:
+                watcher.start()
+                print(f"👀 Watching {root} with inotify ({len(watcher.paths)} directories)")
+                return watcher
+            except (OSError, AttributeError) as e:
+                print(f"⚠️  inotify unavailable ({e}); polling instead")
+        watcher = PollingWatcher(root, self.debouncer.add, self.skip_dir)
+        watcher.start()
+        print(f"👀 Watching {root} by polling every {watcher.interval:g}s "
+              f"({len(watcher.snapshot)} files)")
+        return watcher
+
+    async def open(self):
+        """Load the workspace once; the indexer and generator share its LightRAG"""
+        from .session import WikiSession
+
+        started = time.perf_counter()
+        self.session = WikiSession(self.config, extended=self.extended)
+        self.indexer, self.generator = self.session.indexer, self.session.generator
+        await self.session.open()
+        print(f"📂 Workspace loaded in {time.perf_counter() - started:.1f}s")
+
+    async def update(self, paths: Set[Path]) -> bool:
+        """Apply one batch of changes; returns False when nothing relevant changed"""
+        from .gc import GarbageCollector
+
+        started = time.perf_counter()
+        indexer = self.indexer
+        root = Path(self.config.repo_path)
+        rescan = root in paths
+        if rescan:  # let LightRAG skip everything unchanged
+            changed, removed = indexer.collect_files(), []
+        else:
+            relevant = [p for p in paths if indexer.is_indexable(p)]
+            changed = sorted(p for p in relevant if p.is_file())
+            # Deleted directories too: their files leave the summary tree
+            removed = [
+                str(p.relative_to(root)) for p in paths
+                if not p.exists() and p.is_relative_to(root)
+            ]
+        if not changed and not removed and not rescan:
+            return False
+
+        files, _ = await indexer.read_files(changed)
+        if files:
+            await indexer.insert_files(files)
+        # Previous versions of the changed files, and deleted files
+        report = await GarbageCollector(indexer.rag, self.config).collect()
+        if not files and not report.stale_docs:
+            return False
+        print(f"\n🔁 {len(files)} changed, {len(report.stale_docs)} replaced or deleted documents")
+
+        # Whole-graph steps reuse their caches; the summary tree only reads the changed files
+        await indexer.post_index(files, removed=removed, changed_only=not rescan)
+
+        generator = self.generator
+        generator.load_contexts()
+        await generator.generate_all()
+        self.updates += 1
+        regenerated = len(generator.generated_pages) - generator.reused_pages
+        print(f"✅ Update {self.updates}: {regenerated} pages regenerated, "
+              f"{generator.reused_pages} unchanged, in {time.perf_counter() - started:.1f}s")
+        return True
+
+    async def run(self):
+        """Watch until cancelled (Ctrl+C)"""
+        await self.open()
+        watcher = self.start_watcher()
+        print(f"⏳ Waiting for changes (debounce {self.debouncer.quiet:g}s)...")
+        try:
+            while True:
+                batch = await self.debouncer.next_batch()
+                try:
+                    await self.update(batch)
+                except Exception as e:
+                    print(f"❌ Update failed: {type(e).__name__}: {e}")
+        finally:
+            watcher.close()
+            self.generator.fingerprints.save()
+            await self.session.close()
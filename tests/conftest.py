@@ -0,0 +1,47 @@
+"""Shared fixtures"""
+import numpy as np
+import pytest
+
+
+class CharTokenizer:
+    """One token per character, so no tiktoken encoding is downloaded"""
+
+    def encode(self, content):
+        return [ord(c) for c in content]
+
+    def decode(self, tokens):
+        return "".join(map(chr, tokens))
+
+
+@pytest.fixture
+def offline_models(monkeypatch):
+    """Run real LightRAG indexing with an empty LLM, constant embeddings and no pages"""
+    pytest.importorskip("lightrag")
+    import lightrag.lightrag
+    from lightrag.utils import Tokenizer
+
+    from repowiki.generator import WikiGenerator
+
+    async def llm(self, prompt, system_prompt=None, history_messages=[], **kwargs):
+        return ""
+
+    async def embed(self, texts):
+        return np.ones((len(texts), 1536))
+
+    async def generate_all(self):
+        pass
+
+    monkeypatch.setattr(
+        lightrag.lightrag, "TiktokenTokenizer", lambda *args: Tokenizer("chars", CharTokenizer())
+    )
+    monkeypatch.setattr(WikiGenerator, "_create_llm_func", llm)
+    monkeypatch.setattr(WikiGenerator, "_create_embedding_func", embed)
+    monkeypatch.setattr(WikiGenerator, "generate_all", generate_all)
+
+
+def indexed_files(storage_dir):
+    """File paths in a workspace's doc status, with their statuses"""
+    import json
+
+    docs = json.loads((storage_dir / "kv_store_doc_status.json").read_text(encoding="utf-8"))
+    return sorted(doc["file_path"] for doc in docs.values()), {doc["status"] for doc in docs.values()}
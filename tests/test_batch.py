@@ -0,0 +1,106 @@
+"""Tests for batch mode and the shared model clients"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from repowiki.batch import read_repo_list, repo_configs
+from repowiki.clients import FairLimiter, SharedClients
+
+from .conftest import indexed_files
+
+
+@pytest.mark.asyncio
+async def test_fair_limiter_alternates_between_repositories():
+    """Test a repository with a long queue doesn't delay another's calls"""
+    limiter = FairLimiter(1)
+    order = []
+
+    async def call(repo, i):
+        async with limiter.slot(repo):
+            await asyncio.sleep(0.001)
+            order.append(repo)
+
+    calls = [call("big", i) for i in range(6)] + [call("small", i) for i in range(2)]
+    await asyncio.gather(*calls)
+    # "big" got the free slot first; after that the queues take turns
+    assert order[:5] == ["big", "big", "small", "big", "small"]
+    assert limiter.active == 0 and not limiter.waiting
+
+
+@pytest.mark.asyncio
+async def test_shared_caches_and_usage():
+    """Test identical prompts and texts across repositories are served from the cache"""
+    clients = SharedClients(max_concurrency=2)
+    llm_calls, embedded = [], []
+
+    async def llm(prompt, system_prompt=None, history_messages=[], **kwargs):
+        llm_calls.append(prompt)
+        return "summary of " + prompt
+
+    async def embed(texts):
+        embedded.extend(texts)
+        return np.array([[len(t), 1.0] for t in texts])
+
+    a_llm, b_llm = clients.wrap_llm("a", "m", llm), clients.wrap_llm("b", "m", llm)
+    assert await a_llm("LICENSE") == await b_llm("LICENSE") == "summary of LICENSE"
+    assert llm_calls == ["LICENSE"]
+    # Concurrent identical prompts share one request
+    await asyncio.gather(a_llm("README"), b_llm("README"))
+    assert llm_calls == ["LICENSE", "README"]
+
+    a_embed, b_embed = clients.wrap_embedding("a", "e", embed), clients.wrap_embedding("b", "e", embed)
+    await a_embed(["x", "yy"])
+    vectors = await b_embed(["yy", "zzz", "yy"])
+    assert embedded == ["x", "yy", "zzz"]
+    assert vectors.tolist() == [[2, 1], [3, 1], [2, 1]]
+
+    a, b = clients.usage_of("a"), clients.usage_of("b")
+    assert (a.llm_calls, a.llm_cache_hits, a.embedding_cache_hits) == (2, 0, 0)
+    assert (b.llm_calls, b.llm_cache_hits, b.embedding_cache_hits) == (2, 2, 2)
+    assert b.cache_hits == 4 and a.tokens > 0
+
+
+def test_repo_list_and_configs(tmp_path):
+    """Test list parsing, relative paths and per-repository storage"""
+    (tmp_path / "one").mkdir()
+    (tmp_path / "x" / "one").mkdir(parents=True)
+    repo_list = tmp_path / "repos.txt"
+    repo_list.write_text("# repos\none\n\nx/one  # fork\n", encoding="utf-8")
+
+    repos = read_repo_list(repo_list)
+    assert repos == [tmp_path / "one", tmp_path / "x" / "one"]
+
+    first, second = repo_configs(repos, generation_workers=3)
+    assert (first.repo_name, second.repo_name) == ("one", "one-2")
+    assert first.working_dir == tmp_path / "one" / "repowiki_storage"
+    assert second.output_dir == tmp_path / "x" / "one" / "wiki_docs"
+    assert second.generation_workers == 3
+
+    _, second = repo_configs(repos, working_root=tmp_path / "storage")
+    assert second.working_dir == tmp_path / "storage" / "one-2"
+
+
+@pytest.mark.asyncio
+async def test_repositories_get_their_own_storage(tmp_path, offline_models):
+    """Test concurrent repositories don't see each other's documents"""
+    from repowiki.batch import BatchRunner
+
+    repos = []
+    for name, modules in (("alpha", ["a1", "a2"]), ("beta", ["b1", "b2", "b3"])):
+        repo = tmp_path / name
+        repo.mkdir()
+        for module in modules:
+            (repo / f"{module}.py").write_text(f'"""Module {module}"""\n' + "x = 1\n" * 20)
+        repos.append(repo)
+
+    configs = repo_configs(
+        repos, working_root=tmp_path / "storage", output_root=tmp_path / "wiki",
+        community_summaries=False, summary_tree=False, node_importance=False,
+    )
+    assert [config.workspace for config in configs] == ["alpha", "beta"]
+    results = await BatchRunner(configs, parallel_repos=2).run()
+    assert [r.status for r in results] == ["ok", "ok"]
+
+    for config, expected in zip(configs, (["a1.py", "a2.py"], ["b1.py", "b2.py", "b3.py"])):
+        assert indexed_files(config.working_dir / config.workspace) == (expected, {"processed"})
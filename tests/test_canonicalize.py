@@ -0,0 +1,117 @@
+"""Tests for entity canonicalization"""
+import json
+import numpy as np
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+pytest.importorskip("lightrag")
+
+from lightrag.kg.shared_storage import initialize_share_data
+from lightrag.utils import EmbeddingFunc, compute_mdhash_id
+from lightrag.utils_graph import amerge_entities
+
+from repowiki.canonicalize import EntityCanonicalizer, block_key, normalize_name
+from repowiki.config import Config
+from repowiki.storage.mmap_vector import MmapVectorDBStorage
+from repowiki.storage.sqlite_graph import SQLiteGraphStorage
+
+
+def test_normalize_name():
+    """Test filler words, quotes, repo prefixes and qualified paths"""
+    assert normalize_name("Config class") == "config"
+    assert normalize_name("`Config`") == "config"
+    assert normalize_name("repowiki Config", repo_name="repowiki") == "config"
+    assert normalize_name("generate_page()") == "generate_page"
+    assert normalize_name("src/Config.py") == "src/config.py"
+    assert block_key(normalize_name("config.Config")) == "config"
+    assert block_key("config.py") == "config.py"
+
+
+async def fake_embed(texts, **kwargs):
+    """Texts mentioning 'settings' point one way, everything else another"""
+    return np.array(
+        [[1.0, 0.0] if "settings" in t.lower() else [0.0, 1.0] for t in texts], dtype=np.float32
+    )
+
+
+@pytest.mark.asyncio
+async def test_merges_variants_and_records_aliases(tmp_path):
+    """Test name variants merge onto the best-connected node"""
+    initialize_share_data()
+    global_config = {
+        "working_dir": str(tmp_path),
+        "embedding_batch_num": 8,
+        "vector_db_storage_cls_kwargs": {"cosine_better_than_threshold": 0.2},
+    }
+    embedding = EmbeddingFunc(embedding_dim=2, func=fake_embed)
+
+    def make(cls, namespace, **kwargs):
+        return cls(namespace=namespace, workspace="main", global_config=global_config,
+                   embedding_func=embedding, **kwargs)
+
+    graph = make(SQLiteGraphStorage, "chunk_entity_relation")
+    entities = make(MmapVectorDBStorage, "entities", meta_fields={"entity_name"})
+    relations = make(MmapVectorDBStorage, "relationships", meta_fields={"src_id", "tgt_id"})
+    for storage in (graph, entities, relations):
+        await storage.initialize()
+
+    async def merge(**kwargs):
+        return await amerge_entities(graph, entities, relations, **kwargs)
+
+    rag = SimpleNamespace(
+        chunk_entity_relation_graph=graph, entities_vdb=entities,
+        relationships_vdb=relations, amerge_entities=merge,
+    )
+    nodes = {
+        "Config": "Holds settings",
+        "Config class": "The settings dataclass",
+        "config.Config": "Settings container",
+        "loader.Config": "Unrelated loader config",
+        "Indexer": "Indexes files",
+    }
+    for name, description in nodes.items():
+        await graph.upsert_node(name, {"entity_type": "class", "description": description,
+                                       "source_id": f"chunk-{name}"})
+        await entities.upsert({compute_mdhash_id(name, prefix="ent-"): {
+            "content": f"{name}\n{description}", "entity_name": name}})
+    await graph.upsert_edge("Config", "Indexer", {"description": "configures", "source_id": "c1"})
+    await graph.upsert_edge("Config class", "Indexer", {"description": "used by", "source_id": "c2"})
+
+    config = Config(repo_path=tmp_path, working_dir=tmp_path, workspace="main")
+    report = await EntityCanonicalizer(rag, config).run()
+
+    assert report.groups == {"Config": ["Config class", "config.Config"]}
+    assert (report.nodes_before, report.nodes_after) == (5, 3)
+    assert sorted(await graph.get_all_labels()) == ["Config", "Indexer", "loader.Config"]
+    edge = await graph.get_edge("Config", "Indexer")
+    assert set(edge["source_id"].split("<SEP>")) == {"c1", "c2"}
+    assert "Settings container" in (await graph.get_node("Config"))["description"]
+
+    aliases = json.loads((Path(tmp_path) / "main" / "entity_aliases.json").read_text())
+    assert aliases == {"Config class": "Config", "config.Config": "Config"}
+
+
+@pytest.mark.asyncio
+async def test_case_and_filler_matches_need_agreeing_embeddings(tmp_path):
+    """Test only decoration and unambiguous qualification merge without an embedding check"""
+    vectors = {
+        "Indexer": [1.0, 0.0], "indexer file": [0.0, 1.0],
+        "generator": [0.6, 0.8], "Generator Function": [0.6, 0.8],
+        "Loader": [1.0, 0.0], "config.Loader": [0.0, 1.0],
+    }
+
+    class Vdb:
+        async def get_vectors_by_ids(self, ids):
+            by_id = {compute_mdhash_id(name, prefix="ent-"): v for name, v in vectors.items()}
+            return {i: by_id[i] for i in ids if i in by_id}
+
+    rag = SimpleNamespace(entities_vdb=Vdb())
+    config = Config(repo_path=tmp_path, working_dir=tmp_path, workspace="main")
+    names = list(vectors) + ["`Config`", "Config", "io.Reader", "fs.Reader", "Reader"]
+    groups = await EntityCanonicalizer(rag, config).find_groups(names)
+    assert sorted(sorted(g) for g in groups) == [
+        ["Config", "`Config`"],
+        ["Generator Function", "generator"],
+        ["Loader", "config.Loader"],
+    ]
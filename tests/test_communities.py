@@ -0,0 +1,129 @@
+"""Tests for hierarchical community summaries"""
+import pytest
+from types import SimpleNamespace
+
+pytest.importorskip("networkx")
+
+from repowiki.communities import (
+    CommunityBuilder, community_context, community_items, load_communities, membership_hash,
+)
+from repowiki.config import Config
+
+
+class FakeGraph:
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+
+    def add_clique(self, names):
+        for name in names:
+            self.nodes[name] = {"entity_type": "class", "description": f"{name} does things"}
+        for i, a in enumerate(names):
+            for b in names[i + 1:]:
+                self.edges[(a, b)] = {"description": f"{a} uses {b}", "weight": 1.0}
+
+    async def get_all_nodes(self):
+        return [{**data, "id": name} for name, data in self.nodes.items()]
+
+    async def get_all_edges(self):
+        return [{**data, "source": s, "target": t} for (s, t), data in self.edges.items()]
+
+
+def test_membership_hash_ignores_order():
+    """Test community ids only depend on membership"""
+    assert membership_hash(["b", "a"]) == membership_hash({"a", "b"})
+    assert membership_hash(["a"]) != membership_hash(["a", "b"])
+
+
+@pytest.mark.asyncio
+async def test_only_changed_communities_are_resummarized(tmp_path):
+    """Test summaries are cached by membership hash across builds"""
+    prompts = []
+
+    async def fake_llm(prompt, **kwargs):
+        prompts.append(prompt)
+        return f"TITLE: Cluster {len(prompts)}\nSummary number {len(prompts)}."
+
+    graph = FakeGraph()
+    graph.add_clique(["Indexer", "Reader", "Collector", "Batcher"])
+    graph.add_clique(["Generator", "Page", "Prompt", "Writer"])
+    rag = SimpleNamespace(chunk_entity_relation_graph=graph)
+    config = Config(repo_path=tmp_path, working_dir=tmp_path)
+
+    report = await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    assert (report.communities, report.summarized, report.reused) == (2, 2, 0)
+    first = {c.members[0]: c.summary for c in load_communities(tmp_path / "main").values()}
+
+    prompts.clear()
+    report = await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    assert (report.summarized, report.reused, prompts) == (0, 2, [])
+
+    graph.add_clique(["Generator", "Page", "Prompt", "Writer", "Template"])
+    report = await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    assert (report.summarized, report.reused, report.removed) == (1, 1, 1)
+    assert "Template" in prompts[0]
+
+    communities = load_communities(tmp_path / "main")
+    unchanged = next(c for c in communities.values() if "Indexer" in c.members)
+    assert unchanged.summary == first["Batcher"]
+    context = community_context(communities)
+    assert context.index("Template") < context.index("Indexer")  # larger cluster first
+
+
+@pytest.mark.asyncio
+async def test_nearly_unchanged_communities_keep_their_summary(tmp_path):
+    """Test one new member of a large community reuses its summary and fingerprint items"""
+    prompts = []
+
+    async def fake_llm(prompt, **kwargs):
+        prompts.append(prompt)
+        return f"TITLE: Cluster {len(prompts)}\nSummary number {len(prompts)}."
+
+    graph = FakeGraph()
+    graph.add_clique([f"Parser{i}" for i in range(10)])
+    graph.add_clique(["Generator", "Page", "Prompt", "Writer"])
+    rag = SimpleNamespace(chunk_entity_relation_graph=graph)
+    config = Config(repo_path=tmp_path, working_dir=tmp_path)
+    await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    items = community_items(load_communities(tmp_path / "main"))
+
+    prompts.clear()
+    graph.add_clique([f"Parser{i}" for i in range(11)])
+    report = await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    assert (report.summarized, report.reused, prompts) == (0, 2, [])
+    communities = load_communities(tmp_path / "main")
+    parsers = next(c for c in communities.values() if "Parser10" in c.members)
+    assert "Parser10" not in parsers.basis
+    assert community_items(communities) == items
+
+    # Drift is measured against the summarized members, not the previous build
+    graph.add_clique([f"Parser{i}" for i in range(12)])
+    report = await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    assert report.summarized == 1 and "Parser11" in prompts[0]
+    assert community_items(load_communities(tmp_path / "main")) != items
+
+
+@pytest.mark.asyncio
+async def test_failed_summaries_are_retried_next_build(tmp_path):
+    """Test one failing LLM call keeps the other summaries and is retried later"""
+    failing = {"Generator"}
+
+    async def fake_llm(prompt, **kwargs):
+        if any(name in prompt for name in failing):
+            raise RuntimeError("rate limited")
+        return "TITLE: Cluster\nSummary."
+
+    graph = FakeGraph()
+    graph.add_clique(["Indexer", "Reader", "Collector", "Batcher"])
+    graph.add_clique(["Generator", "Page", "Prompt", "Writer"])
+    rag = SimpleNamespace(chunk_entity_relation_graph=graph)
+    config = Config(repo_path=tmp_path, working_dir=tmp_path)
+
+    report = await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    assert (report.summarized, report.failed) == (1, 1)
+    summaries = {c.members[0]: c.summary for c in load_communities(tmp_path / "main").values()}
+    assert summaries == {"Batcher": "Summary.", "Generator": ""}
+
+    failing.clear()
+    report = await CommunityBuilder(rag, config, llm_func=fake_llm).build()
+    assert (report.summarized, report.reused, report.failed) == (1, 1, 0)
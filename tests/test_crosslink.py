@@ -0,0 +1,52 @@
+"""Tests for entity cross-linking"""
+from repowiki.crosslink import AhoCorasick, CrossLinker, heading_targets, select_mentions
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    """Test every occurrence is reported, including patterns inside others"""
+    matcher = AhoCorasick(["he", "she", "his", "hers"])
+    matches = sorted(matcher.iter_matches("ushers"))
+    assert matches == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_mentions_are_longest_and_word_bounded():
+    """Test a dotted name wins over its prefix and names inside words are ignored"""
+    text = "Use Config and config.Config, not MyConfig or Config_x."
+    matcher = AhoCorasick(["Config", "config.Config"])
+    mentions = select_mentions(text, matcher.iter_matches(text))
+    assert [(text[s:e], name) for s, e, name in mentions] == [
+        ("Config", "Config"), ("config.Config", "config.Config"),
+    ]
+
+
+def test_first_mention_per_page(tmp_path):
+    """Test links are relative, first-mention only, skip protected text and are idempotent"""
+    wiki = tmp_path / "wiki_docs"
+    (wiki / "02-architecture").mkdir(parents=True)
+    (wiki / "04-api-reference").mkdir()
+    (wiki / "04-api-reference" / "public-api.md").write_text(
+        "# Public API\n\n### `class WikiGenerator`\n\nBuilds pages with WikiGenerator.\n",
+        encoding="utf-8",
+    )
+    page = wiki / "02-architecture" / "pipeline.md"
+    page.write_text(
+        "# The WikiGenerator\n\n"
+        "```python\ngen = WikiGenerator(config)\n```\n\n"
+        "The `WikiGenerator` runs jobs. A WikiGenerator and `wiki_gen` again.\n",
+        encoding="utf-8",
+    )
+    targets = heading_targets(wiki)
+    assert targets == {"WikiGenerator": "04-api-reference/public-api.md#class-wikigenerator"}
+
+    linker = CrossLinker(targets, aliases={"wiki_gen": "WikiGenerator"})
+    report = linker.link_wiki(wiki)
+    assert (report.pages, report.pages_changed, report.links_added) == (2, 1, 1)
+    text = page.read_text(encoding="utf-8")
+    assert text == (
+        "# The WikiGenerator\n\n"
+        "```python\ngen = WikiGenerator(config)\n```\n\n"
+        "The [`WikiGenerator`](../04-api-reference/public-api.md#class-wikigenerator) runs jobs. "
+        "A WikiGenerator and `wiki_gen` again.\n"
+    )
+    # The defining page isn't linked to itself, and a second pass changes nothing
+    assert linker.link_wiki(wiki).links_added == 0
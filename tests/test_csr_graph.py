@@ -0,0 +1,109 @@
+"""Tests for the memory-mapped CSR graph storage"""
+import pytest
+from pathlib import Path
+
+pytest.importorskip("lightrag")
+
+import numpy as np
+from lightrag.kg.shared_storage import initialize_share_data
+
+from repowiki.storage.csr_graph import CSRGraphStorage, CSRSnapshotDir, export_graphml
+
+
+async def make_storage(tmp_path: Path) -> CSRGraphStorage:
+    initialize_share_data()
+    storage = CSRGraphStorage(
+        namespace="chunk_entity_relation",
+        workspace="test",
+        global_config={"working_dir": str(tmp_path)},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return storage
+
+
+def test_snapshot_roundtrip(tmp_path):
+    """Test snapshot write and memory-mapped lookups"""
+    snapshot_dir = CSRSnapshotDir(tmp_path / "graph.csr")
+    snapshot_dir.commit(
+        [
+            ("Config", {"entity_type": "class", "description": "Settings"}),
+            ("WikiGenerator", {"entity_type": "class", "weight": 1.5}),
+            ("cli", {"entity_type": "module"}),
+        ],
+        [
+            ("Config", "WikiGenerator", {"description": "configures"}),
+            ("cli", "WikiGenerator", {"weight": 2.0}),
+        ],
+    )
+    snapshot = snapshot_dir.open()
+
+    assert isinstance(snapshot.indptr, np.memmap)
+    assert snapshot.num_nodes == 3
+    assert snapshot.num_edges == 2
+    assert snapshot.find("missing") == -1
+
+    idx = snapshot.find("WikiGenerator")
+    assert snapshot.node_data(idx) == {"entity_type": "class", "weight": 1.5}
+    neighbors = sorted(snapshot.node_id(n) for n, _ in snapshot.neighbors(idx))
+    assert neighbors == ["Config", "cli"]
+
+    eidx = snapshot.find_edge(snapshot.find("cli"), idx)
+    assert snapshot.edge_data(eidx) == {"weight": 2.0}
+
+
+@pytest.mark.asyncio
+async def test_storage_persist_and_reload(tmp_path):
+    """Test overlay mutations are folded into a new snapshot"""
+    storage = await make_storage(tmp_path)
+    await storage.upsert_node("A", {"entity_type": "class"})
+    await storage.upsert_node("B", {"entity_type": "function"})
+    await storage.upsert_edge("A", "B", {"weight": 1.0})
+    await storage.upsert_edge("B", "C", {"weight": 3.0})
+    assert await storage.node_degree("B") == 2
+    assert await storage.index_done_callback()
+
+    reloaded = await make_storage(tmp_path)
+    assert await reloaded.get_node("A") == {"entity_type": "class"}
+    assert await reloaded.has_edge("B", "A")
+    assert sorted(await reloaded.get_all_labels()) == ["A", "B", "C"]
+
+    await reloaded.delete_node("B")
+    assert await reloaded.get_node_edges("A") == []
+    assert not await reloaded.has_edge("A", "B")
+    await reloaded.upsert_node("A", {"description": "updated"})
+    assert await reloaded.get_node("A") == {"entity_type": "class", "description": "updated"}
+    await reloaded.index_done_callback()
+
+    final = await make_storage(tmp_path)
+    assert sorted(await final.get_all_labels()) == ["A", "C"]
+    assert await final.get_all_edges() == []
+
+
+@pytest.mark.asyncio
+async def test_export_graphml(tmp_path):
+    """Test GraphML export of a snapshot"""
+    storage = await make_storage(tmp_path)
+    await storage.upsert_node("A", {"entity_type": "class"})
+    await storage.upsert_edge("A", "B", {"description": "uses"})
+    await storage.index_done_callback()
+
+    output = tmp_path / "graph.graphml"
+    nodes, edges = export_graphml(
+        tmp_path / "test" / "graph_chunk_entity_relation.csr", output
+    )
+    assert (nodes, edges) == (2, 1)
+    assert output.exists()
+
+
+def test_backends_must_implement_every_primitive(tmp_path):
+    """Test a graph backend missing a primitive can't be instantiated"""
+    from repowiki.storage.graph_base import GraphStorageBase
+
+    class Incomplete(GraphStorageBase):
+        def _load(self):
+            pass
+
+    with pytest.raises(TypeError, match="_persist"):
+        Incomplete(namespace="g", workspace="test", global_config={"working_dir": str(tmp_path)},
+                   embedding_func=None)
@@ -0,0 +1,95 @@
+"""Tests for the per-module API reference fan-out"""
+import pytest
+from types import SimpleNamespace
+
+from repowiki.config import Config
+from repowiki.fanout import ApiFanout, api_units
+from repowiki.retrieval import FingerprintStore, Retrieval
+from repowiki.scheduler import DAGScheduler
+
+
+def make_repo(root):
+    for package in ("app", "app/storage"):
+        (root / "src" / package).mkdir(parents=True)
+        (root / "src" / package / "__init__.py").write_text('"""Package"""\n', encoding="utf-8")
+    for module in ("app/cli.py", "app/storage/wal.py", "app/storage/kv.py"):
+        (root / "src" / module).write_text(
+            '"""Module"""\n\ndef open_store(path: str) -> None:\n    """Open a store"""\n',
+            encoding="utf-8",
+        )
+    (root / "src" / "app" / "_private.py").write_text("def hidden():\n    pass\n", encoding="utf-8")
+    return Config(repo_path=root, working_dir=root / "storage", output_dir=root / "wiki",
+                  summary_tree=False, stream_pages=False)
+
+
+def make_generator(config, calls):
+    async def retrieve(prompt, mode, top_k, context=None, memo=True):
+        return Retrieval("context", "system")
+
+    async def complete(prompt, retrieval, stream=False):
+        calls.append(prompt)
+        return "Overview of the module."
+
+    return SimpleNamespace(
+        config=config, force=False, reused_pages=0, generated_pages=[], extra_pages={},
+        page_summaries={}, retrieve=retrieve, complete=complete,
+        fingerprints=FingerprintStore(config.working_dir / "page_fingerprints.json"),
+    )
+
+
+def test_units_per_module_or_package(tmp_path):
+    """Test units skip private modules and map to nested page paths"""
+    config = make_repo(tmp_path)
+    modules = api_units(config, "module")
+    assert [(u.name, u.page) for u in modules] == [
+        ("app", "app.md"), ("app.cli", "app/cli.md"), ("app.storage", "app/storage.md"),
+        ("app.storage.kv", "app/storage/kv.md"), ("app.storage.wal", "app/storage/wal.md"),
+    ]
+    packages = api_units(config, "package")
+    assert [(u.name, len(u.files)) for u in packages] == [("app", 2), ("app.storage", 3)]
+    with pytest.raises(ValueError):
+        api_units(config, "class")
+
+
+def test_top_level_modules_get_a_root_package_page(tmp_path):
+    """Test modules outside any package are grouped under the repository's name"""
+    config = make_repo(tmp_path)
+    config.repo_name = "demo"
+    (tmp_path / "src" / "cli_tool.py").write_text("def main():\n    pass\n", encoding="utf-8")
+    (tmp_path / "src" / "helpers.py").write_text("def build():\n    pass\n", encoding="utf-8")
+    packages = api_units(config, "package")
+    assert [(u.name, u.page, len(u.files)) for u in packages] == [
+        ("demo", "__root__.md", 2), ("app", "app.md", 2), ("app.storage", "app/storage.md", 3),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pages_indexes_and_resume(tmp_path):
+    """Test every module gets a page, directories get indexes, reruns only redo changes"""
+    config = make_repo(tmp_path)
+    calls = []
+    generator = make_generator(config, calls)
+    scheduler = DAGScheduler(max_workers=4)
+    root_job = ApiFanout(generator, "module").add_jobs(scheduler, "API Reference")
+    await scheduler.run()
+
+    modules = config.output_dir / "04-api-reference" / "modules"
+    assert len(calls) == 5
+    wal = (modules / "app" / "storage" / "wal.md").read_text(encoding="utf-8")
+    assert wal.startswith("# `app.storage.wal`\n\nHome > API Reference > Module Reference > app")
+    assert "### `def open_store(path: str) -> None`" in wal
+    index = (modules / "app" / "storage" / "README.md").read_text(encoding="utf-8")
+    assert "- [`app.storage.wal`](wal.md): Overview of the module." in index
+    assert "[`app.storage`](storage/README.md): 2 pages" in (modules / "app" / "README.md").read_text()
+    assert root_job == "04-api-reference/modules/README" and (modules / "README.md").exists()
+    assert generator.extra_pages["04-api-reference"] == [("modules/README", "Module Reference")]
+
+    generator.fingerprints.save()
+    (tmp_path / "src" / "app" / "cli.py").write_text('"""Changed"""\n', encoding="utf-8")
+    calls.clear()
+    generator = make_generator(config, calls)
+    scheduler = DAGScheduler(max_workers=4)
+    ApiFanout(generator, "module").add_jobs(scheduler, "API Reference")
+    await scheduler.run()
+    assert len(calls) == 1 and "`app.cli`" in calls[0]
+    assert generator.reused_pages == 4
@@ -0,0 +1,105 @@
+"""Tests for workspace garbage collection"""
+import numpy as np
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+pytest.importorskip("lightrag")
+
+from lightrag.base import DocStatus
+from lightrag.constants import GRAPH_FIELD_SEP
+from lightrag.kg.json_doc_status_impl import JsonDocStatusStorage
+from lightrag.kg.json_kv_impl import JsonKVStorage
+from lightrag.kg.shared_storage import initialize_share_data
+from lightrag.utils import EmbeddingFunc, compute_mdhash_id
+
+from repowiki.config import Config
+from repowiki.gc import GarbageCollector
+from repowiki.storage.mmap_vector import MmapVectorDBStorage
+from repowiki.storage.sqlite_graph import SQLiteGraphStorage
+
+
+async def fake_embed(texts, **kwargs):
+    return np.ones((len(texts), 4), dtype=np.float32)
+
+
+async def make_rag(working_dir: Path):
+    initialize_share_data()
+    global_config = {
+        "working_dir": str(working_dir),
+        "embedding_batch_num": 8,
+        "vector_db_storage_cls_kwargs": {"cosine_better_than_threshold": 0.2},
+    }
+    embedding = EmbeddingFunc(embedding_dim=4, func=fake_embed)
+
+    def make(cls, namespace, **kwargs):
+        return cls(namespace=namespace, workspace="main", global_config=global_config,
+                   embedding_func=embedding, **kwargs)
+
+    rag = SimpleNamespace(
+        doc_status=make(JsonDocStatusStorage, "doc_status"),
+        full_docs=make(JsonKVStorage, "full_docs"),
+        full_entities=make(JsonKVStorage, "full_entities"),
+        full_relations=make(JsonKVStorage, "full_relations"),
+        text_chunks=make(JsonKVStorage, "text_chunks"),
+        chunk_entity_relation_graph=make(SQLiteGraphStorage, "chunk_entity_relation"),
+        entities_vdb=make(MmapVectorDBStorage, "entities", meta_fields={"entity_name"}),
+        relationships_vdb=make(MmapVectorDBStorage, "relationships", meta_fields={"src_id"}),
+        chunks_vdb=make(MmapVectorDBStorage, "chunks", meta_fields={"full_doc_id"}),
+    )
+    for storage in vars(rag).values():
+        await storage.initialize()
+    return rag
+
+
+async def add_doc(rag, doc_id, file_path, chunk_id, entities):
+    await rag.doc_status.upsert({doc_id: {
+        "status": DocStatus.PROCESSED, "file_path": file_path, "chunks_list": [chunk_id],
+        "content_summary": "", "content_length": 1,
+        "created_at": "2024-01-01", "updated_at": "2024-01-01",
+    }})
+    await rag.text_chunks.upsert({chunk_id: {"content": file_path, "full_doc_id": doc_id}})
+    await rag.chunks_vdb.upsert({chunk_id: {"content": file_path, "full_doc_id": doc_id}})
+    for name, source_ids in entities.items():
+        await rag.chunk_entity_relation_graph.upsert_node(
+            name, {"source_id": GRAPH_FIELD_SEP.join(source_ids)}
+        )
+        await rag.entities_vdb.upsert(
+            {compute_mdhash_id(name, prefix="ent-"): {"content": name, "entity_name": name}}
+        )
+
+
+@pytest.mark.asyncio
+async def test_gc_removes_knowledge_of_deleted_files(tmp_path):
+    """Test entities only sourced from a deleted file are collected"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "kept.py").write_text("print('kept')\n")
+    config = Config(repo_path=repo, working_dir=tmp_path / "storage")
+    rag = await make_rag(config.working_dir)
+
+    await add_doc(rag, "doc-kept", "kept.py", "chunk-kept", {"Kept": ["chunk-kept"]})
+    await add_doc(rag, "doc-gone", "gone.py", "chunk-gone", {
+        "Gone": ["chunk-gone"], "Shared": ["chunk-gone", "chunk-kept"],
+    })
+    graph = rag.chunk_entity_relation_graph
+    await graph.upsert_edge("Gone", "Kept", {"source_id": "chunk-gone"})
+    await graph.upsert_edge("Shared", "Kept", {"source_id": "chunk-kept"})
+    for storage in vars(rag).values():
+        await storage.index_done_callback()
+
+    collector = GarbageCollector(rag, config)
+    dry = await collector.collect(dry_run=True)
+    assert (dry.stale_docs, dry.nodes_removed, dry.edges_removed) == (["doc-gone"], 1, 1)
+    assert await graph.has_node("Gone")
+
+    report = await collector.collect()
+    assert report.chunks_removed == 1
+    assert report.vectors_removed == 2  # entity "Gone" and chunk "chunk-gone"
+    assert report.vector_slots_reclaimed == 2
+    assert sorted(await graph.get_all_labels()) == ["Kept", "Shared"]
+    assert (await graph.get_node("Shared"))["source_id"] == "chunk-kept"
+    assert await rag.doc_status.get_by_id("doc-gone") is None
+    assert await rag.text_chunks.get_by_id("chunk-gone") is None
+    assert await rag.entities_vdb.get_all_ids() == [compute_mdhash_id("Kept", prefix="ent-"),
+                                                    compute_mdhash_id("Shared", prefix="ent-")]
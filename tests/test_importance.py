@@ -0,0 +1,102 @@
+"""Tests for PageRank node importance"""
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+pytest.importorskip("lightrag")
+
+from lightrag.kg.shared_storage import initialize_share_data
+from lightrag.utils import EmbeddingFunc, compute_mdhash_id
+
+from repowiki.config import Config
+from repowiki.importance import ImportanceRanker, NodeImportance, load_importance
+from repowiki.storage.mmap_vector import MmapVectorDBStorage
+from repowiki.storage.sqlite_graph import SQLiteGraphStorage
+
+
+async def fake_embed(texts, **kwargs):
+    return np.ones((len(texts), 4), dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_hub_scores_highest_and_tail_is_pruned(tmp_path):
+    """Test scores are stored on nodes, refreshed incrementally and prune the tail"""
+    initialize_share_data()
+    global_config = {
+        "working_dir": str(tmp_path),
+        "embedding_batch_num": 8,
+        "vector_db_storage_cls_kwargs": {"cosine_better_than_threshold": 0.2},
+    }
+    embedding = EmbeddingFunc(embedding_dim=4, func=fake_embed)
+    graph = SQLiteGraphStorage(namespace="chunk_entity_relation", workspace="main",
+                               global_config=global_config, embedding_func=embedding)
+    entities = MmapVectorDBStorage(namespace="entities", workspace="main",
+                                   global_config=global_config, embedding_func=embedding,
+                                   meta_fields={"entity_name"})
+    await graph.initialize()
+    await entities.initialize()
+
+    names = ["Hub"] + [f"Leaf{i}" for i in range(9)]
+    for name in names:
+        await graph.upsert_node(name, {"entity_type": "class", "description": name})
+        await entities.upsert({compute_mdhash_id(name, prefix="ent-"): {
+            "content": name, "entity_name": name}})
+    for i in range(9):
+        await graph.upsert_edge("Hub", f"Leaf{i}", {"weight": 1.0})
+    await graph.upsert_edge("Leaf0", "Leaf1", {"weight": 1.0})
+
+    rag = SimpleNamespace(chunk_entity_relation_graph=graph, entities_vdb=entities)
+    config = Config(repo_path=tmp_path, working_dir=tmp_path)
+    report = await NodeImportance(rag, config).refresh()
+    assert (report.nodes, report.nodes_updated) == (10, 10)
+    assert (await graph.get_node("Hub"))["importance"] == 1.0
+    scores = load_importance(tmp_path / "main")
+    assert scores["Leaf0"] > scores["Leaf5"]
+
+    report = await NodeImportance(rag, config).refresh(prune_fraction=0.5)
+    assert report.nodes_updated == 0
+    assert report.vectors_pruned == 5
+    remaining = await entities.get_vectors_by_ids(
+        [compute_mdhash_id(n, prefix="ent-") for n in names]
+    )
+    assert compute_mdhash_id("Hub", prefix="ent-") in remaining
+    assert len(remaining) == 5
+    assert await graph.has_node("Leaf8")  # pruning keeps the graph intact
+
+
+def test_ranker_breaks_ties_by_importance():
+    """Test equal similarities are ordered by importance, higher similarity still wins"""
+    ranker = ImportanceRanker({"Hub": 1.0, "Leaf": 0.1, "Other": 0.5})
+    results = [
+        {"entity_name": "Leaf", "distance": 0.801},
+        {"entity_name": "Hub", "distance": 0.799},
+        {"entity_name": "Other", "distance": 0.9},
+    ]
+    assert [r["entity_name"] for r in ranker.rank_entities(results)] == ["Other", "Hub", "Leaf"]
+    # A higher degree still wins; equal degrees go to the more central endpoints
+    assert ranker.edge_rank(3, "Leaf", "Other") > ranker.edge_rank(2, "Hub", "Other")
+    assert ranker.edge_rank(2, "Hub", "Other") > ranker.edge_rank(2, "Leaf", "Other")
+
+
+@pytest.mark.asyncio
+async def test_ranked_views_leave_storages_untouched():
+    """Test the retrieval views rank results without patching the storages"""
+    class Entities:
+        cosine_better_than_threshold = 0.2
+
+        async def query(self, query, top_k, query_embedding=None):
+            return [{"entity_name": "Leaf", "distance": 0.8}, {"entity_name": "Hub", "distance": 0.8}]
+
+    class Graph:
+        async def edge_degrees_batch(self, edge_pairs):
+            return {pair: 2 for pair in edge_pairs}
+
+    entities, graph = Entities(), Graph()
+    ranker = ImportanceRanker({"Hub": 1.0, "Leaf": 0.1})
+    ranked = await ranker.entities(entities).query("q", top_k=2)
+    assert [r["entity_name"] for r in ranked] == ["Hub", "Leaf"]
+    assert ranker.entities(entities).cosine_better_than_threshold == 0.2
+    degrees = await ranker.graph(graph).edge_degrees_batch([("Hub", "Leaf")])
+    assert degrees == {("Hub", "Leaf"): (2, 0.55)}
+    assert "query" not in vars(entities) and "edge_degrees_batch" not in vars(graph)
+    assert (await entities.query("q", 2))[0]["entity_name"] == "Leaf"
@@ -28,3 +28,31 @@ def test_file_collection_config(tmp_path):
     assert '.py' in config.code_extensions
     assert '.md' in config.code_extensions
     assert '.txt' in config.code_extensions
+
+
+@pytest.mark.asyncio
+async def test_failed_post_index_step_does_not_fail_indexing(tmp_path, monkeypatch):
+    """Test a failing community build is reported and the summary tree still runs"""
+    from types import SimpleNamespace
+
+    from repowiki.communities import CommunityBuilder
+    from repowiki.indexer import RepositoryIndexer
+    from repowiki.summary_tree import SummaryTreeBuilder
+
+    built = []
+
+    async def fail(self):
+        raise RuntimeError("LLM unavailable")
+
+    async def build(self, contents, removed=(), incremental=False):
+        built.append(sorted(contents))
+        return SimpleNamespace(print_summary=lambda: None)
+
+    monkeypatch.setattr(CommunityBuilder, "build", fail)
+    monkeypatch.setattr(SummaryTreeBuilder, "build", build)
+    indexer = RepositoryIndexer(Config(repo_path=tmp_path, working_dir=tmp_path, node_importance=False))
+    indexer.rag = SimpleNamespace(llm_model_func=None)
+
+    await indexer.post_index({"a.py": "# File: a.py\n\nx = 1"})
+    assert built == [["a.py"]]
+    assert indexer.metrics.value("post_index_failures", step="communities") == 1
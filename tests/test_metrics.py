@@ -0,0 +1,108 @@
+"""Tests for run metrics"""
+import json
+
+import pytest
+from tenacity import retry, stop_after_attempt, wait_none
+
+from repowiki.metrics import METRICS_JSON, METRICS_PROM, Metrics
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_prometheus_textfile_and_json_report(tmp_path):
+    """Test counters, cumulative histogram buckets and both report files"""
+    metrics = Metrics("my-repo")
+    metrics.inc("files_read", 3)
+    metrics.inc("files_read", 2)
+    metrics.inc("llm_tokens", 120, direction="in", stage="index")
+    for seconds in (0.02, 0.3, 0.4, 500):
+        metrics.observe("llm_latency_seconds", seconds, stage="index")
+    metrics.record_page("01-overview/architecture", wait=1.5, run=12.0)
+
+    text = metrics.to_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE repowiki_files_read_total counter" in lines
+    assert 'repowiki_files_read_total{repo="my-repo"} 5' in lines
+    assert 'repowiki_llm_tokens_total{direction="in",repo="my-repo",stage="index"} 120' in lines
+    assert "# TYPE repowiki_llm_latency_seconds histogram" in lines
+    assert 'repowiki_llm_latency_seconds_bucket{le="0.05",repo="my-repo",stage="index"} 1' in lines
+    assert 'repowiki_llm_latency_seconds_bucket{le="0.5",repo="my-repo",stage="index"} 3' in lines
+    assert 'repowiki_llm_latency_seconds_bucket{le="+Inf",repo="my-repo",stage="index"} 4' in lines
+    assert 'repowiki_llm_latency_seconds_count{repo="my-repo",stage="index"} 4' in lines
+    assert 'repowiki_page_seconds_sum{repo="my-repo"} 12' in lines
+
+    json_path, prom_path = metrics.write(tmp_path / "main")
+    assert (json_path.name, prom_path.name) == (METRICS_JSON, METRICS_PROM)
+    assert prom_path.read_text().startswith("# HELP")
+    report = json.loads(json_path.read_text())
+    assert {"name": "files_read", "labels": {}, "value": 5} in report["counters"]
+    latency, = [h for h in report["histograms"] if h["name"] == "llm_latency_seconds"]
+    assert latency["count"] == 4 and latency["buckets"]["+Inf"] == 4
+    assert report["pages"]["01-overview/architecture"] == {"wait": 1.5, "run": 12.0}
+    assert not list(tmp_path.glob("main/*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_model_calls_retries_and_rate_limits():
+    """Test instrumented model functions, including streams and tenacity retries"""
+    metrics = Metrics("r")
+    attempts = []
+
+    @retry(stop=stop_after_attempt(3), wait=wait_none())
+    async def complete(prompt):
+        attempts.append(prompt)
+        if len(attempts) == 1:
+            raise RateLimitError("slow down")
+        return "x" * 40
+
+    async def llm(prompt, system_prompt=None, history_messages=[], **kwargs):
+        if kwargs.get("stream"):
+            async def chunks():
+                yield "abcd" * 5
+                yield "efgh" * 5
+            return chunks()
+        return await metrics.retrying(complete, "llm")(prompt)
+
+    llm_func = metrics.instrument_llm(llm)
+    assert await llm_func("p" * 400, system_prompt="s" * 400) == "x" * 40
+    metrics.stage = "generate"
+    assert "".join([chunk async for chunk in await llm_func("q" * 40, stream=True)]) == "abcd" * 5 + "efgh" * 5
+
+    assert attempts == ["p" * 400] * 2
+    assert metrics.value("retries", kind="llm") == 1
+    assert metrics.value("rate_limited", kind="llm") == 1
+    assert metrics.value("llm_calls", stage="index") == metrics.value("llm_calls", stage="generate") == 1
+    assert metrics.value("llm_tokens", direction="in", stage="index") == 200
+    assert metrics.value("llm_tokens", direction="out", stage="index") == 10
+    assert metrics.value("llm_tokens", direction="out", stage="generate") == 10
+    assert metrics.histograms[("llm_latency_seconds", (("stage", "generate"),))].count == 1
+
+    async def embed(texts):
+        raise RateLimitError("quota")
+
+    with pytest.raises(RateLimitError):
+        await metrics.instrument_embedding(embed)(["a" * 8, "b" * 8])
+    assert metrics.value("embedding_texts", stage="generate") == 2
+    assert metrics.value("embedding_errors", stage="generate") == 1
+    assert metrics.value("rate_limited", kind="embedding") == 1
+
+
+def test_large_values_keep_full_precision():
+    """Test counters, sums and bucket bounds above 1e6 are not rounded"""
+    from repowiki.metrics import SIZE_BUCKETS
+
+    metrics = Metrics("r")
+    metrics.inc("storage_bytes_written", 123456789)
+    metrics.inc("llm_tokens", 2345678, direction="in", stage="index")
+    metrics.observe("file_size_bytes", 1048576.5, SIZE_BUCKETS)
+    metrics.observe("llm_latency_seconds", 0.123456789)
+
+    lines = metrics.to_prometheus().splitlines()
+    assert 'repowiki_storage_bytes_written_total{repo="r"} 123456789' in lines
+    assert 'repowiki_llm_tokens_total{direction="in",repo="r",stage="index"} 2345678' in lines
+    assert 'repowiki_file_size_bytes_bucket{le="1048576",repo="r"} 0' in lines
+    assert 'repowiki_file_size_bytes_sum{repo="r"} 1048576.5' in lines
+    assert 'repowiki_llm_latency_seconds_sum{repo="r"} 0.123456789' in lines
+    assert not [line for line in lines if "e+" in line]
@@ -0,0 +1,84 @@
+"""Tests for deterministic page renderers"""
+from repowiki.config import Config
+from repowiki.prompts import get_wiki_structure
+from repowiki.renderers import RENDERERS, render_page
+
+
+def make_repo(root):
+    (root / "pyproject.toml").write_text('''
+[project]
+name = "demo"
+requires-python = ">=3.12"
+dependencies = ["numpy>=1.24", "networkx"]
+
+[project.optional-dependencies]
+dev = ["pytest>=7.0"]
+
+[project.scripts]
+demo = "demo.cli:main"
+''', encoding="utf-8")
+    package = root / "src" / "demo"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text('"""Demo package"""\n__all__ = ["Client"]\n'
+                                         'from .client import Client\n', encoding="utf-8")
+    (package / "client.py").write_text('''"""HTTP client"""
+
+class Client:
+    """Talks to the server"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def fetch(self, path: str, retries: int = 3) -> bytes:
+        """Fetch a path"""
+
+    def _backoff(self):
+        pass
+
+
+def connect(url: str) -> Client:
+    return Client(url)
+
+
+def _helper():
+    pass
+''', encoding="utf-8")
+    (package / "_internal.py").write_text("def hidden():\n    pass\n", encoding="utf-8")
+    (root / "tests").mkdir()
+    (root / "tests" / "test_client.py").write_text("def test_fetch():\n    pass\n", encoding="utf-8")
+    (root / "wiki_docs").mkdir()
+    (root / "wiki_docs" / "README.md").write_text("# Old wiki\n", encoding="utf-8")
+    return Config(repo_path=root, working_dir=root / "storage", output_dir=root / "wiki_docs")
+
+
+def test_pages_come_from_static_analysis(tmp_path):
+    """Test dependencies, tree and API are read from the repository, reproducibly"""
+    config = make_repo(tmp_path)
+
+    dependencies = render_page("dependencies", config)
+    assert dependencies.startswith("2 runtime dependencies and 1 optional groups")
+    assert "| numpy | >=1.24 |" in dependencies and "| networkx | any |" in dependencies
+    assert "`>=3.12`" in dependencies and "`demo.cli:main`" in dependencies
+
+    structure = render_page("project_structure", config)
+    assert "├── src/ (3 files)" in structure and "tests/ (1 files)" in structure
+    assert "wiki_docs" not in structure
+
+    api = render_page("public_api", config)
+    assert "## `demo.client`" in api and "HTTP client" in api
+    assert "`async def fetch(self, path: str, retries: int=3) -> bytes`: Fetch a path" in api
+    assert "`def connect(url: str) -> Client`" in api
+    for private in ("_backoff", "_helper", "hidden", "test_fetch"):
+        assert private not in api
+    # __all__ decides what the package re-exports, and it has no definitions of its own
+    assert "## `demo`\n" not in api
+
+    for renderer in RENDERERS:
+        assert render_page(renderer, config) == render_page(renderer, config)
+
+
+def test_structure_renderers_exist():
+    """Test every statically rendered page names a known renderer"""
+    for category in get_wiki_structure(extended=True).values():
+        for page in category["pages"]:
+            assert page.renderer is None or page.renderer in RENDERERS
@@ -0,0 +1,73 @@
+"""Tests for page retrieval and input fingerprints"""
+import asyncio
+import numpy as np
+import pytest
+
+from repowiki.retrieval import (
+    EmbeddingBatcher,
+    FingerprintStore,
+    context_fingerprint,
+    retrieval_items,
+)
+
+DATA = {
+    "entities": [{"entity_name": "Indexer", "entity_type": "class", "description": "Indexes"}],
+    "relationships": [{"src_id": "Indexer", "tgt_id": "Config", "description": "reads",
+                       "keywords": "config", "weight": 1.0}],
+    "chunks": [{"chunk_id": "chunk-1", "content": "class Indexer: ..."}],
+}
+
+
+def test_items_track_ids_and_content():
+    """Test a changed description changes the item, not just its id"""
+    items = retrieval_items(DATA)
+    assert [i.split(":")[0] for i in items] == ["ent", "rel", "chunk"]
+    assert items[0].startswith("ent:Indexer:") and items[2].startswith("chunk:chunk-1:")
+
+    edited = {**DATA, "entities": [{**DATA["entities"][0], "description": "Indexes files"}]}
+    assert retrieval_items(edited)[0] != items[0]
+    assert retrieval_items(edited)[1:] == items[1:]
+
+
+def test_fingerprint_covers_prompt_settings_and_context(tmp_path):
+    """Test any input change invalidates the stored fingerprint"""
+    items = retrieval_items(DATA)
+    base = context_fingerprint("prompt", "local", 40, "gpt-4o", items)
+    assert base == context_fingerprint("prompt", "local", 40, "gpt-4o", list(items))
+    for changed in (
+        ("prompt!", "local", 40, "gpt-4o", items),
+        ("prompt", "hybrid", 40, "gpt-4o", items),
+        ("prompt", "local", 35, "gpt-4o", items),
+        ("prompt", "local", 40, "gpt-4o-mini", items),
+        ("prompt", "local", 40, "gpt-4o", items[:2]),
+    ):
+        assert context_fingerprint(*changed) != base
+
+    store = FingerprintStore(tmp_path / "page_fingerprints.json")
+    store.record("01-overview/architecture.md", base)
+    store.save()
+    reloaded = FingerprintStore(tmp_path / "page_fingerprints.json")
+    assert reloaded.unchanged("01-overview/architecture.md", base)
+    assert not reloaded.unchanged("01-overview/project-overview.md", base)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_embeddings_share_one_request():
+    """Test concurrent query embeddings are merged, deduplicated and split back"""
+    requests = []
+
+    async def embed(texts):
+        requests.append(texts)
+        return np.array([[len(t), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+    batcher = EmbeddingBatcher(embed, window=0.01)
+    results = await asyncio.gather(
+        batcher(["a"]), batcher(["bb", "ccc"]), batcher(["a"]),
+    )
+    assert requests == [["a", "bb", "ccc"]]
+    assert [r[:, 0].tolist() for r in results] == [[1], [2, 3], [1]]
+    assert (batcher.calls, batcher.requests) == (3, 1)
+
+    # A full batch is sent without waiting for the window
+    batcher = EmbeddingBatcher(embed, window=60, max_batch=2)
+    assert (await asyncio.wait_for(batcher(["x", "y"]), 1)).shape == (2, 2)
@@ -0,0 +1,90 @@
+"""Tests for the page generation scheduler"""
+import asyncio
+import pytest
+
+from repowiki.generator import page_summary
+from repowiki.scheduler import DAGScheduler, LatencyHistory
+
+
+@pytest.mark.asyncio
+async def test_dependencies_run_first_within_worker_bound():
+    """Test indexes wait for their pages and no more than max_workers run at once"""
+    order, running, peak = [], 0, 0
+
+    def job(name, fail=False):
+        async def run():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            order.append(name)
+            if fail:
+                raise RuntimeError("boom")
+            return name.upper()
+        return run
+
+    scheduler = DAGScheduler(max_workers=2)
+    scheduler.add("README", job("README"), deps=["a/README", "b/README"])
+    scheduler.add("a/README", job("a/README"), deps=["a/1", "a/2"])
+    scheduler.add("b/README", job("b/README"), deps=["b/1"])
+    for name in ("a/1", "a/2", "b/1"):
+        scheduler.add(name, job(name, fail=name == "b/1"))
+
+    results = await scheduler.run()
+    assert peak == 2
+    assert order[-1] == "README"
+    assert order.index("a/README") > max(order.index("a/1"), order.index("a/2"))
+    assert results["b/1"] is None and results["b/README"] == "B/README"
+
+
+@pytest.mark.asyncio
+async def test_priority_then_longest_expected_first(tmp_path):
+    """Test overview pages start first, then the historically slowest pages"""
+    history = LatencyHistory(tmp_path / "page_latency.json")
+    history.record("slow", 30.0)
+    history.record("fast", 1.0)
+    started = []
+
+    def job(name):
+        async def run():
+            started.append(name)
+            await asyncio.sleep(0)
+        return run
+
+    scheduler = DAGScheduler(max_workers=1, history=history)
+    for name in ("fast", "new", "slow"):
+        scheduler.add(name, job(name))
+    scheduler.add("overview", job("overview"), priority=0)
+    await scheduler.run()
+
+    # "new" has no history and is expected to take the average (15.5s)
+    assert started == ["overview", "slow", "new", "fast"]
+    timings = {t.name: t for t in scheduler.timings}
+    assert timings["fast"].wait >= timings["slow"].wait >= 0
+    history.save()
+    assert LatencyHistory(tmp_path / "page_latency.json").expected("slow") < 30.0
+
+
+def test_rejects_cycles_and_unknown_dependencies():
+    """Test invalid graphs fail before anything runs"""
+    async def noop():
+        return None
+
+    scheduler = DAGScheduler()
+    scheduler.add("a", noop, deps=["b"])
+    scheduler.add("b", noop, deps=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(scheduler.run())
+
+    scheduler = DAGScheduler()
+    scheduler.add("a", noop, deps=["missing"])
+    with pytest.raises(ValueError, match="unknown"):
+        asyncio.run(scheduler.run())
+
+
+def test_page_summary_skips_breadcrumb_and_headings():
+    """Test index entries use the first prose paragraph"""
+    content = "Home > Overview > Architecture\n\n## Overview\n\nThe indexer **builds** a graph.\nIt is fast."
+    assert page_summary(content) == "The indexer **builds** a graph. It is fast."
+    assert page_summary("word " * 100, limit=20).endswith("…")
@@ -0,0 +1,170 @@
+"""Tests for the wiki daemon"""
+import asyncio
+import json
+
+import pytest
+
+from repowiki.config import Config
+from repowiki.retrieval import Retrieval
+from repowiki.serve import Coalescer, RequestError, WikiServer, Workspace, WorkspacePool
+
+from .conftest import indexed_files
+
+
+class FakeGenerator:
+    """Stands in for a WikiGenerator with a warm LightRAG"""
+
+    def __init__(self):
+        self.retrieved = []
+        self.closed = False
+        self.fingerprints = self
+        self.rag = self
+
+    def save(self):
+        pass
+
+    async def finalize_storages(self):
+        self.closed = True
+
+    async def retrieve(self, prompt, mode, top_k, context=None, memo=True):
+        self.retrieved.append((prompt, mode, top_k))
+        await asyncio.sleep(0.01)
+        return Retrieval(f"context for {prompt}", "system")
+
+    async def complete(self, prompt, retrieval, stream=False):
+        return f"answer to {prompt}"
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    opened = []
+
+    async def fake_open(self, config):
+        opened.append(config.repo_path.name)
+        return Workspace(config, FakeGenerator())
+
+    monkeypatch.setattr(WorkspacePool, "_open", fake_open)
+    return opened
+
+
+async def request(socket_path, method, path, body=None):
+    reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response = (await reader.read()).split(b"\r\n\r\n", 1)[1]
+    writer.close()
+    return status, json.loads(response)
+
+
+@pytest.mark.asyncio
+async def test_lru_keeps_busy_and_recent_workspaces(tmp_path, opened):
+    """Test the least recently used idle workspace is closed first"""
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+    pool = WorkspacePool(Config(repo_path=tmp_path / "a"), capacity=2)
+    a = await pool.acquire(pool.config_for({}))  # stays busy
+    b = await pool.acquire(pool.config_for({"repo": str(tmp_path / "b")}))
+    pool.release(b)
+    c = await pool.acquire(pool.config_for({"repo": str(tmp_path / "c")}))
+    pool.release(c)
+    assert b.generator.closed and not a.generator.closed
+    assert [ws.config.repo_path.name for ws in pool.open.values()] == ["a", "c"]
+    again = await pool.acquire(pool.config_for({"repo": str(tmp_path / "c")}))
+    assert again is c and opened == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_api_coalesces_identical_queries(tmp_path, opened):
+    """Test the HTTP API over a Unix socket, with one workspace load and coalesced queries"""
+    socket_path = tmp_path / "repowiki.sock"
+    server = WikiServer(Config(repo_path=tmp_path))
+    serving = asyncio.create_task(server.serve(socket_path=socket_path))
+    while not socket_path.exists():
+        await asyncio.sleep(0.01)
+
+    question = {"question": "How are pages scheduled?", "top_k": 5}
+    results = await asyncio.gather(*(request(socket_path, "POST", "/query", question) for _ in range(3)))
+    assert all(status == 200 for status, _ in results)
+    assert {body["answer"] for _, body in results} == {"answer to How are pages scheduled?"}
+    generator = next(iter(server.pool.open.values())).generator
+    assert generator.retrieved == [("How are pages scheduled?", "mix", 5)]
+    assert opened == [tmp_path.name] and server.coalescer.coalesced == 2
+
+    assert (await request(socket_path, "POST", "/query", {"top_k": 5}))[0] == 400
+    assert (await request(socket_path, "POST", "/generate", {"page": "nope/page"}))[0] == 404
+    assert (await request(socket_path, "GET", "/query"))[0] == 405
+    status, health = await request(socket_path, "GET", "/health")
+    assert status == 200 and health["workspaces"][0]["requests"] == 1
+
+    serving.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await serving
+    assert generator.closed and not socket_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_late_reindex_requests_share_one_follow_up_run():
+    """Test a request arriving mid-run gets a run that started after it"""
+    coalescer = Coalescer()
+    runs = []
+
+    async def reindex():
+        runs.append(len(runs))
+        await asyncio.sleep(0.05)
+        return runs[-1]
+
+    first = asyncio.ensure_future(coalescer.run_after(("ws", "reindex"), reindex))
+    await asyncio.sleep(0.01)
+    late = [asyncio.ensure_future(coalescer.run_after(("ws", "reindex"), reindex)) for _ in range(3)]
+    assert await first == 0
+    assert await asyncio.gather(*late) == [1, 1, 1]
+    assert runs == [0, 1] and coalescer.coalesced == 2
+    assert not coalescer.running and not coalescer.queued
+
+
+def test_request_paths_stay_inside_the_repository(tmp_path):
+    """Test requests can't point storage or output outside the repository"""
+    (tmp_path / "repo").mkdir()
+    base = Config(repo_path=tmp_path / "repo", working_dir=tmp_path / "storage")
+    pool = WorkspacePool(base)
+    assert pool.config_for({"working_dir": str(tmp_path / "storage")}).working_dir == tmp_path / "storage"
+    config = pool.config_for({"output_dir": str(tmp_path / "repo" / "docs"), "workspace": "feature"})
+    assert (config.output_dir, config.workspace) == (tmp_path / "repo" / "docs", "feature")
+    assert pool.config_for({"repo": str(tmp_path / "repo")}).repo_name == "repo"
+    for request in ({"working_dir": str(tmp_path / "elsewhere")},
+                    {"output_dir": str(tmp_path / "repo" / ".." / "out")}):
+        with pytest.raises(RequestError) as error:
+            pool.config_for(request)
+        assert error.value.status == 403
+    with pytest.raises(RequestError):
+        pool.config_for({"workspace": "../escape"})
+
+
+@pytest.mark.asyncio
+async def test_workspaces_with_the_same_name_stay_apart(tmp_path, offline_models):
+    """Test concurrent reindexes of two repositories, each with a "main" workspace"""
+    from lightrag.kg import shared_storage
+
+    for name, modules in (("alpha", ["a1", "a2"]), ("beta", ["b1"])):
+        for module in modules:
+            path = tmp_path / name / f"{module}.py"
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(f'"""Module {module}"""\n' + "x = 1\n" * 20)
+    base = Config(repo_path=tmp_path / "alpha", working_dir=tmp_path / "alpha" / "storage",
+                  output_dir=tmp_path / "alpha" / "wiki", community_summaries=False,
+                  summary_tree=False, node_importance=False)
+    server = WikiServer(base, max_workspaces=1)
+    alpha, beta = await asyncio.gather(server.reindex({}), server.reindex({"repo": str(tmp_path / "beta")}))
+    assert (alpha["indexed"], beta["indexed"]) == (2, 1)
+    assert indexed_files(tmp_path / "alpha" / "storage" / "main") == (["a1.py", "a2.py"], {"processed"})
+    assert indexed_files(tmp_path / "beta" / "repowiki_storage" / "main") == (["b1.py"], {"processed"})
+
+    # Evicted and reopened: a new change is indexed from what is on disk
+    (tmp_path / "beta" / "b2.py").write_text('"""Module b2"""\n' + "y = 2\n" * 20)
+    await server.pool.close()
+    assert not any("main-" in namespace for namespace in shared_storage._shared_dicts)
+    assert (await server.reindex({"repo": str(tmp_path / "beta")}))["indexed"] == 2
+    assert indexed_files(tmp_path / "beta" / "repowiki_storage" / "main") == (["b1.py", "b2.py"], {"processed"})
+    await server.pool.close()
@@ -0,0 +1,47 @@
+"""Tests for the LightRAG session shared by indexing and generation"""
+import pytest
+
+from repowiki.config import Config
+from repowiki.generator import WikiGenerator
+from repowiki.indexer import RepositoryIndexer
+from repowiki.session import WikiSession
+
+
+class FakeRag:
+    def __init__(self):
+        self.finalized = 0
+
+    async def finalize_storages(self):
+        self.finalized += 1
+
+
+@pytest.mark.asyncio
+async def test_index_and_generate_share_one_instance(tmp_path, monkeypatch):
+    """Test storages are initialized once and the generator sees the indexed instance"""
+    opened, used = [], []
+
+    async def initialize_rag(self):
+        self.rag = FakeRag()
+        opened.append(self.rag)
+        return self.rag
+
+    async def index_repository(self):
+        used.append(("index", self.rag))
+        return 3, 0, 0
+
+    async def generate_all(self):
+        used.append(("generate", self.rag))
+
+    monkeypatch.setattr(WikiGenerator, "initialize_rag", initialize_rag)
+    monkeypatch.setattr(WikiGenerator, "load_contexts", lambda self: used.append(("contexts", self.rag)))
+    monkeypatch.setattr(WikiGenerator, "generate_all", generate_all)
+    monkeypatch.setattr(RepositoryIndexer, "index_repository", index_repository)
+
+    config = Config(repo_path=tmp_path, working_dir=tmp_path / "storage", output_dir=tmp_path / "wiki")
+    async with WikiSession(config) as session:
+        assert await session.index() == (3, 0, 0)
+        await session.generate()
+
+    rag, = opened
+    assert used == [("index", rag), ("contexts", rag), ("generate", rag)]
+    assert rag.finalized == 1 and session.rag is None
@@ -0,0 +1,78 @@
+"""Tests for the static site export"""
+import json
+
+from repowiki.site_export import export_site, markdown_to_html, page_href
+
+
+def test_markdown_subset():
+    """Test the constructs generated pages use, with links rewritten to HTML pages"""
+    body, title = markdown_to_html(
+        "# The `Indexer`\n\nSee [overview](../01-overview/README.md#goals) and <b>this</b>.\n\n"
+        "- one\n  - nested **bold**\n- two\n1. first\n\n"
+        "| Name | Type |\n|---|---|\n| `a` | [b](b.md) |\n\n"
+        "```python\nx = '<y>'\n```\n"
+    )
+    assert title == "The Indexer"
+    assert '<h1 id="the-indexer">The <code>Indexer</code></h1>' in body
+    assert '<a href="../01-overview/index.html#goals">overview</a>' in body
+    assert "&lt;b&gt;this&lt;/b&gt;" in body
+    assert "<ul><li>one<ul><li>nested <strong>bold</strong></li></ul></li><li>two</li></ul><ol>" in body
+    assert '<td><code>a</code></td><td><a href="b.html">b</a></td>' in body
+    assert "<pre><code class=\"language-python\">x = '&lt;y&gt;'</code></pre>" in body
+
+
+def test_unsafe_links_and_repeated_headings():
+    """Test only http(s), mailto and relative links survive, and heading ids are unique"""
+    assert page_href("https://example.com/a.md") == "https://example.com/a.md"
+    assert page_href("mailto:dev@example.com") == "mailto:dev@example.com"
+    assert page_href("../api/README.md#top") == "../api/index.html#top"
+    for target in ("javascript:alert(1)", "JavaScript:alert(1)", "\x01javascript:x", "data:text/html,x"):
+        assert page_href(target) == "#"
+    body, _ = markdown_to_html(
+        "## Usage\n\n[x](javascript:alert(1))\n\n## Usage\n\n## Usage\n\n## Usage 1\n"
+        "![i](data:image/svg+xml,x)\n"
+    )
+    assert '<a href="#">x</a>' in body and 'src="#"' in body
+    assert [m for m in ("usage", "usage-1", "usage-2", "usage-1-1") if f'id="{m}"' in body] == [
+        "usage", "usage-1", "usage-2", "usage-1-1"
+    ]
+
+
+def test_incremental_export_and_search_index(tmp_path):
+    """Test only changed pages are re-rendered and the sharded index stays in sync"""
+    wiki, site = tmp_path / "wiki_docs", tmp_path / "site"
+    (wiki / "01-overview").mkdir(parents=True)
+    (wiki / "README.md").write_text("# Home\n\nWelcome to the [overview](01-overview/README.md).",
+                                    encoding="utf-8")
+    (wiki / "01-overview" / "README.md").write_text("# Overview\n\nThe indexer builds a graph.",
+                                                    encoding="utf-8")
+    (wiki / "01-overview" / "storage.md").write_text("# Storage\n\nGraph storage backends.",
+                                                     encoding="utf-8")
+
+    report = export_site(wiki, site, "demo")
+    assert (report.pages, report.rendered) == (3, 3)
+    assert '<a href="01-overview/index.html">' in (site / "index.html").read_text(encoding="utf-8")
+    assert 'href="../style.css"' in (site / "01-overview" / "storage.html").read_text(encoding="utf-8")
+
+    docs = json.loads((site / "search" / "docs.json").read_text())["docs"]
+    shard = json.loads((site / "search" / "gr.json").read_text())
+    pages, doc_id = {}, 0
+    for gap, weight in zip(shard["graph"][::2], shard["graph"][1::2]):
+        doc_id += gap
+        pages[docs[doc_id][1]] = weight
+    assert pages == {"Overview": 1, "Storage": 1}
+    assert json.loads((site / "search" / "st.json").read_text())["storage"] == [1, 7]  # title weight
+
+    (wiki / "01-overview" / "storage.md").unlink()
+    (wiki / "README.md").write_text("# Home\n\nWelcome.", encoding="utf-8")
+    report = export_site(wiki, site, "demo")
+    assert (report.pages, report.rendered, report.removed) == (2, 1, 1)
+    assert not (site / "01-overview" / "storage.html").exists()
+    assert not (site / "search" / "st.json").exists()
+
+    # An edit that keeps page ids only rewrites the shards of changed terms
+    (wiki / "README.md").write_text("# Home\n\nWelcome home.", encoding="utf-8")
+    report = export_site(wiki, site, "demo")
+    assert (report.rendered, report.shards_written, report.shards) == (1, 1, 6)
+    assert export_site(wiki, site, "demo").rendered == 0
+    assert export_site(wiki, site, "demo", force=True).rendered == 2
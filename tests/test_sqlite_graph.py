@@ -0,0 +1,57 @@
+"""Tests for the SQLite graph storage"""
+import pytest
+from pathlib import Path
+
+pytest.importorskip("lightrag")
+
+from lightrag.kg.shared_storage import initialize_share_data
+
+from repowiki.storage import sqlite_graph
+from repowiki.storage.sqlite_graph import SQLiteGraphStorage
+
+
+async def make_storage(tmp_path: Path):
+    initialize_share_data()
+    storage = SQLiteGraphStorage(
+        namespace="chunk_entity_relation",
+        workspace="test",
+        global_config={"working_dir": str(tmp_path)},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return storage
+
+
+@pytest.mark.asyncio
+async def test_graph_roundtrip(tmp_path):
+    """Test nodes and undirected edges persist and deletes cascade"""
+    storage = await make_storage(tmp_path)
+    await storage.upsert_node("A", {"entity_type": "class"})
+    await storage.upsert_edge("B", "A", {"weight": "1.0"})
+    await storage.upsert_edge("A", "C", {"weight": "2.0"})
+    await storage.upsert_node("A", {"description": "first"})
+    await storage.index_done_callback()
+
+    reloaded = await make_storage(tmp_path)
+    assert await reloaded.get_node("A") == {"entity_type": "class", "description": "first"}
+    assert await reloaded.get_edge("A", "B") == {"weight": "1.0"}
+    assert await reloaded.node_degree("A") == 2
+    assert sorted(t for _, t in await reloaded.get_node_edges("A")) == ["B", "C"]
+    assert (await reloaded.get_popular_labels(1)) == ["A"]
+
+    await reloaded.delete_node("A")
+    assert await reloaded.node_degree("B") == 0
+    assert not await reloaded.has_edge("C", "A")
+    assert sorted(await reloaded.get_all_labels()) == ["B", "C"]
+
+
+@pytest.mark.asyncio
+async def test_node_cache_is_bounded(tmp_path, monkeypatch):
+    """Test the hot-node LRU never exceeds its capacity"""
+    monkeypatch.setattr(sqlite_graph, "SQLITE_GRAPH_CACHE_NODES", 3)
+    storage = await make_storage(tmp_path)
+    for i in range(10):
+        await storage.upsert_edge(f"n{i}", f"n{i + 1}", {})
+    for i in range(11):
+        assert await storage.node_degree(f"n{i}") in (1, 2)
+    assert len(storage._cache) == 3
@@ -0,0 +1,91 @@
+"""Tests for the SQLite KV and doc-status storages"""
+import asyncio
+import json
+import pytest
+from pathlib import Path
+
+pytest.importorskip("lightrag")
+
+from lightrag.base import DocStatus
+
+from repowiki.storage import sqlite_base
+from repowiki.storage.sqlite_kv import SQLiteDocStatusStorage, SQLiteKVStorage
+
+
+async def make_storage(cls, tmp_path: Path, namespace: str):
+    storage = cls(
+        namespace=namespace,
+        workspace="test",
+        global_config={"working_dir": str(tmp_path)},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return storage
+
+
+@pytest.mark.asyncio
+async def test_readers_only_see_committed_batches(tmp_path):
+    """Test a second connection sees a batch only after it is committed"""
+    writer = await make_storage(SQLiteKVStorage, tmp_path, "text_chunks")
+    reader = await make_storage(SQLiteKVStorage, tmp_path, "text_chunks")
+
+    await writer.upsert({"chunk-1": {"content": "one"}, "chunk-2": {"content": "two"}})
+    assert await reader.get_by_ids(["chunk-1", "chunk-2"]) == [None, None]
+
+    await writer.index_done_callback()
+    chunk = await reader.get_by_id("chunk-1")
+    assert chunk["content"] == "one"
+    assert chunk["llm_cache_list"] == []
+    assert chunk["_id"] == "chunk-1"
+
+    await writer.delete(["chunk-1"])
+    await writer.index_done_callback()
+    assert await reader.filter_keys({"chunk-1", "chunk-2"}) == {"chunk-1"}
+
+
+@pytest.mark.asyncio
+async def test_write_transactions_are_bounded(tmp_path, monkeypatch):
+    """Test a pending batch is committed after the row or time bound, unblocking other writers"""
+    monkeypatch.setattr(sqlite_base, "SQLITE_BATCH_SECONDS", 0.05)
+    monkeypatch.setattr(sqlite_base, "SQLITE_BUSY_TIMEOUT_MS", 0)
+    writer = await make_storage(SQLiteKVStorage, tmp_path, "text_chunks")
+    other = await make_storage(SQLiteKVStorage, tmp_path, "text_chunks")
+
+    await writer.upsert({"chunk-1": {"content": "one"}})
+    assert writer._conn.in_transaction
+    await asyncio.sleep(0.1)  # e.g. waiting for the LLM
+    assert not writer._conn.in_transaction
+    assert (await other.get_by_id("chunk-1"))["content"] == "one"
+    await other.upsert({"chunk-2": {"content": "two"}})  # no "database is locked"
+    await other.index_done_callback()
+
+    monkeypatch.setattr(sqlite_base, "SQLITE_BATCH_ROWS", 2)
+    await writer.upsert({"chunk-3": {"content": "three"}, "chunk-4": {"content": "four"}})
+    assert not writer._conn.in_transaction
+    assert await other.filter_keys({"chunk-2", "chunk-3", "chunk-4"}) == set()
+
+
+@pytest.mark.asyncio
+async def test_doc_status_queries_and_json_import(tmp_path):
+    """Test doc status is imported from JSON and queried by indexed columns"""
+    workspace = tmp_path / "test"
+    workspace.mkdir()
+    doc = {
+        "content_summary": "x", "content_length": 1, "created_at": "2024-01-01",
+        "updated_at": "2024-01-01", "track_id": "t1",
+    }
+    (workspace / "kv_store_doc_status.json").write_text(json.dumps({
+        "doc-1": {**doc, "status": "processed", "file_path": "a.py"},
+        "doc-2": {**doc, "status": "failed", "file_path": "b.py"},
+    }))
+    storage = await make_storage(SQLiteDocStatusStorage, tmp_path, "doc_status")
+    await storage.upsert({"doc-3": {**doc, "status": DocStatus.PENDING, "file_path": "c.py"}})
+
+    counts = await storage.get_all_status_counts()
+    assert counts["processed"] == counts["failed"] == counts["pending"] == 1
+    assert counts["all"] == 3
+    assert list(await storage.get_docs_by_status(DocStatus.FAILED)) == ["doc-2"]
+    assert (await storage.get_doc_by_file_path("c.py"))["chunks_list"] == []
+    page, total = await storage.get_docs_paginated(sort_field="file_path", sort_direction="asc")
+    assert total == 3
+    assert [doc_id for doc_id, _ in page] == ["doc-1", "doc-2", "doc-3"]
@@ -0,0 +1,80 @@
+"""Import-time regression tests for the command-line interface"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from repowiki import config as config_module
+from repowiki.config import Config
+
+# Budget for the imports `repowiki --help` performs after interpreter startup
+HELP_IMPORT_BUDGET_US = 200_000
+
+HEAVY_MODULES = ("lightrag", "llama_index", "litellm", "numpy", "networkx", "openai")
+
+
+def import_times(*args):
+    """(module, cumulative microseconds) of each top-level import after startup"""
+    result = subprocess.run(
+        # What the `repowiki` console script runs
+        [sys.executable, "-X", "importtime", "-c", "from repowiki.cli import main; main()", *args],
+        capture_output=True, text=True, timeout=60,
+        cwd=Path(__file__).parent.parent / "src",
+    )
+    imports, started = [], False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if started and not name.startswith("  "):  # nested imports are in their parent's time
+            imports.append((name.strip(), int(cumulative)))
+        # Everything before `site` is interpreter and environment startup
+        started = started or name == " site"
+    return result, imports
+
+
+def test_help_is_fast_and_light():
+    """Test `--help` stays under its import budget without loading LightRAG or models"""
+    result, imports = import_times("--help")
+    assert result.returncode == 0 and "watch" in result.stdout
+    loaded = [name for name, _ in imports]
+    assert "repowiki.cli" in loaded
+    heavy = [name for name in loaded if name.split(".")[0] in HEAVY_MODULES]
+    assert not heavy, f"--help imported {heavy}"
+    total = sum(cumulative for _, cumulative in imports)
+    assert total < HELP_IMPORT_BUDGET_US, f"--help imports took {total / 1000:.0f} ms"
+
+
+def test_argument_errors_stay_light():
+    """Test a bad command line fails before anything heavy is imported"""
+    result, imports = import_times("generate", "--workers", "many")
+    assert result.returncode == 2 and "invalid int value" in result.stderr
+    assert not [name for name, _ in imports if name.split(".")[0] in HEAVY_MODULES]
+
+
+def test_git_lookup_is_cached(tmp_path, monkeypatch):
+    """Test the repository name is detected once per path"""
+    calls = []
+    real_run = subprocess.run
+
+    def counting_run(*args, **kwargs):
+        calls.append(args[0])
+        return real_run(*args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "run", counting_run)
+    config_module.detect_repo_name.cache_clear()
+    for _ in range(3):
+        config = Config(repo_path=tmp_path, working_dir=tmp_path / "s", output_dir=tmp_path / "w")
+        config.validate()
+    assert config.repo_name == tmp_path.name
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("name", ["RepositoryIndexer", "WikiGenerator"])
+def test_package_exports_load_lazily(name):
+    """Test the heavy exports are still available from the package"""
+    pytest.importorskip("lightrag")
+    import repowiki
+
+    assert getattr(repowiki, name).__name__ == name
@@ -0,0 +1,48 @@
+"""Tests for streamed page output"""
+import asyncio
+import time
+import pytest
+
+from repowiki.streaming import write_page
+
+
+async def chunks(words, fail=False):
+    for word in words:
+        await asyncio.sleep(0.01)
+        yield word
+    if fail:
+        raise RuntimeError("connection dropped")
+
+
+@pytest.mark.asyncio
+async def test_streamed_page_is_renamed_into_place(tmp_path):
+    """Test the page appears whole at its path with first-token and speed stats"""
+    path = tmp_path / "01-overview" / "architecture.md"
+    started = time.perf_counter()
+    content, stats = await write_page(path, "Architecture", chunks(["The ", "", "indexer."]), started)
+
+    assert content == "The indexer."
+    assert path.read_text(encoding="utf-8") == "# Architecture\n\nThe indexer."
+    assert list(path.parent.iterdir()) == [path]
+    assert 0 < stats.ttft < stats.seconds
+    assert stats.tokens == 2 and stats.tokens_per_second > 0
+
+    content, stats = await write_page(path, "Architecture", "Plain text", time.perf_counter())
+    assert path.read_text(encoding="utf-8").endswith("Plain text") and stats.tokens == 1
+
+
+@pytest.mark.asyncio
+async def test_interrupted_stream_keeps_partial_page(tmp_path):
+    """Test a failed stream leaves the partial page and the previous page untouched"""
+    path = tmp_path / "architecture.md"
+    path.write_text("# Architecture\n\nOld", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        await write_page(path, "Architecture", chunks(["New ", "text"], fail=True),
+                         time.perf_counter())
+
+    assert path.read_text(encoding="utf-8").endswith("Old")
+    partial = tmp_path / "architecture.md.partial"
+    assert partial.read_text(encoding="utf-8") == "# Architecture\n\nNew text"
+
+    content, _ = await write_page(path, "Architecture", chunks(["  "]), time.perf_counter())
+    assert content == "" and not partial.exists()
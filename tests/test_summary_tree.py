@@ -0,0 +1,122 @@
+"""Tests for the per-directory summary tree"""
+import pytest
+from types import SimpleNamespace
+
+from repowiki import summary_tree
+from repowiki.config import Config
+from repowiki.summary_tree import SummaryTreeBuilder, load_tree, tree_context, tree_items
+
+
+def make_builder(tmp_path, prompts):
+    async def fake_llm(prompt, **kwargs):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    config = Config(repo_path=tmp_path, working_dir=tmp_path, repo_name="demo")
+    return SummaryTreeBuilder(SimpleNamespace(), config, llm_func=fake_llm)
+
+
+FILES = {
+    "README.md": "# Demo",
+    "pkg/a.py": "import b",
+    "pkg/b.py": "def b(): pass",
+    "pkg/sub/c.py": "class C: pass",
+}
+
+
+@pytest.mark.asyncio
+async def test_one_file_change_resummarizes_its_ancestors(tmp_path):
+    """Test only the changed file and its ancestor directories are summarized again"""
+    prompts = []
+    report = await make_builder(tmp_path, prompts).build(FILES)
+    assert (report.files, report.directories, report.summarized) == (4, 3, 7)
+
+    tree = load_tree(tmp_path / "main")
+    assert tree["."].children == ["README.md", "pkg"]
+    assert tree["pkg"].children == ["pkg/a.py", "pkg/b.py", "pkg/sub"]
+
+    prompts.clear()
+    report = await make_builder(tmp_path, prompts).build(FILES)
+    assert (report.summarized, report.reused, prompts) == (0, 7, [])
+
+    changed = {**FILES, "pkg/sub/c.py": "class C:\n    x = 1"}
+    report = await make_builder(tmp_path, prompts).build(changed)
+    assert (report.summarized, report.reused) == (4, 3)  # c.py, pkg/sub, pkg, root
+    assert "class C:\n    x = 1" in prompts[0]
+
+    context = tree_context(load_tree(tmp_path / "main"), max_depth=1)
+    assert "Repository root" in context and "pkg/" in context
+    assert "pkg/sub/" not in context
+
+
+@pytest.mark.asyncio
+async def test_large_directories_are_reduced_in_rounds(tmp_path, monkeypatch):
+    """Test directories with many children are summarized in batches"""
+    monkeypatch.setattr(summary_tree, "MAX_CHILDREN_PER_PROMPT", 2)
+    prompts = []
+    files = {f"mod{i}.py": f"x = {i}" for i in range(5)}
+    await make_builder(tmp_path, prompts).build(files)
+    # 5 files; the root's 5 children reduce to 3 partials, then 2, then 1
+    assert len(prompts) == 5 + 3 + 2 + 1
+    assert "(part 2)" in prompts[-1] and "(part 3)" not in prompts[-1]
+
+
+@pytest.mark.asyncio
+async def test_wide_directories_absorb_small_edits(tmp_path):
+    """Test one edit in a wide directory keeps the directory summary and its fingerprint items"""
+    prompts = []
+    files = {f"mods/m{i}.py": f"x = {i}" for i in range(8)}
+    await make_builder(tmp_path, prompts).build(files)
+    items = tree_items(load_tree(tmp_path / "main"))
+
+    # prompts isn't cleared: the fake summaries stay distinct across builds
+    report = await make_builder(tmp_path, prompts).build({**files, "mods/m0.py": "x = 100"})
+    assert (report.summarized, report.reused) == (1, 9)  # m0.py only
+    assert tree_items(load_tree(tmp_path / "main")) == items
+
+    # A third of the children changed since the summary was written
+    edited = {**files, **{f"mods/m{i}.py": f"x = -{i}" for i in range(3)}}
+    report = await make_builder(tmp_path, prompts).build(edited)
+    assert report.summarized == 3 + 1 + 1  # m0-m2, mods, root
+    assert tree_items(load_tree(tmp_path / "main")) != items
+
+
+@pytest.mark.asyncio
+async def test_incremental_build_only_reads_changed_files(tmp_path):
+    """Test an incremental build keeps cached files and drops removed paths"""
+    prompts = []
+    await make_builder(tmp_path, prompts).build(FILES)
+
+    prompts.clear()
+    report = await make_builder(tmp_path, prompts).build(
+        {"pkg/b.py": "def b(): return 1"}, removed=["pkg/sub"], incremental=True
+    )
+    tree = load_tree(tmp_path / "main")
+    assert sorted(p for p, n in tree.items() if n.kind == "file") == ["README.md", "pkg/a.py", "pkg/b.py"]
+    assert tree["pkg"].children == ["pkg/a.py", "pkg/b.py"]
+    assert report.summarized == 3  # b.py, pkg (new children), root
+    assert "def b(): return 1" in prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_failed_summaries_are_saved_empty_and_retried(tmp_path):
+    """Test a failing file summary keeps the rest of the tree and is retried next build"""
+    prompts = []
+    builder = make_builder(tmp_path, prompts)
+    summarize = builder.llm_func
+
+    async def flaky_llm(prompt, **kwargs):
+        if "File: pkg/b.py" in prompt:
+            raise RuntimeError("rate limited")
+        return await summarize(prompt)
+
+    builder.llm_func = flaky_llm
+    report = await builder.build(FILES)
+    assert (report.summarized, report.failed) == (6, 1)
+    tree = load_tree(tmp_path / "main")
+    assert tree["pkg/b.py"].summary == "" and tree["pkg/a.py"].summary
+    assert tree["pkg"].summary and "pkg/b.py" not in prompts[-2]  # pkg, then the root
+
+    report = await make_builder(tmp_path, prompts).build(FILES)
+    assert (report.summarized, report.failed) == (3, 0)  # b.py, pkg, root
+    assert load_tree(tmp_path / "main")["pkg/b.py"].summary
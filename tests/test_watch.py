@@ -0,0 +1,90 @@
+"""Tests for watch mode"""
+import asyncio
+
+import pytest
+
+from repowiki.config import Config
+from repowiki.indexer import RepositoryIndexer
+from repowiki.watch import Debouncer, InotifyWatcher, PollingWatcher
+
+
+async def changes_after(debouncer, action):
+    batch = asyncio.ensure_future(debouncer.next_batch())
+    await asyncio.sleep(0.05)
+    action()
+    return await asyncio.wait_for(batch, 5)
+
+
+@pytest.mark.asyncio
+async def test_debouncer_batches_a_burst_of_changes(tmp_path):
+    """Test changes arriving close together are handed out as one batch"""
+    debouncer = Debouncer(quiet=0.05, max_delay=1.0)
+
+    async def burst():
+        for name in ("a.py", "b.py", "a.py"):
+            debouncer.add(tmp_path / name)
+            await asyncio.sleep(0.01)
+
+    started = asyncio.get_running_loop().time()
+    writer = asyncio.ensure_future(burst())
+    assert await debouncer.next_batch() == {tmp_path / "a.py", tmp_path / "b.py"}
+    assert asyncio.get_running_loop().time() - started >= 0.05
+    await writer
+    assert not debouncer.pending
+
+
+@pytest.mark.asyncio
+async def test_polling_watcher_sees_edits_and_deletes(tmp_path):
+    """Test the polling fallback reports new, modified and deleted files"""
+    (tmp_path / "kept.py").write_text("x = 1\n")
+    (tmp_path / "gone.py").write_text("y = 2\n")
+    (tmp_path / ".git").mkdir()
+    debouncer = Debouncer(quiet=0.05)
+    watcher = PollingWatcher(tmp_path, debouncer.add, lambda path: path.name == ".git", interval=0.05)
+    watcher.start()
+
+    def edit():
+        (tmp_path / "kept.py").write_text("x = 10\n")
+        (tmp_path / "gone.py").unlink()
+        (tmp_path / "new.md").write_text("# New\n")
+        (tmp_path / ".git" / "index").write_text("ignored")
+
+    try:
+        batch = await changes_after(debouncer, edit)
+    finally:
+        watcher.close()
+    assert batch == {tmp_path / "kept.py", tmp_path / "gone.py", tmp_path / "new.md"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify is Linux only")
+async def test_inotify_watcher_follows_new_directories(tmp_path):
+    """Test files in a directory created after the watch started are reported"""
+    debouncer = Debouncer(quiet=0.1)
+    watcher = InotifyWatcher(tmp_path, debouncer.add)
+    try:
+        watcher.start()
+    except OSError as e:
+        pytest.skip(f"inotify unavailable: {e}")
+
+    def add_package():
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "mod.py").write_text("def f(): pass\n")
+
+    try:
+        batch = await changes_after(debouncer, add_package)
+    finally:
+        watcher.close()
+    assert tmp_path / "pkg" / "mod.py" in batch
+
+
+def test_generated_output_is_not_indexable(tmp_path):
+    """Test the wiki and storage directories never feed back into the index"""
+    config = Config(repo_path=tmp_path, working_dir=tmp_path / "storage", output_dir=tmp_path / "wiki_docs")
+    indexer = RepositoryIndexer(config)
+    assert indexer.is_indexable(tmp_path / "src" / "main.py")
+    assert indexer.is_indexable(tmp_path / "README.md")
+    assert not indexer.is_indexable(tmp_path / "wiki_docs" / "overview.md")
+    assert not indexer.is_indexable(tmp_path / "storage" / "notes.txt")
+    assert not indexer.is_indexable(tmp_path / ".venv" / "lib.py")
+    assert not indexer.is_indexable(tmp_path / "image.png")